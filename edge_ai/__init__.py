@@ -3,7 +3,9 @@
 """
 
 from edge_ai.inference import GaitAnalysisModel
+from edge_ai.model_registry import ModelRegistry
+from edge_ai.recommendations import RecommendationEngine, RECOMMENDATION_RULES
 
-__all__ = ['GaitAnalysisModel']
+__all__ = ['GaitAnalysisModel', 'ModelRegistry', 'RecommendationEngine', 'RECOMMENDATION_RULES']
 
 __version__ = '1.0.0'
\ No newline at end of file
@@ -1,13 +1,134 @@
 """
 边缘AI推理模块
 
-负责加载TensorFlow Lite模型并执行推理
+负责加载TensorFlow Lite模型并执行推理。
+TFLite运行时在第一次加载模型时才导入，导入本模块本身不会加载TensorFlow
 """
 import os
 import numpy as np
-import tensorflow as tf
 import time
 
+from edge_ai.recommendations import RecommendationEngine
+
+# 无状态建议生成使用的默认引擎
+_default_engine = RecommendationEngine()
+
+def get_interpreter_class():
+    """
+    获取TFLite解释器类
+    
+    优先使用轻量的tflite_runtime，未安装时回退到TensorFlow
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+# 模型输入特征向量的长度
+FEATURE_VECTOR_SIZE = 37
+
+# 足压分布的区域（analyze_pressure返回的pressure_distribution的键）
+PRESSURE_REGIONS = ('forefoot', 'midfoot', 'hindfoot', 'lateral')
+
+def build_feature_vector(features):
+    """
+    将特征字典转换为模型输入的特征向量
+    
+    Args:
+        features: 特征字典，由特征提取器生成
+    
+    Returns:
+        形状为(FEATURE_VECTOR_SIZE,)的float32数组
+    """
+    feature_vector = []
+    
+    # 添加加速度特征
+    feature_vector.extend(features['acc_mean'])
+    feature_vector.extend(features['acc_std'])
+    feature_vector.extend(features['acc_rms'])
+    
+    # 添加角速度特征
+    feature_vector.extend(features['gyro_mean'])
+    feature_vector.extend(features['gyro_std'])
+    feature_vector.extend(features['gyro_rms'])
+    
+    # 添加合加速度和合角速度特征
+    feature_vector.extend([
+        features['acc_mag_mean'],
+        features['acc_mag_std'],
+        features['gyro_mag_mean'],
+        features['gyro_mag_std']
+    ])
+    
+    # 添加频域特征
+    feature_vector.extend([
+        features['acc_dominant_freq_x'],
+        features['acc_dominant_freq_y'],
+        features['acc_dominant_freq_z'],
+        features['gyro_dominant_freq_x'],
+        features['gyro_dominant_freq_y'],
+        features['gyro_dominant_freq_z']
+    ])
+    
+    # 添加步态特征
+    feature_vector.extend([
+        features['cadence'],
+        features['vertical_oscillation'],
+        features['impact_force']
+    ])
+    
+    # 添加相关性特征
+    feature_vector.extend([
+        features['acc_correlation_xy'],
+        features['acc_correlation_xz'],
+        features['acc_correlation_yz'],
+        features['acc_gyro_correlation_x'],
+        features['acc_gyro_correlation_y'],
+        features['acc_gyro_correlation_z']
+    ])
+    
+    return np.array(feature_vector, dtype=np.float32)
+
+def quantize_tensor(data, detail):
+    """
+    按张量的量化参数将浮点数据转换为张量类型（float模型原样返回）
+    
+    Args:
+        data: 浮点数据
+        detail: 解释器的输入张量详情
+    
+    Returns:
+        可直接set_tensor的数组
+    """
+    dtype = np.dtype(detail['dtype'])
+    if dtype.kind not in 'iu':
+        return np.asarray(data, dtype=dtype)
+    scale, zero_point = detail['quantization']
+    if scale == 0:
+        scale = 1.0
+    info = np.iinfo(dtype)
+    return np.clip(np.round(np.asarray(data, dtype=np.float32) / scale + zero_point), info.min, info.max).astype(dtype)
+
+def dequantize_tensor(data, detail):
+    """
+    按张量的量化参数将输出转换为浮点数据（float模型原样返回）
+    
+    Args:
+        data: 解释器输出的数组
+        detail: 解释器的输出张量详情
+    
+    Returns:
+        float32数组
+    """
+    if np.dtype(detail['dtype']).kind not in 'iu':
+        return data
+    scale, zero_point = detail['quantization']
+    if scale == 0:
+        return data.astype(np.float32)
+    return (data.astype(np.float32) - zero_point) * scale
+
 class GaitAnalysisModel:
     """
     步态分析模型类
@@ -33,6 +154,10 @@ class GaitAnalysisModel:
         self.output_details = None
         self.is_initialized = False
         
+        # 批量推理使用的解释器（按需创建）
+        self.batch_interpreter = None
+        self.batch_size = None
+        
         # 加载模型
         self._load_model()
     
@@ -42,7 +167,7 @@ class GaitAnalysisModel:
         """
         try:
             # 加载模型
-            self.interpreter = tf.lite.Interpreter(model_path=self.model_path)
+            self.interpreter = get_interpreter_class()(model_path=self.model_path)
             self.interpreter.allocate_tensors()
             
             # 获取输入和输出详情
@@ -60,6 +185,29 @@ class GaitAnalysisModel:
             print(f"模型加载失败: {e}")
             self.is_initialized = False
     
+    def warmup(self, num_runs=10):
+        """
+        使用合成输入预热模型，避免首次推理时的延迟尖峰
+        
+        Args:
+            num_runs: 预热推理次数
+        
+        Returns:
+            预热推理的平均耗时(毫秒)，模型未初始化时返回None
+        """
+        if not self.is_initialized:
+            return None
+        
+        input_detail = self.input_details[0]
+        dummy_input = np.zeros(input_detail['shape'], dtype=input_detail['dtype'])
+        
+        start_time = time.time()
+        for _ in range(num_runs):
+            self.interpreter.set_tensor(input_detail['index'], dummy_input)
+            self.interpreter.invoke()
+        
+        return (time.time() - start_time) * 1000 / max(num_runs, 1)
+    
     def preprocess_features(self, features):
         """
         预处理特征数据，将特征字典转换为模型输入格式
@@ -78,55 +226,7 @@ class GaitAnalysisModel:
         input_shape = self.input_details[0]['shape']
         
         # 创建特征向量
-        feature_vector = []
-        
-        # 添加加速度特征
-        feature_vector.extend(features['acc_mean'])
-        feature_vector.extend(features['acc_std'])
-        feature_vector.extend(features['acc_rms'])
-        
-        # 添加角速度特征
-        feature_vector.extend(features['gyro_mean'])
-        feature_vector.extend(features['gyro_std'])
-        feature_vector.extend(features['gyro_rms'])
-        
-        # 添加合加速度和合角速度特征
-        feature_vector.extend([
-            features['acc_mag_mean'],
-            features['acc_mag_std'],
-            features['gyro_mag_mean'],
-            features['gyro_mag_std']
-        ])
-        
-        # 添加频域特征
-        feature_vector.extend([
-            features['acc_dominant_freq_x'],
-            features['acc_dominant_freq_y'],
-            features['acc_dominant_freq_z'],
-            features['gyro_dominant_freq_x'],
-            features['gyro_dominant_freq_y'],
-            features['gyro_dominant_freq_z']
-        ])
-        
-        # 添加步态特征
-        feature_vector.extend([
-            features['cadence'],
-            features['vertical_oscillation'],
-            features['impact_force']
-        ])
-        
-        # 添加相关性特征
-        feature_vector.extend([
-            features['acc_correlation_xy'],
-            features['acc_correlation_xz'],
-            features['acc_correlation_yz'],
-            features['acc_gyro_correlation_x'],
-            features['acc_gyro_correlation_y'],
-            features['acc_gyro_correlation_z']
-        ])
-        
-        # 转换为numpy数组
-        feature_vector = np.array(feature_vector, dtype=np.float32)
+        feature_vector = build_feature_vector(features)
         
         # 根据模型输入形状调整
         if len(input_shape) == 2:
@@ -140,7 +240,8 @@ class GaitAnalysisModel:
         # 注意：在实际应用中，应该使用与训练时相同的缩放方法
         # feature_vector = feature_vector / np.max(np.abs(feature_vector))
         
-        return feature_vector
+        # int8量化模型按输入张量的量化参数转换
+        return quantize_tensor(feature_vector, self.input_details[0])
     
     def infer(self, features):
         """
@@ -178,53 +279,107 @@ class GaitAnalysisModel:
             end_time = time.time()
             inference_time = (end_time - start_time) * 1000  # 毫秒
             
-            # 获取输出张量
-            # 假设输出有两个：步态相位和姿态评分
-            if len(self.output_details) >= 2:
-                gait_phase = self.interpreter.get_tensor(self.output_details[0]['index'])
-                posture_score = self.interpreter.get_tensor(self.output_details[1]['index'])
-                
-                # 后处理结果
-                gait_phase = gait_phase.flatten()
-                posture_score = float(posture_score.flatten()[0])
-                
-                # 将步态相位概率转换为标签
-                phase_labels = ['stance', 'swing']
-                phase_idx = np.argmax(gait_phase)
-                phase_label = phase_labels[phase_idx]
-                phase_confidence = float(gait_phase[phase_idx])
-                
-                # 确保姿态评分在0-100范围内
-                posture_score = max(0, min(100, posture_score * 100))
-            else:
-                # 如果模型只有一个输出，假设是姿态评分
-                output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-                
-                # 后处理结果
-                output_data = output_data.flatten()
-                posture_score = float(output_data[0]) * 100  # 缩放到0-100
-                phase_label = None
-                phase_confidence = None
-            
-            # 返回结果
-            result = {
-                'posture_score': posture_score,
-                'gait_phase': phase_label,
-                'phase_confidence': phase_confidence,
-                'inference_time_ms': inference_time,
-                'features': {
-                    'cadence': features['cadence'],
-                    'vertical_oscillation': features['vertical_oscillation'],
-                    'impact_force': features['impact_force']
-                }
-            }
-            
-            return result
+            # 获取输出张量并后处理
+            outputs = [dequantize_tensor(self.interpreter.get_tensor(detail['index']), detail)
+                       for detail in self.output_details]
+            return self._postprocess(outputs, 0, features, inference_time)
         
         except Exception as e:
             print(f"推理执行失败: {e}")
             return None
     
+    def _postprocess(self, outputs, row, features, inference_time):
+        """
+        将输出张量中的一行转换为推理结果字典
+        
+        Args:
+            outputs: 输出张量列表
+            row: 批中的行号
+            features: 该行对应的特征字典
+            inference_time: 推理耗时(毫秒)
+        
+        Returns:
+            推理结果字典
+        """
+        # 假设输出有两个：步态相位和姿态评分
+        if len(outputs) >= 2:
+            gait_phase = outputs[0][row].flatten()
+            posture_score = float(outputs[1][row].flatten()[0])
+            
+            # 将步态相位概率转换为标签
+            phase_labels = ['stance', 'swing']
+            phase_idx = np.argmax(gait_phase)
+            phase_label = phase_labels[phase_idx]
+            phase_confidence = float(gait_phase[phase_idx])
+            
+            # 确保姿态评分在0-100范围内
+            posture_score = max(0, min(100, posture_score * 100))
+        else:
+            # 如果模型只有一个输出，假设是姿态评分
+            output_data = outputs[0][row].flatten()
+            posture_score = float(output_data[0]) * 100  # 缩放到0-100
+            phase_label = None
+            phase_confidence = None
+        
+        return {
+            'posture_score': posture_score,
+            'gait_phase': phase_label,
+            'phase_confidence': phase_confidence,
+            'inference_time_ms': inference_time,
+            'features': {
+                'cadence': features['cadence'],
+                'vertical_oscillation': features['vertical_oscillation'],
+                'impact_force': features['impact_force']
+            }
+        }
+    
+    def _get_batch_interpreter(self, batch_size):
+        """
+        获取输入批大小为batch_size的解释器
+        
+        批量推理使用单独的解释器，不改变实时推理使用的解释器的输入形状
+        """
+        if self.batch_interpreter is None or self.batch_size != batch_size:
+            interpreter = get_interpreter_class()(model_path=self.model_path)
+            input_shape = list(self.input_details[0]['shape'])
+            input_shape[0] = batch_size
+            interpreter.resize_tensor_input(interpreter.get_input_details()[0]['index'], input_shape)
+            interpreter.allocate_tensors()
+            self.batch_interpreter = interpreter
+            self.batch_size = batch_size
+        return self.batch_interpreter
+    
+    def infer_batch(self, features_list):
+        """
+        批量执行步态分析推理（一次invoke处理所有窗口）
+        
+        Args:
+            features_list: 特征字典列表
+        
+        Returns:
+            推理结果字典列表，inference_time_ms为每个窗口分摊的耗时
+        """
+        if not self.is_initialized:
+            print("模型未初始化，无法执行推理")
+            return None
+        if len(features_list) == 0:
+            return []
+        
+        input_data = np.concatenate([self.preprocess_features(features) for features in features_list])
+        interpreter = self._get_batch_interpreter(len(features_list))
+        
+        interpreter.set_tensor(interpreter.get_input_details()[0]['index'], input_data)
+        start_time = time.time()
+        interpreter.invoke()
+        inference_time = (time.time() - start_time) * 1000 / len(features_list)
+        
+        outputs = [dequantize_tensor(interpreter.get_tensor(detail['index']), detail)
+                   for detail in interpreter.get_output_details()]
+        return [
+            self._postprocess(outputs, row, features, inference_time)
+            for row, features in enumerate(features_list)
+        ]
+    
     def analyze_pressure(self, pressure_features):
         """
         分析足压数据
@@ -259,11 +414,10 @@ class GaitAnalysisModel:
         result = {
             'foot_strike_type': foot_strike_type,
             'pronation_type': pronation_type,
+            'forefoot_hindfoot_ratio': float(forefoot_hindfoot_ratio),
+            'medial_lateral_ratio': float(medial_lateral_ratio),
             'pressure_distribution': {
-                'forefoot': pressure_features['forefoot_percentage'] * 100,
-                'midfoot': pressure_features['midfoot_percentage'] * 100,
-                'hindfoot': pressure_features['hindfoot_percentage'] * 100,
-                'lateral': pressure_features['lateral_percentage'] * 100
+                region: pressure_features[f'{region}_percentage'] * 100 for region in PRESSURE_REGIONS
             }
         }
         
@@ -280,69 +434,5 @@ class GaitAnalysisModel:
         Returns:
             改进建议列表
         """
-        recommendations = []
-        
-        # 步频建议
-        cadence = gait_result['features']['cadence']
-        if cadence < 160:
-            recommendations.append({
-                'type': 'cadence',
-                'title': '增加步频',
-                'description': '您的步频较低，可以尝试增加步频至170-180步/分钟以提高跑步效率。'
-            })
-        elif cadence > 200:
-            recommendations.append({
-                'type': 'cadence',
-                'title': '适当降低步频',
-                'description': '您的步频较高，可以尝试稍微减小步频并增加步幅，以找到更舒适的节奏。'
-            })
-        
-        # 垂直振幅建议
-        oscillation = gait_result['features']['vertical_oscillation']
-        if oscillation > 10.0:  # 大于10厘米
-            recommendations.append({
-                'type': 'oscillation',
-                'title': '减小垂直振幅',
-                'description': '您的垂直振幅较大，容易消耗额外能量。尝试减少上下起伏，保持重心稳定向前推进。'
-            })
-        
-        # 冲击力建议
-        impact = gait_result['features']['impact_force']
-        if impact > 3.5:  # 大于3.5g
-            recommendations.append({
-                'type': 'impact',
-                'title': '减少着地冲击',
-                'description': '您的着地冲击力较大，可能增加受伤风险。尝试改进着地方式，增强核心稳定性。'
-            })
-        
-        # 足部着地方式建议
-        foot_strike = pressure_result['foot_strike_type']
-        if foot_strike == 'rearfoot':
-            recommendations.append({
-                'type': 'foot_strike',
-                'title': '优化足部着地方式',
-                'description': '您主要使用后脚跟着地，可能会增加膝关节压力。尝试渐进式地调整为中脚掌着地。'
-            })
-        elif foot_strike == 'forefoot':
-            recommendations.append({
-                'type': 'foot_strike',
-                'title': '平衡足部着地方式',
-                'description': '您主要使用前脚掌着地，这对小腿肌肉要求较高。在长距离跑步中可能导致过度疲劳，适当调整为中脚掌着地。'
-            })
-        
-        # 足部内外翻建议
-        pronation = pressure_result['pronation_type']
-        if pronation == 'overpronation':
-            recommendations.append({
-                'type': 'pronation',
-                'title': '控制过度内翻',
-                'description': '您的足部存在过度内翻现象，考虑使用支撑型跑鞋或足部稳定训练来改善。'
-            })
-        elif pronation == 'supination':
-            recommendations.append({
-                'type': 'pronation',
-                'title': '改善足部外翻',
-                'description': '您的足部倾向于外翻，考虑使用缓震型跑鞋和提高足部灵活性的练习。'
-            })
-        
-        return recommendations
\ No newline at end of file
+        # 规则表在recommendations模块中定义，这里无状态地评估单个结果
+        return _default_engine.recommend(gait_result, pressure_result)
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+模型注册表模块
+
+管理步态分析模型的版本，支持后台加载、预热、原子切换和回滚，
+使模型更新无需重启数据处理流程
+"""
+import hashlib
+import os
+import threading
+import time
+
+from edge_ai.inference import GaitAnalysisModel
+
+# 模型文件目录
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+def _file_sha256(path):
+    """
+    计算文件的SHA256摘要
+    
+    Args:
+        path: 文件路径
+    
+    Returns:
+        十六进制摘要字符串，文件不存在时返回None
+    """
+    if not os.path.exists(path):
+        return None
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """
+    模型注册表类
+    
+    持有当前活动模型和上一个版本。新模型在后台线程中加载并预热，
+    完成后在两个数据窗口之间原子地替换活动模型；上一个版本保留用于回滚。
+    """
+    
+    def __init__(self, model=None, warmup_runs=10):
+        """
+        初始化模型注册表
+        
+        Args:
+            model: 初始的GaitAnalysisModel实例，如果为None，则加载默认模型
+            warmup_runs: 切换前的预热推理次数
+        """
+        self.warmup_runs = warmup_runs
+        self.lock = threading.Lock()
+        self._version_counter = 0
+        
+        # 当前活动版本和上一个版本
+        self._active = None
+        self._previous = None
+        
+        # 后台加载状态
+        self._loading_thread = None
+        self._pending = None
+        
+        if model is None:
+            model = GaitAnalysisModel()
+        self._active = self._create_entry(model)
+    
+    def _create_entry(self, model, warmup_ms=None):
+        """
+        创建模型版本记录
+        
+        Args:
+            model: GaitAnalysisModel实例
+            warmup_ms: 预热平均耗时(毫秒)
+        
+        Returns:
+            模型版本字典
+        """
+        self._version_counter += 1
+        sha256 = _file_sha256(model.model_path)
+        
+        return {
+            'version': self._version_counter,
+            'name': os.path.basename(model.model_path),
+            'model_path': model.model_path,
+            'sha256': sha256,
+            'is_initialized': model.is_initialized,
+            'loaded_at': time.time() * 1000,
+            'warmup_ms': warmup_ms,
+            'model': model
+        }
+    
+    @staticmethod
+    def _describe(entry):
+        """返回不含模型对象的版本信息，便于序列化"""
+        if entry is None:
+            return None
+        return {key: value for key, value in entry.items() if key != 'model'}
+    
+    def get_active_model(self):
+        """
+        获取当前活动模型
+        
+        调用方应在每个数据窗口开始时获取一次模型引用，
+        这样窗口处理过程中发生的切换不会影响当前窗口。
+        
+        Returns:
+            GaitAnalysisModel实例
+        """
+        return self._active['model']
+    
+    def get_active_version(self):
+        """
+        获取当前活动模型的版本号
+        
+        Returns:
+            版本号整数
+        """
+        return self._active['version']
+    
+    def get_active(self):
+        """
+        获取当前活动模型及其版本号
+        
+        模型和版本号来自同一次对活动版本记录的读取，
+        不会因两次读取之间发生切换而出现模型与版本号不对应
+        
+        Returns:
+            (GaitAnalysisModel实例, 版本号整数)
+        """
+        entry = self._active
+        return entry['model'], entry['version']
+    
+    def is_loading(self):
+        """判断是否有模型正在后台加载"""
+        return self._loading_thread is not None and self._loading_thread.is_alive()
+    
+    def load_model_async(self, model_path):
+        """
+        在后台线程中加载、预热新模型，成功后切换为活动模型
+        
+        Args:
+            model_path: TensorFlow Lite模型路径
+        
+        Returns:
+            是否成功启动加载（已有加载任务进行中时返回False）
+        """
+        with self.lock:
+            if self.is_loading():
+                return False
+            
+            self._pending = {
+                'model_path': model_path,
+                'status': 'loading',
+                'error': None,
+                'started_at': time.time() * 1000
+            }
+            self._loading_thread = threading.Thread(
+                target=self._load_and_swap, args=(model_path,)
+            )
+            self._loading_thread.daemon = True
+            self._loading_thread.start()
+        
+        return True
+    
+    def _load_and_swap(self, model_path):
+        """
+        后台加载线程主函数
+        
+        Args:
+            model_path: TensorFlow Lite模型路径
+        """
+        pending = self._pending
+        
+        try:
+            model = GaitAnalysisModel(model_path)
+            if not model.is_initialized:
+                pending['status'] = 'failed'
+                pending['error'] = '模型加载失败'
+                return
+            
+            # 使用合成输入预热，避免切换后首个窗口出现延迟尖峰
+            pending['status'] = 'warming'
+            warmup_ms = model.warmup(self.warmup_runs)
+            entry = self._create_entry(model, warmup_ms)
+            
+            with self.lock:
+                self._previous = self._active
+                self._active = entry
+            
+            pending['status'] = 'ready'
+            print(f"模型已切换: {entry['name']} (版本 {entry['version']})")
+        
+        except Exception as e:
+            pending['status'] = 'failed'
+            pending['error'] = str(e)
+            print(f"模型后台加载失败: {e}")
+    
+    def rollback(self):
+        """
+        回滚到上一个模型版本
+        
+        Returns:
+            是否成功回滚（没有可回滚的版本时返回False）
+        """
+        with self.lock:
+            if self._previous is None:
+                return False
+            
+            self._active, self._previous = self._previous, self._active
+        
+        print(f"模型已回滚: {self._active['name']} (版本 {self._active['version']})")
+        return True
+    
+    def get_status(self):
+        """
+        获取注册表状态
+        
+        Returns:
+            包含活动版本、上一个版本和后台加载状态的字典
+        """
+        with self.lock:
+            return {
+                'active': self._describe(self._active),
+                'previous': self._describe(self._previous),
+                'pending': dict(self._pending) if self._pending else None
+            }
\ No newline at end of file
@@ -0,0 +1,288 @@
+"""
+改进建议引擎模块
+
+以声明式规则表描述改进建议，对一个或多个分析结果进行向量化评估，
+并通过滞回带避免指标在阈值附近波动时建议反复出现和消失
+"""
+import numpy as np
+
+# 规则评估使用的指标，顺序决定指标矩阵的列
+RECOMMENDATION_METRICS = (
+    'cadence',
+    'vertical_oscillation',
+    'impact_force',
+    'forefoot_hindfoot_ratio',
+    'medial_lateral_ratio'
+)
+
+# 建议规则表
+# op为'<'时指标低于threshold触发，回到threshold + band以上才解除；
+# op为'>'时指标高于threshold触发，回到threshold - band以下才解除
+RECOMMENDATION_RULES = [
+    {
+        'id': 'cadence_low',
+        'type': 'cadence',
+        'metric': 'cadence',
+        'op': '<',
+        'threshold': 160,
+        'band': 3.0,
+        'title': '增加步频',
+        'description': '您的步频较低，可以尝试增加步频至170-180步/分钟以提高跑步效率。'
+    },
+    {
+        'id': 'cadence_high',
+        'type': 'cadence',
+        'metric': 'cadence',
+        'op': '>',
+        'threshold': 200,
+        'band': 3.0,
+        'title': '适当降低步频',
+        'description': '您的步频较高，可以尝试稍微减小步频并增加步幅，以找到更舒适的节奏。'
+    },
+    {
+        'id': 'oscillation_high',
+        'type': 'oscillation',
+        'metric': 'vertical_oscillation',
+        'op': '>',
+        'threshold': 10.0,  # 大于10厘米
+        'band': 0.5,
+        'title': '减小垂直振幅',
+        'description': '您的垂直振幅较大，容易消耗额外能量。尝试减少上下起伏，保持重心稳定向前推进。'
+    },
+    {
+        'id': 'impact_high',
+        'type': 'impact',
+        'metric': 'impact_force',
+        'op': '>',
+        'threshold': 3.5,  # 大于3.5g
+        'band': 0.2,
+        'title': '减少着地冲击',
+        'description': '您的着地冲击力较大，可能增加受伤风险。尝试改进着地方式，增强核心稳定性。'
+    },
+    {
+        'id': 'foot_strike_rearfoot',
+        'type': 'foot_strike',
+        'metric': 'forefoot_hindfoot_ratio',
+        'op': '<',
+        'threshold': 0.7,  # 后脚掌着地
+        'band': 0.05,
+        'title': '优化足部着地方式',
+        'description': '您主要使用后脚跟着地，可能会增加膝关节压力。尝试渐进式地调整为中脚掌着地。'
+    },
+    {
+        'id': 'foot_strike_forefoot',
+        'type': 'foot_strike',
+        'metric': 'forefoot_hindfoot_ratio',
+        'op': '>',
+        'threshold': 1.5,  # 前脚掌着地
+        'band': 0.1,
+        'title': '平衡足部着地方式',
+        'description': '您主要使用前脚掌着地，这对小腿肌肉要求较高。在长距离跑步中可能导致过度疲劳，适当调整为中脚掌着地。'
+    },
+    {
+        'id': 'overpronation',
+        'type': 'pronation',
+        'metric': 'medial_lateral_ratio',
+        'op': '>',
+        'threshold': 2.0,  # 过度内翻
+        'band': 0.1,
+        'title': '控制过度内翻',
+        'description': '您的足部存在过度内翻现象，考虑使用支撑型跑鞋或足部稳定训练来改善。'
+    },
+    {
+        'id': 'supination',
+        'type': 'pronation',
+        'metric': 'medial_lateral_ratio',
+        'op': '<',
+        'threshold': 1.0,  # 外翻
+        'band': 0.05,
+        'title': '改善足部外翻',
+        'description': '您的足部倾向于外翻，考虑使用缓震型跑鞋和提高足部灵活性的练习。'
+    }
+]
+
+def extract_metrics(gait_results, pressure_results):
+    """
+    将分析结果转换为指标矩阵
+    
+    Args:
+        gait_results: 步态分析结果列表（元素可以为None）
+        pressure_results: 足压分析结果列表
+    
+    Returns:
+        形状为(n_results, n_metrics)的float64数组，缺失的指标为NaN
+    """
+    metrics = np.full((len(gait_results), len(RECOMMENDATION_METRICS)), np.nan)
+    
+    for i, (gait_result, pressure_result) in enumerate(zip(gait_results, pressure_results)):
+        if gait_result is not None:
+            features = gait_result['features']
+            metrics[i, 0] = features['cadence']
+            metrics[i, 1] = features['vertical_oscillation']
+            metrics[i, 2] = features['impact_force']
+        if pressure_result is not None:
+            metrics[i, 3] = pressure_result.get('forefoot_hindfoot_ratio', np.nan)
+            metrics[i, 4] = pressure_result.get('medial_lateral_ratio', np.nan)
+    
+    return metrics
+
+class RecommendationEngine:
+    """
+    改进建议引擎类
+    
+    将规则表编译为阈值数组，对指标矩阵一次性比较得到各规则的触发状态，
+    并维护当前活动的建议集合，仅在集合变化时报告变化
+    """
+    
+    def __init__(self, rules=None):
+        """
+        初始化建议引擎
+        
+        Args:
+            rules: 建议规则列表，如果为None，则使用默认规则表
+        """
+        self.rules = rules if rules is not None else RECOMMENDATION_RULES
+        
+        # 编译规则表
+        self.metric_index = np.array([RECOMMENDATION_METRICS.index(rule['metric']) for rule in self.rules])
+        self.thresholds = np.array([rule['threshold'] for rule in self.rules], dtype=np.float64)
+        self.bands = np.array([rule.get('band', 0.0) for rule in self.rules], dtype=np.float64)
+        self.is_below = np.array([rule['op'] == '<' for rule in self.rules])
+        
+        # 解除阈值：低于型规则需回升到阈值+滞回带，高于型规则需回落到阈值-滞回带
+        self.release_thresholds = np.where(self.is_below, self.thresholds + self.bands, self.thresholds - self.bands)
+        
+        # 预先构建建议字典，避免每个窗口重复创建
+        self._recommendations = [
+            {
+                'type': rule['type'],
+                'title': rule['title'],
+                'description': rule['description']
+            }
+            for rule in self.rules
+        ]
+        self._cache = {}
+        
+        # 当前活动规则
+        self.active = np.zeros(len(self.rules), dtype=bool)
+    
+    def reset(self):
+        """清除活动建议状态"""
+        self.active = np.zeros(len(self.rules), dtype=bool)
+    
+    def evaluate(self, metrics):
+        """
+        无滞回地评估规则
+        
+        Args:
+            metrics: 形状为(n_results, n_metrics)的指标矩阵
+        
+        Returns:
+            形状为(n_results, n_rules)的布尔数组，表示各规则是否触发
+        """
+        values = np.atleast_2d(metrics)[:, self.metric_index]
+        with np.errstate(invalid='ignore'):
+            return np.where(self.is_below, values < self.thresholds, values > self.thresholds)
+    
+    def evaluate_with_hysteresis(self, metrics, initial_state=None):
+        """
+        带滞回地评估一系列按时间排序的结果
+        
+        触发条件与无滞回评估相同；规则一旦触发，只有指标越过解除阈值才会解除，
+        介于两者之间时保持上一个状态
+        
+        Args:
+            metrics: 形状为(n_results, n_metrics)的指标矩阵
+            initial_state: 评估前的规则状态，如果为None，则使用当前活动状态
+        
+        Returns:
+            形状为(n_results, n_rules)的布尔数组，表示每个结果之后的规则状态
+        """
+        if initial_state is None:
+            initial_state = self.active
+        
+        values = np.atleast_2d(metrics)[:, self.metric_index]
+        triggered = self.evaluate(metrics)
+        with np.errstate(invalid='ignore'):
+            released = np.where(self.is_below, values >= self.release_thresholds,
+                                values <= self.release_thresholds)
+        
+        # 事件: 1=触发, 0=解除, -1=保持；第一行为初始状态
+        events = np.where(triggered, 1, np.where(released, 0, -1))
+        events = np.vstack([initial_state.astype(int), events])
+        
+        # 向前填充最近一次的决定性事件
+        rows = np.arange(events.shape[0])[:, np.newaxis]
+        last_event = np.maximum.accumulate(np.where(events >= 0, rows, 0), axis=0)
+        states = np.take_along_axis(events, last_event, axis=0) == 1
+        
+        return states[1:]
+    
+    def to_recommendations(self, state):
+        """
+        将规则状态转换为建议列表
+        
+        Args:
+            state: 形状为(n_rules,)的布尔数组
+        
+        Returns:
+            建议字典列表，顺序与规则表一致
+        """
+        key = tuple(np.flatnonzero(state))
+        recommendations = self._cache.get(key)
+        if recommendations is None:
+            recommendations = [self._recommendations[i] for i in key]
+            self._cache[key] = recommendations
+        return list(recommendations)
+    
+    def recommend(self, gait_result, pressure_result):
+        """
+        无状态地为单个结果生成建议
+        
+        Args:
+            gait_result: 步态分析结果
+            pressure_result: 足压分析结果
+        
+        Returns:
+            建议字典列表
+        """
+        metrics = extract_metrics([gait_result], [pressure_result])
+        return self.to_recommendations(self.evaluate(metrics)[0])
+    
+    def update(self, gait_result, pressure_result):
+        """
+        使用新的分析结果更新活动建议集合
+        
+        Args:
+            gait_result: 步态分析结果
+            pressure_result: 足压分析结果
+        
+        Returns:
+            (当前建议列表, 活动建议集合是否发生变化)
+        """
+        recommendations, changed = self.update_batch([gait_result], [pressure_result])
+        return recommendations[-1], bool(changed[-1])
+    
+    def update_batch(self, gait_results, pressure_results):
+        """
+        使用一批按时间排序的分析结果更新活动建议集合
+        
+        Args:
+            gait_results: 步态分析结果列表
+            pressure_results: 足压分析结果列表
+        
+        Returns:
+            (每个结果对应的建议列表, 每个结果处活动集合是否变化的布尔数组)
+        """
+        if len(gait_results) == 0:
+            return [], np.zeros(0, dtype=bool)
+        
+        metrics = extract_metrics(gait_results, pressure_results)
+        states = self.evaluate_with_hysteresis(metrics)
+        
+        previous = np.vstack([self.active[np.newaxis, :], states[:-1]])
+        changed = np.any(states != previous, axis=1)
+        
+        self.active = states[-1].copy()
+        
+        return [self.to_recommendations(state) for state in states], changed
\ No newline at end of file
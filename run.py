@@ -7,13 +7,32 @@
 """
 import os
 import sys
+import glob
+import hashlib
+import argparse
 import subprocess
 import platform
 import time
 import json
 import webbrowser
+import urllib.request
 from pathlib import Path
 
+# 依赖指纹文件（位于虚拟环境目录中）
+FINGERPRINT_FILE = ".deps_fingerprint.json"
+
+# 需要安装/更新的关键依赖
+KEY_PACKAGES = [
+    "flask", "flask-socketio", 
+    "numpy", "scipy", 
+    "matplotlib", "pandas"
+]
+
+# Web服务地址和就绪检查
+APP_URL = "http://localhost:5000"
+HEALTH_URL = APP_URL + "/health"
+HEALTH_POLL_INTERVAL = 0.25
+
 
 # 定义颜色代码（用于终端输出）
 class Colors:
@@ -25,7 +44,17 @@ class Colors:
     ENDC = '\033[0m'
     BOLD = '\033[1m'
 
-def print_header():
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='中长跑实时指导系统启动脚本')
+    parser.add_argument('--fast', action='store_true',
+                        help='快速启动: 跳过标题停顿，依赖未变化时不运行pip')
+    parser.add_argument('--force-install', action='store_true', help='忽略依赖指纹，总是运行pip安装')
+    parser.add_argument('--no-browser', action='store_true', help='服务就绪后不打开浏览器')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='等待服务就绪的最长时间(秒)')
+    return parser.parse_args()
+
+def print_header(pause=True):
     """打印系统标题"""
     print(f"{Colors.HEADER}{Colors.BOLD}")
     print("=" * 70)
@@ -33,7 +62,9 @@ def print_header():
     print("      基于多模态传感器和边缘AI的跑步姿态分析      ")
     print("=" * 70)
     print(f"{Colors.ENDC}")
-    time.sleep(3)
+    if pause:
+        time.sleep(3)
+
 def check_environment():
     """检查运行环境"""
     print(f"{Colors.BLUE}[1/5] 检查运行环境...{Colors.ENDC}")
@@ -78,10 +109,64 @@ def setup_virtual_env():
     # 返回激活脚本路径
     return True, activation_script
 
-def check_dependencies(activation_script):
-    """检查并安装依赖"""
+def site_packages_dirs(venv_dir):
+    """虚拟环境的site-packages目录列表"""
+    if platform.system() == "Windows":
+        return glob.glob(os.path.join(venv_dir, "Lib", "site-packages"))
+    return glob.glob(os.path.join(venv_dir, "lib", "python*", "site-packages"))
+
+def dependency_fingerprint(venv_dir):
+    """
+    计算依赖指纹
+    
+    包含关键依赖列表、requirements.txt的内容和虚拟环境中已安装的包
+    （各个.dist-info目录的名称和修改时间），不需要启动pip，计算只需几毫秒
+    
+    Args:
+        venv_dir: 虚拟环境目录
+    
+    Returns:
+        指纹字符串（SHA-256）
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(KEY_PACKAGES).encode('utf-8'))
+    if os.path.exists("requirements.txt"):
+        with open("requirements.txt", 'rb') as f:
+            digest.update(f.read())
+    
+    for site_dir in site_packages_dirs(venv_dir):
+        for info_dir in sorted(glob.glob(os.path.join(site_dir, "*.dist-info"))):
+            digest.update(os.path.basename(info_dir).encode('utf-8'))
+            digest.update(str(os.stat(info_dir).st_mtime_ns).encode('utf-8'))
+    
+    return digest.hexdigest()
+
+def load_fingerprint(venv_dir):
+    """读取上次安装成功后保存的依赖指纹，不存在时返回None"""
+    try:
+        with open(os.path.join(venv_dir, FINGERPRINT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
+
+def save_fingerprint(venv_dir):
+    """保存当前的依赖指纹"""
+    with open(os.path.join(venv_dir, FINGERPRINT_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': dependency_fingerprint(venv_dir), 'saved_at': time.time()}, f)
+
+def check_dependencies(activation_script, force_install=False):
+    """
+    检查并安装依赖
+    
+    依赖指纹与上次成功安装后保存的指纹相同时跳过pip
+    """
     print(f"{Colors.BLUE}[3/5] 检查依赖项...{Colors.ENDC}")
     
+    venv_dir = os.path.dirname(os.path.dirname(activation_script))
+    if not force_install and load_fingerprint(venv_dir) == dependency_fingerprint(venv_dir):
+        print(f"{Colors.GREEN}  依赖未变化，跳过安装{Colors.ENDC}")
+        return True
+    
     # 执行命令的函数，激活虚拟环境
     def run_in_venv(cmd):
         if platform.system() == "Windows":
@@ -93,18 +178,14 @@ def check_dependencies(activation_script):
     print("  - 检查pip版本...")
     run_in_venv("pip --version")
     
-    # 安装/更新关键依赖
-    key_packages = [
-        "flask", "flask-socketio", 
-        "numpy", "scipy", 
-        "matplotlib", "pandas"
-    ]
+    installed = True
     
     print("  - 安装关键依赖...")
-    for package in key_packages:
+    for package in KEY_PACKAGES:
         print(f"    安装/更新 {package}...")
         result = run_in_venv(f"pip install {package}")
         if result.returncode != 0:
+            installed = False
             print(f"{Colors.YELLOW}  警告: {package} 安装可能不完整{Colors.ENDC}")
     
     # 安装其他项目依赖
@@ -112,18 +193,31 @@ def check_dependencies(activation_script):
         print("  - 安装requirements.txt中的依赖...")
         result = run_in_venv("pip install -r requirements.txt")
         if result.returncode != 0:
+            installed = False
             print(f"{Colors.YELLOW}  警告: 一些依赖可能未安装成功{Colors.ENDC}")
     
+    # 只有全部安装成功时才记录指纹，否则下次启动会重新尝试
+    if installed:
+        save_fingerprint(venv_dir)
+    
     return True
 
-def prepare_demo_data():
+def prepare_demo_data(activation_script):
     """准备演示数据"""
     print(f"{Colors.BLUE}[4/5] 准备演示数据...{Colors.ENDC}")
     
+    # 数据生成工具依赖numpy，需要在虚拟环境中运行
+    def run_in_venv(cmd):
+        if platform.system() == "Windows":
+            return subprocess.run(f"{activation_script} && {cmd}", shell=True)
+        else:
+            return subprocess.run(f"source {activation_script} && {cmd}", shell=True)
+    
     data_dir = Path("data")
     data_dir.mkdir(exist_ok=True)
     
     sample_data_path = data_dir / "sample_data.json"
+    generator = Path("tools") / "generate_workload.py"
     
     # 检查示例数据是否存在
     if sample_data_path.exists():
@@ -131,61 +225,21 @@ def prepare_demo_data():
     else:
         print(f"  - 创建示例数据: {sample_data_path}")
         
-        # 创建简单的示例数据
-        sample_data = {
-            "timestamps": [],
-            "acceleration": [],
-            "gyroscope": [],
-            "pressure": [],
-            "gait_labels": []
-        }
-        
-        # 生成示例数据点
-        import random
-        import math
-        from datetime import datetime, timedelta
-        
-        base_time = datetime.now()
-        for i in range(500):  # 500个数据点
-            # 时间戳
-            time_point = base_time + timedelta(milliseconds=i*5)  # 5ms间隔，200Hz
-            timestamp = time_point.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
-            
-            # 模拟跑步加速度数据（简单正弦波+噪声）
-            period = i % 50  # 50点一个周期
-            acc_z_base = 9.81  # 重力加速度
-            acc_z_amp = 1.5    # 振幅
-            acc_z = acc_z_base + acc_z_amp * math.sin(2 * math.pi * period / 50) + random.uniform(-0.2, 0.2)
-            acc_x = random.uniform(-0.8, 0.8)  # 横向加速度
-            acc_y = random.uniform(-0.5, 0.5)  # 前后加速度
-            
-            # 模拟角速度数据
-            gyro_x = random.uniform(-0.3, 0.3)
-            gyro_y = random.uniform(-0.2, 0.2)
-            gyro_z = 0.15 * math.sin(2 * math.pi * period / 50) + random.uniform(-0.05, 0.05)
-            
-            # 模拟足压数据
-            pressure_phase = (period / 50) * 2 * math.pi
-            pressure_1 = 0.3 + 0.2 * math.sin(pressure_phase)  # 前脚掌
-            pressure_2 = 0.2 + 0.1 * math.sin(pressure_phase + math.pi/4)  # 中脚掌
-            pressure_3 = 0.4 + 0.2 * math.sin(pressure_phase + math.pi/2)  # 后脚掌
-            pressure_4 = 0.1 + 0.05 * math.sin(pressure_phase + math.pi)   # 外侧
-            
-            # 模拟步态相位标签
-            gait_phase = "stance" if period < 30 else "swing"
-            
-            # 添加到数据中
-            sample_data["timestamps"].append(timestamp)
-            sample_data["acceleration"].append([acc_x, acc_y, acc_z])
-            sample_data["gyroscope"].append([gyro_x, gyro_y, gyro_z])
-            sample_data["pressure"].append([pressure_1, pressure_2, pressure_3, pressure_4])
-            sample_data["gait_labels"].append(gait_phase)
-            
-        # 保存示例数据
-        with open(sample_data_path, 'w', encoding='utf-8') as f:
-            json.dump(sample_data, f, indent=2)
-            
-        print(f"  - 示例数据已创建: {len(sample_data['timestamps'])} 条记录")
+        # 生成5分钟的合成跑步数据（固定种子，每次生成的数据相同）
+        result = run_in_venv(f'python "{generator}" --format json --duration 300 --seed 0 '
+                             f'--output "{sample_data_path}"')
+        if result.returncode != 0:
+            print(f"{Colors.RED}  错误: 示例数据生成失败{Colors.ENDC}")
+            return False
+    
+    # 生成演示用的历史会话
+    if glob.glob(str(data_dir / "sessions" / "demo_0_*")):
+        print("  - 检测到现有演示会话")
+    else:
+        print("  - 创建演示会话...")
+        result = run_in_venv(f'python "{generator}" --athletes 2 --duration 600 --seed 0 --prefix demo')
+        if result.returncode != 0:
+            print(f"{Colors.YELLOW}  警告: 演示会话生成失败{Colors.ENDC}")
     
     # 创建模型目录
     models_dir = Path("edge_ai") / "models"
@@ -193,7 +247,31 @@ def prepare_demo_data():
     
     return True
 
-def start_application(activation_script):
+def wait_for_ready(process, timeout):
+    """
+    轮询健康检查接口直到服务就绪
+    
+    Args:
+        process: 服务进程
+        timeout: 最长等待时间(秒)
+    
+    Returns:
+        服务就绪所用的秒数，超时或进程退出时返回None
+    """
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=1) as response:
+                if response.status == 200:
+                    return time.monotonic() - start_time
+        except OSError:
+            pass
+        time.sleep(HEALTH_POLL_INTERVAL)
+    return None
+
+def start_application(activation_script, startup_timeout=120.0, open_browser=True):
     """启动应用程序"""
     print(f"{Colors.BLUE}[5/5] 启动应用程序...{Colors.ENDC}")
     
@@ -210,16 +288,24 @@ def start_application(activation_script):
     print("  - 正在启动Web服务...")
     app_process = run_in_venv("python -m web_ui.app")
     
-    # 等待服务启动
+    # 轮询健康检查接口，服务就绪后立即继续
     print("  - 等待服务启动...")
-    time.sleep(5)  # 等待5秒，确保服务启动完成
+    ready_time = wait_for_ready(app_process, startup_timeout)
+    if ready_time is None:
+        if app_process.poll() is not None:
+            print(f"{Colors.RED}  错误: Web服务启动失败 (退出码 {app_process.returncode}){Colors.ENDC}")
+            return False
+        print(f"{Colors.YELLOW}  警告: {startup_timeout:.0f} 秒内未检测到服务就绪，继续等待服务运行{Colors.ENDC}")
+    else:
+        print(f"  - 服务已就绪 ({ready_time:.1f} 秒)")
     
     # 打开Web浏览器
-    try:
-        print("  - 正在打开Web浏览器...")
-        webbrowser.open("http://localhost:5000")
-    except:
-        print(f"{Colors.YELLOW}  - 无法自动打开浏览器，请手动访问: http://localhost:5000{Colors.ENDC}")
+    if open_browser:
+        try:
+            print("  - 正在打开Web浏览器...")
+            webbrowser.open(APP_URL)
+        except:
+            print(f"{Colors.YELLOW}  - 无法自动打开浏览器，请手动访问: {APP_URL}{Colors.ENDC}")
     
     print(f"{Colors.GREEN}{Colors.BOLD}")
     print("=" * 70)
@@ -242,10 +328,12 @@ def start_application(activation_script):
 
 def main():
     """主函数"""
+    args = parse_arguments()
+    
     # 切换到脚本所在目录，确保相对路径正确
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    print_header()
+    print_header(pause=not args.fast)
     
     if not check_environment():
         sys.exit(1)
@@ -254,15 +342,16 @@ def main():
     if not success:
         sys.exit(1)
     
-    if not check_dependencies(activation_script):
+    if not check_dependencies(activation_script, force_install=args.force_install):
         sys.exit(1)
     
-    if not prepare_demo_data():
+    if not prepare_demo_data(activation_script):
         sys.exit(1)
     
-    start_application(activation_script)
+    if not start_application(activation_script, args.startup_timeout, open_browser=not args.no_browser):
+        sys.exit(1)
     
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
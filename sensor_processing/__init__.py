@@ -8,18 +8,22 @@ from sensor_processing.filter import (
 )
 
 from sensor_processing.feature_extractor import (
-    extract_features, extract_pressure_features,
+    extract_features, extract_features_batch, split_feature_batch, extract_pressure_features,
     estimate_cadence, estimate_vertical_oscillation, calculate_impact_force
 )
 
 from sensor_processing.data_processor import DataProcessor
+from sensor_processing.batch_processor import BatchProcessor
+from sensor_processing.replay import ReplayEngine, load_recording
+from sensor_processing.synthetic import make_athletes, iter_athlete_chunks
 
 __all__ = [
     'lowpass_filter', 'highpass_filter', 'bandpass_filter',
     'median_filter', 'moving_average_filter', 'kalman_filter_1d',
-    'extract_features', 'extract_pressure_features',
+    'extract_features', 'extract_features_batch', 'split_feature_batch', 'extract_pressure_features',
     'estimate_cadence', 'estimate_vertical_oscillation', 'calculate_impact_force',
-    'DataProcessor'
+    'DataProcessor', 'BatchProcessor', 'ReplayEngine', 'load_recording',
+    'make_athletes', 'iter_athlete_chunks'
 ]
 
 __version__ = '1.0.0'
\ No newline at end of file
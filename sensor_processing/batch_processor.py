@@ -0,0 +1,181 @@
+"""
+批量数据处理模块
+
+离线处理已记录的数据：与DataProcessor相同的 滤波 → 特征提取 → 模型推理 → 建议生成 流程，
+但不使用线程、队列和实时回放，而是把滑动窗口按批处理：
+滤波和特征提取对一批窗口一次完成，模型推理一批窗口只调用一次invoke，建议按时间顺序批量更新
+"""
+import numpy as np
+from scipy import signal, ndimage
+
+from sensor_processing.feature_extractor import (
+    extract_features_batch, split_feature_batch, extract_pressure_features
+)
+from edge_ai.recommendations import RecommendationEngine
+
+# 每批处理的窗口数
+DEFAULT_BATCH_WINDOWS = 256
+
+def sliding_windows(data, window_size, step_size):
+    """
+    获取滑动窗口视图（不复制数据）
+
+    窗口位置与DataProcessor一致：第k个窗口结束于第 window_size + k * step_size 个样本
+
+    Args:
+        data: 形状为(n, ...)的数组
+        window_size: 窗口大小
+        step_size: 窗口步长
+
+    Returns:
+        形状为(num_windows, window_size, ...)的数组
+    """
+    data = np.asarray(data)
+    if len(data) < window_size:
+        return np.empty((0, window_size) + data.shape[1:], dtype=data.dtype)
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=0)[::step_size]
+    # sliding_window_view把窗口维放在最后，调整为(num_windows, window_size, ...)
+    return np.moveaxis(windows, -1, 1)
+
+class BatchProcessor:
+    """
+    批量数据处理器类
+
+    滤波参数、窗口位置和建议滞回与DataProcessor相同，结果字典的格式也相同，
+    时间戳为窗口最后一个样本的时间戳（而不是处理时的时间）
+    """
+
+    def __init__(self, model, window_size=400, step_size=50, sampling_rate=200,
+                 acc_lowpass_cutoff=20.0, gyro_lowpass_cutoff=20.0, batch_windows=DEFAULT_BATCH_WINDOWS):
+        """
+        初始化批量数据处理器
+
+        Args:
+            model: GaitAnalysisModel实例
+            window_size: 滑动窗口大小（数据点数量）
+            step_size: 滑动窗口步长（数据点数量）
+            sampling_rate: 采样率 (Hz)
+            acc_lowpass_cutoff: 加速度低通滤波截止频率
+            gyro_lowpass_cutoff: 角速度低通滤波截止频率
+            batch_windows: 每批处理的窗口数
+        """
+        self.model = model
+        self.window_size = window_size
+        self.step_size = step_size
+        self.sampling_rate = sampling_rate
+        self.batch_windows = batch_windows
+        self.recommendation_engine = RecommendationEngine()
+
+        nyq = 0.5 * sampling_rate
+        self.acc_filter = signal.butter(4, acc_lowpass_cutoff / nyq, btype='low', analog=False)
+        self.gyro_filter = signal.butter(4, gyro_lowpass_cutoff / nyq, btype='low', analog=False)
+
+    @classmethod
+    def from_data_processor(cls, data_processor, model=None, batch_windows=DEFAULT_BATCH_WINDOWS):
+        """
+        使用DataProcessor的参数创建批量处理器
+
+        Args:
+            data_processor: DataProcessor实例
+            model: 使用的模型，为None时使用DataProcessor当前活动的模型
+        """
+        return cls(
+            model or data_processor.model,
+            window_size=data_processor.window_size,
+            step_size=data_processor.step_size,
+            sampling_rate=data_processor.sampling_rate,
+            acc_lowpass_cutoff=data_processor.acc_lowpass_cutoff,
+            gyro_lowpass_cutoff=data_processor.gyro_lowpass_cutoff,
+            batch_windows=batch_windows
+        )
+
+    def num_windows(self, num_samples):
+        """样本数对应的窗口数"""
+        if num_samples < self.window_size:
+            return 0
+        return (num_samples - self.window_size) // self.step_size + 1
+
+    def filter_windows(self, acc_windows, gyro_windows):
+        """
+        对一批窗口滤波
+
+        与DataProcessor相同：加速度和角速度低通滤波（每个窗口独立的零相位滤波），
+        垂直加速度再做核大小为5的中值滤波（边界补零，与scipy.signal.medfilt一致）
+
+        Args:
+            acc_windows: 形状为(num_windows, window_size, 3)的加速度
+            gyro_windows: 形状为(num_windows, window_size, 3)的角速度
+
+        Returns:
+            (滤波后的加速度, 滤波后的角速度)
+        """
+        acc_filtered = signal.filtfilt(*self.acc_filter, np.asarray(acc_windows, dtype=np.float64), axis=1)
+        gyro_filtered = signal.filtfilt(*self.gyro_filter, np.asarray(gyro_windows, dtype=np.float64), axis=1)
+        acc_filtered[:, :, 2] = ndimage.median_filter(acc_filtered[:, :, 2], size=(1, 5), mode='constant', cval=0.0)
+        return acc_filtered, gyro_filtered
+
+    def process_batch(self, acc_windows, gyro_windows, pressure_windows, timestamps):
+        """
+        处理一批窗口
+
+        Args:
+            acc_windows: 形状为(num_windows, window_size, 3)的加速度
+            gyro_windows: 形状为(num_windows, window_size, 3)的角速度
+            pressure_windows: 形状为(num_windows, window_size, 4)的足压
+            timestamps: 每个窗口的时间戳
+
+        Returns:
+            结果字典列表（与DataProcessor的结果格式相同）
+        """
+        acc_filtered, gyro_filtered = self.filter_windows(acc_windows, gyro_windows)
+
+        imu_features = split_feature_batch(extract_features_batch(acc_filtered, gyro_filtered, self.sampling_rate))
+        gait_results = self.model.infer_batch(imu_features)
+        pressure_results = [
+            self.model.analyze_pressure(extract_pressure_features(np.asarray(pressure, dtype=np.float64)))
+            for pressure in pressure_windows
+        ]
+
+        recommendations, changed = self.recommendation_engine.update_batch(gait_results, pressure_results)
+
+        return [
+            {
+                'gait': gait,
+                'pressure': pressure,
+                'recommendations': recs,
+                'recommendations_changed': bool(is_changed),
+                'model_version': None,
+                'timestamp': float(timestamp)
+            }
+            for gait, pressure, recs, is_changed, timestamp
+            in zip(gait_results, pressure_results, recommendations, changed, timestamps)
+        ]
+
+    def iter_results(self, timestamps, acc, gyro, pressure):
+        """
+        按批处理一段连续记录的所有窗口
+
+        Args:
+            timestamps: 形状为(n,)的毫秒时间戳
+            acc: 形状为(n, 3)的加速度
+            gyro: 形状为(n, 3)的角速度
+            pressure: 形状为(n, 4)的足压
+
+        Yields:
+            每批窗口的结果字典列表
+        """
+        self.recommendation_engine.reset()
+
+        acc_windows = sliding_windows(acc, self.window_size, self.step_size)
+        gyro_windows = sliding_windows(gyro, self.window_size, self.step_size)
+        pressure_windows = sliding_windows(pressure, self.window_size, self.step_size)
+        window_ends = np.asarray(timestamps)[self.window_size - 1::self.step_size][:len(acc_windows)]
+
+        for start in range(0, len(acc_windows), self.batch_windows):
+            end = start + self.batch_windows
+            yield self.process_batch(
+                acc_windows[start:end],
+                gyro_windows[start:end],
+                pressure_windows[start:end],
+                window_ends[start:end]
+            )
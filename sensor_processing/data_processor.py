@@ -16,6 +16,8 @@ from sensor_processing.feature_extractor import (
     extract_features, extract_pressure_features
 )
 from edge_ai.inference import GaitAnalysisModel
+from edge_ai.model_registry import ModelRegistry
+from edge_ai.recommendations import RecommendationEngine
 
 class DataProcessor:
     """
@@ -24,13 +26,14 @@ class DataProcessor:
     负责对传感器原始数据进行处理、特征提取和模型推理
     """
     
-    def __init__(self, window_size=400, step_size=50):
+    def __init__(self, window_size=400, step_size=50, model=None):
         """
         初始化数据处理器
         
         Args:
             window_size: 滑动窗口大小（数据点数量）
             step_size: 滑动窗口步长（数据点数量）
+            model: GaitAnalysisModel实例，如果为None，则加载默认模型
         """
         self.window_size = window_size
         self.step_size = step_size
@@ -41,12 +44,21 @@ class DataProcessor:
         self.pressure_buffer = deque(maxlen=window_size * 2)  # 足压缓冲区
         self.timestamp_buffer = deque(maxlen=window_size * 2)  # 时间戳缓冲区
         
+        # 已接收的样本总数和下一个窗口结束时的样本计数
+        # （缓冲区写满后长度不再变化，不能用缓冲区长度判断窗口）
+        self.total_samples = 0
+        self.next_window_end = window_size
+        self.dropped_windows = 0
+        
         # 初始化处理队列
         self.processing_queue = queue.Queue(maxsize=100)
         self.result_queue = queue.Queue(maxsize=100)
         
-        # 加载模型
-        self.model = GaitAnalysisModel()
+        # 加载模型（通过注册表管理，支持热切换和回滚）
+        self.model_registry = ModelRegistry(model if model is not None else GaitAnalysisModel())
+        
+        # 建议引擎（带滞回，仅在建议集合变化时标记变化）
+        self.recommendation_engine = RecommendationEngine()
         
         # 设置采样率 (Hz)
         self.sampling_rate = 200
@@ -67,6 +79,11 @@ class DataProcessor:
             'recommendations': []
         }
     
+    @property
+    def model(self):
+        """当前活动的步态分析模型"""
+        return self.model_registry.get_active_model()
+    
     def start_processing(self):
         """
         启动数据处理线程
@@ -101,9 +118,29 @@ class DataProcessor:
             self.acc_buffer.append(acc_data)
             self.gyro_buffer.append(gyro_data)
             
-            # 当累积足够数据后，将数据放入处理队列
-            if len(self.acc_buffer) >= self.window_size and len(self.acc_buffer) % self.step_size == 0:
-                self._queue_data_for_processing()
+            # 当累积足够数据后，每step_size个样本将一个窗口放入处理队列
+            self.total_samples += 1
+            self._queue_due_windows()
+    
+    def add_samples(self, timestamps, acc_data, gyro_data, pressure_data):
+        """
+        批量添加对齐的IMU和足压数据
+        
+        Args:
+            timestamps: 时间戳序列 (毫秒)
+            acc_data: 形状为(n, 3)的加速度数据
+            gyro_data: 形状为(n, 3)的角速度数据
+            pressure_data: 形状为(n, 4)的足压数据
+        """
+        with self.lock:
+            self.timestamp_buffer.extend(timestamps)
+            self.acc_buffer.extend(np.asarray(acc_data))
+            self.gyro_buffer.extend(np.asarray(gyro_data))
+            self.pressure_buffer.extend(np.asarray(pressure_data))
+            
+            # 一批数据可能跨越多个窗口边界，逐个放入处理队列
+            self.total_samples += len(timestamps)
+            self._queue_due_windows()
     
     def add_pressure_data(self, timestamp, pressure_data):
         """
@@ -151,18 +188,57 @@ class DataProcessor:
             self.gyro_buffer.clear()
             self.pressure_buffer.clear()
             self.timestamp_buffer.clear()
+            
+            self.total_samples = 0
+            self.next_window_end = self.window_size
+        
+        # 新的采集会话重新开始评估建议
+        self.recommendation_engine.reset()
     
-    def _queue_data_for_processing(self):
+    def _queue_due_windows(self):
+        """
+        将所有已到期的数据窗口放入处理队列（调用方需持有锁）
+        """
+        # 每个到期窗口结束位置之后新到达的样本数
+        lags = []
+        while self.total_samples >= self.next_window_end:
+            lags.append(self.total_samples - self.next_window_end)
+            self.next_window_end += self.step_size
+        
+        if not lags:
+            return
+        
+        # 每批只把缓冲区转换为数组一次
+        acc = np.array(self.acc_buffer)
+        gyro = np.array(self.gyro_buffer)
+        pressure = np.array(self.pressure_buffer)
+        
+        for lag in lags:
+            self._queue_data_for_processing(acc, gyro, pressure, lag)
+    
+    def _queue_data_for_processing(self, acc, gyro, pressure, lag=0):
         """
         将窗口数据放入处理队列
+        
+        Args:
+            acc: 加速度缓冲区数组
+            gyro: 角速度缓冲区数组
+            pressure: 足压缓冲区数组
+            lag: 窗口结束位置之后的样本数
         """
         # 创建数据窗口的副本
-        acc_window = np.array(list(self.acc_buffer)[-self.window_size:])
-        gyro_window = np.array(list(self.gyro_buffer)[-self.window_size:])
+        end = len(acc) - lag
+        start = end - self.window_size
+        if start < 0:
+            # 窗口已被移出缓冲区（单批数据超过缓冲区容量）
+            return
+        acc_window = acc[start:end].copy()
+        gyro_window = gyro[start:end].copy()
         
         # 创建足压数据副本（如果有）
-        if len(self.pressure_buffer) >= self.window_size:
-            pressure_window = np.array(list(self.pressure_buffer)[-self.window_size:])
+        pressure_end = len(pressure) - lag
+        if pressure_end >= self.window_size:
+            pressure_window = pressure[pressure_end - self.window_size:pressure_end].copy()
         else:
             # 如果足压数据不足，使用零填充
             pressure_window = np.zeros((self.window_size, 4))
@@ -178,6 +254,7 @@ class DataProcessor:
                 block=False
             )
         except queue.Full:
+            self.dropped_windows += 1
             print("处理队列已满，丢弃当前数据窗口")
     
     def _process_data_loop(self):
@@ -231,6 +308,9 @@ class DataProcessor:
         gyro_data = data['gyro']
         pressure_data = data['pressure']
         
+        # 每个窗口只获取一次模型引用，模型切换只会发生在窗口之间
+        model, model_version = self.model_registry.get_active()
+        
         try:
             # 1. 应用滤波器
             acc_filtered = lowpass_filter(acc_data, self.acc_lowpass_cutoff, self.sampling_rate)
@@ -244,17 +324,21 @@ class DataProcessor:
             pressure_features = extract_pressure_features(pressure_data)
             
             # 3. 模型推理
-            gait_result = self.model.infer(imu_features)
-            pressure_result = self.model.analyze_pressure(pressure_features)
+            gait_result = model.infer(imu_features)
+            pressure_result = model.analyze_pressure(pressure_features)
             
-            # 4. 生成建议
-            recommendations = self.model.generate_recommendations(gait_result, pressure_result)
+            # 4. 生成建议（带滞回，避免指标在阈值附近时建议反复闪烁）
+            recommendations, recommendations_changed = self.recommendation_engine.update(
+                gait_result, pressure_result
+            )
             
             # 返回处理结果
             return {
                 'gait': gait_result,
                 'pressure': pressure_result,
                 'recommendations': recommendations,
+                'recommendations_changed': recommendations_changed,
+                'model_version': model_version,
                 'timestamp': time.time() * 1000  # 当前时间戳（毫秒）
             }
         
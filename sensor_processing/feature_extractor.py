@@ -114,6 +114,91 @@ def extract_features(acc_data, gyro_data):
     
     return features
 
+def _batch_correlation(a, b):
+    """逐窗口计算两个序列的皮尔逊相关系数，a和b的形状为(num_windows, n_samples)"""
+    a = a - np.mean(a, axis=1, keepdims=True)
+    b = b - np.mean(b, axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sum(a * b, axis=1) / np.sqrt(np.sum(a * a, axis=1) * np.sum(b * b, axis=1))
+
+def extract_features_batch(acc_windows, gyro_windows, sampling_rate=200):
+    """
+    批量提取一组窗口的IMU特征
+
+    与extract_features计算相同的特征，统计、频域和相关性特征沿窗口维一次计算，
+    只有步频估计（自相关峰值检测）逐窗口进行
+
+    Args:
+        acc_windows: 形状为(num_windows, n_samples, 3)的加速度数据
+        gyro_windows: 形状为(num_windows, n_samples, 3)的角速度数据
+        sampling_rate: 采样率(Hz)
+
+    Returns:
+        特征字典，每个值的第一维为窗口，可用split_feature_batch拆分为逐窗口的特征字典
+    """
+    acc = np.asarray(acc_windows, dtype=np.float64)
+    gyro = np.asarray(gyro_windows, dtype=np.float64)
+    n = acc.shape[1]
+    features = {}
+
+    # ===== 时域特征 =====
+    for name, data in (('acc', acc), ('gyro', gyro)):
+        features[f'{name}_mean'] = np.mean(data, axis=1)
+        features[f'{name}_std'] = np.std(data, axis=1)
+        features[f'{name}_min'] = np.min(data, axis=1)
+        features[f'{name}_max'] = np.max(data, axis=1)
+        features[f'{name}_range'] = features[f'{name}_max'] - features[f'{name}_min']
+        features[f'{name}_rms'] = np.sqrt(np.mean(np.square(data), axis=1))
+    features['acc_kurtosis'] = stats.kurtosis(acc, axis=1)
+    features['acc_skewness'] = stats.skew(acc, axis=1)
+
+    for name, data in (('acc', acc), ('gyro', gyro)):
+        magnitude = np.sqrt(np.sum(np.square(data), axis=2))
+        features[f'{name}_mag_mean'] = np.mean(magnitude, axis=1)
+        features[f'{name}_mag_std'] = np.std(magnitude, axis=1)
+        features[f'{name}_mag_min'] = np.min(magnitude, axis=1)
+        features[f'{name}_mag_max'] = np.max(magnitude, axis=1)
+
+    # ===== 频域特征 =====
+    freq_bins = np.fft.fftfreq(n, d=1.0/sampling_rate)[:n//2]
+    for name, data in (('acc', acc), ('gyro', gyro)):
+        spectrum = np.abs(np.fft.fft(data, axis=1))[:, :n//2]
+        energy = np.sum(np.square(spectrum), axis=1)
+        dominant = freq_bins[np.argmax(spectrum, axis=1)]
+        for i, axis_name in enumerate('xyz'):
+            features[f'{name}_fft_energy_{axis_name}'] = energy[:, i]
+            features[f'{name}_dominant_freq_{axis_name}'] = dominant[:, i]
+
+    # ===== 步态特征 =====
+    vertical_acc = acc[:, :, 2]
+    features['cadence'] = np.array([estimate_cadence(window, sampling_rate) for window in vertical_acc], dtype=np.float64)
+
+    velocity = signal.detrend(np.cumsum(vertical_acc - np.mean(vertical_acc, axis=1, keepdims=True), axis=1) / sampling_rate,
+                              axis=1)
+    displacement = np.cumsum(velocity, axis=1) / sampling_rate * 100
+    features['vertical_oscillation'] = np.max(displacement, axis=1) - np.min(displacement, axis=1)
+    features['impact_force'] = (np.max(vertical_acc, axis=1) - np.mean(vertical_acc, axis=1)) / 9.81
+
+    # ===== 互相关特征 =====
+    for name, data in (('acc', acc), ('gyro', gyro)):
+        features[f'{name}_correlation_xy'] = _batch_correlation(data[:, :, 0], data[:, :, 1])
+        features[f'{name}_correlation_xz'] = _batch_correlation(data[:, :, 0], data[:, :, 2])
+        features[f'{name}_correlation_yz'] = _batch_correlation(data[:, :, 1], data[:, :, 2])
+    for i, axis_name in enumerate('xyz'):
+        features[f'acc_gyro_correlation_{axis_name}'] = _batch_correlation(acc[:, :, i], gyro[:, :, i])
+
+    return features
+
+def split_feature_batch(features):
+    """
+    将extract_features_batch的结果拆分为逐窗口的特征字典列表
+
+    Returns:
+        特征字典列表，格式与extract_features的返回值相同
+    """
+    num_windows = len(features['cadence'])
+    return [{key: values[i] for key, values in features.items()} for i in range(num_windows)]
+
 def estimate_cadence(vertical_acc, sampling_rate=200):
     """
     使用垂直加速度估计步频
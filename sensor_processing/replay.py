@@ -0,0 +1,381 @@
+"""
+数据回放模块
+
+按记录的时间戳回放传感器数据：以单调时钟为基准计算每个样本的计划发送时间，
+支持实时(1x)、加速(Nx)和尽可能快三种速度，并以批的形式交付样本，
+用于以真实速率或过载速率测试数据处理流程。
+JSON记录第一次加载时会在旁边生成二进制缓存（每个数组一个.npy文件），
+之后源文件未变化时直接内存映射缓存，不再解析JSON
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# 尽可能快模式下每批的最大样本数
+MAX_BATCH_SIZE = 200
+
+# 记录缓存目录的后缀和格式版本（缓存格式变化时递增，使旧缓存失效）
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 1
+
+# 记录字典中的数组名（缓存中每个数组一个.npy文件）
+RECORDING_ARRAYS = ('timestamps_ms', 'acc', 'gyro', 'pressure')
+
+def timestamps_to_ms(timestamps):
+    """
+    批量将时间戳转换为毫秒
+
+    Args:
+        timestamps: 毫秒数值序列或ISO格式字符串序列
+
+    Returns:
+        float64毫秒时间戳数组，不带时区的ISO字符串按本地时间解释（与datetime.timestamp()一致）
+    """
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind in 'iuf' or len(timestamps) == 0:
+        return timestamps.astype(np.float64)
+    
+    # numpy按UTC解析，用第一个时间戳的本地时区偏移统一校正
+    utc_ms = timestamps.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+    local_offset_ms = datetime.fromisoformat(str(timestamps[0])).timestamp() * 1000 - utc_ms[0]
+    return utc_ms + local_offset_ms
+
+def _recording_arrays(source):
+    """将JSON记录字典转换为数组字典"""
+    return {
+        'timestamps_ms': timestamps_to_ms(source['timestamps']),
+        'acc': np.asarray(source['acceleration'], dtype=np.float64),
+        'gyro': np.asarray(source['gyroscope'], dtype=np.float64),
+        'pressure': np.asarray(source['pressure'], dtype=np.float64)
+    }
+
+def file_digest(path, chunk_size=1 << 20):
+    """计算文件内容的SHA-1摘要"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _source_info(path):
+    """源文件的修改时间和大小"""
+    stat = os.stat(path)
+    return {'source_mtime_ns': stat.st_mtime_ns, 'source_size': stat.st_size}
+
+def _read_cache_meta(cache_dir):
+    """读取缓存元数据，不存在或损坏时返回None"""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION:
+        return None
+    return meta
+
+def _write_cache_meta(cache_dir, meta):
+    """写入缓存元数据（先写临时文件再替换）"""
+    path = os.path.join(cache_dir, 'meta.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def _cache_is_valid(path, cache_dir):
+    """
+    检查缓存是否与源文件一致
+
+    修改时间和大小相同时直接认为一致；不同时比较内容摘要，
+    内容未变（例如文件被复制或touch）则更新缓存中记录的修改时间
+    """
+    meta = _read_cache_meta(cache_dir)
+    if meta is None:
+        return False
+    if not all(os.path.exists(os.path.join(cache_dir, f'{name}.npy')) for name in RECORDING_ARRAYS):
+        return False
+
+    info = _source_info(path)
+    if all(meta.get(key) == value for key, value in info.items()):
+        return True
+    if meta.get('source_size') != info['source_size'] or meta.get('source_sha1') != file_digest(path):
+        return False
+
+    meta.update(info)
+    _write_cache_meta(cache_dir, meta)
+    return True
+
+def build_recording_cache(path, cache_dir=None):
+    """
+    解析JSON记录并写入二进制缓存
+
+    数组先写入临时目录，完成后替换旧缓存
+
+    Args:
+        path: JSON记录文件路径
+        cache_dir: 缓存目录，默认为 path + CACHE_SUFFIX
+
+    Returns:
+        缓存目录路径
+    """
+    cache_dir = cache_dir or path + CACHE_SUFFIX
+    info = _source_info(path)
+    digest = file_digest(path)
+    with open(path, 'r') as f:
+        arrays = _recording_arrays(json.load(f))
+
+    tmp_dir = f'{cache_dir}.partial'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+
+    meta = dict(info, version=CACHE_VERSION, source_sha1=digest, samples=len(arrays['timestamps_ms']))
+    _write_cache_meta(tmp_dir, meta)
+
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.rename(tmp_dir, cache_dir)
+    return cache_dir
+
+def load_recording(source, use_cache=True):
+    """
+    加载记录的传感器数据
+
+    JSON文件默认通过二进制缓存加载：缓存不存在或与源文件不一致时先生成缓存，
+    然后以只读内存映射方式打开各个数组，无法写入缓存时直接解析JSON
+
+    Args:
+        source: JSON文件路径、会话目录或包含timestamps、acceleration、gyroscope、pressure的字典
+        use_cache: 是否使用二进制缓存（仅对文件路径有效）
+
+    Returns:
+        记录字典，包含毫秒时间戳数组timestamps_ms，
+        以及形状为(n, 3)、(n, 3)、(n, 4)的acc、gyro、pressure数组（float64）
+    """
+    if not isinstance(source, str):
+        return _recording_arrays(source)
+
+    if os.path.isdir(source):
+        # 列式会话目录：直接内存映射样本表
+        from storage.session_store import SessionReader
+        samples = SessionReader(source).samples
+        return {
+            'timestamps_ms': samples['timestamp'],
+            'acc': samples['acc'],
+            'gyro': samples['gyro'],
+            'pressure': samples['pressure']
+        }
+
+    if use_cache:
+        cache_dir = source + CACHE_SUFFIX
+        try:
+            if not _cache_is_valid(source, cache_dir):
+                build_recording_cache(source, cache_dir)
+            return {
+                name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+                for name in RECORDING_ARRAYS
+            }
+        except OSError as e:
+            print(f"记录缓存不可用，直接解析JSON: {e}")
+
+    with open(source, 'r') as f:
+        return _recording_arrays(json.load(f))
+
+class ReplayEngine:
+    """
+    回放引擎类
+
+    样本i的计划发送时间为 开始时间 + (t_i - t_0) / speed，与循环的实际耗时无关，
+    因此不会因处理耗时而累积漂移。每隔batch_ms毫秒醒来一次，将所有已到期的样本作为一批交付
+    """
+
+    def __init__(self, recording, on_batch, speed=1.0, batch_ms=20, loop=True,
+                 max_batch_size=MAX_BATCH_SIZE, clock=time.monotonic):
+        """
+        初始化回放引擎
+
+        Args:
+            recording: load_recording返回的记录字典
+            on_batch: 批回调函数 on_batch(batch)，batch字典包含index（记录中的样本索引）、
+                      timestamps_ms（循环回放时已加上循环偏移，保持单调递增）、acc、gyro、pressure
+            speed: 回放倍速，1.0为实时；None或0表示尽可能快
+            batch_ms: 交付批的间隔(毫秒)
+            loop: 到达记录末尾后是否从头循环
+            max_batch_size: 每批的最大样本数
+            clock: 单调时钟函数，返回秒
+        """
+        if speed is not None and speed < 0:
+            raise ValueError(f'回放倍速不能为负数: {speed}')
+
+        self.recording = recording
+        self.on_batch = on_batch
+        self.speed = speed or None
+        self.batch_ms = batch_ms
+        self.loop = loop
+        self.max_batch_size = max_batch_size
+        self.clock = clock
+
+        timestamps_ms = recording['timestamps_ms']
+        self.length = len(timestamps_ms)
+
+        # 相对记录起点的时间偏移；循环时每轮增加一个记录时长加一个采样间隔
+        self.offsets_ms = timestamps_ms - timestamps_ms[0] if self.length else timestamps_ms
+        if self.length > 1:
+            sample_interval_ms = float(np.median(np.diff(timestamps_ms)))
+        else:
+            sample_interval_ms = 0.0
+        self.cycle_ms = (float(self.offsets_ms[-1]) if self.length else 0.0) + sample_interval_ms
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.position = 0
+        self.cycle = 0
+        self.start_time = None
+        self.end_time = None
+        self.stats = self._empty_stats()
+
+    def _empty_stats(self):
+        """创建空的统计字典"""
+        return {
+            'samples': 0,
+            'batches': 0,
+            'cycles': 0,
+            'max_lag_ms': 0.0,
+            'last_lag_ms': 0.0
+        }
+
+    @property
+    def is_running(self):
+        """回放线程是否正在运行"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """在后台线程中开始回放"""
+        if self.is_running:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """停止回放"""
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+
+    def run(self):
+        """
+        执行回放直到记录结束（不循环时）或被停止
+
+        Returns:
+            回放统计字典
+        """
+        self.position = 0
+        self.cycle = 0
+        self.stats = self._empty_stats()
+
+        if self.length == 0:
+            return self.get_stats()
+
+        start_time = self.start_time = self.clock()
+        self.end_time = None
+
+        while not self.stop_event.is_set():
+            if self.speed is None:
+                due = self.max_batch_size
+                if not self.loop:
+                    # 不循环时最后一批只包含剩余的样本，不能回绕到记录开头
+                    due = min(due, self.length - self.position)
+            else:
+                elapsed_ms = (self.clock() - start_time) * 1000 * self.speed
+                due = self._count_due(elapsed_ms)
+
+            if due > 0 and not self._deliver(min(due, self.max_batch_size), start_time):
+                break
+
+            if self.speed is None:
+                # 让出CPU，避免其他线程饥饿
+                time.sleep(0)
+            elif due <= self.max_batch_size:
+                # 计划时间是绝对的，等待时间不会累积漂移
+                self.stop_event.wait(self.batch_ms / 1000)
+
+        self.end_time = self.clock()
+        return self.get_stats()
+
+    def _count_due(self, elapsed_ms):
+        """计算从当前位置开始已到期的样本数量"""
+        due = 0
+        position = self.position
+        cycle = self.cycle
+
+        while True:
+            local_ms = elapsed_ms - cycle * self.cycle_ms
+            end = int(np.searchsorted(self.offsets_ms, local_ms, side='right'))
+            due += max(0, end - position)
+            if end < self.length or not self.loop or due >= self.max_batch_size:
+                return due
+            position = 0
+            cycle += 1
+
+    def _deliver(self, count, start_time):
+        """
+        交付下一批样本
+
+        Returns:
+            是否还有剩余样本可以回放
+        """
+        indices = self.position + np.arange(count)
+        cycles = self.cycle + indices // self.length
+        indices = indices % self.length
+
+        recording = self.recording
+        timestamps_ms = recording['timestamps_ms'][indices] + cycles * self.cycle_ms
+
+        self.on_batch({
+            'index': indices,
+            'timestamps_ms': timestamps_ms,
+            'acc': recording['acc'][indices],
+            'gyro': recording['gyro'][indices],
+            'pressure': recording['pressure'][indices]
+        })
+
+        stats = self.stats
+        stats['samples'] += count
+        stats['batches'] += 1
+        if self.speed is not None:
+            scheduled_ms = self.offsets_ms[indices[-1]] + cycles[-1] * self.cycle_ms
+            lag_ms = (self.clock() - start_time) * 1000 - scheduled_ms / self.speed
+            stats['last_lag_ms'] = float(lag_ms)
+            stats['max_lag_ms'] = max(stats['max_lag_ms'], float(lag_ms))
+
+        next_position = self.position + count
+        self.cycle += next_position // self.length
+        self.position = next_position % self.length
+        stats['cycles'] = self.cycle
+
+        return self.loop or self.cycle == 0
+
+    def get_stats(self):
+        """
+        获取回放统计
+
+        Returns:
+            统计字典，包含已交付样本数、批数、循环次数、实际样本速率和相对计划的延迟
+        """
+        stats = dict(self.stats)
+        stats['speed'] = self.speed
+        if self.start_time is None:
+            stats['elapsed_s'] = 0.0
+        else:
+            stats['elapsed_s'] = (self.end_time or self.clock()) - self.start_time
+        stats['samples_per_s'] = stats['samples'] / stats['elapsed_s'] if stats['elapsed_s'] > 0 else 0.0
+        return stats
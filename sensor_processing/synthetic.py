@@ -0,0 +1,134 @@
+"""
+合成跑步数据生成模块
+
+每个运动员的信号由步频（含漂移）、疲劳、噪声和着地方式等参数决定，
+按块使用NumPy向量化生成（步态相位对瞬时步频积分，块之间保持连续）。
+相同的种子和参数总是生成完全相同的数据
+"""
+import numpy as np
+
+GRAVITY = 9.81
+
+# 每次生成的样本数（块大小是数据的一部分：相同种子下改变块大小会得到不同的噪声序列）
+GENERATE_CHUNK_SAMPLES = 1 << 18
+
+# 着地方式 -> 支撑期内各足压区域的载荷权重 (起始, 结束)
+# 足压通道顺序: 前脚掌, 中脚掌, 后脚掌, 外侧
+FOOT_STRIKE_PATTERNS = {
+    'heel': (np.array([0.10, 0.20, 0.60, 0.10]), np.array([0.65, 0.20, 0.05, 0.10])),
+    'midfoot': (np.array([0.30, 0.40, 0.20, 0.10]), np.array([0.60, 0.25, 0.05, 0.10])),
+    'forefoot': (np.array([0.65, 0.20, 0.05, 0.10]), np.array([0.75, 0.15, 0.02, 0.08]))
+}
+
+def make_athletes(num_athletes, seed=0, cadence_range=(165.0, 185.0), cadence_drift=-4.0, fatigue=0.5,
+                  noise=0.2, foot_strike='mixed'):
+    """
+    生成运动员参数
+
+    Args:
+        num_athletes: 运动员数量
+        seed: 随机种子
+        cadence_range: 初始步频范围(步/分钟)
+        cadence_drift: 平均步频漂移(步/分钟/小时)
+        fatigue: 疲劳程度 0~1
+        noise: 加速度噪声标准差
+        foot_strike: 着地方式，'mixed'为随机选择
+
+    Returns:
+        运动员参数字典列表，每个包含用于生成信号的独立种子
+    """
+    rng = np.random.default_rng(seed)
+    patterns = sorted(FOOT_STRIKE_PATTERNS)
+    child_seeds = np.random.SeedSequence(seed).spawn(num_athletes)
+
+    athletes = []
+    for i in range(num_athletes):
+        athletes.append({
+            'athlete_id': f'athlete_{i + 1:03d}',
+            'seed': int(child_seeds[i].generate_state(1)[0]),
+            'cadence': float(rng.uniform(*cadence_range)),
+            'cadence_drift': float(cadence_drift * rng.uniform(0.5, 1.5)),
+            'fatigue': float(np.clip(fatigue * rng.uniform(0.7, 1.3), 0.0, 1.0)),
+            # 疲劳出现的时间常数(秒)
+            'fatigue_tau_s': float(rng.uniform(1800, 5400)),
+            'noise': float(noise * rng.uniform(0.8, 1.2)),
+            'stance_ratio': float(rng.uniform(0.34, 0.42)),
+            'vertical_amplitude': float(rng.uniform(1.2, 2.0)),
+            'impact': float(rng.uniform(8.0, 14.0)),
+            'foot_strike': foot_strike if foot_strike != 'mixed' else patterns[int(rng.integers(len(patterns)))]
+        })
+    return athletes
+
+def iter_athlete_chunks(athlete, duration_s, sampling_rate=200, start_ms=0.0, chunk_samples=GENERATE_CHUNK_SAMPLES):
+    """
+    按块生成一个运动员的传感器数据
+
+    Args:
+        athlete: make_athletes返回的运动员参数
+        duration_s: 时长(秒)
+        sampling_rate: 采样率(Hz)
+        start_ms: 第一个样本的毫秒时间戳
+        chunk_samples: 每块的样本数
+
+    Yields:
+        数据块字典: timestamps_ms (n,), acc (n, 3), gyro (n, 3), pressure (n, 4),
+        gait_phase (n,) 布尔数组（True为支撑期）
+    """
+    rng = np.random.default_rng(athlete['seed'])
+    num_samples = int(round(duration_s * sampling_rate))
+    dt = 1.0 / sampling_rate
+    fore_start, fore_end = FOOT_STRIKE_PATTERNS[athlete['foot_strike']]
+    stance_ratio = athlete['stance_ratio']
+    noise = athlete['noise']
+
+    # 步态相位（以步为单位）在块之间连续累加
+    step_phase = 0.0
+    # 步频的慢速随机游走（每块一个增量，使相邻块平滑衔接）
+    wander = 0.0
+
+    for start in range(0, num_samples, chunk_samples):
+        n = min(chunk_samples, num_samples - start)
+        t = (start + np.arange(n)) * dt
+
+        fatigue = athlete['fatigue'] * (1.0 - np.exp(-t / athlete['fatigue_tau_s']))
+        wander_end = wander + rng.normal(0.0, 0.5) * np.sqrt(n * dt / 60.0)
+        cadence = (athlete['cadence'] + athlete['cadence_drift'] * t / 3600.0
+                   + np.linspace(wander, wander_end, n, endpoint=False) - 3.0 * fatigue)
+        wander = wander_end
+
+        # 对瞬时步频积分得到步态相位，frac为当前步内的位置 0~1
+        phase = step_phase + np.cumsum(cadence / 60.0 * dt)
+        step_phase = float(phase[-1])
+        # 疲劳使每一步的时间更不规则
+        frac = np.mod(phase + rng.normal(0.0, 0.005, n) * (1.0 + 4.0 * fatigue), 1.0)
+        stance = frac < stance_ratio
+        progress = np.where(stance, frac / stance_ratio, 0.0)
+
+        # 垂直加速度：步频正弦 + 着地冲击脉冲，疲劳时冲击和振幅增大
+        vertical_amplitude = athlete['vertical_amplitude'] * (1.0 + 0.3 * fatigue)
+        impact = athlete['impact'] * (1.0 + 0.4 * fatigue) * np.exp(-np.square(frac / 0.03))
+        noise_scale = noise * (1.0 + fatigue)
+        acc = np.empty((n, 3))
+        acc[:, 0] = 0.6 * np.sin(np.pi * phase) + noise_scale * rng.standard_normal(n)
+        acc[:, 1] = 0.8 * np.sin(2 * np.pi * phase + 0.5) + noise_scale * rng.standard_normal(n)
+        acc[:, 2] = (GRAVITY + vertical_amplitude * np.sin(2 * np.pi * frac) + impact
+                     + noise_scale * rng.standard_normal(n))
+
+        gyro = np.empty((n, 3))
+        gyro[:, 0] = 0.25 * np.sin(np.pi * phase + 0.3) + 0.25 * noise_scale * rng.standard_normal(n)
+        gyro[:, 1] = 0.15 * np.sin(2 * np.pi * phase) + 0.25 * noise_scale * rng.standard_normal(n)
+        gyro[:, 2] = 0.4 * np.sin(2 * np.pi * frac) + 0.25 * noise_scale * rng.standard_normal(n)
+
+        # 足压：支撑期内载荷先增后减，各区域权重随支撑进度从着地方式的起始分布过渡到蹬离分布
+        load = np.sin(np.pi * progress) * stance
+        weights = fore_start + np.outer(progress, fore_end - fore_start)
+        pressure = load[:, None] * weights * (1.0 + 0.2 * fatigue)[:, None]
+        pressure += 0.01 * rng.random((n, 4))
+
+        yield {
+            'timestamps_ms': start_ms + t * 1000.0,
+            'acc': acc,
+            'gyro': gyro,
+            'pressure': pressure,
+            'gait_phase': stance
+        }
@@ -0,0 +1,21 @@
+"""
+数据存储模块初始化文件
+"""
+
+from storage.session_store import (
+    SessionStore, SessionWriter, SessionReader,
+    SAMPLE_COLUMNS, RESULT_COLUMNS, GAIT_PHASES, PRESSURE_REGIONS
+)
+from storage.catalog import SessionCatalog, compute_aggregates
+from storage.export import iter_csv, iter_npz, iter_export, timestamps_to_iso
+from storage.pyramid import build_pyramid, query_series, lttb
+
+__all__ = [
+    'SessionStore', 'SessionWriter', 'SessionReader',
+    'SAMPLE_COLUMNS', 'RESULT_COLUMNS', 'GAIT_PHASES', 'PRESSURE_REGIONS',
+    'SessionCatalog', 'compute_aggregates',
+    'iter_csv', 'iter_npz', 'iter_export', 'timestamps_to_iso',
+    'build_pyramid', 'query_series', 'lttb'
+]
+
+__version__ = '1.0.0'
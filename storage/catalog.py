@@ -0,0 +1,295 @@
+"""
+会话目录模块
+
+使用SQLite（标准库sqlite3）记录所有已保存会话的元数据和聚合指标。
+聚合指标在会话关闭时计算一次并写入目录，历史列表和统计查询只访问目录，
+不需要打开任何原始数据文件；按日期的查询使用date列上的索引
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from storage.session_store import GAIT_PHASES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    duration_s REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    results INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    avg_cadence REAL,
+    avg_posture_score REAL,
+    pressure_forefoot REAL,
+    pressure_midfoot REAL,
+    pressure_rearfoot REAL,
+    pressure_lateral REAL,
+    stance_ratio REAL,
+    source TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date, started_at);
+"""
+
+# 足压分布（百分比，与分析结果的pressure_distribution相同）
+PRESSURE_FIELDS = ('pressure_forefoot', 'pressure_midfoot', 'pressure_rearfoot', 'pressure_lateral')
+
+# 目录格式版本（聚合指标的定义变化时递增）。打开旧版本的目录时清空会话记录，
+# 聚合指标是派生数据，由sync从会话存储重新计算
+CATALOG_VERSION = 2
+
+def _finite_or_none(value):
+    """将NaN转换为None，以便写入SQL NULL"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def _nanmean(values, axis=None):
+    """忽略NaN的均值，全部为NaN或为空时返回NaN且不产生警告"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    count = valid.sum(axis=axis)
+    total = np.where(valid, values, 0.0).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+def compute_aggregates(reader):
+    """
+    计算会话的聚合指标
+
+    Args:
+        reader: SessionReader实例
+
+    Returns:
+        聚合指标字典，键与sessions表的列一致
+    """
+    header = reader.header
+    samples = reader.samples
+    results = reader.results
+
+    started_at = header['created_at']
+    ended_at = header.get('closed_at')
+
+    # 时长以样本时间戳跨度为准，没有样本时使用会话开关时间
+    num_samples = len(samples['timestamp'])
+    if num_samples > 1:
+        duration_s = (float(samples['timestamp'][-1]) - float(samples['timestamp'][0])) / 1000.0
+    else:
+        duration_s = max(0.0, (ended_at or started_at) - started_at)
+
+    avg_cadence = _nanmean(results['cadence'])
+    avg_posture_score = _nanmean(results['posture_score'])
+    steps = int(round(avg_cadence * duration_s / 60.0)) if np.isfinite(avg_cadence) else 0
+
+    if len(results['timestamp']):
+        pressure = _nanmean(results['pressure_distribution'], axis=0)
+    elif num_samples:
+        # 没有分析结果时使用原始足压的平均占比，与分析结果一样以百分比表示
+        mean_pressure = _nanmean(samples['pressure'], axis=0)
+        total_pressure = np.sum(mean_pressure)
+        pressure = mean_pressure / total_pressure * 100 if total_pressure > 0 else mean_pressure
+    else:
+        pressure = np.full(len(PRESSURE_FIELDS), np.nan)
+
+    phases = np.asarray(results['gait_phase'])
+    known = phases > 0
+    stance_ratio = np.mean(phases[known] == GAIT_PHASES.index('stance')) if np.any(known) else np.nan
+
+    aggregates = {
+        'session_id': reader.session_id,
+        'date': datetime.fromtimestamp(started_at).strftime('%Y-%m-%d'),
+        'started_at': started_at,
+        'ended_at': ended_at,
+        'duration_s': duration_s,
+        'samples': num_samples,
+        'results': len(results['timestamp']),
+        'steps': steps,
+        'avg_cadence': _finite_or_none(avg_cadence),
+        'avg_posture_score': _finite_or_none(avg_posture_score),
+        'stance_ratio': _finite_or_none(stance_ratio),
+        'source': reader.metadata.get('source'),
+        'metadata': json.dumps(reader.metadata, ensure_ascii=False)
+    }
+    for field, value in zip(PRESSURE_FIELDS, pressure):
+        aggregates[field] = _finite_or_none(value)
+
+    return aggregates
+
+def _date_filter(start_date, end_date):
+    """构建日期范围的WHERE子句和参数（日期格式YYYY-MM-DD，包含两端）"""
+    clauses = []
+    params = []
+    if start_date:
+        clauses.append('date >= ?')
+        params.append(start_date)
+    if end_date:
+        clauses.append('date <= ?')
+        params.append(end_date)
+    where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    return where, params
+
+class SessionCatalog:
+    """
+    会话目录类
+
+    每个会话一行，保存会话关闭时计算的聚合指标
+    """
+
+    def __init__(self, db_path):
+        """
+        打开（必要时创建）会话目录数据库
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+            if self.connection.execute('PRAGMA user_version').fetchone()[0] != CATALOG_VERSION:
+                self.connection.execute('DELETE FROM sessions')
+                self.connection.execute(f'PRAGMA user_version = {CATALOG_VERSION}')
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.connection.close()
+
+    def add_session(self, reader):
+        """
+        计算会话的聚合指标并写入目录（已存在时覆盖）
+
+        Args:
+            reader: SessionReader实例
+
+        Returns:
+            聚合指标字典
+        """
+        aggregates = compute_aggregates(reader)
+        columns = ', '.join(aggregates)
+        placeholders = ', '.join('?' for _ in aggregates)
+        with self.lock, self.connection:
+            self.connection.execute(
+                f'INSERT OR REPLACE INTO sessions ({columns}) VALUES ({placeholders})',
+                list(aggregates.values())
+            )
+        return aggregates
+
+    def remove_session(self, session_id):
+        """从目录中移除会话"""
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def has_session(self, session_id):
+        """会话是否已在目录中"""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM sessions WHERE session_id = ?', (session_id,)
+            ).fetchone()
+        return row is not None
+
+    def sync(self, store, exclude=()):
+        """
+        将存储中尚未编入目录的会话（例如进程意外退出时未关闭的会话）加入目录，
+        并移除存储中已不存在的会话
+
+        Args:
+            store: SessionStore实例
+            exclude: 需要跳过的会话ID（例如正在记录的会话）
+
+        Returns:
+            新加入目录的会话数量
+        """
+        stored = set(store.list_sessions()) - set(exclude)
+        with self.lock:
+            cataloged = {row[0] for row in self.connection.execute('SELECT session_id FROM sessions')}
+
+        for session_id in cataloged - stored - set(exclude):
+            self.remove_session(session_id)
+
+        added = 0
+        for session_id in sorted(stored - cataloged):
+            try:
+                self.add_session(store.open_session(session_id))
+                added += 1
+            except (OSError, ValueError) as e:
+                print(f"无法编入会话目录 {session_id}: {e}")
+        return added
+
+    def get_session(self, session_id):
+        """
+        获取单个会话的记录
+
+        Returns:
+            会话记录字典，不存在时返回None
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT * FROM sessions WHERE session_id = ?', (session_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def list_sessions(self, start_date=None, end_date=None, limit=100, offset=0):
+        """
+        按日期范围列出会话，最新的在前
+
+        Args:
+            start_date: 起始日期 YYYY-MM-DD（包含）
+            end_date: 结束日期 YYYY-MM-DD（包含）
+            limit: 最多返回的会话数
+            offset: 跳过的会话数
+
+        Returns:
+            会话记录字典列表
+        """
+        where, params = _date_filter(start_date, end_date)
+        with self.lock:
+            rows = self.connection.execute(
+                f'SELECT * FROM sessions {where} ORDER BY date DESC, started_at DESC LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self, start_date=None, end_date=None):
+        """
+        计算日期范围内的汇总统计
+
+        Returns:
+            统计字典: 会话数、总时长、总步数、平均姿态评分、平均步频、平均支撑相占比
+        """
+        where, params = _date_filter(start_date, end_date)
+        with self.lock:
+            row = self.connection.execute(
+                f'''SELECT COUNT(*) AS total_sessions,
+                           COALESCE(SUM(duration_s), 0) AS total_duration_s,
+                           COALESCE(SUM(steps), 0) AS total_steps,
+                           AVG(avg_posture_score) AS avg_score,
+                           AVG(avg_cadence) AS avg_cadence,
+                           AVG(stance_ratio) AS avg_stance_ratio
+                    FROM sessions {where}''',
+                params
+            ).fetchone()
+        return dict(row)
+
+    def revision(self):
+        """
+        获取目录的修订标识
+
+        会话加入、移除或聚合指标更新（关闭会话时覆盖写入）后修订标识都会改变，
+        可作为依赖目录内容的缓存的键
+
+        Returns:
+            字符串: 会话数、最后关闭时间和结果总数
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT COUNT(*), MAX(ended_at), COALESCE(SUM(results), 0) FROM sessions'
+            ).fetchone()
+        return '{}:{}:{}'.format(*row)
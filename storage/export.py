@@ -0,0 +1,233 @@
+"""
+会话导出模块
+
+以生成器的形式按块读取会话数据并输出CSV文本或NPZ压缩包，
+内存占用只与块大小有关，与会话长度无关，可以直接作为流式HTTP响应的内容
+"""
+import io
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+from storage.session_store import TABLES, GAIT_PHASES
+
+EXPORT_FORMATS = ('csv', 'npz')
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'npz': 'application/zip'
+}
+
+# 每次读取和输出的行数
+DEFAULT_EXPORT_CHUNK_ROWS = 20000
+
+# CSV中多通道列的展开列名（与decode_data工具的CSV格式一致）
+CSV_CHANNEL_NAMES = {
+    'acc': ['acc_x', 'acc_y', 'acc_z'],
+    'gyro': ['gyro_x', 'gyro_y', 'gyro_z'],
+    'pressure': ['pressure_1', 'pressure_2', 'pressure_3', 'pressure_4']
+}
+
+# CSV中浮点数的格式
+CSV_FLOAT_FORMAT = '%.6g'
+
+def timestamps_to_iso(timestamps_ms):
+    """
+    批量将毫秒时间戳转换为本地时间的ISO格式字符串（毫秒精度）
+
+    Args:
+        timestamps_ms: 毫秒时间戳数组
+
+    Returns:
+        字符串数组，格式与datetime.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]一致
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+    if len(timestamps_ms) == 0:
+        return np.array([], dtype='U23')
+
+    # 使用第一个时间戳的本地时区偏移统一转换
+    first = datetime.fromtimestamp(timestamps_ms[0] / 1000.0).astimezone()
+    offset_ms = first.utcoffset().total_seconds() * 1000
+    local = np.round(timestamps_ms + offset_ms).astype(np.int64).astype('datetime64[ms]')
+    return np.datetime_as_string(local, unit='ms')
+
+def csv_header(table='samples'):
+    """
+    获取表导出为CSV时的列名
+
+    Returns:
+        列名列表
+    """
+    names = []
+    for name, (_, shape) in TABLES[table].items():
+        if shape:
+            names.extend(CSV_CHANNEL_NAMES.get(name, [f'{name}_{i + 1}' for i in range(shape[0])]))
+        else:
+            names.append(name)
+    return names
+
+def format_csv_block(columns, formats):
+    """
+    将一块按列存储的数据格式化为CSV文本
+
+    各列放入一个(n, 列数)的对象数组，由np.savetxt一次写入内存缓冲区
+
+    Args:
+        columns: 输出列的数组列表，每个形状为(n,)
+        formats: 每列的格式字符串
+
+    Returns:
+        CSV文本（每行以换行符结尾）
+    """
+    n = len(columns[0]) if columns else 0
+    if n == 0:
+        return ''
+
+    block = np.empty((n, len(columns)), dtype=object)
+    for i, values in enumerate(columns):
+        block[:, i] = values
+
+    buffer = io.StringIO()
+    np.savetxt(buffer, block, fmt=formats, delimiter=',')
+    return buffer.getvalue()
+
+def format_csv_rows(columns, table='samples'):
+    """
+    将一块数据格式化为CSV文本
+
+    时间戳批量转换为ISO字符串，步态相位转换为标签，其余列按CSV_FLOAT_FORMAT格式化
+
+    Args:
+        columns: 列名 -> 数组 的字典
+        table: 表名
+
+    Returns:
+        CSV文本（每行以换行符结尾）
+    """
+    n = len(columns['timestamp'])
+    if n == 0:
+        return ''
+
+    # 按表定义的列顺序收集每个输出列的值和格式
+    output_columns = []
+    formats = []
+    for name in TABLES[table]:
+        values = columns[name]
+        if name == 'timestamp':
+            output_columns.append(timestamps_to_iso(values))
+            formats.append('%s')
+        elif name == 'gait_phase':
+            labels = np.array([label or '' for label in GAIT_PHASES])
+            output_columns.append(labels[np.clip(values, 0, len(labels) - 1)])
+            formats.append('%s')
+        else:
+            channels = np.asarray(values, dtype=np.float64).reshape(n, -1).T
+            output_columns.extend(channels)
+            formats.extend([CSV_FLOAT_FORMAT] * len(channels))
+
+    return format_csv_block(output_columns, formats)
+
+def iter_csv(reader, start_ms=None, end_ms=None, table='samples', chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """
+    按块生成会话的CSV文本
+
+    Args:
+        reader: SessionReader实例
+        start_ms: 起始时间戳（包含），None表示从头开始
+        end_ms: 结束时间戳（包含），None表示到末尾
+        table: 导出的表
+        chunk_rows: 每块的行数
+
+    Yields:
+        UTF-8编码的CSV文本块
+    """
+    yield (','.join(csv_header(table)) + '\n').encode('utf-8')
+    for chunk in reader.iter_chunks(chunk_rows, start_ms, end_ms, table):
+        yield format_csv_rows(chunk, table).encode('utf-8')
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    只写的内存缓冲区
+
+    zipfile写入不可定位的流时使用数据描述符，写出的字节在每块之后取走，
+    缓冲区大小不超过一块压缩后的数据
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        """取出并清空已写入的字节"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_npz(reader, start_ms=None, end_ms=None, table='samples', chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """
+    按块生成会话的NPZ压缩包（可用numpy.load读取，每列一个数组）
+
+    每个数组的.npy头在写入前根据行数确定，数据逐块压缩写入
+
+    Args:
+        reader: SessionReader实例
+        start_ms: 起始时间戳（包含），None表示从头开始
+        end_ms: 结束时间戳（包含），None表示到末尾
+        table: 导出的表
+        chunk_rows: 每块的行数
+
+    Yields:
+        压缩包的字节块
+    """
+    start, end = reader.row_range(start_ms, end_ms, table)
+    buffer = _StreamBuffer()
+
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, (dtype, shape) in TABLES[table].items():
+            with archive.open(f'{name}.npy', mode='w', force_zip64=True) as entry:
+                np.lib.format.write_array_header_1_0(entry, {
+                    'descr': np.dtype(dtype).str,
+                    'fortran_order': False,
+                    'shape': (end - start,) + tuple(shape)
+                })
+                for chunk in reader.iter_chunks(chunk_rows, start_ms, end_ms, table, columns=[name]):
+                    entry.write(np.ascontiguousarray(chunk[name], dtype=dtype).tobytes())
+                    data = buffer.pop()
+                    if data:
+                        yield data
+
+            data = buffer.pop()
+            if data:
+                yield data
+
+    yield buffer.pop()
+
+def iter_export(reader, export_format, start_ms=None, end_ms=None, table='samples',
+                chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """
+    按格式生成导出内容
+
+    Args:
+        reader: SessionReader实例
+        export_format: 'csv'或'npz'
+
+    Returns:
+        生成字节块的生成器
+    """
+    if export_format == 'csv':
+        return iter_csv(reader, start_ms, end_ms, table, chunk_rows)
+    if export_format == 'npz':
+        return iter_npz(reader, start_ms, end_ms, table, chunk_rows)
+    raise ValueError(f'不支持的导出格式: {export_format}')
+
+def export_filename(session_id, export_format, table='samples'):
+    """获取导出文件名"""
+    suffix = '' if table == 'samples' else f'_{table}'
+    return f'{session_id}{suffix}.{export_format}'
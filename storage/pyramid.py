@@ -0,0 +1,336 @@
+"""
+多分辨率降采样模块
+
+为每个会话预先计算按秒和按分钟聚合的min/max/mean视图（降采样金字塔），
+并提供LTTB(Largest-Triangle-Three-Buckets)视觉降采样。
+查询时根据请求的时间跨度和像素宽度选择合适的层级，
+长时间会话的缩略图只需读取几千个聚合点，而不是数百万个原始样本
+
+金字塔文件保存在会话目录的pyramid/子目录中，每个(表, 层级, 统计量)一个.npy文件，
+读取时使用内存映射
+"""
+import os
+
+import numpy as np
+
+from storage.session_store import TABLES
+from storage.export import CSV_CHANNEL_NAMES
+
+# 聚合层级的时间桶宽度(毫秒)，从细到粗
+PYRAMID_LEVELS = (1000, 60000)
+
+PYRAMID_STATS = ('timestamp', 'count', 'min', 'max', 'mean')
+
+# 构建金字塔时每次读取的行数
+PYRAMID_CHUNK_ROWS = 100000
+
+# 原始数据层使用LTTB时允许的最大输入点数，超过时改用聚合层
+MAX_LTTB_INPUT = 200000
+
+def channel_names(table='samples'):
+    """
+    获取表中参与降采样的通道名（浮点列按通道展开）
+
+    Returns:
+        通道名列表
+    """
+    names = []
+    for name, (dtype, shape) in TABLES[table].items():
+        if name == 'timestamp' or np.dtype(dtype).kind != 'f':
+            continue
+        if shape:
+            names.extend(CSV_CHANNEL_NAMES.get(name, [f'{name}_{i + 1}' for i in range(shape[0])]))
+        else:
+            names.append(name)
+    return names
+
+def flatten_channels(columns, table='samples'):
+    """
+    将一块表数据展开为通道矩阵
+
+    Returns:
+        形状为(n, n_channels)的float64数组，列顺序与channel_names一致
+    """
+    n = len(columns['timestamp'])
+    parts = [
+        np.asarray(columns[name], dtype=np.float64).reshape(n, -1)
+        for name, (dtype, _) in TABLES[table].items()
+        if name != 'timestamp' and np.dtype(dtype).kind == 'f'
+    ]
+    return np.hstack(parts) if parts else np.empty((n, 0))
+
+def _reduce_runs(keys, count, valid, vmin, vmax, vsum):
+    """
+    合并keys相同的相邻行（keys必须有序）
+
+    Returns:
+        合并后的 (keys, count, valid, vmin, vmax, vsum)
+    """
+    if len(keys) == 0:
+        return keys, count, valid, vmin, vmax, vsum
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (
+        keys[starts],
+        np.add.reduceat(count, starts),
+        np.add.reduceat(valid, starts, axis=0),
+        np.fmin.reduceat(vmin, starts, axis=0),
+        np.fmax.reduceat(vmax, starts, axis=0),
+        np.add.reduceat(vsum, starts, axis=0)
+    )
+
+def _aggregate(timestamps, values, bin_ms):
+    """
+    将原始数据按时间桶聚合（NaN不参与统计）
+
+    Returns:
+        (桶编号, 行数, 有效值数, 最小值, 最大值, 和)
+    """
+    keys = np.floor(np.asarray(timestamps, dtype=np.float64) / bin_ms).astype(np.int64)
+    finite = np.isfinite(values)
+    return _reduce_runs(
+        keys,
+        np.ones(len(keys), dtype=np.int64),
+        finite.astype(np.int64),
+        values,
+        values,
+        np.where(finite, values, 0.0)
+    )
+
+def _level_arrays(bin_ms, keys, count, valid, vmin, vmax, vsum):
+    """将聚合结果转换为保存的数组"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = vsum / valid
+    return {
+        'timestamp': (keys * bin_ms).astype(np.float64),
+        'count': count.astype(np.uint32),
+        'min': vmin.astype(np.float32),
+        'max': vmax.astype(np.float32),
+        'mean': mean.astype(np.float32)
+    }
+
+def _pyramid_path(reader, table, bin_ms, stat):
+    """获取金字塔文件路径"""
+    return os.path.join(reader.session_dir, 'pyramid', f'{table}_{bin_ms}ms_{stat}.npy')
+
+def build_pyramid(reader, table='samples', levels=PYRAMID_LEVELS, chunk_rows=PYRAMID_CHUNK_ROWS):
+    """
+    计算并保存会话的降采样金字塔
+
+    最细的层级从原始数据按块计算，内存占用与会话长度无关；
+    更粗的层级由上一层合并得到
+
+    Args:
+        reader: SessionReader实例
+        table: 表名
+        levels: 各层的时间桶宽度(毫秒)，从细到粗，每层必须是上一层的整数倍
+        chunk_rows: 每次读取的原始数据行数
+
+    Returns:
+        层级宽度 -> 聚合点数 的字典
+    """
+    n_channels = len(channel_names(table))
+    parts = [
+        _aggregate(chunk['timestamp'], flatten_channels(chunk, table), levels[0])
+        for chunk in reader.iter_chunks(chunk_rows, table=table)
+    ]
+    if parts:
+        merged = _reduce_runs(*(np.concatenate(arrays) for arrays in zip(*parts)))
+    else:
+        empty = np.empty((0, n_channels))
+        merged = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                  np.empty((0, n_channels), dtype=np.int64), empty, empty, empty)
+
+    os.makedirs(os.path.join(reader.session_dir, 'pyramid'), exist_ok=True)
+
+    sizes = {}
+    previous_ms = levels[0]
+    for bin_ms in levels:
+        if bin_ms != previous_ms:
+            if bin_ms % previous_ms:
+                raise ValueError(f'层级宽度{bin_ms}不是{previous_ms}的整数倍')
+            keys = merged[0] // (bin_ms // previous_ms)
+            merged = _reduce_runs(keys, *merged[1:])
+            previous_ms = bin_ms
+
+        for stat, array in _level_arrays(bin_ms, *merged).items():
+            np.save(_pyramid_path(reader, table, bin_ms, stat), array)
+        sizes[bin_ms] = len(merged[0])
+
+    return sizes
+
+def load_level(reader, table, bin_ms):
+    """
+    内存映射读取一个聚合层级，文件不存在时先构建金字塔
+
+    Returns:
+        统计量 -> 数组 的字典
+    """
+    if not os.path.exists(_pyramid_path(reader, table, bin_ms, 'mean')):
+        build_pyramid(reader, table)
+    return {stat: np.load(_pyramid_path(reader, table, bin_ms, stat), mmap_mode='r') for stat in PYRAMID_STATS}
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets降采样
+
+    保留首尾两点，其余点分为n_out-2个桶，每个桶选择与上一个选中点和下一个桶均值
+    构成的三角形面积最大的点，能在很少的点数下保持曲线的视觉形状
+
+    Args:
+        x: 单调递增的横坐标
+        y: 纵坐标（NaN点不会被选中，除非整个桶都是NaN）
+        n_out: 输出点数
+
+    Returns:
+        选中点的索引数组
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 中间n-2个点分为n_out-2个桶
+    edges = (np.linspace(0, n - 2, n_out - 1) + 1).astype(np.int64)
+    edges[-1] = n - 1
+
+    # 预先计算每个桶的均值（最后一个桶之后是终点）
+    valid = np.isfinite(y)
+    counts = np.diff(edges)
+    bucket_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bucket_y = np.add.reduceat(np.where(valid, y, 0.0)[:-1], edges[:-1]) / np.add.reduceat(valid[:-1], edges[:-1])
+    next_x = np.r_[bucket_x[1:], x[-1]]
+    next_y = np.r_[bucket_y[1:], y[-1]]
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y[i] - y[a]))
+        area = np.where(np.isfinite(area), area, -1.0)
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+def _merge_groups(level, group):
+    """将聚合层中每group个相邻点合并为一个点"""
+    n = len(level['timestamp'])
+    starts = np.arange(0, n, group)
+    count = np.add.reduceat(np.asarray(level['count'], dtype=np.int64), starts)
+
+    # 用行数加权合并均值（NaN均值的桶权重为0）
+    mean = np.asarray(level['mean'], dtype=np.float64)
+    weights = np.where(np.isfinite(mean), np.asarray(level['count'], dtype=np.float64)[:, np.newaxis], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        merged_mean = np.add.reduceat(np.where(weights > 0, mean, 0.0) * weights, starts) / np.add.reduceat(weights, starts)
+
+    return {
+        'timestamp': np.asarray(level['timestamp'])[starts],
+        'count': count,
+        'min': np.fmin.reduceat(np.asarray(level['min']), starts),
+        'max': np.fmax.reduceat(np.asarray(level['max']), starts),
+        'mean': merged_mean
+    }
+
+def _to_list(values):
+    """数组转换为列表，NaN转换为None"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+def query_series(reader, start_ms=None, end_ms=None, width=1000, channels=None, table='samples',
+                 levels=PYRAMID_LEVELS):
+    """
+    查询用于绘图的降采样序列
+
+    选择点数不少于width的最粗层级：时间跨度很短时使用原始数据并通过LTTB降到width个点；
+    否则使用聚合层，点数超过width时将相邻的桶合并，保留每个像素内的min/max包络
+
+    Args:
+        reader: SessionReader实例
+        start_ms: 起始时间戳，None表示会话开始
+        end_ms: 结束时间戳，None表示会话结束
+        width: 图表像素宽度（期望的点数）
+        channels: 通道名列表，None表示所有通道
+        table: 表名
+
+    Returns:
+        结果字典: level（'raw'或桶宽度毫秒）、points、series（通道名 -> 数据），
+        原始层每个通道为 {'timestamps', 'values'}，聚合层每个通道为 {'timestamps', 'min', 'max', 'mean'}
+    """
+    names = channel_names(table)
+    channels = channels or names
+    unknown = [channel for channel in channels if channel not in names]
+    if unknown:
+        raise ValueError(f"未知的通道: {', '.join(unknown)}")
+    column_index = [names.index(channel) for channel in channels]
+    width = max(3, int(width))
+
+    first_ms, last_ms = reader.time_bounds(table)
+    if first_ms is None:
+        return {'level': 'raw', 'bin_ms': None, 'points': 0, 'series': {channel: {'timestamps': [], 'values': []}
+                                                                        for channel in channels}}
+    start_ms = first_ms if start_ms is None else max(start_ms, first_ms)
+    end_ms = last_ms if end_ms is None else min(end_ms, last_ms)
+    span_ms = max(0.0, end_ms - start_ms)
+
+    # 选择点数不少于width的最粗层级
+    bin_ms = None
+    for level_ms in reversed(levels):
+        if span_ms / level_ms >= width:
+            bin_ms = level_ms
+            break
+
+    if bin_ms is None:
+        row_start, row_end = reader.row_range(start_ms, end_ms, table)
+        if row_end - row_start > MAX_LTTB_INPUT:
+            bin_ms = levels[0]
+
+    if bin_ms is None:
+        # 原始数据 + LTTB
+        data = reader.read(start_ms, end_ms, table)
+        timestamps = np.asarray(data['timestamp'])
+        values = flatten_channels(data, table)[:, column_index]
+
+        series = {}
+        for i, channel in enumerate(channels):
+            selected = lttb(timestamps, values[:, i], width)
+            series[channel] = {
+                'timestamps': timestamps[selected].tolist(),
+                'values': _to_list(values[selected, i])
+            }
+        return {'level': 'raw', 'bin_ms': None, 'points': len(timestamps), 'series': series}
+
+    # 聚合层，时间桶起点落在查询范围内（起始桶向前对齐）
+    level = load_level(reader, table, bin_ms)
+    level_timestamps = level['timestamp']
+    first = int(np.searchsorted(level_timestamps, np.floor(start_ms / bin_ms) * bin_ms, side='left'))
+    last = int(np.searchsorted(level_timestamps, end_ms, side='right'))
+    selected = {
+        'timestamp': np.asarray(level_timestamps[first:last]),
+        'count': np.asarray(level['count'][first:last]),
+        'min': np.asarray(level['min'][first:last])[:, column_index],
+        'max': np.asarray(level['max'][first:last])[:, column_index],
+        'mean': np.asarray(level['mean'][first:last])[:, column_index]
+    }
+
+    points = len(selected['timestamp'])
+    if points > width:
+        selected = _merge_groups(selected, int(np.ceil(points / width)))
+
+    timestamps = selected['timestamp'].tolist()
+    series = {
+        channel: {
+            'timestamps': timestamps,
+            'min': _to_list(selected['min'][:, i]),
+            'max': _to_list(selected['max'][:, i]),
+            'mean': _to_list(selected['mean'][:, i])
+        }
+        for i, channel in enumerate(channels)
+    }
+    return {'level': bin_ms, 'bin_ms': bin_ms, 'points': points, 'series': series}
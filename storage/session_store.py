@@ -0,0 +1,555 @@
+"""
+会话存储模块
+
+以只追加的列式二进制格式保存采集会话：每个会话一个目录，
+每个数据表（samples原始样本、results分析结果）的每一列一个定长dtype的二进制文件，
+另有一个小的JSON头文件和按块记录的二进制索引。
+
+采集过程中数据按块追加写入，停止时只需写入剩余的缓冲数据并更新头文件；
+读取时通过内存映射打开各列文件，无需把整个会话加载到内存。
+
+目录结构:
+    <session_id>/
+        header.json            格式版本、会话元数据、各表的列定义和行数
+        index.bin              块索引，每条记录: 表编号(B) 起始行(Q) 行数(I) 起始时间戳(d) 结束时间戳(d)
+        samples/timestamp.bin  毫秒时间戳 float64
+        samples/acc.bin        加速度 float32 x 3
+        samples/gyro.bin       角速度 float32 x 3
+        samples/pressure.bin   足压 float32 x 4
+        results/<列名>.bin      分析结果各列
+"""
+import os
+import json
+import struct
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# 表定义: 列名 -> (dtype, 每行形状)
+SAMPLE_COLUMNS = {
+    'timestamp': ('<f8', ()),
+    'acc': ('<f4', (3,)),
+    'gyro': ('<f4', (3,)),
+    'pressure': ('<f4', (4,))
+}
+
+RESULT_COLUMNS = {
+    'timestamp': ('<f8', ()),
+    'posture_score': ('<f4', ()),
+    'gait_phase': ('u1', ()),
+    'phase_confidence': ('<f4', ()),
+    'cadence': ('<f4', ()),
+    'vertical_oscillation': ('<f4', ()),
+    'impact_force': ('<f4', ()),
+    'inference_time_ms': ('<f4', ()),
+    'pressure_distribution': ('<f4', (4,)),
+    'forefoot_hindfoot_ratio': ('<f4', ()),
+    'medial_lateral_ratio': ('<f4', ())
+}
+
+TABLES = {
+    'samples': SAMPLE_COLUMNS,
+    'results': RESULT_COLUMNS
+}
+
+# 步态相位编码，0表示未知
+GAIT_PHASES = (None, 'stance', 'swing')
+
+# pressure_distribution列中各足压区域的顺序（结果中pressure_distribution字典的键）
+PRESSURE_REGIONS = ('forefoot', 'midfoot', 'hindfoot', 'lateral')
+
+INDEX_RECORD = struct.Struct('<BQIdd')
+
+# 默认每块的行数: 原始样本200Hz下约1秒，分析结果约1秒
+DEFAULT_CHUNK_ROWS = {
+    'samples': 200,
+    'results': 4
+}
+
+# 元数据中没有记录采样率且无法从时间戳估计时使用的采样率(Hz)
+DEFAULT_SAMPLING_RATE = 200
+
+# 估计采样率时使用的开头样本数
+SAMPLING_RATE_ESTIMATE_ROWS = 1000
+
+def generate_session_id():
+    """按当前时间生成会话ID"""
+    return f'session_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+
+def _column_path(session_dir, table, column):
+    """获取列文件路径"""
+    return os.path.join(session_dir, table, f'{column}.bin')
+
+def _row_nbytes(dtype, shape):
+    """获取列中一行的字节数"""
+    return np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+
+def _write_json_atomic(path, data):
+    """写入JSON文件（先写临时文件再替换，避免读到半个文件）"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def results_to_columns(results):
+    """
+    将数据处理器产生的结果字典列表转换为结果表的列
+
+    Args:
+        results: 结果字典列表（包含gait、pressure和timestamp）
+
+    Returns:
+        列名 -> 数组 的字典
+    """
+    results = [r for r in results if r.get('gait') is not None and r.get('pressure') is not None]
+    n = len(results)
+    columns = {
+        name: np.full((n,) + shape, np.nan if np.dtype(dtype).kind == 'f' else 0, dtype=dtype)
+        for name, (dtype, shape) in RESULT_COLUMNS.items()
+    }
+
+    for i, result in enumerate(results):
+        gait = result['gait']
+        pressure = result['pressure']
+        features = gait['features']
+
+        columns['timestamp'][i] = result.get('timestamp', np.nan)
+        columns['posture_score'][i] = gait['posture_score']
+        columns['gait_phase'][i] = GAIT_PHASES.index(gait['gait_phase']) if gait['gait_phase'] in GAIT_PHASES else 0
+        if gait['phase_confidence'] is not None:
+            columns['phase_confidence'][i] = gait['phase_confidence']
+        columns['cadence'][i] = features['cadence']
+        columns['vertical_oscillation'][i] = features['vertical_oscillation']
+        columns['impact_force'][i] = features['impact_force']
+        columns['inference_time_ms'][i] = gait['inference_time_ms']
+        distribution = pressure['pressure_distribution']
+        columns['pressure_distribution'][i] = [distribution[region] for region in PRESSURE_REGIONS]
+        columns['forefoot_hindfoot_ratio'][i] = pressure.get('forefoot_hindfoot_ratio', np.nan)
+        columns['medial_lateral_ratio'][i] = pressure.get('medial_lateral_ratio', np.nan)
+
+    return columns
+
+class SessionWriter:
+    """
+    会话写入器类
+
+    将数据按表缓存，缓存行数达到chunk_rows时作为一个块追加到各列文件并记录索引。
+    只追加、不修改已写入的数据，进程意外退出时最多丢失未写入的一个块
+    """
+
+    def __init__(self, session_dir, session_id, metadata=None, chunk_rows=None):
+        """
+        创建新会话
+
+        Args:
+            session_dir: 会话目录（不能已存在）
+            session_id: 会话ID
+            metadata: 会话元数据字典
+            chunk_rows: 每块的行数，可以是整数（所有表相同）或 表名 -> 行数 的字典，
+                        为None时使用DEFAULT_CHUNK_ROWS
+        """
+        self.session_dir = session_dir
+        self.session_id = session_id
+        if chunk_rows is None:
+            chunk_rows = DEFAULT_CHUNK_ROWS
+        if isinstance(chunk_rows, int):
+            chunk_rows = {table: chunk_rows for table in TABLES}
+        self.chunk_rows = {table: chunk_rows.get(table, DEFAULT_CHUNK_ROWS[table]) for table in TABLES}
+
+        self.lock = threading.Lock()
+        self.buffers = {table: [] for table in TABLES}
+        self.buffered_rows = {table: 0 for table in TABLES}
+        self.row_counts = {table: 0 for table in TABLES}
+        self.time_range = [None, None]
+        self.closed = False
+
+        os.makedirs(session_dir)
+        for table in TABLES:
+            os.makedirs(os.path.join(session_dir, table))
+
+        self.files = {
+            table: {column: open(_column_path(session_dir, table, column), 'ab') for column in columns}
+            for table, columns in TABLES.items()
+        }
+        self.index_file = open(os.path.join(session_dir, 'index.bin'), 'ab')
+
+        self.header = {
+            'format_version': FORMAT_VERSION,
+            'session_id': session_id,
+            'created_at': time.time(),
+            'closed_at': None,
+            'metadata': metadata or {},
+            'tables': {
+                table: {
+                    'rows': 0,
+                    'columns': {name: {'dtype': dtype, 'shape': list(shape)} for name, (dtype, shape) in columns.items()}
+                }
+                for table, columns in TABLES.items()
+            },
+            'start_timestamp': None,
+            'end_timestamp': None
+        }
+        _write_json_atomic(os.path.join(session_dir, 'header.json'), self.header)
+
+    def append_samples(self, timestamps_ms, acc, gyro, pressure):
+        """
+        追加一批原始样本
+
+        Args:
+            timestamps_ms: 形状为(n,)的毫秒时间戳
+            acc: 形状为(n, 3)的加速度
+            gyro: 形状为(n, 3)的角速度
+            pressure: 形状为(n, 4)的足压
+        """
+        self.append('samples', {
+            'timestamp': timestamps_ms,
+            'acc': acc,
+            'gyro': gyro,
+            'pressure': pressure
+        })
+
+    def append_results(self, results):
+        """
+        追加一批分析结果
+
+        Args:
+            results: 数据处理器产生的结果字典列表
+        """
+        columns = results_to_columns(results)
+        if len(columns['timestamp']):
+            self.append('results', columns)
+
+    def append(self, table, columns):
+        """
+        追加一批行
+
+        Args:
+            table: 表名
+            columns: 列名 -> 数组 的字典，所有列的行数相同
+        """
+        definition = TABLES[table]
+        arrays = {
+            name: np.ascontiguousarray(columns[name], dtype=dtype).reshape((-1,) + shape)
+            for name, (dtype, shape) in definition.items()
+        }
+        n = len(arrays['timestamp'])
+        if n == 0:
+            return
+
+        with self.lock:
+            if self.closed:
+                raise ValueError(f'会话已关闭: {self.session_id}')
+
+            self.buffers[table].append(arrays)
+            self.buffered_rows[table] += n
+            if self.buffered_rows[table] >= self.chunk_rows[table]:
+                self._flush_table(table)
+
+    def _flush_table(self, table):
+        """将表的缓存数据作为一个块写入（调用方需持有锁）"""
+        buffers = self.buffers[table]
+        if not buffers:
+            return
+
+        chunk = {name: np.concatenate([b[name] for b in buffers]) for name in TABLES[table]}
+        n = len(chunk['timestamp'])
+
+        # 先写数据再写索引，索引中的块一定是完整的
+        for name, f in self.files[table].items():
+            f.write(chunk[name].tobytes())
+            f.flush()
+
+        first_ts = float(chunk['timestamp'][0])
+        last_ts = float(chunk['timestamp'][-1])
+        self.index_file.write(INDEX_RECORD.pack(
+            list(TABLES).index(table), self.row_counts[table], n, first_ts, last_ts
+        ))
+        self.index_file.flush()
+
+        self.row_counts[table] += n
+        if table == 'samples':
+            if self.time_range[0] is None:
+                self.time_range[0] = first_ts
+            self.time_range[1] = last_ts
+
+        self.buffers[table] = []
+        self.buffered_rows[table] = 0
+
+    def flush(self):
+        """写入所有缓存数据"""
+        with self.lock:
+            for table in TABLES:
+                self._flush_table(table)
+
+    def close(self, metadata=None):
+        """
+        写入剩余数据并关闭会话
+
+        Args:
+            metadata: 需要合并到会话元数据中的字典
+
+        Returns:
+            会话头信息字典
+        """
+        with self.lock:
+            if self.closed:
+                return self.header
+
+            for table in TABLES:
+                self._flush_table(table)
+
+            for files in self.files.values():
+                for f in files.values():
+                    f.close()
+            self.index_file.close()
+            self.closed = True
+
+            if metadata:
+                self.header['metadata'].update(metadata)
+            self.header['closed_at'] = time.time()
+            for table in TABLES:
+                self.header['tables'][table]['rows'] = self.row_counts[table]
+            self.header['start_timestamp'], self.header['end_timestamp'] = self.time_range
+            _write_json_atomic(os.path.join(self.session_dir, 'header.json'), self.header)
+
+            return self.header
+
+class SessionReader:
+    """
+    会话读取器类
+
+    通过内存映射打开各列文件。未正常关闭的会话按各列文件中完整的行数读取
+    """
+
+    def __init__(self, session_dir):
+        """
+        打开会话
+
+        Args:
+            session_dir: 会话目录
+        """
+        self.session_dir = session_dir
+
+        with open(os.path.join(session_dir, 'header.json'), 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+        if self.header.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"不支持的会话格式版本: {self.header.get('format_version')}")
+
+        self.session_id = self.header['session_id']
+        self.tables = {table: self._open_table(table) for table in self.header['tables']}
+
+    def _open_table(self, table):
+        """内存映射表的所有列"""
+        columns = self.header['tables'][table]['columns']
+
+        # 行数取各列文件中完整行数的最小值
+        rows = None
+        for name, column in columns.items():
+            path = _column_path(self.session_dir, table, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            column_rows = size // _row_nbytes(column['dtype'], column['shape'])
+            rows = column_rows if rows is None else min(rows, column_rows)
+
+        arrays = {}
+        for name, column in columns.items():
+            shape = (rows,) + tuple(column['shape'])
+            if rows:
+                arrays[name] = np.memmap(_column_path(self.session_dir, table, name),
+                                         dtype=column['dtype'], mode='r', shape=shape)
+            else:
+                arrays[name] = np.empty(shape, dtype=column['dtype'])
+        return arrays
+
+    @property
+    def is_closed(self):
+        """会话是否已正常关闭"""
+        return self.header.get('closed_at') is not None
+
+    @property
+    def metadata(self):
+        """会话元数据"""
+        return self.header.get('metadata', {})
+
+    @property
+    def sampling_rate(self):
+        """
+        原始样本的采样率(Hz)
+
+        优先使用会话元数据中记录的采样率，没有记录时（例如解码的设备数据）
+        按开头样本时间戳间隔的中位数估计
+        """
+        sampling_rate = self.metadata.get('sampling_rate')
+        if sampling_rate:
+            return sampling_rate
+
+        timestamps = np.asarray(self.samples['timestamp'][:SAMPLING_RATE_ESTIMATE_ROWS], dtype=np.float64)
+        intervals = np.diff(timestamps)
+        intervals = intervals[intervals > 0]
+        if len(intervals) == 0:
+            return DEFAULT_SAMPLING_RATE
+        return int(round(1000.0 / np.median(intervals)))
+
+    def num_rows(self, table='samples'):
+        """获取表的行数"""
+        return len(self.tables[table]['timestamp'])
+
+    def column(self, name, table='samples'):
+        """获取内存映射的列"""
+        return self.tables[table][name]
+
+    @property
+    def samples(self):
+        """原始样本表（列名 -> 内存映射数组）"""
+        return self.tables['samples']
+
+    @property
+    def results(self):
+        """分析结果表（列名 -> 内存映射数组）"""
+        return self.tables['results']
+
+    def time_bounds(self, table='samples'):
+        """
+        获取表的时间范围
+
+        Returns:
+            (起始时间戳, 结束时间戳)，表为空时返回(None, None)
+        """
+        timestamps = self.tables[table]['timestamp']
+        if len(timestamps) == 0:
+            return None, None
+        return float(timestamps[0]), float(timestamps[-1])
+
+    def row_range(self, start_ms=None, end_ms=None, table='samples'):
+        """
+        获取时间范围对应的行区间（时间戳单调递增，使用二分查找）
+
+        Args:
+            start_ms: 起始时间戳（包含），None表示从头开始
+            end_ms: 结束时间戳（包含），None表示到末尾
+
+        Returns:
+            (起始行, 结束行)，结束行不包含
+        """
+        timestamps = self.tables[table]['timestamp']
+        start = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+        end = len(timestamps) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='right'))
+        return start, max(start, end)
+
+    def read(self, start_ms=None, end_ms=None, table='samples', columns=None):
+        """
+        读取时间范围内的数据（返回内存映射的切片，不复制数据）
+
+        Returns:
+            列名 -> 数组 的字典
+        """
+        start, end = self.row_range(start_ms, end_ms, table)
+        names = columns or list(self.tables[table])
+        return {name: self.tables[table][name][start:end] for name in names}
+
+    def iter_chunks(self, chunk_rows=10000, start_ms=None, end_ms=None, table='samples', columns=None):
+        """
+        按块遍历时间范围内的数据，每次只读入一块，内存占用与会话长度无关
+
+        Yields:
+            列名 -> 数组 的字典
+        """
+        start, end = self.row_range(start_ms, end_ms, table)
+        names = columns or list(self.tables[table])
+        for chunk_start in range(start, end, chunk_rows):
+            chunk_end = min(chunk_start + chunk_rows, end)
+            yield {name: np.asarray(self.tables[table][name][chunk_start:chunk_end]) for name in names}
+
+    def read_index(self):
+        """
+        读取块索引
+
+        Returns:
+            块记录列表，每条为 (表名, 起始行, 行数, 起始时间戳, 结束时间戳)
+        """
+        path = os.path.join(self.session_dir, 'index.bin')
+        if not os.path.exists(path):
+            return []
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        table_names = list(TABLES)
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        return [
+            (table_names[table], row, n, first_ts, last_ts)
+            for table, row, n, first_ts, last_ts in INDEX_RECORD.iter_unpack(data[:usable])
+        ]
+
+class SessionStore:
+    """
+    会话存储类
+
+    管理根目录下的所有会话
+    """
+
+    def __init__(self, root_dir):
+        """
+        初始化会话存储
+
+        Args:
+            root_dir: 会话根目录
+        """
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def session_dir(self, session_id):
+        """获取会话目录，拒绝包含路径分隔符的会话ID"""
+        if not session_id or session_id != os.path.basename(session_id) or session_id.startswith('.'):
+            raise ValueError(f'无效的会话ID: {session_id}')
+        return os.path.join(self.root_dir, session_id)
+
+    def create_session(self, session_id=None, metadata=None, chunk_rows=None):
+        """
+        创建新会话
+
+        Args:
+            session_id: 会话ID，为None时按当前时间生成（重名时追加序号）
+            metadata: 会话元数据字典
+            chunk_rows: 每块的行数，参见SessionWriter
+
+        Returns:
+            SessionWriter实例
+        """
+        if session_id is None:
+            base_id = generate_session_id()
+            session_id = base_id
+            suffix = 1
+            while os.path.exists(self.session_dir(session_id)):
+                suffix += 1
+                session_id = f'{base_id}_{suffix}'
+
+        return SessionWriter(self.session_dir(session_id), session_id, metadata, chunk_rows)
+
+    def open_session(self, session_id):
+        """
+        打开会话
+
+        Returns:
+            SessionReader实例
+        """
+        session_dir = self.session_dir(session_id)
+        if not os.path.exists(os.path.join(session_dir, 'header.json')):
+            raise FileNotFoundError(f'会话不存在: {session_id}')
+        return SessionReader(session_dir)
+
+    def list_sessions(self):
+        """
+        列出所有会话ID（按名称排序）
+        """
+        return sorted(
+            name for name in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self.root_dir, name, 'header.json'))
+        )
+
+    def delete_session(self, session_id):
+        """删除会话"""
+        shutil.rmtree(self.session_dir(session_id))
@@ -0,0 +1,8 @@
+"""
+测试配置：将项目根目录加入模块搜索路径，使测试可以在任意目录下运行
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,142 @@
+"""
+会话目录测试（聚合指标、日期查询和同步）
+"""
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from storage.catalog import CATALOG_VERSION, PRESSURE_FIELDS, SessionCatalog, compute_aggregates
+from storage.session_store import SessionStore
+
+def make_result(timestamp, cadence, gait_phase='stance'):
+    """生成一个数据处理器格式的结果，足压分布为百分比"""
+    return {
+        'timestamp': timestamp,
+        'gait': {
+            'posture_score': 80.0,
+            'gait_phase': gait_phase,
+            'phase_confidence': 0.9,
+            'inference_time_ms': 0.5,
+            'features': {'cadence': cadence, 'vertical_oscillation': 8.0, 'impact_force': 2.5}
+        },
+        'pressure': {
+            'pressure_distribution': {'forefoot': 40.0, 'midfoot': 20.0, 'hindfoot': 30.0, 'lateral': 10.0},
+            'forefoot_hindfoot_ratio': 1.3,
+            'medial_lateral_ratio': 1.5
+        }
+    }
+
+def write_session(store, session_id, num_samples=601, results=()):
+    """写入一个60秒(10Hz)的会话，原始足压的比例为 4:2:3:1"""
+    writer = store.create_session(session_id, metadata={'source': 'test'})
+    timestamps = 1_700_000_000_000.0 + np.arange(num_samples) * 100.0
+    pressure = np.tile([4.0, 2.0, 3.0, 1.0], (num_samples, 1))
+    writer.append_samples(timestamps, np.zeros((num_samples, 3)), np.zeros((num_samples, 3)), pressure)
+    writer.append_results(list(results))
+    writer.close()
+    return store.open_session(session_id)
+
+def at_date(reader, date):
+    """把会话的创建时间改为指定日期的中午"""
+    reader.header['created_at'] = datetime.strptime(date, '%Y-%m-%d').replace(hour=12).timestamp()
+    return reader
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path / 'sessions'))
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = SessionCatalog(str(tmp_path / 'sessions.db'))
+    yield catalog
+    catalog.close()
+
+def test_aggregates_from_results(store):
+    results = [make_result(1000.0, 170.0), make_result(2000.0, 180.0), make_result(3000.0, 175.0, 'swing')]
+    aggregates = compute_aggregates(write_session(store, 'with_results', results=results))
+
+    assert aggregates['duration_s'] == 60.0
+    assert aggregates['samples'] == 601
+    assert aggregates['results'] == 3
+    assert aggregates['avg_cadence'] == pytest.approx(175.0)
+    assert aggregates['steps'] == 175
+    assert aggregates['stance_ratio'] == pytest.approx(2 / 3)
+    assert [aggregates[field] for field in PRESSURE_FIELDS] == pytest.approx([40.0, 20.0, 30.0, 10.0])
+
+def test_aggregates_without_results_use_same_pressure_unit(store):
+    aggregates = compute_aggregates(write_session(store, 'raw_only'))
+
+    assert aggregates['results'] == 0
+    assert aggregates['avg_cadence'] is None
+    assert aggregates['steps'] == 0
+    assert aggregates['stance_ratio'] is None
+    # 原始足压的占比也以百分比表示，与有分析结果的会话可以直接比较
+    assert [aggregates[field] for field in PRESSURE_FIELDS] == pytest.approx([40.0, 20.0, 30.0, 10.0])
+
+def test_empty_session(store):
+    aggregates = compute_aggregates(write_session(store, 'empty', num_samples=0))
+
+    assert aggregates['samples'] == 0
+    assert all(aggregates[field] is None for field in PRESSURE_FIELDS)
+
+def test_date_queries_and_stats(store, catalog):
+    results = [make_result(1000.0, 170.0)]
+    for session_id, date in [('a', '2026-01-05'), ('b', '2026-01-10'), ('c', '2026-01-10'), ('d', '2026-02-01')]:
+        catalog.add_session(at_date(write_session(store, session_id, results=results), date))
+
+    assert [row['session_id'] for row in catalog.list_sessions()] == ['d', 'c', 'b', 'a']
+    assert {row['session_id'] for row in catalog.list_sessions('2026-01-10', '2026-01-31')} == {'b', 'c'}
+    assert [row['session_id'] for row in catalog.list_sessions(end_date='2026-01-09')] == ['a']
+    assert [row['session_id'] for row in catalog.list_sessions(limit=2, offset=1)] == ['c', 'b']
+
+    stats = catalog.get_stats('2026-01-01', '2026-01-31')
+    assert stats['total_sessions'] == 3
+    assert stats['total_duration_s'] == pytest.approx(180.0)
+    assert stats['total_steps'] == 3 * 170
+    assert stats['avg_cadence'] == pytest.approx(170.0)
+
+    empty = catalog.get_stats('2027-01-01')
+    assert empty['total_sessions'] == 0
+    assert empty['total_steps'] == 0
+    assert empty['avg_cadence'] is None
+
+def test_date_filter_uses_index(catalog):
+    plan = catalog.connection.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM sessions WHERE date >= ? AND date <= ?', ('2026-01-01', '2026-01-31')
+    ).fetchall()
+
+    assert any('idx_sessions_date' in row[-1] for row in plan)
+
+def test_sync_adds_and_removes_sessions(store, catalog):
+    write_session(store, 'a')
+    write_session(store, 'b')
+    write_session(store, 'recording')
+
+    assert catalog.sync(store, exclude=['recording']) == 2
+    assert catalog.has_session('a') and not catalog.has_session('recording')
+
+    store.delete_session('a')
+    revision = catalog.revision()
+    assert catalog.sync(store, exclude=['recording']) == 0
+    assert not catalog.has_session('a')
+    assert catalog.revision() != revision
+
+def test_old_catalog_is_rebuilt(tmp_path, store):
+    db_path = str(tmp_path / 'old.db')
+    catalog = SessionCatalog(db_path)
+    catalog.add_session(write_session(store, 'a'))
+    catalog.close()
+
+    # 模拟旧版本的目录
+    connection = sqlite3.connect(db_path)
+    connection.execute('PRAGMA user_version = 1')
+    connection.commit()
+    connection.close()
+
+    catalog = SessionCatalog(db_path)
+    assert not catalog.has_session('a')
+    assert catalog.connection.execute('PRAGMA user_version').fetchone()[0] == CATALOG_VERSION
+    assert catalog.sync(store) == 1
+    catalog.close()
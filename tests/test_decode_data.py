@@ -0,0 +1,147 @@
+"""
+设备二进制数据解码测试（格式版本1和2、文件头、错位检测、CSV/JSON/NPZ输出）
+"""
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from tools.decode_data import (
+    FILE_HEADER, FILE_MAGIC, PACKET_DTYPES,
+    CSV_HEADER, decode_binary_data, iter_decoded_chunks, map_packets, write_csv, write_json, write_npz
+)
+
+def make_packets(version, n, seed=0):
+    """生成n个格式版本为version的数据包"""
+    rng = np.random.default_rng(seed)
+    packets = np.zeros(n, dtype=PACKET_DTYPES[version])
+    packets['timestamp'] = 1_700_000_000 + np.arange(n) * 5
+    packets['acc'] = rng.normal(size=(n, 3)) + [0.0, 0.0, 9.81]
+    packets['gyro'] = rng.normal(size=(n, 3))
+    packets['pressure'] = rng.random(packets['pressure'].shape)
+    return packets
+
+def write_dump(path, packets, version=None):
+    """写入数据文件，version不为None时写入文件头"""
+    with open(path, 'wb') as f:
+        if version is not None:
+            f.write(FILE_HEADER.pack(FILE_MAGIC, version, PACKET_DTYPES[version].itemsize))
+        f.write(packets.tobytes())
+    return str(path)
+
+@pytest.mark.parametrize('with_header', [False, True])
+def test_decode_v2(tmp_path, with_header):
+    packets = make_packets(2, 50)
+    path = write_dump(tmp_path / 'v2.bin', packets, 2 if with_header else None)
+
+    data = decode_binary_data(path)
+
+    assert data['format_version'] == 2
+    np.testing.assert_array_equal(data['timestamps_ms'], packets['timestamp'])
+    np.testing.assert_array_equal(data['acceleration'], packets['acc'])
+    np.testing.assert_array_equal(data['gyroscope'], packets['gyro'])
+    np.testing.assert_array_equal(data['pressure'], packets['pressure'])
+    assert len(data['timestamps']) == 50
+    assert len(data['gait_labels']) == 50
+
+@pytest.mark.parametrize('with_header', [False, True])
+def test_decode_v1_pads_fourth_pressure_channel(tmp_path, with_header):
+    packets = make_packets(1, 50)
+    path = write_dump(tmp_path / 'v1.bin', packets, 1 if with_header else None)
+
+    data = decode_binary_data(path, version=None if with_header else 1)
+
+    assert data['format_version'] == 1
+    np.testing.assert_array_equal(data['timestamps_ms'], packets['timestamp'])
+    np.testing.assert_array_equal(data['pressure'][:, :3], packets['pressure'])
+    np.testing.assert_array_equal(data['pressure'][:, 3], 0.0)
+
+def test_header_overrides_requested_version(tmp_path):
+    path = write_dump(tmp_path / 'v1.bin', make_packets(1, 10), 1)
+
+    packets, version = map_packets(path, version=2)
+    assert version == 1
+    assert len(packets) == 10
+
+def test_headerless_v1_size_mismatch_names_version(tmp_path):
+    # 30个40字节的包不是44字节的整数倍
+    path = write_dump(tmp_path / 'legacy.bin', make_packets(1, 30))
+
+    with pytest.raises(ValueError, match='--packet-version 1'):
+        map_packets(path)
+
+def test_headerless_v1_misaligned_timestamps_detected(tmp_path):
+    # 11个40字节的包恰好是10个44字节的包，只能通过时间戳发现错位
+    path = write_dump(tmp_path / 'legacy.bin', make_packets(1, 11))
+
+    with pytest.raises(ValueError, match='--packet-version 1'):
+        map_packets(path)
+    assert len(map_packets(path, version=1)[0]) == 11
+
+def test_truncated_packet_with_header_is_ignored(tmp_path, capsys):
+    path = write_dump(tmp_path / 'v2.bin', make_packets(2, 10), 2)
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 7)
+
+    packets, _ = map_packets(path)
+    assert len(packets) == 10
+    assert '不完整' in capsys.readouterr().out
+
+def test_chunked_decode_matches_whole_file(tmp_path):
+    packets = make_packets(2, 100)
+    path = write_dump(tmp_path / 'v2.bin', packets)
+
+    whole = decode_binary_data(path)
+    chunks = list(iter_decoded_chunks(path, chunk_packets=16))
+
+    # 步态相位阈值按整个文件计算，分块解码的标签与整体解码相同
+    np.testing.assert_array_equal(np.concatenate([c['gait_labels'] for c in chunks]), whole['gait_labels'])
+    np.testing.assert_array_equal(np.concatenate([c['acceleration'] for c in chunks]), whole['acceleration'])
+
+def test_write_npz_round_trip(tmp_path):
+    packets = make_packets(1, 40)
+    path = write_dump(tmp_path / 'v1.bin', packets, 1)
+    output = str(tmp_path / 'out.npz')
+
+    assert write_npz(path, output, chunk_packets=16) == 40
+    with np.load(output) as data:
+        assert int(data['format_version']) == 1
+        np.testing.assert_array_equal(data['timestamp_ms'], packets['timestamp'])
+        np.testing.assert_array_equal(data['pressure'][:, :3], packets['pressure'])
+        np.testing.assert_array_equal(data['pressure'][:, 3], 0.0)
+        assert set(np.unique(data['gait_phase'])) <= {1, 2}
+
+def test_write_csv_round_trip(tmp_path):
+    packets = make_packets(2, 40)
+    path = write_dump(tmp_path / 'v2.bin', packets)
+    output = str(tmp_path / 'out.csv')
+
+    assert write_csv(iter_decoded_chunks(path, chunk_packets=16), output) == 40
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+
+    whole = decode_binary_data(path)
+    assert rows[0] == CSV_HEADER
+    assert [row[0] for row in rows[1:]] == whole['timestamps'].tolist()
+    assert [row[-1] for row in rows[1:]] == whole['gait_labels'].tolist()
+    # 9位有效数字可以无损还原float32
+    values = np.array([row[1:-1] for row in rows[1:]], dtype=np.float64)
+    np.testing.assert_array_equal(values.astype(np.float32),
+                                  np.hstack([packets['acc'], packets['gyro'], packets['pressure']]))
+
+def test_write_json_matches_json_dump(tmp_path):
+    packets = make_packets(2, 40)
+    path = write_dump(tmp_path / 'v2.bin', packets)
+    output = str(tmp_path / 'out.json')
+
+    assert write_json(iter_decoded_chunks(path, chunk_packets=16), output, 2) == 40
+    with open(output, encoding='utf-8') as f:
+        data = json.load(f)
+
+    whole = decode_binary_data(path)
+    assert data['format_version'] == 2
+    assert data['timestamps'] == whole['timestamps'].tolist()
+    assert data['gait_labels'] == whole['gait_labels'].tolist()
+    for field in ('acceleration', 'gyroscope', 'pressure'):
+        np.testing.assert_array_equal(np.array(data[field], dtype=np.float32), whole[field])
@@ -0,0 +1,103 @@
+"""
+会话CSV/NPZ流式导出测试
+"""
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from storage.export import csv_header, iter_csv, iter_export, iter_npz, timestamps_to_iso
+from storage.session_store import GAIT_PHASES, SessionStore
+
+def make_result(timestamp, gait_phase):
+    """生成一个数据处理器格式的结果"""
+    return {
+        'timestamp': timestamp,
+        'gait': {
+            'posture_score': 80.0,
+            'gait_phase': gait_phase,
+            'phase_confidence': 0.9,
+            'inference_time_ms': 0.5,
+            'features': {'cadence': 172.0, 'vertical_oscillation': 8.0, 'impact_force': 2.5}
+        },
+        'pressure': {
+            'pressure_distribution': {'forefoot': 40.0, 'midfoot': 20.0, 'hindfoot': 30.0, 'lateral': 10.0},
+            'forefoot_hindfoot_ratio': 1.3,
+            'medial_lateral_ratio': 1.5
+        }
+    }
+
+@pytest.fixture
+def reader(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 103
+    writer = SessionStore(str(tmp_path / 'sessions')).create_session('export', chunk_rows=16)
+    writer.append_samples(1_700_000_000_000.0 + np.arange(n) * 5.0, rng.normal(size=(n, 3)),
+                          rng.normal(size=(n, 3)), rng.random((n, 4)))
+    writer.append_results([make_result(1_700_000_000_000.0 + i * 250.0, ('stance', 'swing')[i % 2])
+                           for i in range(5)])
+    writer.close()
+    return SessionStore(str(tmp_path / 'sessions')).open_session('export')
+
+def read_csv(chunks):
+    """解析导出的CSV，返回(列名, 行列表)"""
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    return rows[0], rows[1:]
+
+def test_csv_round_trip(reader):
+    header, rows = read_csv(iter_csv(reader, chunk_rows=10))
+    samples = reader.samples
+
+    assert header == csv_header('samples')
+    assert len(rows) == 103
+    assert [row[0] for row in rows] == timestamps_to_iso(samples['timestamp']).tolist()
+
+    values = np.array([row[1:] for row in rows], dtype=np.float64)
+    expected = np.hstack([samples['acc'], samples['gyro'], samples['pressure']])
+    # CSV_FLOAT_FORMAT保留6位有效数字
+    np.testing.assert_allclose(values, expected, rtol=1e-5, atol=1e-6)
+
+def test_csv_chunk_size_does_not_change_output(reader):
+    assert b''.join(iter_csv(reader, chunk_rows=7)) == b''.join(iter_csv(reader, chunk_rows=1000))
+
+def test_csv_time_range(reader):
+    _, rows = read_csv(iter_csv(reader, start_ms=1_700_000_000_100.0, end_ms=1_700_000_000_200.0, chunk_rows=8))
+
+    start, end = reader.row_range(1_700_000_000_100.0, 1_700_000_000_200.0)
+    assert len(rows) == end - start == 21
+    assert rows[0][0] == timestamps_to_iso([1_700_000_000_100.0])[0]
+
+def test_csv_results_table_labels_gait_phase(reader):
+    header, rows = read_csv(iter_csv(reader, table='results'))
+
+    assert header == csv_header('results')
+    phase_column = header.index('gait_phase')
+    assert [row[phase_column] for row in rows] == ['stance', 'swing', 'stance', 'swing', 'stance']
+    pressure_columns = [header.index(f'pressure_distribution_{i}') for i in range(1, 5)]
+    assert [float(rows[0][i]) for i in pressure_columns] == [40.0, 20.0, 30.0, 10.0]
+
+def test_npz_round_trip(reader):
+    with np.load(io.BytesIO(b''.join(iter_npz(reader, chunk_rows=10)))) as data:
+        assert set(data.files) == set(reader.samples)
+        for name, values in reader.samples.items():
+            assert data[name].dtype == values.dtype
+            np.testing.assert_array_equal(data[name], values)
+
+def test_npz_time_range_and_results(reader):
+    payload = b''.join(iter_npz(reader, start_ms=1_700_000_000_250.0, table='results', chunk_rows=2))
+    with np.load(io.BytesIO(payload)) as data:
+        np.testing.assert_array_equal(data['timestamp'], reader.results['timestamp'][1:])
+        np.testing.assert_array_equal(data['gait_phase'],
+                                      [GAIT_PHASES.index(phase) for phase in ('swing', 'stance', 'swing', 'stance')])
+
+def test_empty_range(reader):
+    _, rows = read_csv(iter_csv(reader, start_ms=0.0, end_ms=1.0))
+    assert rows == []
+
+    with np.load(io.BytesIO(b''.join(iter_npz(reader, start_ms=0.0, end_ms=1.0)))) as data:
+        assert data['acc'].shape == (0, 3)
+
+def test_unknown_format(reader):
+    with pytest.raises(ValueError):
+        iter_export(reader, 'xlsx')
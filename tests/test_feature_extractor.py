@@ -0,0 +1,49 @@
+"""
+批量特征提取与逐窗口特征提取的一致性测试
+"""
+import numpy as np
+import pytest
+
+from sensor_processing.batch_processor import BatchProcessor, sliding_windows
+from sensor_processing.feature_extractor import extract_features, extract_features_batch, split_feature_batch
+from sensor_processing.filter import lowpass_filter, median_filter
+from sensor_processing.synthetic import make_athletes, iter_athlete_chunks
+
+WINDOW_SIZE = 400
+STEP_SIZE = 200
+
+def make_windows():
+    """合成运动员数据的滑动窗口，外加一个常数窗口（相关系数为NaN）"""
+    acc, gyro = [], []
+    for athlete in make_athletes(2, seed=3):
+        chunk = next(iter_athlete_chunks(athlete, duration_s=6))
+        acc.append(sliding_windows(chunk['acc'], WINDOW_SIZE, STEP_SIZE))
+        gyro.append(sliding_windows(chunk['gyro'], WINDOW_SIZE, STEP_SIZE))
+    acc.append(np.full((1, WINDOW_SIZE, 3), [0.0, 0.0, 9.81]))
+    gyro.append(np.zeros((1, WINDOW_SIZE, 3)))
+    return np.concatenate(acc), np.concatenate(gyro)
+
+@pytest.fixture(scope='module')
+def windows():
+    return make_windows()
+
+def test_filter_windows_matches_per_window_filters(windows):
+    acc, gyro = windows
+    acc_filtered, gyro_filtered = BatchProcessor(None).filter_windows(acc, gyro)
+
+    for i in range(len(acc)):
+        expected_acc = lowpass_filter(acc[i], 20.0, 200)
+        expected_acc[:, 2] = median_filter(expected_acc[:, 2], kernel_size=5)
+        np.testing.assert_allclose(acc_filtered[i], expected_acc, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(gyro_filtered[i], lowpass_filter(gyro[i], 20.0, 200), rtol=1e-9, atol=1e-12)
+
+def test_batch_features_match_extract_features(windows):
+    acc, gyro = BatchProcessor(None).filter_windows(*windows)
+    batch = split_feature_batch(extract_features_batch(acc, gyro))
+
+    assert len(batch) == len(acc)
+    for i, features in enumerate(batch):
+        expected = extract_features(acc[i], gyro[i])
+        assert set(features) == set(expected)
+        for key, value in expected.items():
+            np.testing.assert_allclose(features[key], value, rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=key)
@@ -0,0 +1,100 @@
+"""
+传感器数据帧打包/解析测试
+"""
+import numpy as np
+import pytest
+
+from web_ui.frame_batcher import FRAME_CHANNELS, FRAME_HEADER, FrameBatcher, pack_frame, unpack_frame
+
+def test_pack_unpack_round_trip():
+    rng = np.random.default_rng(0)
+    timestamps = 1.7e12 + np.arange(16) * 5.0
+    values = rng.normal(size=(16, FRAME_CHANNELS))
+
+    payload = pack_frame(42, timestamps, values, decimation=3)
+    frame = unpack_frame(payload)
+
+    assert len(payload) == FRAME_HEADER.size + 16 * 4 * (1 + FRAME_CHANNELS)
+    assert frame['seq'] == 42
+    assert frame['decimation'] == 3
+    # 时间偏移以float32保存，相对于float64的基准时间戳，毫秒精度无损
+    np.testing.assert_allclose(frame['timestamps'], timestamps, rtol=0, atol=1e-3)
+    np.testing.assert_array_equal(frame['values'], values.astype(np.float32))
+
+def test_empty_frame():
+    frame = unpack_frame(pack_frame(1, np.empty(0), np.empty((0, FRAME_CHANNELS))))
+
+    assert frame['seq'] == 1
+    assert frame['timestamps'].shape == (0,)
+    assert frame['values'].shape == (0, FRAME_CHANNELS)
+
+def test_unknown_frame_rejected():
+    payload = bytearray(pack_frame(1, np.arange(2.0), np.zeros((2, FRAME_CHANNELS))))
+    payload[:2] = b'XX'
+
+    with pytest.raises(ValueError):
+        unpack_frame(bytes(payload))
+
+def test_batcher_decimates_per_client():
+    frames = []
+    batcher = FrameBatcher(lambda payload, sid: frames.append((sid, unpack_frame(payload))),
+                           sampling_rate=200, default_points_per_second=50)
+    batcher.add_client('full', points_per_second=200)
+    batcher.add_client('reduced', points_per_second=50)
+
+    n = 40
+    timestamps = 1000.0 + np.arange(n) * 5.0
+    acc = np.tile(np.arange(n, dtype=np.float64)[:, None], (1, 3))
+    batcher.add_samples(timestamps, acc, np.zeros((n, 3)), np.zeros((n, 4)))
+    batcher.flush()
+
+    received = {sid: frame for sid, frame in frames}
+    assert received['full']['decimation'] == 1
+    np.testing.assert_array_equal(received['full']['values'][:, 0], np.arange(n))
+    assert received['reduced']['decimation'] == 4
+    assert len(received['reduced']['timestamps']) == n // 4
+
+def test_batcher_decimation_continues_across_frames():
+    frames = []
+    batcher = FrameBatcher(lambda payload, sid: frames.append(unpack_frame(payload)), sampling_rate=200)
+    batcher.add_client('viewer', points_per_second=50)
+
+    # 每帧6个样本，不是抽取因子4的整数倍，抽取的样本仍然每隔4个一个
+    for start in range(0, 24, 6):
+        timestamps = 1000.0 + np.arange(start, start + 6) * 5.0
+        batcher.add_samples(timestamps, np.zeros((6, 3)), np.zeros((6, 3)), np.zeros((6, 4)))
+        batcher.flush()
+
+    timestamps = np.concatenate([frame['timestamps'] for frame in frames])
+    np.testing.assert_allclose(timestamps, 1000.0 + np.arange(0, 24, 4) * 5.0)
+    assert [frame['seq'] for frame in frames] == sorted(frame['seq'] for frame in frames)
+
+def test_single_and_batched_samples_in_one_frame():
+    frames = []
+    batcher = FrameBatcher(lambda payload, sid: frames.append(unpack_frame(payload)), sampling_rate=200)
+    batcher.add_client('viewer', points_per_second=200)
+
+    batcher.add_sample(1000.0, [1, 2, 3], [4, 5, 6], [7, 8, 9, 10])
+    acc = np.full((2, 3), 11.0)
+    batcher.add_samples(np.array([1005.0, 1010.0]), acc, np.zeros((2, 3)), np.zeros((2, 4)))
+    # 调用方重用缓冲区不影响已缓存的样本
+    acc[:] = -1.0
+    batcher.flush()
+
+    assert len(frames) == 1
+    np.testing.assert_allclose(frames[0]['timestamps'], [1000.0, 1005.0, 1010.0])
+    np.testing.assert_array_equal(frames[0]['values'][0], np.arange(1, 11))
+    np.testing.assert_array_equal(frames[0]['values'][1:, :3], 11.0)
+
+def test_samples_without_clients_are_dropped_but_counted():
+    frames = []
+    batcher = FrameBatcher(lambda payload, sid: frames.append(unpack_frame(payload)), sampling_rate=200)
+
+    batcher.add_samples(np.arange(6) * 5.0, np.zeros((6, 3)), np.zeros((6, 3)), np.zeros((6, 4)))
+    assert batcher.flush() == 0
+
+    # 抽取位置按样本总数计算，丢弃的6个样本也计入，抽取的是索引为8的样本
+    batcher.add_client('viewer', points_per_second=50)
+    batcher.add_samples(30.0 + np.arange(6) * 5.0, np.zeros((6, 3)), np.zeros((6, 3)), np.zeros((6, 4)))
+    assert batcher.flush() == 1
+    np.testing.assert_allclose(frames[0]['timestamps'], [40.0])
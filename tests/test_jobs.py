@@ -0,0 +1,122 @@
+"""
+后台任务管理测试（结果缓存、去重、取消和队列上限）
+"""
+import threading
+
+import pytest
+
+from web_ui.jobs import JobCancelled, JobManager, JobQueueFull, job_key
+
+TIMEOUT = 5.0
+
+class BlockingTask:
+    """在release之前阻塞的任务函数，记录被调用的次数"""
+
+    def __init__(self, result='done'):
+        self.result = result
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.calls = 0
+
+    def __call__(self, job):
+        self.calls += 1
+        self.started.set()
+        while not self.released.wait(0.01):
+            job.report(0.5)
+        return self.result
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=2)
+    yield manager
+    manager.shutdown()
+
+def test_job_key_ignores_param_order():
+    assert job_key('export', {'a': 1, 'b': 2}) == job_key('export', {'b': 2, 'a': 1})
+    assert job_key('export', {'a': 1}) != job_key('analysis', {'a': 1})
+
+def test_completed_result_is_cached(manager):
+    task = BlockingTask(result={'rows': 3})
+    task.released.set()
+
+    first = manager.submit('export', {'session_id': 's1'}, task)
+    first.future.result(TIMEOUT)
+    assert first.to_dict()['status'] == 'completed'
+    assert first.result == {'rows': 3}
+
+    second = manager.submit('export', {'session_id': 's1'}, task)
+    assert second.job_id != first.job_id
+    assert second.cached and second.status == 'completed'
+    assert second.result == {'rows': 3}
+    assert task.calls == 1
+
+    manager.invalidate(lambda key: 's1' in key)
+    third = manager.submit('export', {'session_id': 's1'}, task)
+    third.future.result(TIMEOUT)
+    assert not third.cached
+    assert task.calls == 2
+
+def test_running_job_is_deduplicated(manager):
+    task = BlockingTask()
+    first = manager.submit('export', {'session_id': 's1'}, task)
+    assert manager.submit('export', {'session_id': 's1'}, task) is first
+
+    task.released.set()
+    first.future.result(TIMEOUT)
+    assert task.calls == 1
+
+def test_failed_job_is_not_cached(manager):
+    def fail(job):
+        raise RuntimeError('磁盘已满')
+
+    job = manager.submit('export', {'session_id': 's1'}, fail)
+    job.future.result(TIMEOUT)
+    assert job.status == 'failed'
+    assert job.to_dict()['error'] == '磁盘已满'
+    assert manager.get_stats()['cached_results'] == 0
+
+def test_cancel_running_and_queued_jobs(manager):
+    running_task, queued_task = BlockingTask(), BlockingTask()
+    running = manager.submit('export', {'session_id': 's1'}, running_task)
+    queued = manager.submit('export', {'session_id': 's2'}, queued_task)
+    assert running_task.started.wait(TIMEOUT)
+
+    # 排队中的任务直接取消，不会再执行
+    assert manager.cancel(queued.job_id).status == 'cancelled'
+
+    # 执行中的任务在下一次报告进度时停止
+    manager.cancel(running.job_id)
+    running.future.result(TIMEOUT)
+    assert running.status == 'cancelled'
+    assert queued_task.calls == 0
+    assert manager.get_stats()['pending'] == 0
+    assert manager.cancel('unknown') is None
+
+def test_queue_full(manager):
+    task = BlockingTask()
+    manager.submit('export', {'session_id': 's1'}, task)
+    manager.submit('export', {'session_id': 's2'}, task)
+
+    with pytest.raises(JobQueueFull):
+        manager.submit('export', {'session_id': 's3'}, task)
+    # 已提交的相同任务不占用新的名额
+    assert manager.submit('export', {'session_id': 's1'}, task).status in ('queued', 'running')
+
+    task.released.set()
+    for job in list(manager.jobs.values()):
+        job.future.result(TIMEOUT)
+    job = manager.submit('export', {'session_id': 's3'}, task)
+    job.future.result(TIMEOUT)
+    assert job.result == 'done'
+
+def test_report_raises_after_cancel():
+    manager = JobManager(max_workers=1)
+    task = BlockingTask()
+    job = manager.submit('analysis', {}, task)
+    assert task.started.wait(TIMEOUT)
+
+    job.cancel_event.set()
+    with pytest.raises(JobCancelled):
+        job.report(0.9)
+    task.released.set()
+    manager.shutdown()
@@ -0,0 +1,81 @@
+"""
+模型注册表测试（后台加载、切换和回滚）
+"""
+import pytest
+
+from edge_ai import model_registry
+from edge_ai.model_registry import ModelRegistry
+
+class FakeModel:
+    """不加载TFLite的模型替身，模型路径中包含'broken'时加载失败"""
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or 'default.tflite'
+        self.is_initialized = 'broken' not in self.model_path
+        self.warmup_runs = None
+
+    def warmup(self, num_runs=10):
+        self.warmup_runs = num_runs
+        return 0.5
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(model_registry, 'GaitAnalysisModel', FakeModel)
+    return ModelRegistry(warmup_runs=3)
+
+def load(registry, model_path):
+    """启动后台加载并等待完成"""
+    assert registry.load_model_async(model_path)
+    registry._loading_thread.join(timeout=5)
+    assert not registry.is_loading()
+    return registry.get_status()
+
+def test_initial_model(registry):
+    model, version = registry.get_active()
+
+    assert model.model_path == 'default.tflite'
+    assert version == 1
+    assert registry.get_status()['previous'] is None
+    assert not registry.rollback()
+
+def test_hot_swap_warms_up_and_keeps_previous(registry):
+    status = load(registry, 'v2.tflite')
+    model, version = registry.get_active()
+
+    assert status['pending']['status'] == 'ready'
+    assert model.model_path == 'v2.tflite'
+    assert model.warmup_runs == 3
+    assert version == 2
+    assert status['active']['warmup_ms'] == 0.5
+    assert status['previous']['model_path'] == 'default.tflite'
+    assert 'model' not in status['active']
+
+def test_failed_load_keeps_active_model(registry):
+    status = load(registry, 'broken.tflite')
+
+    assert status['pending']['status'] == 'failed'
+    assert status['pending']['error']
+    assert registry.get_active_model().model_path == 'default.tflite'
+    assert registry.get_active_version() == 1
+
+def test_rollback_swaps_active_and_previous(registry):
+    load(registry, 'v2.tflite')
+
+    assert registry.rollback()
+    model, version = registry.get_active()
+    assert (model.model_path, version) == ('default.tflite', 1)
+    assert registry.get_status()['previous']['version'] == 2
+
+    # 再次回滚回到新版本
+    assert registry.rollback()
+    assert registry.get_active_version() == 2
+
+def test_only_one_load_at_a_time(registry, monkeypatch):
+    started = []
+    monkeypatch.setattr(registry, '_load_and_swap', lambda path: started.append(path))
+    monkeypatch.setattr(registry, 'is_loading', lambda: bool(started))
+
+    assert registry.load_model_async('a.tflite')
+    registry._loading_thread.join(timeout=5)
+    assert not registry.load_model_async('b.tflite')
+    assert started == ['a.tflite']
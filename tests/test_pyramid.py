@@ -0,0 +1,97 @@
+"""
+降采样金字塔和LTTB测试
+"""
+import numpy as np
+import pytest
+
+from storage.pyramid import build_pyramid, channel_names, load_level, lttb, query_series
+from storage.session_store import SessionStore
+
+START_MS = 1_700_000_040_000.0
+
+@pytest.fixture
+def reader(tmp_path):
+    """3分钟、100Hz的会话，acc_x为样本序号，其中一个样本为NaN"""
+    n = 18000
+    acc = np.zeros((n, 3))
+    acc[:, 0] = np.arange(n)
+    acc[150, 0] = np.nan
+    writer = SessionStore(str(tmp_path / 'sessions')).create_session('pyramid', chunk_rows=4096)
+    writer.append_samples(START_MS + np.arange(n) * 10.0, acc, np.zeros((n, 3)), np.zeros((n, 4)))
+    writer.close()
+    return SessionStore(str(tmp_path / 'sessions')).open_session('pyramid')
+
+def test_levels(reader):
+    assert build_pyramid(reader, chunk_rows=777) == {1000: 180, 60000: 3}
+
+    seconds = load_level(reader, 'samples', 1000)
+    np.testing.assert_array_equal(seconds['timestamp'], START_MS + np.arange(180) * 1000.0)
+    np.testing.assert_array_equal(seconds['count'], 100)
+
+    acc_x = channel_names().index('acc_x')
+    np.testing.assert_array_equal(seconds['min'][:3, acc_x], [0, 100, 200])
+    np.testing.assert_array_equal(seconds['max'][:3, acc_x], [99, 199, 299])
+    # NaN不参与均值
+    expected_mean = (np.arange(100, 200).sum() - 150) / 99
+    assert seconds['mean'][1, acc_x] == pytest.approx(expected_mean)
+
+    minutes = load_level(reader, 'samples', 60000)
+    np.testing.assert_array_equal(minutes['count'], 6000)
+    np.testing.assert_array_equal(minutes['min'][:, acc_x], [0, 6000, 12000])
+    np.testing.assert_array_equal(minutes['max'][:, acc_x], [5999, 11999, 17999])
+
+def test_chunk_size_does_not_change_levels(reader):
+    build_pyramid(reader, chunk_rows=100000)
+    whole = {stat: np.array(values) for stat, values in load_level(reader, 'samples', 1000).items()}
+
+    build_pyramid(reader, chunk_rows=333)
+    chunked = load_level(reader, 'samples', 1000)
+    for stat, values in whole.items():
+        np.testing.assert_array_equal(chunked[stat], values)
+
+def test_levels_must_be_multiples(reader):
+    with pytest.raises(ValueError):
+        build_pyramid(reader, levels=(1000, 1500))
+
+def test_lttb_keeps_endpoints():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    y[500] = 10.0
+
+    selected = lttb(x, y, 50)
+    assert len(selected) == 50
+    assert selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+    # 尖峰是所在桶中三角形面积最大的点
+    assert 500 in selected
+
+def test_lttb_skips_nan_and_short_input():
+    x = np.arange(100, dtype=np.float64)
+    y = np.where(x % 7 == 3, np.nan, x)
+
+    assert np.all(np.isfinite(y[lttb(x, y, 20)]))
+    np.testing.assert_array_equal(lttb(x[:10], y[:10], 20), np.arange(10))
+
+def test_query_selects_raw_for_short_span(reader):
+    result = query_series(reader, START_MS, START_MS + 2000.0, width=50, channels=['acc_x'])
+
+    assert result['level'] == 'raw'
+    assert result['points'] == 201
+    timestamps = result['series']['acc_x']['timestamps']
+    assert len(timestamps) == 50
+    assert timestamps[0] == START_MS and timestamps[-1] == START_MS + 2000.0
+
+def test_query_uses_aggregate_level_and_merges_to_width(reader):
+    result = query_series(reader, width=100, channels=['acc_x'])
+
+    assert result['level'] == 1000
+    assert result['points'] == 180
+    series = result['series']['acc_x']
+    # 每2个秒级桶合并为一个点，包络保持不变
+    assert len(series['timestamps']) == 90
+    assert series['min'][0] == 0 and series['max'][0] == 199
+    assert series['max'][-1] == 17999
+
+def test_query_unknown_channel(reader):
+    with pytest.raises(ValueError):
+        query_series(reader, channels=['heart_rate'])
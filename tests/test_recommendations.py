@@ -0,0 +1,87 @@
+"""
+建议引擎滞回测试
+"""
+import numpy as np
+
+from edge_ai.recommendations import RECOMMENDATION_METRICS, RecommendationEngine
+
+CADENCE_RULES = [
+    {'id': 'low', 'type': 'cadence', 'metric': 'cadence', 'op': '<', 'threshold': 160, 'band': 3.0,
+     'title': 'low', 'description': ''},
+    {'id': 'high', 'type': 'cadence', 'metric': 'cadence', 'op': '>', 'threshold': 200, 'band': 3.0,
+     'title': 'high', 'description': ''}
+]
+
+def cadence_metrics(values):
+    """只有步频的指标矩阵，其他指标为NaN"""
+    metrics = np.full((len(values), len(RECOMMENDATION_METRICS)), np.nan)
+    metrics[:, RECOMMENDATION_METRICS.index('cadence')] = values
+    return metrics
+
+def make_result(cadence, forefoot_hindfoot_ratio=1.0, medial_lateral_ratio=1.5):
+    """生成数据处理器格式的步态和足压结果"""
+    gait = {'features': {'cadence': cadence, 'vertical_oscillation': 8.0, 'impact_force': 2.0}}
+    pressure = {'forefoot_hindfoot_ratio': forefoot_hindfoot_ratio, 'medial_lateral_ratio': medial_lateral_ratio}
+    return gait, pressure
+
+def test_below_rule_triggers_holds_and_releases():
+    engine = RecommendationEngine(CADENCE_RULES)
+    # 低于160触发，160~163之间保持，达到163解除
+    cadence = [170, 159, 161, 162.9, 163, 161, 159.9]
+    states = engine.evaluate_with_hysteresis(cadence_metrics(cadence))
+
+    np.testing.assert_array_equal(states[:, 0], [False, True, True, True, False, False, True])
+    assert not states[:, 1].any()
+
+def test_above_rule_triggers_holds_and_releases():
+    engine = RecommendationEngine(CADENCE_RULES)
+    cadence = [190, 201, 199, 197.5, 197, 198, 200.5]
+    states = engine.evaluate_with_hysteresis(cadence_metrics(cadence))
+
+    # 高于200触发，197~200之间保持，回落到197解除
+    np.testing.assert_array_equal(states[:, 1], [False, True, True, True, False, False, True])
+
+def test_missing_metric_keeps_state():
+    engine = RecommendationEngine(CADENCE_RULES)
+    states = engine.evaluate_with_hysteresis(cadence_metrics([150, np.nan, np.nan, 170, np.nan]))
+
+    np.testing.assert_array_equal(states[:, 0], [True, True, True, False, False])
+
+def test_initial_state():
+    engine = RecommendationEngine(CADENCE_RULES)
+    # 处于滞回带中时保持初始状态
+    cadence = cadence_metrics([161, 162])
+
+    np.testing.assert_array_equal(engine.evaluate_with_hysteresis(cadence, np.array([True, False]))[:, 0], [True, True])
+    np.testing.assert_array_equal(engine.evaluate_with_hysteresis(cadence, np.array([False, False]))[:, 0],
+                                  [False, False])
+
+def test_without_hysteresis_matches_thresholds():
+    engine = RecommendationEngine(CADENCE_RULES)
+    triggered = engine.evaluate(cadence_metrics([159, 161, 201, np.nan]))
+
+    np.testing.assert_array_equal(triggered, [[True, False], [False, False], [False, True], [False, False]])
+
+def test_update_batch_matches_sequential_updates():
+    cadence = [170, 158, 161, 164, 157, 162, 201, 199, 196]
+    ratios = [1.0, 0.65, 0.72, 0.76, 1.6, 1.45, 1.3, 0.6, 0.8]
+    results = [make_result(c, r) for c, r in zip(cadence, ratios)]
+
+    batch_engine = RecommendationEngine()
+    batch_recommendations, batch_changed = batch_engine.update_batch(
+        [gait for gait, _ in results], [pressure for _, pressure in results]
+    )
+
+    engine = RecommendationEngine()
+    for i, (gait, pressure) in enumerate(results):
+        recommendations, changed = engine.update(gait, pressure)
+        assert recommendations == batch_recommendations[i]
+        assert changed == batch_changed[i]
+
+    np.testing.assert_array_equal(engine.active, batch_engine.active)
+
+def test_changed_only_when_active_set_changes():
+    engine = RecommendationEngine(CADENCE_RULES)
+    changes = [engine.update(*make_result(cadence))[1] for cadence in [170, 159, 158, 161, 165, 166]]
+
+    assert changes == [False, True, False, False, True, False]
@@ -0,0 +1,195 @@
+"""
+回放引擎测试（实时、倍速、尽可能快和循环回放，JSON记录的二进制缓存）
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from sensor_processing import replay as replay_module
+from sensor_processing.replay import CACHE_SUFFIX, ReplayEngine, load_recording
+
+class FakeClock:
+    """每次读取前进固定步长的单调时钟，使回放测试不依赖真实时间"""
+
+    def __init__(self, step_s=0.002):
+        self.now = 100.0
+        self.step_s = step_s
+
+    def __call__(self):
+        self.now += self.step_s
+        return self.now
+
+def make_recording(n=50, interval_ms=5.0):
+    """生成n个样本的记录"""
+    samples = np.arange(n, dtype=np.float64)
+    return load_recording({
+        'timestamps': 1_700_000_000_000.0 + samples * interval_ms,
+        'acceleration': np.stack([samples] * 3, axis=1),
+        'gyroscope': np.zeros((n, 3)),
+        'pressure': np.zeros((n, 4))
+    })
+
+def replay(recording, speed, loop=False, max_samples=None, **kwargs):
+    """回放记录，返回(批列表, 每批交付时相对开始的毫秒数, 统计)"""
+    clock = FakeClock()
+    batches, delivered_at = [], []
+
+    def on_batch(batch):
+        batches.append(batch)
+        delivered_at.append((clock.now - engine.start_time) * 1000)
+        if max_samples is not None and sum(len(b['index']) for b in batches) >= max_samples:
+            engine.stop()
+
+    engine = ReplayEngine(recording, on_batch, speed=speed, batch_ms=0, loop=loop, clock=clock, **kwargs)
+    stats = engine.run()
+    return batches, delivered_at, stats
+
+@pytest.mark.parametrize('speed', [1.0, 4.0])
+def test_samples_are_never_delivered_early(speed):
+    recording = make_recording()
+    batches, delivered_at, stats = replay(recording, speed)
+
+    offsets = recording['timestamps_ms'] - recording['timestamps_ms'][0]
+    np.testing.assert_array_equal(np.concatenate([b['index'] for b in batches]), np.arange(50))
+    for batch, at_ms in zip(batches, delivered_at):
+        assert offsets[batch['index'][-1]] / speed <= at_ms
+
+    assert stats['samples'] == 50
+    assert stats['cycles'] == 1
+    # 时长为245ms的记录按倍速缩短，延迟不超过几个时钟步长
+    assert 245.0 / speed <= stats['elapsed_s'] * 1000 <= 245.0 / speed + 10.0
+    assert stats['max_lag_ms'] < 10.0
+
+def test_faster_speed_finishes_sooner():
+    recording = make_recording()
+
+    elapsed = [replay(recording, speed)[2]['elapsed_s'] for speed in (1.0, 4.0)]
+    assert elapsed[1] < elapsed[0] / 3
+
+@pytest.mark.parametrize('speed', [None, 0])
+def test_max_speed_delivers_full_batches(speed):
+    recording = make_recording(n=50)
+    batches, _, stats = replay(recording, speed, max_batch_size=16)
+
+    assert [len(b['index']) for b in batches] == [16, 16, 16, 2]
+    assert stats['speed'] is None
+    assert stats['samples'] == 50
+    assert stats['max_lag_ms'] == 0.0
+
+def test_loop_keeps_timestamps_monotonic():
+    recording = make_recording(n=10)
+    batches, _, stats = replay(recording, None, loop=True, max_samples=25, max_batch_size=4)
+
+    indices = np.concatenate([b['index'] for b in batches])
+    timestamps = np.concatenate([b['timestamps_ms'] for b in batches])
+
+    np.testing.assert_array_equal(indices[:25], np.arange(25) % 10)
+    # 每轮增加记录时长(45ms)加一个采样间隔(5ms)，相邻样本间隔保持5ms
+    np.testing.assert_allclose(np.diff(timestamps), 5.0)
+    np.testing.assert_array_equal(np.concatenate([b['acc'] for b in batches])[:, 0], indices)
+    assert stats['cycles'] == 2
+
+def test_realtime_loop_wraps_on_schedule():
+    recording = make_recording(n=10)
+    batches, delivered_at, _ = replay(recording, 1.0, loop=True, max_samples=30)
+
+    timestamps = np.concatenate([b['timestamps_ms'] for b in batches])
+    offsets = timestamps - timestamps[0]
+    for batch, at_ms in zip(batches, delivered_at):
+        assert batch['timestamps_ms'][-1] - timestamps[0] <= at_ms
+    np.testing.assert_allclose(np.diff(offsets), 5.0)
+
+def test_negative_speed_rejected():
+    with pytest.raises(ValueError):
+        ReplayEngine(make_recording(), lambda batch: None, speed=-1.0)
+
+def test_empty_recording():
+    batches, _, stats = replay(make_recording(n=0), 1.0)
+
+    assert batches == []
+    assert stats['samples'] == 0
+
+def write_json_recording(path, first_acc=1.0):
+    """写入一个3个样本的JSON记录"""
+    with open(path, 'w') as f:
+        json.dump({
+            'timestamps': [1000.0, 1005.0, 1010.0],
+            'acceleration': [[first_acc, 0.0, 9.8], [2.0, 0.0, 9.8], [3.0, 0.0, 9.8]],
+            'gyroscope': [[0.0, 0.0, 0.0]] * 3,
+            'pressure': [[1.0, 2.0, 3.0, 4.0]] * 3
+        }, f)
+    return str(path)
+
+@pytest.fixture
+def builds(monkeypatch):
+    """记录缓存的构建次数"""
+    calls = []
+    build = replay_module.build_recording_cache
+
+    def counting_build(path, cache_dir=None):
+        calls.append(path)
+        return build(path, cache_dir)
+
+    monkeypatch.setattr(replay_module, 'build_recording_cache', counting_build)
+    return calls
+
+def test_cache_is_built_once_and_memory_mapped(tmp_path, builds):
+    path = write_json_recording(tmp_path / 'recording.json')
+
+    first = load_recording(path)
+    second = load_recording(path)
+
+    assert len(builds) == 1
+    assert os.path.isdir(path + CACHE_SUFFIX)
+    assert isinstance(second['acc'], np.memmap)
+    np.testing.assert_array_equal(second['acc'][:, 0], [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(first['timestamps_ms'], [1000.0, 1005.0, 1010.0])
+
+def test_touched_source_keeps_cache(tmp_path, builds):
+    path = write_json_recording(tmp_path / 'recording.json')
+    load_recording(path)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    load_recording(path)
+    load_recording(path)
+
+    # 内容未变，只更新缓存中记录的修改时间
+    assert len(builds) == 1
+    with open(os.path.join(path + CACHE_SUFFIX, 'meta.json')) as f:
+        assert json.load(f)['source_mtime_ns'] == os.stat(path).st_mtime_ns
+
+def test_changed_content_rebuilds_cache(tmp_path, builds):
+    path = write_json_recording(tmp_path / 'recording.json')
+    load_recording(path)
+
+    # 大小相同、修改时间相同的内容变化也能通过摘要发现
+    stat = os.stat(path)
+    write_json_recording(tmp_path / 'recording.json', first_acc=7.0)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    recording = load_recording(path)
+    assert len(builds) == 2
+    assert recording['acc'][0, 0] == 7.0
+
+def test_cache_version_change_rebuilds_cache(tmp_path, builds, monkeypatch):
+    path = write_json_recording(tmp_path / 'recording.json')
+    load_recording(path)
+
+    monkeypatch.setattr(replay_module, 'CACHE_VERSION', replay_module.CACHE_VERSION + 1)
+    load_recording(path)
+    load_recording(path)
+
+    assert len(builds) == 2
+
+def test_missing_cache_array_rebuilds_cache(tmp_path, builds):
+    path = write_json_recording(tmp_path / 'recording.json')
+    load_recording(path)
+
+    os.remove(os.path.join(path + CACHE_SUFFIX, 'pressure.npy'))
+    recording = load_recording(path)
+
+    assert len(builds) == 2
+    np.testing.assert_array_equal(recording['pressure'][0], [1.0, 2.0, 3.0, 4.0])
@@ -0,0 +1,85 @@
+"""
+分析结果增量推送测试
+"""
+from web_ui.result_stream import ResultStream, build_result_view
+
+def make_result(cadence=172.0, timestamp=1000.0, recommendations=None, distribution=None):
+    """生成一个数据处理器格式的结果"""
+    if distribution is None:
+        distribution = {'forefoot': 40.0, 'midfoot': 20.0, 'hindfoot': 30.0, 'lateral': 10.0}
+    return {
+        'timestamp': timestamp,
+        'model_version': 1,
+        'recommendations': recommendations or [],
+        'gait': {
+            'posture_score': 80.0,
+            'gait_phase': 'stance',
+            'phase_confidence': 0.9,
+            'inference_time_ms': 0.5,
+            'features': {'cadence': cadence, 'vertical_oscillation': 8.0, 'impact_force': 2.5}
+        },
+        'pressure': {
+            'foot_strike_type': 'midfoot',
+            'pronation_type': 'neutral',
+            'pressure_distribution': distribution
+        }
+    }
+
+def test_view_orders_pressure_regions_by_key():
+    # 字典的插入顺序与列顺序不同
+    distribution = {'lateral': 10.0, 'hindfoot': 30.0, 'midfoot': 20.0, 'forefoot': 40.0}
+    view = build_result_view(make_result(distribution=distribution))
+
+    assert view['pressure_distribution'] == [40.0, 20.0, 30.0, 10.0]
+
+def test_view_rounds_and_drops_non_finite():
+    view = build_result_view(make_result(cadence=float('nan'), timestamp=1000.123456))
+
+    assert view['cadence'] is None
+    assert view['timestamp'] == 1000.12
+
+def test_incomplete_result_is_skipped():
+    stream = ResultStream()
+
+    assert build_result_view({'gait': None, 'pressure': None}) is None
+    assert stream.encode({'gait': None, 'pressure': None}) is None
+    assert stream.seq == 0
+
+def test_first_message_is_full_then_deltas():
+    stream = ResultStream()
+
+    first = stream.encode(make_result())
+    assert first['seq'] == 1
+    assert first['delta'] == build_result_view(make_result())
+
+    second = stream.encode(make_result(cadence=174.0, timestamp=1250.0))
+    assert second['seq'] == 2
+    assert second['delta'] == {'cadence': 174.0, 'timestamp': 1250.0}
+
+def test_unchanged_result_sends_nothing_and_keeps_seq():
+    stream = ResultStream()
+    stream.encode(make_result())
+
+    # 舍入后没有变化
+    assert stream.encode(make_result(cadence=172.001)) is None
+    assert stream.seq == 1
+
+def test_snapshot_reflects_applied_deltas():
+    stream = ResultStream()
+    client_state = {}
+    for cadence, timestamp in [(170.0, 1000.0), (171.0, 1250.0), (171.0, 1500.0)]:
+        message = stream.encode(make_result(cadence=cadence, timestamp=timestamp))
+        client_state.update(message['delta'])
+
+    snapshot = stream.snapshot()
+    assert snapshot['seq'] == 3
+    assert snapshot['state'] == client_state
+
+def test_reset_resends_all_fields_with_next_seq():
+    stream = ResultStream()
+    stream.encode(make_result())
+    stream.reset()
+
+    message = stream.encode(make_result())
+    assert message['seq'] == 2
+    assert message['delta'] == build_result_view(make_result())
@@ -0,0 +1,76 @@
+"""
+启动脚本依赖指纹测试（依赖未变化时跳过pip）
+"""
+import os
+import subprocess
+
+import pytest
+
+import run
+
+class FakePip:
+    """记录在虚拟环境中执行的命令，按需返回失败"""
+
+    def __init__(self):
+        self.commands = []
+        self.returncode = 0
+
+    def __call__(self, cmd, shell=False):
+        self.commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, self.returncode)
+
+@pytest.fixture
+def venv(tmp_path, monkeypatch):
+    """在临时目录中创建一个只有site-packages的虚拟环境，返回激活脚本路径"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(run.platform, 'system', lambda: 'Linux')
+    os.makedirs(tmp_path / 'venv' / 'lib' / 'python3.11' / 'site-packages' / 'numpy-2.0.0.dist-info')
+    (tmp_path / 'requirements.txt').write_text('flask\n')
+    return str(tmp_path / 'venv' / 'bin' / 'activate')
+
+@pytest.fixture
+def pip(monkeypatch):
+    fake = FakePip()
+    monkeypatch.setattr(run.subprocess, 'run', fake)
+    return fake
+
+def test_unchanged_dependencies_skip_pip(venv, pip):
+    assert run.check_dependencies(venv)
+    assert any('pip install -r requirements.txt' in cmd for cmd in pip.commands)
+
+    pip.commands.clear()
+    assert run.check_dependencies(venv)
+    assert pip.commands == []
+
+def test_requirements_change_reinstalls(venv, pip, tmp_path):
+    run.check_dependencies(venv)
+    pip.commands.clear()
+
+    (tmp_path / 'requirements.txt').write_text('flask\nscipy\n')
+    run.check_dependencies(venv)
+    assert pip.commands
+
+def test_new_package_in_venv_reinstalls(venv, pip, tmp_path):
+    run.check_dependencies(venv)
+    pip.commands.clear()
+
+    os.makedirs(tmp_path / 'venv' / 'lib' / 'python3.11' / 'site-packages' / 'scipy-1.13.0.dist-info')
+    run.check_dependencies(venv)
+    assert pip.commands
+
+def test_failed_install_is_retried(venv, pip):
+    pip.returncode = 1
+    run.check_dependencies(venv)
+    assert run.load_fingerprint(os.path.dirname(os.path.dirname(venv))) is None
+
+    pip.returncode = 0
+    pip.commands.clear()
+    run.check_dependencies(venv)
+    assert pip.commands
+
+def test_force_install_ignores_fingerprint(venv, pip):
+    run.check_dependencies(venv)
+    pip.commands.clear()
+
+    run.check_dependencies(venv, force_install=True)
+    assert pip.commands
@@ -0,0 +1,163 @@
+"""
+列式会话存储测试
+"""
+import os
+
+import numpy as np
+import pytest
+
+from storage.session_store import SessionStore, SessionReader, GAIT_PHASES
+
+def make_samples(n, start_ms=1000.0, interval_ms=5.0, seed=0):
+    """生成n个样本"""
+    rng = np.random.default_rng(seed)
+    return {
+        'timestamp': start_ms + np.arange(n) * interval_ms,
+        'acc': rng.normal(size=(n, 3)),
+        'gyro': rng.normal(size=(n, 3)),
+        'pressure': rng.random((n, 4))
+    }
+
+def make_result(timestamp, gait_phase='stance'):
+    """生成一个数据处理器格式的结果"""
+    return {
+        'timestamp': timestamp,
+        'gait': {
+            'posture_score': 80.0,
+            'gait_phase': gait_phase,
+            'phase_confidence': 0.9,
+            'inference_time_ms': 0.5,
+            'features': {'cadence': 172.0, 'vertical_oscillation': 8.0, 'impact_force': 2.5}
+        },
+        'pressure': {
+            # 与分析器相同的键（百分比），插入顺序与列顺序不同
+            'pressure_distribution': {'lateral': 10.0, 'hindfoot': 30.0, 'midfoot': 20.0, 'forefoot': 40.0},
+            'forefoot_hindfoot_ratio': 1.3,
+            'medial_lateral_ratio': 1.5
+        }
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path / 'sessions'))
+
+def write_session(store, samples, batch_sizes, chunk_rows=7, session_id='test'):
+    """按给定的批大小写入样本并关闭会话"""
+    writer = store.create_session(session_id, metadata={'source': 'test', 'sampling_rate': 200},
+                                  chunk_rows=chunk_rows)
+    start = 0
+    for size in batch_sizes:
+        end = start + size
+        writer.append_samples(samples['timestamp'][start:end], samples['acc'][start:end],
+                              samples['gyro'][start:end], samples['pressure'][start:end])
+        start = end
+    writer.append_results([make_result(1000.0), make_result(1100.0, 'swing'), {'gait': None, 'pressure': None}])
+    writer.close()
+    return store.open_session(session_id)
+
+def test_round_trip(store):
+    samples = make_samples(50)
+    reader = write_session(store, samples, [3, 10, 1, 20, 16])
+
+    assert reader.is_closed
+    assert reader.metadata['source'] == 'test'
+    assert reader.sampling_rate == 200
+    assert reader.num_rows('samples') == 50
+    assert reader.header['tables']['samples']['rows'] == 50
+    for name in ('acc', 'gyro', 'pressure'):
+        np.testing.assert_array_equal(reader.samples[name], samples[name].astype(np.float32))
+    np.testing.assert_array_equal(reader.samples['timestamp'], samples['timestamp'])
+    assert reader.time_bounds() == (1000.0, 1245.0)
+
+    # 没有gait/pressure的结果不写入
+    assert reader.num_rows('results') == 2
+    np.testing.assert_array_equal(reader.results['gait_phase'],
+                                  [GAIT_PHASES.index('stance'), GAIT_PHASES.index('swing')])
+    # 按PRESSURE_REGIONS的顺序存储: 前脚掌, 中脚掌, 后脚掌, 外侧
+    np.testing.assert_allclose(reader.results['pressure_distribution'][0], [40.0, 20.0, 30.0, 10.0], rtol=1e-6)
+
+def test_index_covers_all_rows(store):
+    reader = write_session(store, make_samples(50), [50], chunk_rows=7)
+    chunks = [record for record in reader.read_index() if record[0] == 'samples']
+
+    rows = 0
+    for _, start_row, n, first_ts, last_ts in chunks:
+        assert start_row == rows
+        assert first_ts == reader.samples['timestamp'][start_row]
+        assert last_ts == reader.samples['timestamp'][start_row + n - 1]
+        rows += n
+    assert rows == 50
+
+def test_row_range(store):
+    reader = write_session(store, make_samples(50), [50])
+    timestamps = reader.samples['timestamp']
+
+    assert reader.row_range() == (0, 50)
+    # 两端都包含
+    assert reader.row_range(1010.0, 1020.0) == (2, 5)
+    # 落在样本之间
+    assert reader.row_range(1011.0, 1019.0) == (3, 4)
+    assert reader.row_range(start_ms=1240.0) == (48, 50)
+    assert reader.row_range(end_ms=1000.0) == (0, 1)
+    # 超出范围和反向区间
+    assert reader.row_range(2000.0, 3000.0) == (50, 50)
+    assert reader.row_range(0.0, 500.0) == (0, 0)
+    start, end = reader.row_range(1100.0, 1050.0)
+    assert start == end
+
+    data = reader.read(1010.0, 1020.0)
+    np.testing.assert_array_equal(data['timestamp'], timestamps[2:5])
+
+def test_iter_chunks_matches_read(store):
+    reader = write_session(store, make_samples(50), [50])
+    chunks = list(reader.iter_chunks(chunk_rows=8, start_ms=1020.0, end_ms=1200.0, columns=['timestamp', 'acc']))
+    data = reader.read(1020.0, 1200.0)
+
+    np.testing.assert_array_equal(np.concatenate([c['timestamp'] for c in chunks]), data['timestamp'])
+    np.testing.assert_array_equal(np.concatenate([c['acc'] for c in chunks]), data['acc'])
+    assert set(chunks[0]) == {'timestamp', 'acc'}
+
+def test_unclosed_session_reads_flushed_rows(store):
+    samples = make_samples(20)
+    writer = store.create_session('open', chunk_rows=7)
+    for start in range(0, 20, 3):
+        writer.append_samples(samples['timestamp'][start:start + 3], samples['acc'][start:start + 3],
+                              samples['gyro'][start:start + 3], samples['pressure'][start:start + 3])
+
+    # 缓存达到7行时写入一块（9行和9行），剩余2行仍在缓存中
+    reader = store.open_session('open')
+    assert not reader.is_closed
+    assert reader.num_rows() == 18
+
+    writer.close()
+    assert store.open_session('open').num_rows() == 20
+
+def test_partial_row_is_ignored(store):
+    reader = write_session(store, make_samples(10), [10])
+    with open(os.path.join(reader.session_dir, 'samples', 'acc.bin'), 'ab') as f:
+        f.write(b'\0' * 5)
+
+    assert SessionReader(reader.session_dir).num_rows() == 10
+
+def test_sampling_rate_estimated_without_metadata(store):
+    samples = make_samples(30, interval_ms=10.0)
+    writer = store.create_session('no_rate')
+    writer.append_samples(samples['timestamp'], samples['acc'], samples['gyro'], samples['pressure'])
+    writer.close()
+
+    assert store.open_session('no_rate').sampling_rate == 100
+
+def test_invalid_session_id(store):
+    for session_id in ('../escape', '', '.hidden', 'a/b'):
+        with pytest.raises(ValueError):
+            store.session_dir(session_id)
+
+def test_list_and_delete(store):
+    write_session(store, make_samples(5), [5], session_id='b')
+    write_session(store, make_samples(5), [5], session_id='a')
+    assert store.list_sessions() == ['a', 'b']
+
+    store.delete_session('a')
+    assert store.list_sessions() == ['b']
+    with pytest.raises(FileNotFoundError):
+        store.open_session('a')
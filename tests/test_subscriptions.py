@@ -0,0 +1,91 @@
+"""
+订阅管理和有界发送队列测试
+"""
+import pytest
+
+from web_ui.subscriptions import SubscriptionManager
+
+class Recorder:
+    """记录发送的消息，并模拟每个客户端的传输层积压"""
+
+    def __init__(self):
+        self.sent = []
+        self.backlogs = {}
+
+    def send(self, sid, event, args):
+        self.sent.append((sid, event, args))
+
+    def backlog(self, sid):
+        return self.backlogs.get(sid, 0)
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+@pytest.fixture
+def manager(recorder):
+    return SubscriptionManager(recorder.send, recorder.backlog, max_queue_size=3, max_backlog=5)
+
+def test_publish_reaches_only_subscribers(manager, recorder):
+    manager.subscribe('a', 's1', 'results')
+    manager.subscribe('b', 's1', 'raw')
+    manager.subscribe('c', 's2', 'results')
+
+    assert manager.publish('s1', 'results', 'analysis_update', {'seq': 1}) == 1
+    assert manager.drain() == 1
+    assert recorder.sent == [('a', 'analysis_update', ({'seq': 1},))]
+
+def test_unknown_channel_rejected(manager):
+    with pytest.raises(ValueError):
+        manager.subscribe('a', 's1', 'video')
+
+def test_full_queue_drops_oldest(manager, recorder):
+    manager.subscribe('a', 's1', 'results')
+    for seq in range(5):
+        manager.publish('s1', 'results', 'analysis_update', seq)
+
+    stats = manager.get_stats()['per_client']['a']
+    assert stats['queued'] == 3
+    assert stats['dropped'] == 2
+
+    manager.drain()
+    assert [args for _, _, args in recorder.sent] == [(2,), (3,), (4,)]
+    assert manager.get_stats()['per_client']['a']['sent'] == 3
+
+def test_backlogged_client_is_skipped_without_blocking_others(manager, recorder):
+    manager.subscribe('slow', 's1', 'results')
+    manager.subscribe('fast', 's1', 'results')
+    recorder.backlogs['slow'] = 6
+
+    manager.publish('s1', 'results', 'analysis_update', 1)
+    assert manager.drain() == 1
+    assert [sid for sid, _, _ in recorder.sent] == ['fast']
+    assert manager.get_stats()['per_client']['slow']['queued'] == 1
+
+    # 积压消除后发送留在队列中的消息
+    recorder.backlogs['slow'] = 0
+    assert manager.drain() == 1
+    assert recorder.sent[-1] == ('slow', 'analysis_update', (1,))
+
+def test_enqueue_targets_single_client(manager, recorder):
+    manager.add_client('a')
+    manager.add_client('b')
+
+    manager.enqueue('b', 'sensor_frame', 's1', b'payload')
+    manager.enqueue('unknown', 'sensor_frame', 's1', b'payload')
+    manager.drain()
+
+    assert recorder.sent == [('b', 'sensor_frame', ('s1', b'payload'))]
+
+def test_unsubscribe_and_remove_client(manager, recorder):
+    manager.subscribe('a', 's1', 'raw')
+    manager.subscribe('a', 's1', 'results')
+    manager.unsubscribe('a', 's1', 'raw')
+
+    assert manager.get_subscribers('s1', 'raw') == []
+    assert manager.get_subscribers('s1', 'results') == ['a']
+
+    assert manager.remove_client('a') == {('s1', 'results')}
+    assert manager.get_subscribers('s1', 'results') == []
+    assert manager.publish('s1', 'results', 'analysis_update', 1) == 0
+    assert manager.remove_client('a') == set()
@@ -0,0 +1,6 @@
+"""
+工具脚本包
+
+各工具作为脚本运行（python tools/xxx.py），工具之间共用的辅助函数放在独立的模块中，
+以 tools.模块名 的形式导入
+"""
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+推理性能基准测试工具
+
+加载一个或多个TensorFlow Lite模型，在不同批大小、线程数和量化方式下
+执行预热和计时推理，输出延迟分位数、吞吐量、模型加载时间和峰值内存(JSON)
+"""
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，峰值内存改用psutil获取
+    resource = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from edge_ai.inference import get_interpreter_class, quantize_tensor
+from tools.benchmark_utils import summarize_latencies, environment_info
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='TensorFlow Lite模型推理性能基准测试')
+    parser.add_argument('--models', '-m', nargs='+', required=True,
+                        help='TFLite模型文件或包含.tflite文件的目录')
+    parser.add_argument('--batch-sizes', '-b', type=int, nargs='+', default=[1],
+                        help='测试的批大小列表')
+    parser.add_argument('--threads', '-t', type=int, nargs='+', default=[1],
+                        help='测试的num_threads列表')
+    parser.add_argument('--warmup', type=int, default=20, help='每个配置的预热推理次数')
+    parser.add_argument('--runs', '-n', type=int, default=200, help='每个配置的计时推理次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机输入数据的种子')
+    parser.add_argument('--in-process', action='store_true',
+                        help='在当前进程中运行所有配置（默认每个配置使用独立进程以隔离加载时间和峰值内存）')
+    parser.add_argument('--output', '-o', help='输出JSON报告路径，不指定时输出到标准输出')
+    return parser.parse_args()
+
+def collect_model_paths(paths):
+    """
+    展开模型路径列表，目录会被替换为其中的所有.tflite文件
+    
+    Args:
+        paths: 文件或目录路径列表
+    
+    Returns:
+        排序去重后的模型文件路径列表
+    """
+    model_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            model_paths.extend(glob.glob(os.path.join(path, '*.tflite')))
+        else:
+            model_paths.append(path)
+    return sorted(set(model_paths))
+
+def peak_rss_mb():
+    """
+    获取当前进程的峰值常驻内存(MB)
+    
+    Windows上使用psutil（峰值工作集），未安装psutil时返回None
+    """
+    if resource is None:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / (1024.0 * 1024.0)
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux返回KB，macOS返回字节
+    if platform.system() == 'Darwin':
+        return peak / (1024.0 * 1024.0)
+    return peak / 1024.0
+
+def quantization_type(input_detail):
+    """
+    根据输入张量类型判断模型的量化方式
+    
+    Args:
+        input_detail: 解释器的输入张量详情
+    
+    Returns:
+        'int8'、'uint8'或'float'
+    """
+    dtype = np.dtype(input_detail['dtype'])
+    if dtype == np.int8:
+        return 'int8'
+    if dtype == np.uint8:
+        return 'uint8'
+    return 'float'
+
+def make_input(input_detail, batch_size, rng):
+    """
+    生成符合模型输入要求的随机数据
+    
+    量化模型按输入张量的scale和zero_point将浮点数据转换为整数
+    
+    Args:
+        input_detail: 解释器的输入张量详情
+        batch_size: 批大小
+        rng: numpy随机数生成器
+    
+    Returns:
+        输入数据数组
+    """
+    shape = list(input_detail['shape'])
+    shape[0] = batch_size
+    data = rng.uniform(-1, 1, shape).astype(np.float32)
+    
+    # 与GaitAnalysisModel相同的量化路径
+    return quantize_tensor(data, input_detail)
+
+def load_interpreter(model_path, num_threads, batch_size):
+    """
+    加载解释器并按批大小调整输入张量
+    
+    Args:
+        model_path: TFLite模型路径
+        num_threads: 解释器线程数
+        batch_size: 批大小
+    
+    Returns:
+        (解释器, 加载耗时毫秒)
+    """
+    interpreter_class = get_interpreter_class()
+    
+    start_time = time.perf_counter()
+    interpreter = interpreter_class(model_path=model_path, num_threads=num_threads)
+    
+    input_detail = interpreter.get_input_details()[0]
+    if input_detail['shape'][0] != batch_size:
+        shape = list(input_detail['shape'])
+        shape[0] = batch_size
+        interpreter.resize_tensor_input(input_detail['index'], shape)
+    
+    interpreter.allocate_tensors()
+    load_time_ms = (time.perf_counter() - start_time) * 1000
+    
+    return interpreter, load_time_ms
+
+def run_benchmark(model_path, batch_size, num_threads, warmup, runs, seed=0):
+    """
+    对单个配置执行基准测试
+    
+    Args:
+        model_path: TFLite模型路径
+        batch_size: 批大小
+        num_threads: 解释器线程数
+        warmup: 预热推理次数
+        runs: 计时推理次数
+        seed: 随机输入数据的种子
+    
+    Returns:
+        测试结果字典
+    """
+    result = {
+        'model': model_path,
+        'model_size_kb': os.path.getsize(model_path) / 1024.0,
+        'batch_size': batch_size,
+        'num_threads': num_threads,
+        'runs': runs
+    }
+    
+    try:
+        # 先导入解释器依赖，使基线内存包含运行时本身的开销
+        get_interpreter_class()
+        result['baseline_rss_mb'] = peak_rss_mb()
+        
+        interpreter, load_time_ms = load_interpreter(model_path, num_threads, batch_size)
+        input_detail = interpreter.get_input_details()[0]
+        input_data = make_input(input_detail, batch_size, np.random.default_rng(seed))
+        
+        result['quantization'] = quantization_type(input_detail)
+        result['load_time_ms'] = load_time_ms
+        
+        interpreter.set_tensor(input_detail['index'], input_data)
+        for _ in range(warmup):
+            interpreter.invoke()
+        
+        latencies_ms = np.empty(runs, dtype=np.float64)
+        total_start = time.perf_counter()
+        for i in range(runs):
+            start_time = time.perf_counter()
+            interpreter.invoke()
+            latencies_ms[i] = (time.perf_counter() - start_time) * 1000
+        total_time = time.perf_counter() - total_start
+        
+        result['latency_ms'] = summarize_latencies(latencies_ms)
+        result['throughput_samples_per_s'] = batch_size * runs / total_time
+        result['error'] = None
+    
+    except Exception as e:
+        result['error'] = str(e)
+    
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def run_isolated(model_path, batch_size, num_threads, warmup, runs, seed=0):
+    """
+    在独立子进程中执行单个配置，使加载时间和峰值内存不受其他配置影响
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        future = executor.submit(run_benchmark, model_path, batch_size, num_threads, warmup, runs, seed)
+        return future.result()
+
+def print_summary(results):
+    """打印结果摘要表"""
+    print(f"{'模型':<32} {'量化':<6} {'批':>4} {'线程':>4} {'加载ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'样本/s':>10} {'RSS MB':>8}",
+          file=sys.stderr)
+    for r in results:
+        name = os.path.basename(r['model'])
+        if r['error']:
+            print(f"{name:<32} 失败: {r['error']}", file=sys.stderr)
+            continue
+        lat = r['latency_ms']
+        rss = f"{r['peak_rss_mb']:>8.1f}" if r['peak_rss_mb'] is not None else f"{'-':>8}"
+        print(f"{name:<32} {r['quantization']:<6} {r['batch_size']:>4} {r['num_threads']:>4} "
+              f"{r['load_time_ms']:>8.2f} {lat['p50']:>8.3f} {lat['p95']:>8.3f} {lat['p99']:>8.3f} "
+              f"{r['throughput_samples_per_s']:>10.1f} {rss}", file=sys.stderr)
+
+def main():
+    args = parse_arguments()
+    
+    model_paths = collect_model_paths(args.models)
+    if not model_paths:
+        print("错误: 未找到任何TFLite模型文件", file=sys.stderr)
+        return 1
+    
+    runner = run_benchmark if args.in_process else run_isolated
+    
+    results = []
+    for model_path in model_paths:
+        for num_threads in args.threads:
+            for batch_size in args.batch_sizes:
+                print(f"测试 {os.path.basename(model_path)} (批大小={batch_size}, 线程={num_threads})...",
+                      file=sys.stderr)
+                results.append(runner(model_path, batch_size, num_threads, args.warmup, args.runs, args.seed))
+    
+    report = {
+        'environment': environment_info(),
+        'config': {
+            'warmup': args.warmup,
+            'runs': args.runs,
+            'seed': args.seed,
+            'isolated': not args.in_process
+        },
+        'results': results
+    }
+    
+    print_summary(results)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"基准测试报告已保存: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    
+    return 1 if any(r['error'] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
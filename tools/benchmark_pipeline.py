@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""
+数据处理流程微基准测试工具
+
+对滤波器、特征提取、步频估计、单窗口完整处理(_process_data_window)和模型推理
+在多个窗口大小下计时。输入数据由固定种子的合成跑步数据生成，每次运行完全相同。
+结果可以保存为基线JSON，之后的运行与基线比较，p50延迟变慢超过阈值的项目会被标记，
+并以非零状态退出，用于防止性能优化之后出现回退
+"""
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from sensor_processing.filter import (
+    lowpass_filter, highpass_filter, bandpass_filter,
+    median_filter, moving_average_filter, kalman_filter_1d
+)
+from sensor_processing.feature_extractor import extract_features, extract_pressure_features, estimate_cadence
+from sensor_processing.synthetic import make_athletes, iter_athlete_chunks
+from tools.benchmark_utils import summarize_latencies, environment_info
+
+SAMPLING_RATE = 200
+
+# 每个窗口大小使用的不同窗口数量（计时时循环使用）
+WINDOWS_PER_SIZE = 16
+
+# 默认回归阈值：p50延迟比基线慢25%以上视为回退
+DEFAULT_THRESHOLD = 0.25
+
+# 小于该值的延迟变化不视为回退（毫秒），避免极短操作的计时噪声
+DEFAULT_MIN_DELTA_MS = 0.005
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='滤波、特征提取和推理的微基准测试')
+    parser.add_argument('--window-sizes', '-w', type=int, nargs='+', default=[200, 400, 800],
+                        help='测试的窗口大小（数据点数量）')
+    parser.add_argument('--cases', '-c', nargs='+', default=['*'],
+                        help='只运行名称匹配的测试项（支持通配符，如 filter.* infer）')
+    parser.add_argument('--runs', '-n', type=int, default=50, help='每个测试项的计时次数')
+    parser.add_argument('--warmup', type=int, default=5, help='每个测试项的预热次数')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据的种子')
+    parser.add_argument('--model', '-m', default=None, help='TFLite模型路径 (默认: 内置模型)')
+    parser.add_argument('--baseline', '-b', help='与之比较的基线JSON')
+    parser.add_argument('--save-baseline', help='将本次结果保存为基线JSON')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='回归阈值: p50延迟超过基线的(1+阈值)倍时标记为回退')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help='p50延迟的增加小于该值(毫秒)时不视为回退')
+    parser.add_argument('--output', '-o', help='输出JSON报告路径，不指定时输出到标准输出')
+    return parser.parse_args()
+
+def make_windows(window_size, count=WINDOWS_PER_SIZE, seed=0):
+    """
+    从合成跑步数据中截取固定的测试窗口
+
+    Args:
+        window_size: 窗口大小
+        count: 窗口数量
+        seed: 合成数据的种子
+
+    Returns:
+        窗口字典列表，每个包含acc (n, 3)、gyro (n, 3)、pressure (n, 4)
+    """
+    athlete = make_athletes(1, seed)[0]
+    duration_s = (count + 1) * window_size / SAMPLING_RATE
+    chunk = next(iter_athlete_chunks(athlete, duration_s, SAMPLING_RATE, chunk_samples=int(duration_s * SAMPLING_RATE)))
+    return [
+        {
+            'acc': chunk['acc'][i * window_size:(i + 1) * window_size],
+            'gyro': chunk['gyro'][i * window_size:(i + 1) * window_size],
+            'pressure': chunk['pressure'][i * window_size:(i + 1) * window_size]
+        }
+        for i in range(count)
+    ]
+
+def build_cases(model_path=None):
+    """
+    创建测试项
+
+    模型相关的测试项在第一次使用时才加载模型（只运行滤波和特征测试项时不需要TFLite运行时）
+
+    Args:
+        model_path: TFLite模型路径
+
+    Returns:
+        测试项名称 -> 函数 func(window) 的字典
+    """
+    state = {}
+
+    def get_model():
+        if 'model' not in state:
+            from edge_ai.inference import GaitAnalysisModel
+            state['model'] = GaitAnalysisModel(model_path)
+        return state['model']
+
+    def get_processor():
+        if 'processor' not in state:
+            from sensor_processing.data_processor import DataProcessor
+            state['processor'] = DataProcessor(model=get_model())
+        return state['processor']
+
+    def infer(window):
+        # 特征在计时外预先提取，只测量推理本身
+        return get_model().infer(window['features'])
+
+    return {
+        'filter.lowpass': lambda w: lowpass_filter(w['acc'], 20.0, SAMPLING_RATE),
+        'filter.highpass': lambda w: highpass_filter(w['acc'], 0.5, SAMPLING_RATE),
+        'filter.bandpass': lambda w: bandpass_filter(w['acc'], 0.5, 20.0, SAMPLING_RATE),
+        'filter.median': lambda w: median_filter(w['acc'][:, 2], kernel_size=5),
+        'filter.moving_average': lambda w: moving_average_filter(w['acc'], window_size=5),
+        'filter.kalman_1d': lambda w: kalman_filter_1d(w['acc'][:, 2]),
+        'features.extract_features': lambda w: extract_features(w['acc'], w['gyro']),
+        'features.extract_pressure_features': lambda w: extract_pressure_features(w['pressure']),
+        'features.estimate_cadence': lambda w: estimate_cadence(w['acc'][:, 2], SAMPLING_RATE),
+        'pipeline.process_data_window': lambda w: get_processor()._process_data_window(w),
+        'inference.infer': infer
+    }
+
+def select_cases(cases, patterns):
+    """按通配符选择测试项"""
+    return {name: func for name, func in cases.items() if any(fnmatch.fnmatch(name, p) for p in patterns)}
+
+def run_case(func, windows, runs, warmup):
+    """
+    对单个测试项计时，循环使用测试窗口
+
+    Returns:
+        每次调用的延迟(毫秒)数组
+    """
+    for i in range(warmup):
+        func(windows[i % len(windows)])
+
+    latencies_ms = np.empty(runs, dtype=np.float64)
+    for i in range(runs):
+        window = windows[i % len(windows)]
+        start_time = time.perf_counter()
+        func(window)
+        latencies_ms[i] = (time.perf_counter() - start_time) * 1000
+    return latencies_ms
+
+def result_key(result):
+    """测试结果在基线中的键"""
+    return f"{result['case']}@{result['window_size']}"
+
+def compare_to_baseline(results, baseline, threshold, min_delta_ms):
+    """
+    与基线比较p50延迟
+
+    Args:
+        results: 本次的测试结果列表
+        baseline: 基线报告
+        threshold: 回归阈值
+        min_delta_ms: 视为回退的最小延迟增加(毫秒)
+
+    Returns:
+        比较结果列表，基线中没有的测试项不参与比较
+    """
+    baseline_results = {result_key(result): result for result in baseline.get('results', [])}
+    comparison = []
+    for result in results:
+        reference = baseline_results.get(result_key(result))
+        if reference is None:
+            continue
+        p50 = result['latency_ms']['p50']
+        baseline_p50 = reference['latency_ms']['p50']
+        ratio = p50 / baseline_p50 if baseline_p50 > 0 else None
+        comparison.append({
+            'case': result['case'],
+            'window_size': result['window_size'],
+            'baseline_p50_ms': baseline_p50,
+            'p50_ms': p50,
+            'ratio': ratio,
+            'regressed': ratio is not None and ratio > 1 + threshold and p50 - baseline_p50 > min_delta_ms
+        })
+    return comparison
+
+def print_summary(results, comparison):
+    """打印结果摘要表"""
+    ratios = {(c['case'], c['window_size']): c for c in comparison}
+    print(f"{'测试项':<38} {'窗口':>6} {'p50 ms':>10} {'p95 ms':>10} {'基线p50':>10} {'倍数':>6}", file=sys.stderr)
+    for result in results:
+        lat = result['latency_ms']
+        item = ratios.get((result['case'], result['window_size']))
+        baseline = f"{item['baseline_p50_ms']:>10.4f} {item['ratio']:>6.2f}" if item and item['ratio'] else ''
+        flag = '  回退' if item and item['regressed'] else ''
+        print(f"{result['case']:<38} {result['window_size']:>6} {lat['p50']:>10.4f} {lat['p95']:>10.4f} "
+              f"{baseline}{flag}", file=sys.stderr)
+
+def main():
+    args = parse_arguments()
+
+    cases = select_cases(build_cases(args.model), args.cases)
+    if not cases:
+        print(f"错误: 没有匹配的测试项: {' '.join(args.cases)}", file=sys.stderr)
+        return 1
+
+    results = []
+    for window_size in args.window_sizes:
+        windows = make_windows(window_size, seed=args.seed)
+        if 'inference.infer' in cases:
+            for window in windows:
+                window['features'] = extract_features(window['acc'], window['gyro'])
+
+        for name, func in cases.items():
+            print(f"测试 {name} (窗口={window_size})...", file=sys.stderr)
+            latencies_ms = run_case(func, windows, args.runs, args.warmup)
+            results.append({
+                'case': name,
+                'window_size': window_size,
+                'runs': args.runs,
+                'latency_ms': summarize_latencies(latencies_ms)
+            })
+
+    report = {
+        'environment': environment_info(),
+        'config': {
+            'runs': args.runs,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'window_sizes': args.window_sizes,
+            'model': args.model
+        },
+        'results': results
+    }
+
+    comparison = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('environment', {}).get('machine') != report['environment']['machine']:
+            print("警告: 基线来自不同的机器架构，比较结果可能没有意义", file=sys.stderr)
+        comparison = compare_to_baseline(results, baseline, args.threshold, args.min_delta_ms)
+        report['comparison'] = {
+            'baseline': args.baseline,
+            'threshold': args.threshold,
+            'min_delta_ms': args.min_delta_ms,
+            'items': comparison
+        }
+
+    print_summary(results, comparison)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"基线已保存: {args.save_baseline}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"基准测试报告已保存: {args.output}", file=sys.stderr)
+    elif not args.save_baseline:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    regressions = [item for item in comparison if item['regressed']]
+    if regressions:
+        print(f"性能回退: {len(regressions)} 个测试项的p50延迟超过基线的 {1 + args.threshold:.2f} 倍", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+基准测试和负载测试工具共用的辅助函数
+"""
+import os
+import platform
+import numpy as np
+
+def summarize_latencies(latencies_ms):
+    """
+    计算延迟统计
+    
+    Args:
+        latencies_ms: 每次调用（推理、请求或消息）的延迟(毫秒)
+    
+    Returns:
+        延迟统计字典
+    """
+    latencies_ms = np.asarray(latencies_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        'mean': float(np.mean(latencies_ms)),
+        'min': float(np.min(latencies_ms)),
+        'max': float(np.max(latencies_ms)),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99)
+    }
+
+def environment_info():
+    """收集测试环境信息"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__
+    }
+    try:
+        import tflite_runtime
+        info['tflite_runtime'] = tflite_runtime.__version__
+    except ImportError:
+        try:
+            import tensorflow as tf
+            info['tensorflow'] = tf.__version__
+        except ImportError:
+            info['tensorflow'] = None
+    return info
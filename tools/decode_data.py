@@ -2,165 +2,685 @@
 """
 数据解码工具
 
-用于将设备原始二进制数据转换为CSV或JSON格式
+用于将设备原始二进制数据转换为CSV、JSON或列式会话格式。
+输入为目录、通配符或多个文件时进入批量模式，使用进程池并行解码，
+输出已是最新的文件会被跳过
 """
 import os
 import sys
+import glob
+import time
+import shutil
 import argparse
+import io
 import struct
 import json
-import csv
+import zipfile
 import numpy as np
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from storage.export import format_csv_block, timestamps_to_iso
+from storage.session_store import SessionWriter, SessionReader, GAIT_PHASES
+
+# 数据包格式版本 -> 结构化dtype
+# 版本1: 早期固件，只有三个足压传感器（4+12+12+12=40字节），pressure_4补0
+# 版本2: 时间戳 + 3x加速度 + 3x角速度 + 4x足压（4+12+12+16=44字节）
+PACKET_DTYPES = {
+    1: np.dtype([
+        ('timestamp', '<u4'),
+        ('acc', '<f4', (3,)),
+        ('gyro', '<f4', (3,)),
+        ('pressure', '<f4', (3,))
+    ]),
+    2: np.dtype([
+        ('timestamp', '<u4'),
+        ('acc', '<f4', (3,)),
+        ('gyro', '<f4', (3,)),
+        ('pressure', '<f4', (4,))
+    ])
+}
+
+# 没有文件头的数据文件默认按此版本解码
+DEFAULT_PACKET_VERSION = 2
+
+# 可选的文件头: 魔数 + 格式版本(uint16) + 数据包大小(uint16)
+FILE_MAGIC = b'GDAT'
+FILE_HEADER = struct.Struct('<4sHH')
+
+# 没有文件头的文件检查时间戳递减的数据包数量
+HEADERLESS_CHECK_PACKETS = 1000
+
+# 每次解码的数据包数量（约44MB），超过内存大小的文件按块处理
+DECODE_CHUNK_PACKETS = 1 << 20
+
+# 文本格式每次格式化并写入的行数，内存占用与文件大小无关
+WRITE_CHUNK_PACKETS = 50000
+
+# 输出格式 -> 文件扩展名（npz为紧凑的二进制列格式，session为列式会话目录，见storage.session_store）
+OUTPUT_EXTENSIONS = {
+    'csv': '.csv',
+    'json': '.json',
+    'npz': '.npz',
+    'session': ''
+}
+
+CSV_HEADER = ['timestamp', 'acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z',
+              'pressure_1', 'pressure_2', 'pressure_3', 'pressure_4', 'gait_phase']
+
+# 浮点数输出格式，9位有效数字可以无损还原float32
+FLOAT_FORMAT = '%.9g'
+
+# JSON输出的数组字段（与decode_binary_data返回的字典键一致）
+JSON_FIELDS = ('timestamps', 'acceleration', 'gyroscope', 'pressure', 'gait_labels')
+
+# 批量模式下目录中匹配的数据文件
+BATCH_FILE_PATTERN = '*.bin'
 
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='解码IMU和足压传感器数据')
-    parser.add_argument('--input', '-i', required=True, help='输入二进制数据文件路径')
-    parser.add_argument('--output', '-o', required=True, help='输出文件路径')
-    parser.add_argument('--format', '-f', choices=['csv', 'json'], default='csv', help='输出格式 (csv 或 json)')
+    parser.add_argument('--input', '-i', required=True, nargs='+',
+                        help='输入二进制数据文件路径，可以是多个文件、目录或通配符（批量模式）')
+    parser.add_argument('--output', '-o', required=True, help='输出文件路径，批量模式下为输出目录')
+    parser.add_argument('--format', '-f', choices=sorted(OUTPUT_EXTENSIONS), default='csv',
+                        help='输出格式 (csv、json、npz二进制列格式 或 session列式会话目录)')
+    parser.add_argument('--packet-version', type=int, choices=sorted(PACKET_DTYPES), default=None,
+                        help=f'数据包格式版本，文件没有文件头时使用 (默认: {DEFAULT_PACKET_VERSION})')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count(), help='批量模式的并行进程数')
+    parser.add_argument('--force', action='store_true', help='批量模式下重新解码已是最新的输出')
     return parser.parse_args()
 
-def decode_binary_data(binary_file):
+def read_file_header(binary_file, version=None):
+    """
+    读取数据文件的格式版本
+
+    文件以FILE_MAGIC开头时从文件头读取版本，否则使用指定的版本（默认DEFAULT_PACKET_VERSION）
+
+    Args:
+        binary_file: 二进制数据文件路径
+        version: 没有文件头时使用的格式版本
+
+    Returns:
+        (格式版本, 数据起始偏移)
+    """
+    with open(binary_file, 'rb') as f:
+        header = f.read(FILE_HEADER.size)
+
+    if len(header) == FILE_HEADER.size and header[:len(FILE_MAGIC)] == FILE_MAGIC:
+        _, file_version, packet_size = FILE_HEADER.unpack(header)
+        if file_version not in PACKET_DTYPES:
+            raise ValueError(f'不支持的数据格式版本: {file_version}')
+        if packet_size != PACKET_DTYPES[file_version].itemsize:
+            raise ValueError(f'数据包大小{packet_size}与格式版本{file_version}不一致')
+        if version is not None and version != file_version:
+            print(f"警告: 文件头声明格式版本{file_version}，忽略指定的版本{version}")
+        return file_version, FILE_HEADER.size
+
+    version = DEFAULT_PACKET_VERSION if version is None else version
+    if version not in PACKET_DTYPES:
+        raise ValueError(f'不支持的数据格式版本: {version}')
+    return version, 0
+
+def matching_versions(data_size):
+    """数据大小能被数据包大小整除的格式版本列表"""
+    return [version for version, dtype in sorted(PACKET_DTYPES.items()) if data_size % dtype.itemsize == 0]
+
+def version_hint(data_size, version):
+    """没有文件头的文件按version解码失败时，提示可能正确的--packet-version"""
+    candidates = [v for v in matching_versions(data_size) if v != version]
+    if not candidates:
+        return ''
+    return '，可能是其他格式版本的数据，请尝试 ' + ' 或 '.join(f'--packet-version {v}' for v in candidates)
+
+def check_headerless_packets(packets, version, data_size):
+    """
+    检查没有文件头的数据文件是否按正确的格式版本解码
+
+    格式版本不对时数据包边界错位，时间戳会变成无意义的值，
+    因此要求开头的数据包时间戳不递减
+
+    Raises:
+        ValueError: 时间戳不递减
+    """
+    timestamps = np.asarray(packets['timestamp'][:HEADERLESS_CHECK_PACKETS], dtype=np.int64)
+    if np.any(np.diff(timestamps) < 0):
+        raise ValueError(f'按格式版本{version}解码的时间戳不递减，数据包边界可能错位'
+                         f'{version_hint(data_size, version)}')
+
+def map_packets(binary_file, version=None):
+    """
+    将数据文件内存映射为结构化数组（不读入内存）
+
+    有文件头的文件末尾不完整的数据包会被忽略（打印警告）；没有文件头的文件
+    数据大小不是数据包大小的整数倍、或者没有指定版本时开头的时间戳不递减，
+    说明格式版本不对，抛出ValueError
+
+    Args:
+        binary_file: 二进制数据文件路径
+        version: 没有文件头时使用的格式版本
+
+    Returns:
+        (结构化数组, 格式版本)
+    """
+    requested_version = version
+    version, offset = read_file_header(binary_file, version)
+    dtype = PACKET_DTYPES[version]
+
+    data_size = os.path.getsize(binary_file) - offset
+    num_packets, remainder = divmod(data_size, dtype.itemsize)
+    if remainder:
+        if offset == 0:
+            raise ValueError(f'数据大小{data_size}字节不是格式版本{version}的数据包大小'
+                             f'{dtype.itemsize}字节的整数倍{version_hint(data_size, version)}')
+        print(f"警告: {binary_file} 末尾有{remainder}字节不完整的数据包，已忽略")
+
+    if num_packets == 0:
+        return np.empty(0, dtype=dtype), version
+    packets = np.memmap(binary_file, dtype=dtype, mode='r', offset=offset, shape=(num_packets,))
+    if offset == 0 and requested_version is None:
+        check_headerless_packets(packets, version, data_size)
+    return packets, version
+
+def _packet_columns(packets):
+    """将一块结构化数据包转换为列数组，足压统一为4个通道"""
+    pressure = np.asarray(packets['pressure'], dtype=np.float32)
+    if pressure.shape[1] < 4:
+        pressure = np.hstack([pressure, np.zeros((len(pressure), 4 - pressure.shape[1]), dtype=np.float32)])
+    return {
+        'timestamps_ms': np.asarray(packets['timestamp'], dtype=np.int64),
+        'acceleration': np.array(packets['acc']),
+        'gyroscope': np.array(packets['gyro']),
+        'pressure': pressure
+    }
+
+def gait_phase_threshold(packets, chunk_packets=DECODE_CHUNK_PACKETS):
+    """
+    计算步态相位阈值（垂直加速度均值 + 0.5倍标准差），按块累加，内存占用与文件大小无关
+
+    Args:
+        packets: 结构化数据包数组（可以是内存映射）
+
+    Returns:
+        阈值
+    """
+    total = 0.0
+    total_sq = 0.0
+    for start in range(0, len(packets), chunk_packets):
+        vertical_acc = np.asarray(packets['acc'][start:start + chunk_packets, 2], dtype=np.float64)
+        total += vertical_acc.sum()
+        total_sq += np.square(vertical_acc).sum()
+
+    n = len(packets)
+    if n == 0:
+        return 0.0
+    mean = total / n
+    return mean + 0.5 * np.sqrt(max(0.0, total_sq / n - mean * mean))
+
+def iter_decoded_chunks(binary_file, version=None, chunk_packets=DECODE_CHUNK_PACKETS, with_labels=True):
+    """
+    按块解码数据文件
+
+    第一遍按块计算步态相位阈值，第二遍按块解码，每次只有一块数据在内存中
+
+    Args:
+        binary_file: 二进制数据文件路径
+        version: 没有文件头时使用的格式版本
+        chunk_packets: 每块的数据包数量
+        with_labels: 为False时不计算步态相位标签（只需要一遍读取）
+
+    Yields:
+        数据块字典: timestamps_ms、acceleration、gyroscope、pressure、gait_labels（数组）
+    """
+    packets, _ = map_packets(binary_file, version)
+    threshold = gait_phase_threshold(packets, chunk_packets) if with_labels else None
+
+    for start in range(0, len(packets), chunk_packets):
+        chunk = _packet_columns(packets[start:start + chunk_packets])
+        if with_labels:
+            chunk['gait_labels'] = estimate_gait_phase(chunk['acceleration'], threshold=threshold)
+        yield chunk
+
+def decode_binary_data(binary_file, version=None):
     """
     解码二进制数据文件
-    
-    数据格式:
+
+    数据格式（版本2，小端序，每包44字节）:
     - 时间戳 (uint32): 毫秒级Unix时间戳
     - 加速度 (3x float): X, Y, Z轴加速度，单位m/s²
     - 角速度 (3x float): X, Y, Z轴角速度，单位rad/s
     - 足压 (4x float): 四个足压传感器的值，范围0-1
-    
+
+    文件可以以FILE_HEADER开头声明格式版本，见PACKET_DTYPES
+
+    Args:
+        binary_file: 二进制数据文件路径
+        version: 没有文件头时使用的格式版本
+
     Returns:
-        解码后的数据字典
+        解码后的数据字典（数组），timestamps为本地时间的ISO格式字符串
     """
-    data = {
-        'timestamps': [],
-        'acceleration': [],
-        'gyroscope': [],
-        'pressure': []
-    }
-    
-    # 数据包大小：4字节时间戳 + 3x4字节加速度 + 3x4字节角速度 + 4x4字节足压 = 40字节
-    packet_size = 40
-    
-    with open(binary_file, 'rb') as f:
-        while True:
-            packet = f.read(packet_size)
-            if not packet or len(packet) < packet_size:
-                break
-                
-            # 解析时间戳 (uint32)
-            timestamp_ms = struct.unpack('<I', packet[0:4])[0]
-            timestamp = datetime.fromtimestamp(timestamp_ms / 1000.0).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
-            
-            # 解析加速度 (3x float)
-            acc_x = struct.unpack('<f', packet[4:8])[0]
-            acc_y = struct.unpack('<f', packet[8:12])[0]
-            acc_z = struct.unpack('<f', packet[12:16])[0]
-            
-            # 解析角速度 (3x float)
-            gyro_x = struct.unpack('<f', packet[16:20])[0]
-            gyro_y = struct.unpack('<f', packet[20:24])[0]
-            gyro_z = struct.unpack('<f', packet[24:28])[0]
-            
-            # 解析足压 (4x float)
-            pressure_1 = struct.unpack('<f', packet[28:32])[0]
-            pressure_2 = struct.unpack('<f', packet[32:36])[0]
-            pressure_3 = struct.unpack('<f', packet[36:40])[0]
-            pressure_4 = struct.unpack('<f', packet[40:44])[0] if len(packet) >= 44 else 0
-            
-            # 存储解析后的数据
-            data['timestamps'].append(timestamp)
-            data['acceleration'].append([acc_x, acc_y, acc_z])
-            data['gyroscope'].append([gyro_x, gyro_y, gyro_z])
-            data['pressure'].append([pressure_1, pressure_2, pressure_3, pressure_4])
-    
+    packets, version = map_packets(binary_file, version)
+    data = _packet_columns(packets)
+    data['timestamps'] = timestamps_to_iso(data['timestamps_ms'])
+    data['format_version'] = version
+
     # 生成步态相位标签（实际应用中应该使用模型推理）
     data['gait_labels'] = estimate_gait_phase(data['acceleration'], data['gyroscope'])
-    
+
     return data
 
-def estimate_gait_phase(acceleration_data, gyroscope_data):
+def estimate_gait_phase(acceleration_data, gyroscope_data=None, threshold=None):
     """
     基于简单规则估计步态相位
-    
+
     实际应用中应使用机器学习模型进行更准确的预测
-    
+
     Args:
-        acceleration_data: 加速度数据列表
-        gyroscope_data: 陀螺仪数据列表
-        
+        acceleration_data: 加速度数组 (n, 3)
+        gyroscope_data: 陀螺仪数据（当前规则未使用）
+        threshold: 垂直加速度阈值，为None时使用 均值 + 0.5倍标准差
+
     Returns:
-        步态相位标签列表，每个时间点对应的相位标签：'stance'或'swing'
+        步态相位标签数组，每个时间点对应的相位标签：'stance'或'swing'
     """
     # 提取垂直方向加速度
-    vertical_acc = [acc[2] for acc in acceleration_data]
-    
+    vertical_acc = np.asarray(acceleration_data, dtype=np.float64).reshape(-1, 3)[:, 2]
+    if len(vertical_acc) == 0:
+        return np.array([], dtype='U6')
+
     # 计算加速度平均值作为阈值
-    threshold = np.mean(vertical_acc) + 0.5 * np.std(vertical_acc)
-    
+    if threshold is None:
+        threshold = np.mean(vertical_acc) + 0.5 * np.std(vertical_acc)
+
     # 根据简单规则判断步态相位
-    phases = []
-    for acc in vertical_acc:
-        if acc > threshold:
-            phases.append('swing')
-        else:
-            phases.append('stance')
-    
-    return phases
+    return np.where(vertical_acc > threshold, 'swing', 'stance')
+
+def _iso_timestamps(chunk):
+    """获取数据块的ISO格式时间戳（批量转换）"""
+    if 'timestamps' in chunk:
+        return np.asarray(chunk['timestamps'])
+    return timestamps_to_iso(chunk['timestamps_ms'])
+
+def format_csv_chunk(chunk):
+    """
+    将一块数据格式化为CSV文本
+
+    按列批量转换后由storage.export.format_csv_block一次写出，不逐行格式化
+
+    Args:
+        chunk: 数据块字典（decode_binary_data或iter_decoded_chunks的输出）
+
+    Returns:
+        CSV文本（每行以换行符结尾）
+    """
+    if len(chunk['timestamps_ms']) == 0:
+        return ''
+
+    columns = [_iso_timestamps(chunk)]
+    for name in ('acceleration', 'gyroscope', 'pressure'):
+        columns.extend(np.asarray(chunk[name], dtype=np.float64).T)
+    columns.append(np.asarray(chunk['gait_labels']))
+
+    return format_csv_block(columns, ['%s'] + [FLOAT_FORMAT] * 10 + ['%s'])
+
+def _format_json_values(values):
+    """将数组格式化为JSON数组的内容（不含外层方括号）"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'US' or not np.all(np.isfinite(values)):
+        # 字符串或包含NaN/无穷大时使用json模块（与json.dump的输出一致）
+        return json.dumps(values.tolist(), ensure_ascii=False)[1:-1]
+    if values.ndim == 1:
+        row_format = FLOAT_FORMAT
+    else:
+        row_format = '[' + ','.join([FLOAT_FORMAT] * values.shape[1]) + ']'
+
+    # 以逗号作为行分隔符一次写出所有元素，去掉末尾多余的逗号
+    buffer = io.StringIO()
+    np.savetxt(buffer, np.asarray(values, dtype=np.float64), fmt=row_format, newline=',')
+    return buffer.getvalue()[:-1]
+
+def write_csv(chunks, output_file):
+    """
+    将数据块流式写入CSV文件
+
+    Args:
+        chunks: 数据块可迭代对象
+        output_file: 输出文件路径
+
+    Returns:
+        写入的行数
+    """
+    rows = 0
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(CSV_HEADER) + '\n')
+        for chunk in chunks:
+            f.write(format_csv_chunk(chunk))
+            rows += len(chunk['timestamps_ms'])
+    return rows
+
+def write_json(chunks, output_file, format_version):
+    """
+    将数据块流式写入JSON文件（紧凑格式）
+
+    JSON按字段组织数组，每个字段先写入单独的临时文件，全部数据块处理完后拼接，
+    只需要遍历一遍数据
+
+    Args:
+        chunks: 数据块可迭代对象
+        output_file: 输出文件路径
+        format_version: 数据包格式版本
+
+    Returns:
+        写入的记录数
+    """
+    part_paths = {field: f'{output_file}.{field}.part' for field in JSON_FIELDS}
+    parts = {field: open(path, 'w', encoding='utf-8') for field, path in part_paths.items()}
+    rows = 0
+    try:
+        for chunk in chunks:
+            if len(chunk['timestamps_ms']) == 0:
+                continue
+            values = {
+                'timestamps': _iso_timestamps(chunk),
+                'acceleration': chunk['acceleration'],
+                'gyroscope': chunk['gyroscope'],
+                'pressure': chunk['pressure'],
+                'gait_labels': chunk['gait_labels']
+            }
+            for field, part in parts.items():
+                part.write((',' if rows else '') + _format_json_values(values[field]))
+            rows += len(chunk['timestamps_ms'])
+
+        for part in parts.values():
+            part.close()
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for i, field in enumerate(JSON_FIELDS):
+                f.write(('{' if i == 0 else ',') + json.dumps(field) + ':[')
+                with open(part_paths[field], 'r', encoding='utf-8') as part:
+                    shutil.copyfileobj(part, f)
+                f.write(']')
+            f.write(f',"format_version":{int(format_version)}}}')
+    finally:
+        for field, part in parts.items():
+            part.close()
+            if os.path.exists(part_paths[field]):
+                os.remove(part_paths[field])
+
+    return rows
+
+def write_npz(binary_file, output_file, version=None, chunk_packets=DECODE_CHUNK_PACKETS, compress=True):
+    """
+    将数据文件写入NPZ压缩包（可用numpy.load读取，每列一个数组）
+
+    zip中同时只能写入一个数组，因此每列单独遍历一遍内存映射的数据包，
+    内存占用只与块大小有关。gait_phase按GAIT_PHASES编码（1为stance，2为swing）
+
+    Args:
+        binary_file: 二进制数据文件路径
+        output_file: 输出文件路径
+        version: 没有文件头时使用的格式版本
+        chunk_packets: 每块的数据包数量
+        compress: 是否压缩
+
+    Returns:
+        写入的记录数
+    """
+    packets, version = map_packets(binary_file, version)
+    threshold = gait_phase_threshold(packets, chunk_packets)
+    phase_codes = np.array([GAIT_PHASES.index('stance'), GAIT_PHASES.index('swing')], dtype=np.uint8)
+
+    columns = {
+        'timestamp_ms': ('<i8', (), lambda chunk: chunk['timestamps_ms']),
+        'acc': ('<f4', (3,), lambda chunk: chunk['acceleration']),
+        'gyro': ('<f4', (3,), lambda chunk: chunk['gyroscope']),
+        'pressure': ('<f4', (4,), lambda chunk: chunk['pressure']),
+        'gait_phase': ('u1', (), lambda chunk: phase_codes[(chunk['acceleration'][:, 2] > threshold).astype(np.intp)])
+    }
+
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(output_file, mode='w', compression=compression) as archive:
+        for name, (dtype, shape, getter) in columns.items():
+            with archive.open(f'{name}.npy', mode='w', force_zip64=True) as entry:
+                np.lib.format.write_array_header_1_0(entry, {
+                    'descr': np.dtype(dtype).str,
+                    'fortran_order': False,
+                    'shape': (len(packets),) + shape
+                })
+                for start in range(0, len(packets), chunk_packets):
+                    chunk = _packet_columns(packets[start:start + chunk_packets])
+                    entry.write(np.ascontiguousarray(getter(chunk), dtype=dtype).tobytes())
+
+        with archive.open('format_version.npy', mode='w') as entry:
+            np.lib.format.write_array(entry, np.array(version, dtype=np.uint16))
+
+    return len(packets)
 
 def save_as_csv(data, output_file):
     """将数据保存为CSV格式"""
-    with open(output_file, 'w', newline='') as f:
-        writer = csv.writer(f)
-        
-        # 写入表头
-        header = ['timestamp', 'acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z',
-                  'pressure_1', 'pressure_2', 'pressure_3', 'pressure_4', 'gait_phase']
-        writer.writerow(header)
-        
-        # 写入数据行
-        for i in range(len(data['timestamps'])):
-            row = [
-                data['timestamps'][i],
-                data['acceleration'][i][0],
-                data['acceleration'][i][1],
-                data['acceleration'][i][2],
-                data['gyroscope'][i][0],
-                data['gyroscope'][i][1],
-                data['gyroscope'][i][2],
-                data['pressure'][i][0],
-                data['pressure'][i][1],
-                data['pressure'][i][2],
-                data['pressure'][i][3],
-                data['gait_labels'][i]
-            ]
-            writer.writerow(row)
-    
+    write_csv([data], output_file)
     print(f"数据已保存为CSV格式: {output_file}")
 
 def save_as_json(data, output_file):
     """将数据保存为JSON格式"""
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+    write_json([data], output_file, data['format_version'])
     print(f"数据已保存为JSON格式: {output_file}")
 
+def save_output(binary_file, output_file, output_format, version=None):
+    """
+    按块解码数据文件并保存为指定格式
+
+    Args:
+        binary_file: 二进制数据文件路径
+        output_file: 输出路径
+        output_format: 'csv'、'json'、'npz'或'session'
+        version: 没有文件头时使用的格式版本
+
+    Returns:
+        (记录数, 格式版本)
+    """
+    if output_format == 'session':
+        return save_as_session(binary_file, output_file, version)
+    if output_format == 'npz':
+        return write_npz(binary_file, output_file, version), read_file_header(binary_file, version)[0]
+
+    version, _ = read_file_header(binary_file, version)
+    chunks = iter_decoded_chunks(binary_file, version, WRITE_CHUNK_PACKETS)
+    if output_format == 'csv':
+        return write_csv(chunks, output_file), version
+    return write_json(chunks, output_file, version), version
+
+def save_as_session(binary_file, session_dir, version=None):
+    """
+    将数据文件按块解码为列式会话目录
+
+    先写入临时目录，关闭后重命名，中断时不会留下不完整的输出。
+    会话元数据记录输入文件的大小和修改时间，用于判断输出是否为最新
+
+    Returns:
+        (解码的数据包数量, 格式版本)
+    """
+    version, _ = read_file_header(binary_file, version)
+    stat = os.stat(binary_file)
+    session_id = os.path.basename(session_dir)
+    tmp_dir = f'{session_dir}.partial'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    writer = SessionWriter(tmp_dir, session_id, metadata={
+        'source': 'device_dump',
+        'input_file': os.path.abspath(binary_file),
+        'input_size': stat.st_size,
+        'input_mtime': stat.st_mtime,
+        'format_version': version
+    }, chunk_rows=DECODE_CHUNK_PACKETS)
+
+    num_packets = 0
+    for chunk in iter_decoded_chunks(binary_file, version, with_labels=False):
+        writer.append_samples(chunk['timestamps_ms'], chunk['acceleration'], chunk['gyroscope'], chunk['pressure'])
+        num_packets += len(chunk['timestamps_ms'])
+    writer.close()
+
+    if os.path.exists(session_dir):
+        shutil.rmtree(session_dir)
+    os.rename(tmp_dir, session_dir)
+    return num_packets, version
+
+def resolve_inputs(patterns):
+    """
+    将输入参数展开为数据文件列表
+
+    目录展开为其中匹配BATCH_FILE_PATTERN的文件，通配符按glob展开（支持**）
+
+    Returns:
+        去重并排序的文件路径列表
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, BATCH_FILE_PATTERN))
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
+        else:
+            matches = [pattern]
+        files.update(os.path.abspath(path) for path in matches if os.path.isfile(path))
+    return sorted(files)
+
+def is_batch_mode(patterns):
+    """输入为多个路径、目录或通配符时使用批量模式"""
+    return len(patterns) > 1 or any(os.path.isdir(pattern) or glob.has_magic(pattern) for pattern in patterns)
+
+def batch_output_path(binary_file, output_dir, output_format):
+    """获取批量模式下输入文件对应的输出路径"""
+    stem = os.path.splitext(os.path.basename(binary_file))[0]
+    return os.path.join(output_dir, stem + OUTPUT_EXTENSIONS[output_format])
+
+def is_up_to_date(binary_file, output_path, output_format):
+    """
+    判断输出是否为最新
+
+    列式会话比较元数据中记录的输入文件大小和修改时间，CSV/JSON比较文件修改时间
+    """
+    if not os.path.exists(output_path):
+        return False
+
+    stat = os.stat(binary_file)
+    if output_format == 'session':
+        try:
+            reader = SessionReader(output_path)
+        except (OSError, ValueError):
+            return False
+        metadata = reader.metadata
+        return (
+            reader.is_closed
+            and metadata.get('input_size') == stat.st_size
+            and metadata.get('input_mtime') == stat.st_mtime
+        )
+    return os.path.getmtime(output_path) >= stat.st_mtime
+
+def decode_file(binary_file, output_path, output_format, version=None):
+    """
+    解码单个文件并保存（批量模式的工作进程入口）
+
+    Returns:
+        结果字典: 输入、输出、数据包数、字节数、耗时
+    """
+    start_time = time.perf_counter()
+    if output_format == 'session':
+        num_packets, _ = save_as_session(binary_file, output_path, version)
+    else:
+        # 先写入临时文件，中断时不会留下看起来是最新的不完整输出
+        tmp_path = f'{output_path}.partial'
+        num_packets, _ = save_output(binary_file, tmp_path, output_format, version)
+        os.replace(tmp_path, output_path)
+
+    return {
+        'input': binary_file,
+        'output': output_path,
+        'packets': num_packets,
+        'bytes': os.path.getsize(binary_file),
+        'seconds': time.perf_counter() - start_time
+    }
+
+def run_batch(binary_files, output_dir, output_format, version=None, workers=None, force=False):
+    """
+    使用进程池并行解码多个文件
+
+    Args:
+        binary_files: 输入文件列表
+        output_dir: 输出目录
+        output_format: 输出格式
+        version: 没有文件头时使用的格式版本
+        workers: 并行进程数
+        force: 为True时不跳过已是最新的输出
+
+    Returns:
+        (成功的结果列表, 跳过的文件数, 失败的文件数)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    pending = []
+    skipped = 0
+    for binary_file in binary_files:
+        output_path = batch_output_path(binary_file, output_dir, output_format)
+        if not force and is_up_to_date(binary_file, output_path, output_format):
+            skipped += 1
+        else:
+            pending.append((binary_file, output_path))
+
+    print(f"共 {len(binary_files)} 个文件，{skipped} 个已是最新，需要解码 {len(pending)} 个")
+
+    results = []
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(decode_file, binary_file, output_path, output_format, version): binary_file
+            for binary_file, output_path in pending
+        }
+        for future in as_completed(futures):
+            binary_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  失败 {binary_file}: {e}")
+                continue
+
+            results.append(result)
+            mb_per_s = result['bytes'] / 1e6 / max(result['seconds'], 1e-9)
+            print(f"  {os.path.basename(binary_file)}: {result['packets']} 条记录, "
+                  f"{result['seconds']:.2f} 秒, {mb_per_s:.1f} MB/s")
+
+    return results, skipped, failed
+
 def main():
     args = parse_arguments()
     
+    if is_batch_mode(args.input):
+        binary_files = resolve_inputs(args.input)
+        start_time = time.perf_counter()
+        results, skipped, failed = run_batch(binary_files, args.output, args.format,
+                                             args.packet_version, args.workers, args.force)
+        elapsed = time.perf_counter() - start_time
+        
+        total_bytes = sum(result['bytes'] for result in results)
+        total_packets = sum(result['packets'] for result in results)
+        print(f"完成: 解码 {len(results)} 个文件 ({total_packets} 条记录), 跳过 {skipped} 个, 失败 {failed} 个, "
+              f"总耗时 {elapsed:.2f} 秒, {total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s")
+        return 1 if failed else 0
+    
     try:
-        print(f"正在解码数据文件: {args.input}")
-        data = decode_binary_data(args.input)
+        input_file = args.input[0]
+        print(f"正在解码数据文件: {input_file}")
         
-        # 根据指定格式保存数据
-        if args.format == 'csv':
-            save_as_csv(data, args.output)
-        else:
-            save_as_json(data, args.output)
-            
-        print(f"共处理 {len(data['timestamps'])} 条数据记录")
+        # 按块解码并根据指定格式保存数据
+        num_packets, version = save_output(input_file, args.output, args.format, args.packet_version)
+        
+        print(f"数据已保存为{args.format.upper()}格式: {args.output}")
+        print(f"共处理 {num_packets} 条数据记录 (数据格式版本 {version})")
         
     except Exception as e:
         print(f"错误: {e}")
@@ -169,4 +689,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
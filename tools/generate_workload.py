@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+合成负载数据生成工具
+
+为基准测试和负载测试生成大规模、可复现的多运动员跑步传感器数据
+（信号生成见sensor_processing.synthetic），
+结果写入列式会话存储（每个运动员一个会话），也可以写成回放使用的示例JSON。
+相同的种子和参数总是生成完全相同的数据
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from storage.session_store import SessionWriter
+from sensor_processing.synthetic import make_athletes, iter_athlete_chunks, FOOT_STRIKE_PATTERNS, GENERATE_CHUNK_SAMPLES
+
+DEFAULT_SESSIONS_DIR = os.path.join(ROOT_DIR, 'data', 'sessions')
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='生成可复现的多运动员合成跑步传感器数据')
+    parser.add_argument('--athletes', '-n', type=int, default=4, help='运动员数量（每人一个会话）')
+    parser.add_argument('--duration', '-d', type=float, default=3600.0, help='每个会话的时长(秒)')
+    parser.add_argument('--sampling-rate', type=int, default=200, help='采样率(Hz)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--cadence', type=float, nargs=2, default=[165.0, 185.0], metavar=('MIN', 'MAX'),
+                        help='运动员初始步频范围(步/分钟)')
+    parser.add_argument('--cadence-drift', type=float, default=-4.0,
+                        help='步频的平均漂移(步/分钟/小时)，每个运动员在此基础上随机变化')
+    parser.add_argument('--fatigue', type=float, default=0.5,
+                        help='疲劳程度 0~1：影响冲击、垂直振幅、噪声和步频稳定性随时间的变化')
+    parser.add_argument('--noise', type=float, default=0.2, help='加速度噪声标准差(m/s^2)，角速度噪声按比例缩放')
+    parser.add_argument('--foot-strike', choices=sorted(FOOT_STRIKE_PATTERNS) + ['mixed'], default='mixed',
+                        help='着地方式，mixed为每个运动员随机选择')
+    parser.add_argument('--format', '-f', choices=['session', 'json'], default='session',
+                        help='输出格式: session=列式会话（每个运动员一个）, json=回放示例数据（仅第一个运动员）')
+    parser.add_argument('--output', '-o', default=None,
+                        help='输出位置: session格式为会话根目录 (默认data/sessions)，json格式为文件路径')
+    parser.add_argument('--prefix', default='synthetic', help='会话ID前缀')
+    parser.add_argument('--start-time', type=float, default=None,
+                        help='第一个样本的Unix时间戳(秒)，默认按种子固定，保证数据可复现')
+    parser.add_argument('--force', action='store_true', help='覆盖已存在的同名会话')
+    return parser.parse_args()
+
+def default_start_ms(seed):
+    """按种子固定的起始时间，使相同参数生成的时间戳也相同"""
+    return (1704067200.0 + (seed % 1000) * 86400.0) * 1000.0
+
+def write_session(athlete, session_dir, duration_s, sampling_rate, start_ms, params):
+    """
+    生成一个运动员的数据并写入会话目录
+
+    先写入临时目录，完成后重命名
+
+    Returns:
+        写入的样本数
+    """
+    session_id = os.path.basename(session_dir)
+    tmp_dir = f'{session_dir}.partial'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    writer = SessionWriter(tmp_dir, session_id, metadata={
+        'source': 'synthetic',
+        'sampling_rate': sampling_rate,
+        'athlete': athlete,
+        'generator': params
+    }, chunk_rows=GENERATE_CHUNK_SAMPLES)
+
+    num_samples = 0
+    for chunk in iter_athlete_chunks(athlete, duration_s, sampling_rate, start_ms):
+        writer.append_samples(chunk['timestamps_ms'], chunk['acc'], chunk['gyro'], chunk['pressure'])
+        num_samples += len(chunk['timestamps_ms'])
+    writer.close()
+
+    if os.path.exists(session_dir):
+        shutil.rmtree(session_dir)
+    os.rename(tmp_dir, session_dir)
+    return num_samples
+
+def write_json(athlete, path, duration_s, sampling_rate, start_ms):
+    """
+    生成一个运动员的数据并写入回放使用的JSON格式（timestamps、acceleration、gyroscope、pressure、gait_labels）
+
+    Returns:
+        写入的样本数
+    """
+    chunks = list(iter_athlete_chunks(athlete, duration_s, sampling_rate, start_ms))
+    timestamps_ms = np.concatenate([chunk['timestamps_ms'] for chunk in chunks])
+    stance = np.concatenate([chunk['gait_phase'] for chunk in chunks])
+    # 与示例数据相同的不带时区的本地时间ISO格式（毫秒精度），按第一个样本的时区偏移统一转换
+    local_offset_ms = datetime.fromtimestamp(timestamps_ms[0] / 1000).astimezone().utcoffset().total_seconds() * 1000
+    timestamps = np.datetime_as_string((timestamps_ms + local_offset_ms).astype('datetime64[ms]'), unit='ms').tolist()
+
+    data = {
+        'timestamps': timestamps,
+        'acceleration': np.round(np.concatenate([chunk['acc'] for chunk in chunks]), 5).tolist(),
+        'gyroscope': np.round(np.concatenate([chunk['gyro'] for chunk in chunks]), 5).tolist(),
+        'pressure': np.round(np.concatenate([chunk['pressure'] for chunk in chunks]), 5).tolist(),
+        'gait_labels': np.where(stance, 'stance', 'swing').tolist()
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return len(timestamps)
+
+def main():
+    args = parse_arguments()
+
+    athletes = make_athletes(args.athletes, args.seed, tuple(args.cadence), args.cadence_drift,
+                             args.fatigue, args.noise, args.foot_strike)
+    start_ms = args.start_time * 1000.0 if args.start_time is not None else default_start_ms(args.seed)
+    params = {
+        'seed': args.seed,
+        'duration_s': args.duration,
+        'sampling_rate': args.sampling_rate,
+        'cadence': args.cadence,
+        'cadence_drift': args.cadence_drift,
+        'fatigue': args.fatigue,
+        'noise': args.noise,
+        'foot_strike': args.foot_strike
+    }
+
+    start_time = time.perf_counter()
+    total_samples = 0
+
+    if args.format == 'json':
+        output = args.output or os.path.join(ROOT_DIR, 'data', 'sample_data.json')
+        total_samples = write_json(athletes[0], output, args.duration, args.sampling_rate, start_ms)
+        print(f"已生成: {output} ({total_samples} 个样本, 着地方式 {athletes[0]['foot_strike']})")
+    else:
+        sessions_dir = args.output or DEFAULT_SESSIONS_DIR
+        os.makedirs(sessions_dir, exist_ok=True)
+        for athlete in athletes:
+            session_id = f"{args.prefix}_{args.seed}_{athlete['athlete_id']}"
+            session_dir = os.path.join(sessions_dir, session_id)
+            if os.path.exists(session_dir) and not args.force:
+                print(f"  {session_id}: 已存在，跳过（使用 --force 覆盖）")
+                continue
+            num_samples = write_session(athlete, session_dir, args.duration, args.sampling_rate, start_ms, params)
+            total_samples += num_samples
+            print(f"  {session_id}: {num_samples} 个样本, 步频 {athlete['cadence']:.1f}, "
+                  f"着地方式 {athlete['foot_strike']}")
+
+    elapsed = time.perf_counter() - start_time
+    rate = total_samples / elapsed if elapsed > 0 else 0.0
+    print(f"完成: 共 {total_samples} 个样本, 耗时 {elapsed:.2f} 秒 ({rate / 1e6:.1f} M样本/秒)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
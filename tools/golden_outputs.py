@@ -0,0 +1,542 @@
+#!/usr/bin/env python
+"""
+流程输出一致性（黄金输出）检查工具
+
+record: 在合成跑步数据、记录文件/会话和边界情况窗口组成的固定语料上运行当前的
+滤波 -> extract_features / extract_pressure_features -> infer 流程，
+将输入窗口和每个阶段的输出保存为黄金输出文件(.npz)
+
+compare: 在黄金输出文件保存的同一批输入上运行另一种实现（内置的批量实现、
+module:function 形式的自定义实现，或替换了部分函数的参考流程），
+按特征逐项与黄金输出比较，每一项使用各自的容差，任何一项超出容差时以非零状态退出。
+性能优化（更快的滤波、特征提取或步频估计）必须通过该检查，避免建议在不知不觉中改变
+"""
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import importlib
+from contextlib import contextmanager
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from sensor_processing import filter as filter_module
+from sensor_processing import feature_extractor
+from sensor_processing.replay import load_recording, file_digest
+from sensor_processing.synthetic import FOOT_STRIKE_PATTERNS, make_athletes, iter_athlete_chunks
+
+DEFAULT_GOLDEN_PATH = os.path.join(ROOT_DIR, 'data', 'golden_outputs.npz')
+DEFAULT_SESSIONS_DIR = os.path.join(ROOT_DIR, 'data', 'sessions')
+DEFAULT_RECORDING = os.path.join(ROOT_DIR, 'data', 'sample_data.json')
+
+GOLDEN_VERSION = 1
+SAMPLING_RATE = 200
+
+# 与DataProcessor相同的滤波参数
+ACC_LOWPASS_CUTOFF = 20.0
+GYRO_LOWPASS_CUTOFF = 20.0
+MEDIAN_KERNEL_SIZE = 5
+
+# 合成数据每个运动员的时长(秒)，足够覆盖疲劳和步频漂移
+SYNTHETIC_DURATION_S = 1800
+
+# 阶段名称（输出键的前缀）
+STAGES = ('filter', 'features', 'pressure', 'infer')
+
+# 默认容差: (通配符, rtol, atol)，按顺序匹配第一个
+DEFAULT_TOLERANCES = [
+    ('infer.gait_phase', 0.0, 0.0),
+    ('infer.posture_score', 0.0, 1e-3),
+    ('infer.phase_confidence', 0.0, 1e-5),
+    ('*', 1e-6, 1e-9)
+]
+
+# 可以在参考流程中替换的函数: 名称 -> 所在模块
+REPLACEABLE_FUNCTIONS = {
+    'lowpass_filter': filter_module,
+    'median_filter': filter_module,
+    'extract_features': feature_extractor,
+    'extract_pressure_features': feature_extractor,
+    'estimate_cadence': feature_extractor
+}
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='记录流程的黄金输出，并检查其他实现与之一致')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help='用当前的参考流程记录黄金输出')
+    record.add_argument('--output', '-o', default=DEFAULT_GOLDEN_PATH, help='黄金输出文件路径(.npz)')
+    record.add_argument('--window-size', '-w', type=int, default=400, help='窗口大小（数据点数量）')
+    record.add_argument('--windows-per-source', type=int, default=24,
+                        help='每个运动员/记录中均匀截取的窗口数量')
+    record.add_argument('--seed', type=int, default=0, help='合成数据的种子')
+    record.add_argument('--recordings', nargs='*', default=None,
+                        help='加入语料的JSON记录文件或会话目录 (默认: sample_data.json和--sessions-dir中的所有会话)')
+    record.add_argument('--sessions-dir', default=DEFAULT_SESSIONS_DIR, help='会话存储目录')
+    record.add_argument('--model', '-m', default=None, help='TFLite模型路径 (默认: 内置模型)')
+    record.add_argument('--force', action='store_true', help='覆盖已存在的黄金输出文件')
+
+    compare = subparsers.add_parser('compare', help='将一种实现的输出与黄金输出比较')
+    compare.add_argument('--golden', '-g', default=DEFAULT_GOLDEN_PATH, help='黄金输出文件路径(.npz)')
+    compare.add_argument('--impl', default='batch',
+                         help="被检查的实现: 'reference'、'batch' 或 module:function "
+                              "(签名与 reference_pipeline 相同)")
+    compare.add_argument('--replace', nargs='+', default=[], metavar='NAME=MODULE:FUNCTION',
+                         help=f"运行前替换流程中的函数，可替换: {', '.join(REPLACEABLE_FUNCTIONS)}")
+    compare.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES, help='比较的阶段')
+    compare.add_argument('--tolerance', '-t', nargs='+', default=[], metavar='PATTERN=RTOL,ATOL',
+                         help='覆盖容差，如 features.cadence=0,0.5 或 filter.*=1e-5,1e-8（优先于默认容差）')
+    compare.add_argument('--model', '-m', default=None, help='TFLite模型路径 (默认: 记录时使用的模型)')
+    compare.add_argument('--output', '-o', help='输出JSON报告路径')
+    return parser.parse_args()
+
+def load_function(spec):
+    """
+    按 module:function 导入函数
+
+    Args:
+        spec: 如 'my_package.fast_features:extract_features'
+
+    Returns:
+        函数对象
+    """
+    module_name, _, func_name = spec.partition(':')
+    if not module_name or not func_name:
+        raise ValueError(f"函数格式应为 module:function: {spec}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+@contextmanager
+def replaced_functions(replacements):
+    """
+    在上下文中替换流程使用的函数，退出时恢复
+
+    extract_features通过模块全局名称调用estimate_cadence，
+    因此替换estimate_cadence对extract_features和extract_features_batch都有效
+
+    Args:
+        replacements: 函数名 -> 新函数
+    """
+    originals = {}
+    try:
+        for name, func in replacements.items():
+            module = REPLACEABLE_FUNCTIONS[name]
+            originals[name] = getattr(module, name)
+            setattr(module, name, func)
+        yield
+    finally:
+        for name, func in originals.items():
+            setattr(REPLACEABLE_FUNCTIONS[name], name, func)
+
+def evenly_spaced_windows(recording, window_size, count):
+    """
+    从一段连续数据中均匀截取窗口
+
+    Returns:
+        (起始样本列表, acc窗口, gyro窗口, pressure窗口)，窗口形状为(count, window_size, 3/4)
+    """
+    num_samples = len(recording['acc'])
+    if num_samples < window_size:
+        return [], None, None, None
+    count = min(count, num_samples - window_size + 1)
+    starts = np.linspace(0, num_samples - window_size, count).astype(int)
+    index = starts[:, None] + np.arange(window_size)
+    return (
+        starts.tolist(),
+        np.asarray(recording['acc'], dtype=np.float64)[index],
+        np.asarray(recording['gyro'], dtype=np.float64)[index],
+        np.asarray(recording['pressure'], dtype=np.float64)[index]
+    )
+
+def edge_case_windows(window_size, seed=0):
+    """
+    边界情况窗口: 静止（常数信号，方差为零）、无足压接触、单个冲击尖峰
+
+    Returns:
+        [(来源名称, acc, gyro, pressure)]
+    """
+    rng = np.random.default_rng(seed)
+    still_acc = np.tile([0.0, 0.0, 9.81], (window_size, 1))
+    still_gyro = np.zeros((window_size, 3))
+    still_pressure = np.tile([0.25, 0.1, 0.6, 0.05], (window_size, 1))
+
+    spike_acc = still_acc + rng.normal(0, 0.05, (window_size, 3))
+    spike_acc[window_size // 2, 2] += 40.0
+    spike_gyro = rng.normal(0, 0.02, (window_size, 3))
+
+    return [
+        ('edge:still', still_acc, still_gyro, still_pressure),
+        ('edge:no_contact', still_acc + rng.normal(0, 0.2, (window_size, 3)), spike_gyro,
+         np.zeros((window_size, 4))),
+        ('edge:spike', spike_acc, spike_gyro, still_pressure)
+    ]
+
+def default_recordings(sessions_dir):
+    """默认加入语料的记录: 示例数据文件和会话存储中的所有会话目录"""
+    recordings = []
+    if os.path.exists(DEFAULT_RECORDING):
+        recordings.append(DEFAULT_RECORDING)
+    if os.path.isdir(sessions_dir):
+        recordings.extend(
+            os.path.join(sessions_dir, name) for name in sorted(os.listdir(sessions_dir))
+            if os.path.isdir(os.path.join(sessions_dir, name))
+        )
+    return recordings
+
+def build_corpus(window_size, windows_per_source, seed, recordings):
+    """
+    构建输入语料
+
+    每种着地方式一个合成运动员（固定种子），加上记录文件/会话和边界情况窗口
+
+    Returns:
+        字典: acc、gyro、pressure (num_windows, window_size, 3/4) 和每个窗口的来源名称 source
+    """
+    sources, acc, gyro, pressure = [], [], [], []
+
+    def add(name, starts, acc_windows, gyro_windows, pressure_windows):
+        sources.extend(f'{name}@{start}' for start in starts)
+        acc.append(acc_windows)
+        gyro.append(gyro_windows)
+        pressure.append(pressure_windows)
+
+    for i, pattern in enumerate(sorted(FOOT_STRIKE_PATTERNS)):
+        athlete = make_athletes(1, seed + i, foot_strike=pattern)[0]
+        chunks = list(iter_athlete_chunks(athlete, SYNTHETIC_DURATION_S, SAMPLING_RATE))
+        recording = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in ('acc', 'gyro', 'pressure')}
+        add(f'synthetic:{pattern}:seed{seed + i}', *evenly_spaced_windows(recording, window_size, windows_per_source))
+
+    for path in recordings:
+        starts, *windows = evenly_spaced_windows(load_recording(path), window_size, windows_per_source)
+        if not starts:
+            print(f"警告: 记录短于一个窗口，已跳过: {path}", file=sys.stderr)
+            continue
+        add(f'recording:{os.path.relpath(path, ROOT_DIR)}', starts, *windows)
+
+    for name, *window in edge_case_windows(window_size, seed):
+        add(name, [0], *(data[None] for data in window))
+
+    return {
+        'source': np.array(sources),
+        'acc': np.concatenate(acc),
+        'gyro': np.concatenate(gyro),
+        'pressure': np.concatenate(pressure)
+    }
+
+def collect_outputs(prefix, dicts):
+    """
+    将每个窗口的结果字典合并为按键堆叠的数组
+
+    Args:
+        prefix: 输出键的前缀（阶段名称）
+        dicts: 每个窗口的结果字典列表
+
+    Returns:
+        字典: '前缀.键' -> 形状为(num_windows, ...)的数组
+    """
+    return {f'{prefix}.{key}': np.stack([np.asarray(d[key], dtype=np.float64) for d in dicts])
+            for key in dicts[0]}
+
+def collect_inference(results):
+    """
+    将推理结果转换为数组
+
+    单输出模型没有步态相位，gait_phase记为空字符串，phase_confidence记为NaN
+    """
+    return {
+        'infer.posture_score': np.array([r['posture_score'] for r in results], dtype=np.float64),
+        'infer.gait_phase': np.array([r['gait_phase'] or '' for r in results]),
+        'infer.phase_confidence': np.array(
+            [np.nan if r['phase_confidence'] is None else r['phase_confidence'] for r in results],
+            dtype=np.float64
+        )
+    }
+
+def reference_pipeline(acc_windows, gyro_windows, pressure_windows, model, stages=STAGES):
+    """
+    参考实现：与DataProcessor._process_data_window相同，逐窗口处理
+
+    Args:
+        acc_windows: 形状为(num_windows, window_size, 3)的加速度
+        gyro_windows: 形状为(num_windows, window_size, 3)的角速度
+        pressure_windows: 形状为(num_windows, window_size, 4)的足压
+        model: GaitAnalysisModel实例（不需要infer阶段时可以为None）
+        stages: 需要输出的阶段
+
+    Returns:
+        字典: 输出键 -> 形状为(num_windows, ...)的数组
+    """
+    acc_filtered, gyro_filtered, imu_features = [], [], []
+    for acc, gyro in zip(acc_windows, gyro_windows):
+        acc_f = filter_module.lowpass_filter(acc, ACC_LOWPASS_CUTOFF, SAMPLING_RATE)
+        gyro_f = filter_module.lowpass_filter(gyro, GYRO_LOWPASS_CUTOFF, SAMPLING_RATE)
+        acc_f[:, 2] = filter_module.median_filter(acc_f[:, 2], kernel_size=MEDIAN_KERNEL_SIZE)
+        acc_filtered.append(acc_f)
+        gyro_filtered.append(gyro_f)
+        if 'features' in stages or 'infer' in stages:
+            imu_features.append(feature_extractor.extract_features(acc_f, gyro_f))
+
+    outputs = {}
+    if 'filter' in stages:
+        outputs['filter.acc'] = np.stack(acc_filtered)
+        outputs['filter.gyro'] = np.stack(gyro_filtered)
+    if 'features' in stages:
+        outputs.update(collect_outputs('features', imu_features))
+    if 'pressure' in stages:
+        outputs.update(collect_outputs(
+            'pressure', [feature_extractor.extract_pressure_features(p) for p in pressure_windows]
+        ))
+    if 'infer' in stages:
+        outputs.update(collect_inference([model.infer(features) for features in imu_features]))
+    return outputs
+
+def batch_pipeline(acc_windows, gyro_windows, pressure_windows, model, stages=STAGES):
+    """
+    批量实现：BatchProcessor的批量滤波、extract_features_batch和infer_batch
+
+    足压特征没有批量版本，与参考实现相同逐窗口计算
+    """
+    from sensor_processing.batch_processor import BatchProcessor
+
+    processor = BatchProcessor(model, window_size=acc_windows.shape[1], sampling_rate=SAMPLING_RATE,
+                               acc_lowpass_cutoff=ACC_LOWPASS_CUTOFF, gyro_lowpass_cutoff=GYRO_LOWPASS_CUTOFF)
+    acc_filtered, gyro_filtered = processor.filter_windows(acc_windows, gyro_windows)
+
+    outputs = {}
+    if 'filter' in stages:
+        outputs['filter.acc'] = acc_filtered
+        outputs['filter.gyro'] = gyro_filtered
+    if 'features' in stages or 'infer' in stages:
+        features = feature_extractor.extract_features_batch(acc_filtered, gyro_filtered, SAMPLING_RATE)
+        if 'features' in stages:
+            outputs.update({f'features.{key}': np.asarray(value, dtype=np.float64) for key, value in features.items()})
+        if 'infer' in stages:
+            outputs.update(collect_inference(model.infer_batch(feature_extractor.split_feature_batch(features))))
+    if 'pressure' in stages:
+        outputs.update(collect_outputs(
+            'pressure', [feature_extractor.extract_pressure_features(p) for p in pressure_windows]
+        ))
+    return outputs
+
+IMPLEMENTATIONS = {
+    'reference': reference_pipeline,
+    'batch': batch_pipeline
+}
+
+def resolve_implementation(name):
+    """按名称获取内置实现，或按 module:function 导入自定义实现"""
+    if name in IMPLEMENTATIONS:
+        return IMPLEMENTATIONS[name]
+    return load_function(name)
+
+def parse_tolerances(specs):
+    """
+    解析命令行容差
+
+    Args:
+        specs: 'PATTERN=RTOL,ATOL' 字符串列表
+
+    Returns:
+        [(通配符, rtol, atol)]，排在默认容差之前
+    """
+    tolerances = []
+    for spec in specs:
+        pattern, _, values = spec.partition('=')
+        rtol, _, atol = values.partition(',')
+        if not pattern or not atol:
+            raise ValueError(f"容差格式应为 PATTERN=RTOL,ATOL: {spec}")
+        tolerances.append((pattern, float(rtol), float(atol)))
+    return tolerances + DEFAULT_TOLERANCES
+
+def tolerance_for(key, tolerances):
+    """输出键使用的容差 (rtol, atol)"""
+    for pattern, rtol, atol in tolerances:
+        if fnmatch.fnmatch(key, pattern):
+            return rtol, atol
+    return 0.0, 0.0
+
+def compare_output(key, expected, actual, rtol, atol, sources):
+    """
+    比较单个输出项
+
+    NaN与NaN、同号无穷与无穷视为相等；字符串必须完全相同
+
+    Returns:
+        比较结果字典: 是否通过、最大绝对/相对误差、不一致的窗口数和前几个不一致窗口的来源
+    """
+    result = {'key': key, 'rtol': rtol, 'atol': atol}
+    if actual is None:
+        return dict(result, passed=False, error='缺少该输出')
+    actual = np.asarray(actual)
+    if actual.shape != expected.shape:
+        return dict(result, passed=False, error=f'形状不一致: {actual.shape} != {expected.shape}')
+
+    if expected.dtype.kind in 'US':
+        mismatch = actual != expected
+        result.update(max_abs_error=None, max_rel_error=None)
+    else:
+        actual = actual.astype(np.float64)
+        mismatch = ~np.isclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True)
+        finite = np.isfinite(actual) & np.isfinite(expected)
+        abs_error = np.abs(actual - expected, where=finite, out=np.zeros(expected.shape))
+        rel_error = np.divide(abs_error, np.abs(expected), where=finite & (expected != 0),
+                              out=np.zeros(expected.shape))
+        result.update(max_abs_error=float(abs_error.max(initial=0.0)),
+                      max_rel_error=float(rel_error.max(initial=0.0)))
+
+    bad_windows = np.flatnonzero(mismatch.reshape(len(expected), -1).any(axis=1))
+    result.update(
+        passed=len(bad_windows) == 0,
+        mismatched_windows=int(len(bad_windows)),
+        examples=[str(sources[i]) for i in bad_windows[:5]]
+    )
+    return result
+
+def save_golden(path, corpus, outputs, meta):
+    """保存黄金输出（先写临时文件再替换）"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    arrays = {f'input.{key}': value for key, value in corpus.items()}
+    arrays.update({f'output.{key}': value for key, value in outputs.items()})
+    arrays['meta'] = np.array(json.dumps(meta, ensure_ascii=False))
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_golden(path):
+    """
+    加载黄金输出
+
+    Returns:
+        (元数据字典, 输入字典, 输出字典)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta.get('version') != GOLDEN_VERSION:
+            raise ValueError(f"不支持的黄金输出版本: {meta.get('version')}")
+        inputs = {key[len('input.'):]: data[key] for key in data.files if key.startswith('input.')}
+        outputs = {key[len('output.'):]: data[key] for key in data.files if key.startswith('output.')}
+    return meta, inputs, outputs
+
+def load_model(model_path):
+    """加载推理模型，失败时抛出异常"""
+    from edge_ai.inference import GaitAnalysisModel
+    model = GaitAnalysisModel(model_path)
+    if not model.is_initialized:
+        raise RuntimeError(f"模型加载失败: {model.model_path}")
+    return model
+
+def record(args):
+    """记录黄金输出"""
+    if os.path.exists(args.output) and not args.force:
+        print(f"错误: 黄金输出已存在: {args.output}（使用--force覆盖）", file=sys.stderr)
+        return 1
+
+    recordings = default_recordings(args.sessions_dir) if args.recordings is None else args.recordings
+    start_time = time.perf_counter()
+    corpus = build_corpus(args.window_size, args.windows_per_source, args.seed, recordings)
+    print(f"语料: {len(corpus['source'])} 个窗口 (合成、{len(recordings)} 个记录和边界情况)", file=sys.stderr)
+
+    model = load_model(args.model)
+    with np.errstate(all='ignore'):
+        outputs = reference_pipeline(corpus['acc'], corpus['gyro'], corpus['pressure'], model)
+
+    meta = {
+        'version': GOLDEN_VERSION,
+        'created_at': time.time(),
+        'window_size': args.window_size,
+        'sampling_rate': SAMPLING_RATE,
+        'seed': args.seed,
+        'recordings': [os.path.relpath(path, ROOT_DIR) for path in recordings],
+        'model': os.path.relpath(model.model_path, ROOT_DIR),
+        'model_sha1': file_digest(model.model_path)
+    }
+    save_golden(args.output, corpus, outputs, meta)
+    print(f"已记录 {len(outputs)} 项输出，用时 {time.perf_counter() - start_time:.1f} 秒: {args.output}",
+          file=sys.stderr)
+    return 0
+
+def print_results(results):
+    """打印比较结果表"""
+    print(f"{'输出项':<40} {'rtol':>8} {'atol':>8} {'最大绝对误差':>14} {'最大相对误差':>14} {'不一致':>6}",
+          file=sys.stderr)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['key']:<40} 失败: {result['error']}", file=sys.stderr)
+            continue
+        abs_error = '-' if result['max_abs_error'] is None else f"{result['max_abs_error']:.3e}"
+        rel_error = '-' if result['max_rel_error'] is None else f"{result['max_rel_error']:.3e}"
+        flag = '' if result['passed'] else f"  失败 例: {', '.join(result['examples'])}"
+        print(f"{result['key']:<40} {result['rtol']:>8.0e} {result['atol']:>8.0e} {abs_error:>14} {rel_error:>14} "
+              f"{result['mismatched_windows']:>6}{flag}", file=sys.stderr)
+
+def compare(args):
+    """将实现的输出与黄金输出比较"""
+    meta, inputs, golden = load_golden(args.golden)
+    tolerances = parse_tolerances(args.tolerance)
+    implementation = resolve_implementation(args.impl)
+    replacements = {}
+    for spec in args.replace:
+        name, _, func_spec = spec.partition('=')
+        if name not in REPLACEABLE_FUNCTIONS:
+            raise ValueError(f"不能替换的函数: {name}")
+        replacements[name] = load_function(func_spec)
+
+    model = None
+    if 'infer' in args.stages:
+        model_path = args.model or os.path.join(ROOT_DIR, meta['model'])
+        model = load_model(model_path)
+        if file_digest(model.model_path) != meta['model_sha1']:
+            print("警告: 模型与记录黄金输出时使用的模型不同，推理输出可能不一致", file=sys.stderr)
+
+    start_time = time.perf_counter()
+    with replaced_functions(replacements), np.errstate(all='ignore'):
+        outputs = implementation(inputs['acc'], inputs['gyro'], inputs['pressure'], model, stages=args.stages)
+    elapsed_s = time.perf_counter() - start_time
+
+    keys = sorted(key for key in golden if key.split('.', 1)[0] in args.stages)
+    results = [
+        compare_output(key, golden[key], outputs.get(key), *tolerance_for(key, tolerances), inputs['source'])
+        for key in keys
+    ]
+    extra = sorted(key for key in outputs if key not in golden)
+    print_results(results)
+
+    failed = [result for result in results if not result['passed']]
+    report = {
+        'golden': args.golden,
+        'golden_meta': meta,
+        'implementation': args.impl,
+        'replacements': args.replace,
+        'stages': args.stages,
+        'num_windows': int(len(inputs['source'])),
+        'elapsed_s': elapsed_s,
+        'passed': not failed,
+        'results': results,
+        'extra_outputs': extra
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"比较报告已保存: {args.output}", file=sys.stderr)
+
+    if extra:
+        print(f"注意: 黄金输出中没有的输出项未比较: {', '.join(extra)}", file=sys.stderr)
+    if failed:
+        print(f"不一致: {len(failed)}/{len(results)} 项输出超出容差", file=sys.stderr)
+        return 1
+    print(f"一致: {len(results)} 项输出均在容差内 ({len(inputs['source'])} 个窗口, {elapsed_s:.2f} 秒)",
+          file=sys.stderr)
+    return 0
+
+def main():
+    args = parse_arguments()
+    if args.command == 'record':
+        return record(args)
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
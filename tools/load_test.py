@@ -0,0 +1,553 @@
+#!/usr/bin/env python
+"""
+Web层负载测试工具
+
+在本机启动web_ui.app服务，模拟N个传感器数据流（通过Socket.IO推送二进制数据帧）和
+M个查看客户端（Socket.IO订阅或HTTP轮询），测量样本从发送到客户端收到的端到端延迟、
+分析结果推送延迟、丢弃的数据窗口和消息、服务端CPU和内存占用，输出JSON报告
+
+所有连接都在localhost上完成，客户端与服务端共享同一时钟，延迟可以直接用时间戳相减得到
+"""
+import os
+import sys
+import json
+import time
+import socket
+import secrets
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+import numpy as np
+import requests
+import socketio
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from web_ui.frame_batcher import pack_frame, unpack_frame
+from sensor_processing.replay import ReplayEngine, load_recording
+from tools.benchmark_utils import summarize_latencies
+
+# 在子进程中启动服务的脚本
+SERVER_SCRIPT = """
+import sys
+from web_ui.app import app, socketio
+socketio.run(app, host=sys.argv[1], port=int(sys.argv[2]), allow_unsafe_werkzeug=True)
+"""
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Web/Socket.IO层多客户端负载测试')
+    parser.add_argument('--streams', '-n', type=int, default=1, help='模拟的传感器数据流（运动员）数量')
+    parser.add_argument('--viewers', '-m', type=int, default=4, help='Socket.IO查看客户端数量')
+    parser.add_argument('--http-viewers', type=int, default=0, help='HTTP轮询查看客户端数量')
+    parser.add_argument('--duration', '-d', type=float, default=30.0, help='测试时长(秒)')
+    parser.add_argument('--speed', type=float, default=1.0, help='每个数据流的回放倍速，0为尽可能快')
+    parser.add_argument('--batch-ms', type=float, default=50.0, help='数据流推送数据帧的间隔(毫秒)')
+    parser.add_argument('--points-per-second', type=int, default=50, help='查看客户端声明的显示分辨率')
+    parser.add_argument('--http-interval', type=float, default=1.0, help='HTTP查看客户端的轮询间隔(秒)')
+    parser.add_argument('--no-processing', action='store_true',
+                        help='不将第一个数据流送入分析流程，只测试数据分发')
+    parser.add_argument('--recording', default=os.path.join(ROOT_DIR, 'data', 'sample_data.json'),
+                        help='数据流回放的记录（JSON文件或会话目录）')
+    parser.add_argument('--port', type=int, default=0, help='服务端口，0为自动选择空闲端口')
+    parser.add_argument('--server-url', help='使用已运行的服务（不启动本地服务，也不采集进程指标）')
+    parser.add_argument('--ingest-token',
+                        help='数据流接入令牌（与服务的GAIT_INGEST_TOKEN相同），使用--server-url时必须指定，'
+                             '本地启动的服务使用随机令牌')
+    parser.add_argument('--startup-timeout', type=float, default=120.0, help='等待服务就绪的最长时间(秒)')
+    parser.add_argument('--output', '-o', help='输出JSON报告路径，不指定时输出到标准输出')
+    return parser.parse_args()
+
+def find_free_port():
+    """获取一个空闲的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(port, log_file, ingest_token):
+    """
+    在子进程中启动Web服务
+
+    Args:
+        port: 监听端口
+        log_file: 服务输出的日志文件对象
+        ingest_token: 数据流接入令牌（服务只在设置了令牌时接受ingest_frame事件）
+
+    Returns:
+        子进程对象
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    env['GAIT_INGEST_TOKEN'] = ingest_token
+    return subprocess.Popen(
+        [sys.executable, '-c', SERVER_SCRIPT, '127.0.0.1', str(port)],
+        cwd=ROOT_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+
+def wait_until_ready(url, timeout, process=None):
+    """
+    轮询服务的健康检查接口直到模型和数据处理器就绪
+
+    Returns:
+        服务就绪耗时(秒)
+    """
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'服务进程已退出，退出码 {process.returncode}')
+        try:
+            response = requests.get(url, timeout=1.0)
+            if response.status_code == 200 and response.json().get('ready'):
+                return time.monotonic() - start_time
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f'服务在{timeout}秒内未就绪: {url}')
+
+class ProcessMonitor:
+    """
+    进程资源监视器类
+
+    定期采样进程的CPU占用率和常驻内存，优先使用psutil，未安装时读取/proc（仅Linux）
+    """
+
+    def __init__(self, pid, interval=0.5):
+        """
+        初始化进程资源监视器
+
+        Args:
+            pid: 进程ID
+            interval: 采样间隔(秒)
+        """
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent = []
+        self.rss_mb = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        try:
+            import psutil
+            self.process = psutil.Process(pid)
+        except ImportError:
+            self.process = None
+
+    def _read_proc(self):
+        """从/proc读取累计CPU时间(秒)和常驻内存(MB)"""
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_time = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+        rss_mb = 0.0
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_mb = int(line.split()[1]) / 1024.0
+                    break
+        return cpu_time, rss_mb
+
+    def _run(self):
+        """采样循环"""
+        last_cpu_time = None
+        last_wall = None
+        while not self.stop_event.wait(self.interval):
+            try:
+                if self.process is not None:
+                    cpu_times = self.process.cpu_times()
+                    cpu_time = cpu_times.user + cpu_times.system
+                    rss_mb = self.process.memory_info().rss / (1024.0 * 1024.0)
+                else:
+                    cpu_time, rss_mb = self._read_proc()
+            except (OSError, IndexError, ValueError):
+                break
+
+            wall = time.monotonic()
+            if last_cpu_time is not None:
+                self.cpu_percent.append(100.0 * (cpu_time - last_cpu_time) / (wall - last_wall))
+            self.rss_mb.append(rss_mb)
+            last_cpu_time, last_wall = cpu_time, wall
+
+    def start(self):
+        """开始采样"""
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """停止采样"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+    def summary(self):
+        """采样结果摘要"""
+        if not self.rss_mb:
+            return None
+        cpu = np.asarray(self.cpu_percent or [0.0])
+        rss = np.asarray(self.rss_mb)
+        return {
+            'samples': len(rss),
+            'cpu_percent': {'mean': float(cpu.mean()), 'p95': float(np.percentile(cpu, 95)), 'max': float(cpu.max())},
+            'rss_mb': {'start': float(rss[0]), 'mean': float(rss.mean()), 'max': float(rss.max())}
+        }
+
+class IngestStream:
+    """
+    模拟传感器数据流类
+
+    使用回放引擎按记录的时间戳节奏回放数据，样本时间戳替换为发送时的墙上时钟，
+    打包为二进制帧后通过ingest_frame事件推送给服务端
+    """
+
+    def __init__(self, url, session_id, recording, speed, batch_ms, ingest_token):
+        """
+        初始化数据流
+
+        Args:
+            url: 服务地址
+            session_id: 数据流的会话ID
+            recording: load_recording返回的记录
+            speed: 回放倍速
+            batch_ms: 推送间隔(毫秒)
+            ingest_token: 数据流接入令牌
+        """
+        self.url = url
+        self.ingest_token = ingest_token
+        self.session_id = session_id
+        self.client = socketio.Client(reconnection=False)
+        self.engine = ReplayEngine(recording, self._send_batch, speed=speed, batch_ms=batch_ms)
+        self.seq = 0
+        self.samples_sent = 0
+        self.errors = 0
+
+    def _send_batch(self, batch):
+        """将一批样本打上发送时间并推送"""
+        offsets = batch['timestamps_ms'] - batch['timestamps_ms'][-1]
+        timestamps_ms = time.time() * 1000 + offsets
+        values = np.hstack([batch['acc'], batch['gyro'], batch['pressure']])
+
+        self.seq += 1
+        try:
+            self.client.emit('ingest_frame', (self.session_id, pack_frame(self.seq, timestamps_ms, values)))
+            self.samples_sent += len(timestamps_ms)
+        except socketio.exceptions.SocketIOError:
+            self.errors += 1
+
+    def start(self):
+        """连接服务并开始推送"""
+        self.client.connect(self.url, auth={'ingest_token': self.ingest_token}, wait_timeout=10)
+        self.engine.start()
+
+    def stop(self):
+        """停止推送并断开连接"""
+        self.engine.stop()
+        self.client.disconnect()
+
+class SocketViewer:
+    """
+    Socket.IO查看客户端类
+
+    订阅一个会话的原始数据和分析结果，记录每个收到样本的端到端延迟和结果推送延迟
+    """
+
+    def __init__(self, url, session_id, points_per_second):
+        """
+        初始化查看客户端
+
+        Args:
+            url: 服务地址
+            session_id: 订阅的会话ID
+            points_per_second: 声明的显示分辨率
+        """
+        self.url = url
+        self.session_id = session_id
+        self.points_per_second = points_per_second
+        self.client = socketio.Client(reconnection=False)
+
+        self.lock = threading.Lock()
+        self.sample_latencies = []
+        self.result_latencies = []
+        self.frames = 0
+        self.updates = 0
+        self.seq_gaps = 0
+        self.last_seq = None
+
+        self.client.on('connect', self._on_connect)
+        self.client.on('sensor_frame', self._on_frame)
+        self.client.on('analysis_snapshot', self._on_snapshot)
+        self.client.on('analysis_update', self._on_update)
+
+    def _on_connect(self):
+        self.client.emit('subscribe', {
+            'session_id': self.session_id,
+            'channels': ['raw', 'results'],
+            'points_per_second': self.points_per_second
+        })
+
+    def _on_frame(self, session_id, payload):
+        now_ms = time.time() * 1000
+        frame = unpack_frame(payload)
+        with self.lock:
+            self.frames += 1
+            self.sample_latencies.extend((now_ms - frame['timestamps']).tolist())
+
+    def _on_snapshot(self, message):
+        with self.lock:
+            self.last_seq = message['seq']
+
+    def _on_update(self, message):
+        now_ms = time.time() * 1000
+        with self.lock:
+            self.updates += 1
+            if self.last_seq is not None and message['seq'] != self.last_seq + 1:
+                self.seq_gaps += 1
+            self.last_seq = message['seq']
+            timestamp = message['delta'].get('timestamp')
+            if timestamp is not None:
+                self.result_latencies.append(now_ms - timestamp)
+
+    def start(self):
+        """连接服务"""
+        self.client.connect(self.url, wait_timeout=10)
+
+    def stop(self):
+        """断开连接"""
+        self.client.disconnect()
+
+class HttpViewer:
+    """
+    HTTP轮询查看客户端类
+
+    定期请求最新分析数据，记录响应时间和错误数
+    """
+
+    def __init__(self, url, interval):
+        """
+        初始化HTTP查看客户端
+
+        Args:
+            url: 服务地址
+            interval: 轮询间隔(秒)
+        """
+        self.url = url.rstrip('/') + '/api/get_latest_data'
+        self.interval = interval
+        self.session = requests.Session()
+        self.response_times = []
+        self.errors = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            start_time = time.perf_counter()
+            try:
+                self.session.get(self.url, timeout=10).raise_for_status()
+                self.response_times.append((time.perf_counter() - start_time) * 1000)
+            except requests.RequestException:
+                self.errors += 1
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        """开始轮询"""
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """停止轮询"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval + 10)
+
+def summarize(values):
+    """延迟统计，没有数据时返回None"""
+    return summarize_latencies(values) if len(values) else None
+
+def run_load_test(args, url):
+    """
+    执行负载测试
+
+    Args:
+        args: 命令行参数
+        url: 服务地址
+
+    Returns:
+        报告字典（不含服务进程指标）
+    """
+    recording = load_recording(args.recording)
+    session_ids = [f'load-{i}' for i in range(args.streams)]
+    http = requests.Session()
+
+    # 第一个数据流进入完整的分析流程（服务端只有一个数据处理器）
+    if not args.no_processing and session_ids:
+        http.post(url + '/api/start_collection', json={'source': 'ingest', 'session_id': session_ids[0]},
+                  timeout=10).raise_for_status()
+
+    viewers = [SocketViewer(url, session_ids[i % len(session_ids)], args.points_per_second)
+               for i in range(args.viewers)] if session_ids else []
+    http_viewers = [HttpViewer(url, args.http_interval) for _ in range(args.http_viewers)]
+    streams = [IngestStream(url, session_id, recording, args.speed, args.batch_ms, args.ingest_token)
+               for session_id in session_ids]
+
+    connect_failures = 0
+    for client in viewers + streams:
+        try:
+            client.start()
+        except socketio.exceptions.ConnectionError as e:
+            connect_failures += 1
+            print(f"连接失败: {e}", file=sys.stderr)
+    for client in http_viewers:
+        client.start()
+
+    transport = viewers[0].client.transport() if viewers and viewers[0].client.connected else None
+
+    print(f"负载测试运行中: {len(streams)}个数据流, {len(viewers)}个Socket.IO客户端, "
+          f"{len(http_viewers)}个HTTP客户端, 传输方式={transport}, {args.duration}秒...", file=sys.stderr)
+    start_time = time.monotonic()
+    time.sleep(args.duration)
+    elapsed = time.monotonic() - start_time
+
+    # 先停止数据流，收集服务端统计后再断开查看客户端
+    for stream in streams:
+        stream.engine.stop()
+    time.sleep(0.5)
+
+    stream_stats = http.get(url + '/api/stream_stats', timeout=10).json()
+    replay_stats = http.get(url + '/api/replay_stats', timeout=10).json()
+    if not args.no_processing:
+        http.post(url + '/api/stop_collection', timeout=30)
+
+    for client in streams + viewers + http_viewers:
+        try:
+            client.stop()
+        except Exception:
+            pass
+
+    per_client = stream_stats.get('per_client', {}).values()
+    samples_sent = sum(stream.samples_sent for stream in streams)
+
+    return {
+        'config': {
+            'streams': args.streams,
+            'viewers': args.viewers,
+            'http_viewers': args.http_viewers,
+            'duration_s': elapsed,
+            'speed': args.speed,
+            'batch_ms': args.batch_ms,
+            'points_per_second': args.points_per_second,
+            'processing': not args.no_processing,
+            'transport': transport
+        },
+        'ingest': {
+            'samples_sent': samples_sent,
+            'samples_per_s': samples_sent / elapsed,
+            'frames_sent': sum(stream.seq for stream in streams),
+            'errors': sum(stream.errors for stream in streams),
+            'max_schedule_lag_ms': max((stream.engine.get_stats()['max_lag_ms'] for stream in streams), default=None)
+        },
+        'viewers': {
+            'connect_failures': connect_failures,
+            'frames_received': sum(viewer.frames for viewer in viewers),
+            'samples_received': sum(len(viewer.sample_latencies) for viewer in viewers),
+            'sample_to_client_latency_ms': summarize([x for viewer in viewers for x in viewer.sample_latencies]),
+            'result_updates': sum(viewer.updates for viewer in viewers),
+            'result_seq_gaps': sum(viewer.seq_gaps for viewer in viewers),
+            'result_push_latency_ms': summarize([x for viewer in viewers for x in viewer.result_latencies])
+        },
+        'http_viewers': {
+            'requests': sum(len(viewer.response_times) for viewer in http_viewers),
+            'errors': sum(viewer.errors for viewer in http_viewers),
+            'response_ms': summarize([x for viewer in http_viewers for x in viewer.response_times])
+        },
+        'server_queues': {
+            'clients': stream_stats.get('clients'),
+            'dropped_messages': sum(client['dropped'] for client in per_client),
+            'max_queued': max((client['queued'] for client in per_client), default=0)
+        },
+        'processing': replay_stats.get('processing')
+    }
+
+def print_summary(report):
+    """打印报告摘要"""
+    viewers = report['viewers']
+    latency = viewers['sample_to_client_latency_ms']
+    print(f"数据流发送: {report['ingest']['samples_sent']} 样本 ({report['ingest']['samples_per_s']:.0f}/s)",
+          file=sys.stderr)
+    if latency:
+        print(f"样本到客户端延迟: p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms "
+              f"p99={latency['p99']:.1f}ms max={latency['max']:.1f}ms", file=sys.stderr)
+    print(f"结果推送: {viewers['result_updates']} 条, 序列号跳变 {viewers['result_seq_gaps']} 次", file=sys.stderr)
+    print(f"服务端丢弃消息: {report['server_queues']['dropped_messages']}, "
+          f"丢弃数据窗口: {(report['processing'] or {}).get('dropped_windows')}", file=sys.stderr)
+    server = report.get('server')
+    if server:
+        print(f"服务端CPU: 平均 {server['cpu_percent']['mean']:.1f}% 最大 {server['cpu_percent']['max']:.1f}%, "
+              f"内存: 最大 {server['rss_mb']['max']:.1f}MB", file=sys.stderr)
+
+def main():
+    args = parse_arguments()
+
+    if args.streams < 1:
+        print("错误: 至少需要一个数据流", file=sys.stderr)
+        return 1
+    if args.server_url and not args.ingest_token:
+        print("错误: 使用--server-url时需要通过--ingest-token指定服务的数据流接入令牌", file=sys.stderr)
+        return 1
+    if not args.ingest_token:
+        args.ingest_token = secrets.token_hex(16)
+
+    process = None
+    monitor = None
+    log_file = None
+
+    try:
+        if args.server_url:
+            url = args.server_url.rstrip('/')
+            startup_s = wait_until_ready(url + '/health', args.startup_timeout)
+        else:
+            port = args.port or find_free_port()
+            url = f'http://127.0.0.1:{port}'
+            log_file = tempfile.NamedTemporaryFile(mode='w+', prefix='load_test_server_', suffix='.log', delete=False)
+            print(f"启动服务: {url} (日志: {log_file.name})", file=sys.stderr)
+            process = start_server(port, log_file, args.ingest_token)
+            startup_s = wait_until_ready(url + '/health', args.startup_timeout, process)
+            monitor = ProcessMonitor(process.pid)
+            monitor.start()
+
+        report = run_load_test(args, url)
+        report['environment'] = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'server_startup_s': startup_s
+        }
+        if monitor is not None:
+            monitor.stop()
+            report['server'] = monitor.summary()
+
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if log_file is not None:
+            log_file.close()
+
+    print_summary(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"负载测试报告已保存: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
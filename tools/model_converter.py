@@ -2,14 +2,46 @@
 """
 模型转换工具
 
-用于将训练好的TensorFlow模型转换为TensorFlow Lite格式，以便在边缘设备上运行
+用于将训练好的TensorFlow模型转换为TensorFlow Lite格式，以便在边缘设备上运行。
+int8量化使用已保存会话的真实特征向量作为代表性数据集进行校准。
+转换后在同一组会话特征向量上运行转换后的模型和源模型，报告延迟分位数、内存占用、
+步态相位分类和姿态评分的一致性，超出回归预算时以非零状态退出
 """
 import os
 import sys
+import json
+import time
 import argparse
 import numpy as np
 import tensorflow as tf
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from storage.session_store import SessionStore
+from sensor_processing.batch_processor import BatchProcessor, sliding_windows
+from sensor_processing.feature_extractor import extract_features_batch
+from edge_ai.inference import build_feature_vector, quantize_tensor, dequantize_tensor
+from tools.benchmark_utils import summarize_latencies
+
+DEFAULT_SESSIONS_DIR = os.path.join(ROOT_DIR, 'data', 'sessions')
+
+# 默认的校准和评估样本数
+DEFAULT_CALIBRATION_SAMPLES = 500
+DEFAULT_EVAL_SAMPLES = 200
+
+# 评估计时的预热次数和遍历评估集的次数
+DEFAULT_WARMUP = 20
+DEFAULT_EVAL_RUNS = 5
+
+# 默认回归预算
+DEFAULT_MIN_PHASE_AGREEMENT = 0.95
+DEFAULT_MAX_POSTURE_ERROR = 2.0
+DEFAULT_MAX_LATENCY_RATIO = 1.5
+
+# 每批提取特征的窗口数
+FEATURE_BATCH_WINDOWS = 256
+
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='将TensorFlow模型转换为TensorFlow Lite格式')
@@ -18,6 +50,23 @@ def parse_arguments():
     parser.add_argument('--quantize', '-q', action='store_true', help='是否进行int8量化')
     parser.add_argument('--optimize', choices=['none', 'size', 'latency'], default='latency', 
                       help='优化目标: none=不优化, size=优化大小, latency=优化延迟')
+    parser.add_argument('--sessions-dir', default=DEFAULT_SESSIONS_DIR,
+                        help='提供校准和评估数据的会话根目录')
+    parser.add_argument('--sessions', nargs='+', default=None, help='使用的会话ID，不指定时使用所有会话')
+    parser.add_argument('--calibration-samples', type=int, default=DEFAULT_CALIBRATION_SAMPLES,
+                        help='int8量化校准使用的特征向量数量')
+    parser.add_argument('--eval-samples', type=int, default=DEFAULT_EVAL_SAMPLES,
+                        help='转换前后比较使用的特征向量数量')
+    parser.add_argument('--eval-runs', type=int, default=DEFAULT_EVAL_RUNS, help='计时遍历评估集的次数')
+    parser.add_argument('--report', help='比较报告JSON输出路径')
+    parser.add_argument('--min-phase-agreement', type=float, default=DEFAULT_MIN_PHASE_AGREEMENT,
+                        help='回归预算: 步态相位分类与源模型的一致率下限')
+    parser.add_argument('--max-posture-error', type=float, default=DEFAULT_MAX_POSTURE_ERROR,
+                        help='回归预算: 姿态评分平均绝对误差上限（0~100分）')
+    parser.add_argument('--max-latency-ratio', type=float, default=DEFAULT_MAX_LATENCY_RATIO,
+                        help='回归预算: p50延迟相对未优化浮点模型的倍数上限，0表示不检查')
+    parser.add_argument('--skip-eval', action='store_true', help='跳过转换前后比较（不检查回归预算，直接保存）')
+    parser.add_argument('--window-size', type=int, default=400, help='特征提取的窗口大小（数据点数量）')
     return parser.parse_args()
 
 def load_model(model_path):
@@ -47,7 +96,96 @@ def load_model(model_path):
         print(f"模型加载失败: {e}")
         return None
 
-def convert_to_tflite(model, optimize_option, quantize=False):
+def evenly_spaced(total, num_samples):
+    """在[0, total)中均匀选取最多num_samples个不重复的位置"""
+    num_samples = min(num_samples, total)
+    if num_samples <= 0:
+        return np.empty(0, dtype=np.int64)
+    return (np.arange(num_samples) * total // num_samples).astype(np.int64)
+
+def select_windows(window_counts, num_samples, exclude_samples=0):
+    """
+    在所有会话的窗口中均匀选取num_samples个位置
+    
+    Args:
+        window_counts: 每个会话的窗口数
+        num_samples: 选取的窗口数
+        exclude_samples: 先按相同方式均匀选取exclude_samples个位置（例如校准集）并排除，
+                         再在剩余的窗口中选取，两次选取的窗口集合互不重叠
+    
+    Returns:
+        每个会话选中的窗口序号数组列表
+    """
+    total = int(sum(window_counts))
+    candidates = np.setdiff1d(np.arange(total), evenly_spaced(total, exclude_samples))
+    positions = candidates[evenly_spaced(len(candidates), num_samples)]
+    bounds = np.concatenate([[0], np.cumsum(window_counts)])
+    return [positions[(positions >= start) & (positions < end)] - start
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+def iter_session_features(sessions_dir, num_samples, session_ids=None, window_size=400, step_size=None,
+                          exclude_samples=0):
+    """
+    从已保存的会话中按批提取特征向量
+    
+    窗口在所有会话中均匀选取，经过与实时处理相同的滤波和特征提取，
+    会话数据按内存映射读取，只有选中的窗口会被复制
+    
+    Args:
+        sessions_dir: 会话根目录
+        num_samples: 特征向量数量
+        session_ids: 会话ID列表，为None时使用所有会话
+        window_size: 窗口大小
+        step_size: 候选窗口的步长，默认为窗口大小的一半
+        exclude_samples: 排除的窗口数，见select_windows
+    
+    Yields:
+        形状为(batch, 37)的float32特征向量数组
+    """
+    step_size = step_size or window_size // 2
+    store = SessionStore(sessions_dir)
+    readers = []
+    for session_id in session_ids or store.list_sessions():
+        reader = store.open_session(session_id)
+        if reader.num_rows('samples') >= window_size:
+            readers.append(reader)
+    
+    processor = BatchProcessor(None, window_size=window_size, step_size=step_size)
+    window_counts = [processor.num_windows(reader.num_rows('samples')) for reader in readers]
+    
+    for reader, selected in zip(readers, select_windows(window_counts, num_samples, exclude_samples)):
+        if len(selected) == 0:
+            continue
+        samples = reader.samples
+        acc_windows = sliding_windows(samples['acc'], window_size, step_size)
+        gyro_windows = sliding_windows(samples['gyro'], window_size, step_size)
+        for start in range(0, len(selected), FEATURE_BATCH_WINDOWS):
+            index = selected[start:start + FEATURE_BATCH_WINDOWS]
+            acc_filtered, gyro_filtered = processor.filter_windows(acc_windows[index], gyro_windows[index])
+            features = extract_features_batch(acc_filtered, gyro_filtered, processor.sampling_rate)
+            yield np.stack([
+                build_feature_vector({key: values[i] for key, values in features.items()})
+                for i in range(len(index))
+            ])
+
+def load_session_features(sessions_dir, num_samples, session_ids=None, window_size=400, exclude_samples=0):
+    """
+    从已保存的会话中提取特征向量
+    
+    Returns:
+        形状为(n, 37)的float32数组，n <= num_samples
+    """
+    batches = list(iter_session_features(sessions_dir, num_samples, session_ids, window_size,
+                                       exclude_samples=exclude_samples))
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.concatenate(batches)
+
+def model_input_shape(model):
+    """Keras模型单个样本的输入形状（不含批维度）"""
+    return tuple(model.inputs[0].shape[1:])
+
+def convert_to_tflite(model, optimize_option, quantize=False, calibration_data=None):
     """
     将TensorFlow模型转换为TensorFlow Lite格式
     
@@ -55,6 +193,7 @@ def convert_to_tflite(model, optimize_option, quantize=False):
         model: TensorFlow模型
         optimize_option: 优化选项 ('none', 'size', 'latency')
         quantize: 是否进行int8量化
+        calibration_data: int8量化的代表性数据，形状为(batch, 37)的特征向量批的可迭代对象
     
     Returns:
         TFLite模型对象
@@ -81,20 +220,19 @@ def convert_to_tflite(model, optimize_option, quantize=False):
         print("应用int8量化...")
         converter.optimizations = [tf.lite.Optimize.DEFAULT]
         
-        # 定义代表性数据集用于量化校准
+        if calibration_data is None:
+            raise ValueError('int8量化需要代表性数据集')
+        
+        # 代表性数据集：从会话特征批中逐个产生真实特征向量，形状与模型输入一致
+        input_shape = (1,) + model_input_shape(model)
+        calibration_count = [0]
         def representative_dataset():
-            # 这里应该使用真实的代表性数据
-            # 现在使用随机数据作为示例
-            for _ in range(100):
-                # 根据模型输入形状调整数据生成
-                input_shape = model.inputs[0].shape
-                batch_size = 1
-                if input_shape[0] is None:  # 批次维度
-                    # 创建适配模型输入形状的随机数据
-                    shape = (batch_size,) + tuple(dim if dim is not None else 10 for dim in input_shape[1:])
-                    yield [np.random.uniform(-1, 1, shape).astype(np.float32)]
-                else:
-                    yield [np.random.uniform(-1, 1, input_shape).astype(np.float32)]
+            for batch in calibration_data:
+                for vector in batch:
+                    calibration_count[0] += 1
+                    yield [vector.reshape(input_shape).astype(np.float32)]
+            if calibration_count[0] == 0:
+                raise ValueError('没有可用于量化校准的会话数据，请先采集会话或指定 --sessions-dir')
         
         converter.representative_dataset = representative_dataset
         converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
@@ -103,20 +241,210 @@ def convert_to_tflite(model, optimize_option, quantize=False):
     
     # 执行转换
     tflite_model = converter.convert()
+    if quantize:
+        print(f"已使用 {calibration_count[0]} 个会话特征向量完成量化校准")
     print("模型转换完成")
     
     return tflite_model
 
+def tensor_memory_kb(interpreter):
+    """
+    解释器所有张量（权重、激活和输入输出）占用的内存(KB)
+    """
+    total = 0
+    for detail in interpreter.get_tensor_details():
+        total += int(np.prod(detail['shape'])) * np.dtype(detail['dtype']).itemsize
+    return total / 1024.0
+
+def run_tflite(tflite_model, inputs, warmup=DEFAULT_WARMUP, runs=1):
+    """
+    使用TFLite模型逐个样本推理并计时
+    
+    量化模型的输入按输入张量的量化参数转换，输出反量化为浮点数
+    
+    Args:
+        tflite_model: TFLite模型对象
+        inputs: 形状为(n, ...)的浮点输入
+        warmup: 预热推理次数
+        runs: 计时遍历输入的次数
+    
+    Returns:
+        (输出数组列表，每个形状为(n, ...)；每次invoke的延迟毫秒数组；模型信息字典)
+    """
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()
+    input_shape = tuple(input_detail['shape'])
+    quantized_inputs = [quantize_tensor(sample.reshape(input_shape), input_detail) for sample in inputs]
+    
+    for i in range(min(warmup, len(quantized_inputs))):
+        interpreter.set_tensor(input_detail['index'], quantized_inputs[i])
+        interpreter.invoke()
+    
+    outputs = [[] for _ in output_details]
+    latencies_ms = np.empty(len(inputs) * runs, dtype=np.float64)
+    for run in range(runs):
+        for i, sample in enumerate(quantized_inputs):
+            interpreter.set_tensor(input_detail['index'], sample)
+            start_time = time.perf_counter()
+            interpreter.invoke()
+            latencies_ms[run * len(inputs) + i] = (time.perf_counter() - start_time) * 1000
+            if run == 0:
+                for values, detail in zip(outputs, output_details):
+                    values.append(dequantize_tensor(interpreter.get_tensor(detail['index']), detail)[0])
+    
+    info = {
+        'quantization': np.dtype(input_detail['dtype']).name,
+        'model_size_kb': len(tflite_model) / 1024.0,
+        'tensor_memory_kb': tensor_memory_kb(interpreter)
+    }
+    return [np.asarray(values, dtype=np.float32) for values in outputs], latencies_ms, info
+
+def run_keras(model, inputs):
+    """
+    使用源模型推理
+    
+    Returns:
+        输出数组列表，每个形状为(n, ...)
+    """
+    outputs = model(inputs.reshape((len(inputs),) + model_input_shape(model)), training=False)
+    if not isinstance(outputs, (list, tuple)):
+        outputs = [outputs]
+    return [np.asarray(output, dtype=np.float32) for output in outputs]
+
+def match_outputs(outputs, reference_outputs):
+    """
+    按形状将TFLite输出与源模型输出对应（转换后输出张量的顺序可能改变）
+    
+    Returns:
+        与reference_outputs顺序一致的TFLite输出列表
+    """
+    remaining = list(outputs)
+    matched = []
+    for reference in reference_outputs:
+        index = next((i for i, output in enumerate(remaining) if output.size == reference.size), 0)
+        matched.append(remaining.pop(index).reshape(reference.shape))
+    return matched
+
+def output_agreement(outputs, reference_outputs):
+    """
+    比较转换后模型与源模型的输出
+    
+    与推理引擎的约定一致：多值输出视为步态相位概率（比较argmax分类的一致率），
+    单值输出视为姿态评分（按0~100分比较误差）
+    
+    Args:
+        outputs: 转换后模型的输出列表（已与reference_outputs对应）
+        reference_outputs: 源模型的输出列表
+    
+    Returns:
+        一致性统计字典，模型没有对应输出的项为None
+    """
+    result = {
+        'phase_agreement': None,
+        'posture_mean_abs_error': None,
+        'posture_max_abs_error': None,
+        'output_errors': []
+    }
+    for output, reference in zip(outputs, reference_outputs):
+        diff = np.abs(output - reference)
+        result['output_errors'].append({
+            'mean_abs_error': float(np.mean(diff)),
+            'max_abs_error': float(np.max(diff))
+        })
+        values = reference.reshape(len(reference), -1)
+        if values.shape[1] > 1 and result['phase_agreement'] is None:
+            labels = np.argmax(output.reshape(values.shape), axis=1)
+            result['phase_agreement'] = float(np.mean(labels == np.argmax(values, axis=1)))
+        elif values.shape[1] == 1 and result['posture_mean_abs_error'] is None:
+            score_diff = diff.reshape(-1) * 100
+            result['posture_mean_abs_error'] = float(np.mean(score_diff))
+            result['posture_max_abs_error'] = float(np.max(score_diff))
+    return result
+
+def compare_models(tflite_model, baseline_model, model, eval_data, warmup=DEFAULT_WARMUP, runs=DEFAULT_EVAL_RUNS):
+    """
+    在同一评估集上比较转换后模型与源模型
+    
+    延迟和内存以未优化的浮点TFLite模型为基线（与源模型计算相同，
+    且与转换后模型使用同一运行时计时），输出一致性以源模型的推理结果为准
+    
+    Args:
+        tflite_model: 转换后的TFLite模型对象
+        baseline_model: 源模型未经优化转换的浮点TFLite模型对象
+        model: 源Keras模型
+        eval_data: 形状为(n, 37)的评估特征向量
+        warmup: 预热推理次数
+        runs: 计时遍历评估集的次数
+    
+    Returns:
+        比较报告字典
+    """
+    reference_outputs = run_keras(model, eval_data)
+    report = {'samples': len(eval_data), 'runs': runs}
+    for name, candidate in (('baseline', baseline_model), ('converted', tflite_model)):
+        outputs, latencies_ms, info = run_tflite(candidate, eval_data, warmup, runs)
+        info['latency_ms'] = summarize_latencies(latencies_ms)
+        info.update(output_agreement(match_outputs(outputs, reference_outputs), reference_outputs))
+        report[name] = info
+    
+    baseline_p50 = report['baseline']['latency_ms']['p50']
+    report['latency_ratio'] = report['converted']['latency_ms']['p50'] / baseline_p50 if baseline_p50 > 0 else None
+    return report
+
+def check_budget(report, min_phase_agreement, max_posture_error, max_latency_ratio):
+    """
+    检查转换后模型是否超出回归预算
+    
+    Args:
+        report: compare_models返回的报告
+        min_phase_agreement: 步态相位分类一致率下限
+        max_posture_error: 姿态评分平均绝对误差上限（0~100分）
+        max_latency_ratio: p50延迟相对基线的倍数上限，为None时不检查
+    
+    Returns:
+        超出预算的项目说明列表，为空表示通过
+    """
+    converted = report['converted']
+    violations = []
+    if converted['phase_agreement'] is not None and converted['phase_agreement'] < min_phase_agreement:
+        violations.append(f"步态相位一致率 {converted['phase_agreement']:.3f} < {min_phase_agreement}")
+    if converted['posture_mean_abs_error'] is not None and converted['posture_mean_abs_error'] > max_posture_error:
+        violations.append(f"姿态评分平均误差 {converted['posture_mean_abs_error']:.3f} > {max_posture_error}")
+    if max_latency_ratio is not None and report['latency_ratio'] is not None and report['latency_ratio'] > max_latency_ratio:
+        violations.append(f"p50延迟为基线的 {report['latency_ratio']:.2f} 倍 > {max_latency_ratio}")
+    return violations
+
+def print_comparison(report):
+    """打印比较报告"""
+    print(f"转换前后比较 ({report['samples']} 个会话特征向量, 计时 {report['runs']} 轮):")
+    print(f"  {'模型':<10} {'类型':<8} {'大小KB':>8} {'张量KB':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'相位一致':>8} {'评分误差':>8}")
+    for name, label in (('baseline', '浮点基线'), ('converted', '转换后')):
+        info = report[name]
+        lat = info['latency_ms']
+        agreement = '-' if info['phase_agreement'] is None else f"{info['phase_agreement']:.3f}"
+        error = '-' if info['posture_mean_abs_error'] is None else f"{info['posture_mean_abs_error']:.3f}"
+        print(f"  {label:<10} {info['quantization']:<8} {info['model_size_kb']:>8.2f} {info['tensor_memory_kb']:>8.2f} "
+              f"{lat['p50']:>8.4f} {lat['p95']:>8.4f} {lat['p99']:>8.4f} {agreement:>8} {error:>8}")
+    if report['latency_ratio'] is not None:
+        print(f"  p50延迟为基线的 {report['latency_ratio']:.2f} 倍")
+
 def save_model(tflite_model, output_path):
     """
     保存TFLite模型到文件
     
+    先写入临时文件再替换，输出路径（可能是正在部署的模型）不会出现写了一半的文件
+    
     Args:
         tflite_model: TFLite模型对象
         output_path: 输出文件路径
     """
-    with open(output_path, 'wb') as f:
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
         f.write(tflite_model)
+    os.replace(tmp_path, output_path)
     
     # 获取模型大小
     model_size = os.path.getsize(output_path) / 1024.0
@@ -134,8 +462,41 @@ def main():
         if model is None:
             return 1
         
+        # 从会话中提取校准数据（仅int8量化需要）
+        calibration_data = None
+        if args.quantize:
+            calibration_data = iter_session_features(args.sessions_dir, args.calibration_samples,
+                                                     args.sessions, args.window_size)
+        
         # 转换模型
-        tflite_model = convert_to_tflite(model, args.optimize, args.quantize)
+        tflite_model = convert_to_tflite(model, args.optimize, args.quantize, calibration_data)
+        
+        # 在与校准数据不重叠的窗口上比较转换前后的模型，通过回归预算检查后才保存
+        if not args.skip_eval:
+            eval_data = load_session_features(args.sessions_dir, args.eval_samples, args.sessions, args.window_size,
+                                              exclude_samples=args.calibration_samples if args.quantize else 0)
+            if len(eval_data) == 0:
+                print(f"错误: {args.sessions_dir} 中没有可用于转换前后比较的会话窗口"
+                      f"（int8量化时只使用校准窗口之外的窗口），模型未保存。使用--skip-eval跳过比较")
+                return 1
+            
+            baseline_model = convert_to_tflite(model, 'none')
+            report = compare_models(tflite_model, baseline_model, model, eval_data, runs=args.eval_runs)
+            report['config'] = {'optimize': args.optimize, 'quantize': args.quantize}
+            report['violations'] = check_budget(report, args.min_phase_agreement, args.max_posture_error,
+                                                args.max_latency_ratio or None)
+            print_comparison(report)
+            
+            if args.report:
+                with open(args.report, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+                print(f"比较报告已保存: {args.report}")
+            
+            if report['violations']:
+                for violation in report['violations']:
+                    print(f"超出回归预算: {violation}")
+                print(f"模型未保存，{args.output} 保持不变")
+                return 1
         
         # 保存模型
         save_model(tflite_model, args.output)
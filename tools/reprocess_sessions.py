@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+会话离线重处理工具
+
+将已保存的会话原始数据按与DataProcessor相同的 滤波 → 特征提取 → 模型推理 → 建议生成 流程
+重新分析，窗口按批处理，不使用线程和实时回放，以处理器的最大速度运行。
+每个窗口的结果以列形式(.npy)保存在会话目录的子目录中，与原始数据放在一起，
+可用于回顾分析或使用新模型重新评分旧会话
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from storage.session_store import SessionStore, RESULT_COLUMNS, results_to_columns
+from sensor_processing.batch_processor import BatchProcessor, DEFAULT_BATCH_WINDOWS
+from sensor_processing.replay import file_digest
+from edge_ai.inference import GaitAnalysisModel
+
+DEFAULT_SESSIONS_DIR = os.path.join(ROOT_DIR, 'data', 'sessions')
+
+# 会话目录中保存重处理结果的子目录名
+DEFAULT_OUTPUT_NAME = 'reprocessed'
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='使用完整分析流程离线重处理已保存的会话')
+    parser.add_argument('sessions', nargs='*', help='会话ID，不指定时处理所有会话')
+    parser.add_argument('--sessions-dir', default=DEFAULT_SESSIONS_DIR, help='会话根目录')
+    parser.add_argument('--model', '-m', default=None, help='TFLite模型路径 (默认: 内置模型)')
+    parser.add_argument('--window-size', type=int, default=400, help='滑动窗口大小（数据点数量）')
+    parser.add_argument('--step-size', type=int, default=50, help='滑动窗口步长（数据点数量）')
+    parser.add_argument('--batch-windows', '-b', type=int, default=DEFAULT_BATCH_WINDOWS, help='每批处理的窗口数')
+    parser.add_argument('--output-name', default=DEFAULT_OUTPUT_NAME, help='会话目录中保存结果的子目录名')
+    parser.add_argument('--force', action='store_true', help='重新处理已有结果的会话')
+    return parser.parse_args()
+
+def processing_params(processor, model_sha1):
+    """
+    结果对应的处理参数，保存在meta.json中，任何一项变化都需要重新处理
+
+    Args:
+        processor: BatchProcessor实例
+        model_sha1: 模型文件的SHA-1摘要（同一路径的模型被覆盖时也能识别）
+    """
+    return {
+        'model_path': os.path.abspath(processor.model.model_path),
+        'model_sha1': model_sha1,
+        'window_size': processor.window_size,
+        'step_size': processor.step_size,
+        'sampling_rate': processor.sampling_rate
+    }
+
+def is_up_to_date(reader, output_dir, params):
+    """结果已存在、处理参数（含模型摘要）相同且不早于会话头信息时返回True"""
+    meta_path = os.path.join(output_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    header_mtime = os.path.getmtime(os.path.join(reader.session_dir, 'header.json'))
+    return (all(meta.get(key) == value for key, value in params.items())
+            and os.path.getmtime(meta_path) >= header_mtime)
+
+def reprocess_session(reader, processor, output_dir, params):
+    """
+    重处理一个会话并保存结果
+
+    结果先写入临时目录，完成后替换旧结果
+
+    Args:
+        reader: SessionReader实例
+        processor: BatchProcessor实例
+        output_dir: 结果目录
+        params: 处理参数，见processing_params
+
+    Returns:
+        统计字典: 样本数、窗口数、耗时、处理速度相对实时的倍数
+    """
+    samples = reader.samples
+    num_samples = len(samples['timestamp'])
+    start_time = time.perf_counter()
+
+    batches = {name: [] for name in RESULT_COLUMNS}
+    changes = []
+    for results in processor.iter_results(samples['timestamp'], samples['acc'], samples['gyro'], samples['pressure']):
+        for name, values in results_to_columns(results).items():
+            batches[name].append(values)
+        # 只记录建议集合发生变化的窗口
+        changes.extend(
+            {'timestamp': result['timestamp'], 'recommendations': result['recommendations']}
+            for result in results if result['recommendations_changed']
+        )
+
+    elapsed = time.perf_counter() - start_time
+    num_windows = sum(len(values) for values in batches['timestamp'])
+
+    tmp_dir = f'{output_dir}.partial'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    for name, (dtype, shape) in RESULT_COLUMNS.items():
+        values = np.concatenate(batches[name]) if batches[name] else np.empty((0,) + shape, dtype=dtype)
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), values)
+
+    with open(os.path.join(tmp_dir, 'recommendations.json'), 'w', encoding='utf-8') as f:
+        json.dump(changes, f, ensure_ascii=False)
+
+    duration_s = (float(samples['timestamp'][-1]) - float(samples['timestamp'][0])) / 1000.0 if num_samples else 0.0
+    stats = {
+        'samples': num_samples,
+        'windows': num_windows,
+        'duration_s': duration_s,
+        'elapsed_s': elapsed,
+        'windows_per_s': num_windows / elapsed if elapsed > 0 else 0.0,
+        'realtime_factor': duration_s / elapsed if elapsed > 0 else 0.0
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'session_id': reader.session_id,
+            **params,
+            'created_at': time.time(),
+            'stats': stats
+        }, f, indent=2, ensure_ascii=False)
+
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.rename(tmp_dir, output_dir)
+    return stats
+
+def main():
+    args = parse_arguments()
+
+    store = SessionStore(args.sessions_dir)
+    session_ids = args.sessions or store.list_sessions()
+    if not session_ids:
+        print(f"没有找到会话: {args.sessions_dir}")
+        return 1
+
+    model = GaitAnalysisModel(args.model)
+    if not model.is_initialized:
+        print("错误: 模型加载失败")
+        return 1
+
+    model_sha1 = file_digest(model.model_path)
+
+    failed = 0
+    total_windows = 0
+    start_time = time.perf_counter()
+    for session_id in session_ids:
+        try:
+            reader = store.open_session(session_id)
+            output_dir = os.path.join(reader.session_dir, args.output_name)
+            # 采样率取自会话，不同设备记录的会话可能不同
+            processor = BatchProcessor(model, window_size=args.window_size, step_size=args.step_size,
+                                       sampling_rate=reader.sampling_rate, batch_windows=args.batch_windows)
+            params = processing_params(processor, model_sha1)
+            if not args.force and is_up_to_date(reader, output_dir, params):
+                print(f"  {session_id}: 结果已是最新，跳过")
+                continue
+
+            stats = reprocess_session(reader, processor, output_dir, params)
+            total_windows += stats['windows']
+            print(f"  {session_id}: {stats['windows']} 个窗口, {stats['elapsed_s']:.2f} 秒, "
+                  f"{stats['windows_per_s']:.0f} 窗口/秒, 实时的 {stats['realtime_factor']:.0f} 倍")
+        except Exception as e:
+            failed += 1
+            print(f"  {session_id}: 处理失败: {e}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"完成: 共 {total_windows} 个窗口, 总耗时 {elapsed:.2f} 秒, 失败 {failed} 个会话")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
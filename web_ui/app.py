@@ -4,43 +4,235 @@ Flask Web应用程序
 提供Web界面，用于实时显示跑步数据分析结果和建议
 """
 import os
-import json
-import time
 import threading
-from datetime import datetime, timedelta
-from collections import deque
+import queue
+import struct
+import hashlib
+import hmac
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, send_from_directory
-from flask_socketio import SocketIO
+# 启动性能记录：从这里开始计时，记录各模块导入和组件初始化的耗时
+from web_ui.startup_profile import StartupProfile
+startup_profile = StartupProfile()
+
+with startup_profile.measure('import:numpy'):
+    import numpy as np
+
+with startup_profile.measure('import:flask'):
+    from flask import (
+        Flask, Response, render_template, jsonify, request, redirect, url_for,
+        send_from_directory, stream_with_context, abort
+    )
+    from flask_socketio import SocketIO, emit, join_room
 
 # 导入自定义模块
-from sensor_processing.data_processor import DataProcessor
-import numpy as np
+with startup_profile.measure('import:sensor_processing'):
+    from sensor_processing.replay import ReplayEngine, load_recording
+with startup_profile.measure('import:edge_ai'):
+    from edge_ai.model_registry import MODELS_DIR
+with startup_profile.measure('import:storage'):
+    from storage.session_store import SessionStore
+    from storage.catalog import SessionCatalog, PRESSURE_FIELDS
+    from storage.export import EXPORT_FORMATS, EXPORT_MIMETYPES, iter_export, export_filename
+    from storage.pyramid import build_pyramid, query_series
+with startup_profile.measure('import:web_ui'):
+    from web_ui.result_stream import ResultStream, build_result_view
+    from web_ui.frame_batcher import FrameBatcher, unpack_frame
+    from web_ui.subscriptions import SubscriptionManager, CHANNELS
+    from web_ui.jobs import JobManager, JobQueueFull, job_key
+    from web_ui.tasks import analyze_session, export_session
 
 # 创建Flask应用
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'running-gait-analysis-secret-key'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# 创建数据处理器实例
-data_processor = DataProcessor(window_size=400, step_size=50)
+# 数据处理器（加载TFLite运行时和模型）在后台线程中创建，服务启动后即可访问页面，
+# 需要处理器的接口在处理器就绪前返回错误提示
+data_processor = None
+processor_ready = threading.Event()
+processor_error = None
+processor_init_thread = None
+processor_init_lock = threading.Lock()
+
+# 启动性能记录文件
+STARTUP_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'startup_profile.json')
+
+def init_data_processor():
+    """创建数据处理器（在后台线程中执行）"""
+    global data_processor, processor_error
+    
+    try:
+        with startup_profile.measure('import:data_processor'):
+            from sensor_processing.data_processor import DataProcessor
+            from edge_ai.inference import get_interpreter_class
+        with startup_profile.measure('import:tflite_runtime'):
+            get_interpreter_class()
+        with startup_profile.measure('init:data_processor'):
+            processor = DataProcessor(window_size=400, step_size=50)
+        data_processor = processor
+        startup_profile.mark('model_ready')
+    except Exception as e:
+        processor_error = str(e)
+        print(f"数据处理器初始化失败: {e}")
+    finally:
+        processor_ready.set()
+        save_startup_profile()
+
+def start_processor_init():
+    """在后台线程中开始创建数据处理器（如果尚未开始）"""
+    global processor_init_thread
+    
+    with processor_init_lock:
+        if processor_init_thread is None:
+            processor_init_thread = threading.Thread(target=init_data_processor, name='processor-init')
+            processor_init_thread.daemon = True
+            processor_init_thread.start()
+
+def get_data_processor(timeout=None):
+    """
+    获取数据处理器
+
+    Args:
+        timeout: 等待处理器就绪的最长时间(秒)，为None时不等待
 
-# 模拟数据线程
-simulation_thread = None
+    Returns:
+        DataProcessor实例，尚未就绪或初始化失败时返回None
+    """
+    start_processor_init()
+    if timeout is not None:
+        processor_ready.wait(timeout)
+    return data_processor
+
+def processor_unavailable():
+    """处理器不可用时返回的错误响应"""
+    message = f'模型加载失败: {processor_error}' if processor_error else '模型正在加载，请稍后重试'
+    return jsonify({
+        'status': 'error',
+        'message': message
+    })
+
+def save_startup_profile():
+    """保存启动性能记录"""
+    try:
+        startup_profile.save(STARTUP_PROFILE_PATH)
+    except OSError as e:
+        print(f"启动性能记录保存失败: {e}")
+
+# 模拟数据回放引擎
+replay_engine = None
 is_simulating = False
-simulation_data = None
-simulation_index = 0
 
-# 存储历史数据
-history_data = deque(maxlen=1000)  # 限制存储量
+# 是否在处理通过Socket.IO接入的传感器数据流
+is_ingesting = False
+
+# 数据流接入令牌：只有设置了环境变量GAIT_INGEST_TOKEN时才接受ingest_frame事件（负载测试启动服务时设置），
+# 客户端连接时通过 auth={'ingest_token': 令牌} 认证
+INGEST_TOKEN = os.environ.get('GAIT_INGEST_TOKEN') or None
+
+# 通过数据流接入认证的客户端sid
+ingest_clients = set()
+
+def is_valid_ingest_token(token):
+    """检查数据流接入令牌（未配置令牌时总是无效）"""
+    if INGEST_TOKEN is None or not isinstance(token, str):
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), INGEST_TOKEN.encode('utf-8'))
+
+# 默认会话ID（模拟数据使用）
+DEFAULT_SESSION_ID = 'default'
+current_session_id = DEFAULT_SESSION_ID
+
+# 分析结果推送任务
+result_push_thread = None
+
+# 传感器数据帧打包间隔 (毫秒)
+FRAME_INTERVAL = 80
+
+# 每个客户端发送队列的最大长度
+CLIENT_QUEUE_SIZE = 50
+
+def send_to_client(sid, event, args):
+    """向单个客户端发送消息"""
+    socketio.emit(event, args, to=sid)
+
+def transport_backlog(sid):
+    """
+    获取客户端在传输层（Engine.IO）积压的待发送包数量
+    
+    用于识别慢客户端，无法获取时返回0
+    """
+    try:
+        eio_sid = socketio.server.manager.eio_sid_from_sid(sid, '/')
+        return socketio.server.eio.sockets[eio_sid].queue.qsize()
+    except Exception:
+        return 0
+
+# 订阅管理器：按会话和通道分发消息，每个客户端使用有界发送队列
+subscription_manager = SubscriptionManager(send_to_client, transport_backlog, max_queue_size=CLIENT_QUEUE_SIZE)
+fanout_thread = None
 
-# 模拟数据更新间隔 (毫秒)
-SIMULATION_INTERVAL = 50  # 20Hz
+# 会话ID -> 会话数据流（传感器数据帧批处理器和分析结果推送流）
+session_streams = {}
+session_streams_lock = threading.Lock()
+
+def get_session_stream(session_id):
+    """
+    获取会话的数据流，不存在时创建
+    
+    Args:
+        session_id: 会话ID
+        
+    Returns:
+        包含'frames'(FrameBatcher)和'results'(ResultStream)的字典
+    """
+    with session_streams_lock:
+        stream = session_streams.get(session_id)
+        if stream is None:
+            def send_frame(payload, sid):
+                subscription_manager.enqueue(sid, 'sensor_frame', session_id, payload)
+            
+            stream = {
+                'frames': FrameBatcher(send_frame, interval_ms=FRAME_INTERVAL),
+                'results': ResultStream()
+            }
+            session_streams[session_id] = stream
+        return stream
+
+# 模拟数据默认回放倍速（按记录的时间戳实时回放）
+DEFAULT_REPLAY_SPEED = 1.0
+
+# 回放引擎交付数据批的间隔 (毫秒)
+REPLAY_BATCH_INTERVAL = 20
 
 # 保存数据的目录
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# 会话存储：采集过程中将原始样本和分析结果按块追加写入
+SESSIONS_DIR = os.path.join(DATA_DIR, 'sessions')
+session_store = SessionStore(SESSIONS_DIR)
+session_writer = None
+session_writer_lock = threading.Lock()
+
+# 会话目录：会话关闭时计算聚合指标，历史查询只访问目录
+with startup_profile.measure('init:session_catalog'):
+    session_catalog = SessionCatalog(os.path.join(DATA_DIR, 'sessions.db'))
+    session_catalog.sync(session_store)
+
+# 后台任务导出文件的目录
+EXPORTS_DIR = os.path.join(DATA_DIR, 'exports')
+
+# 后台任务线程数和排队任务上限
+JOB_WORKERS = 2
+MAX_PENDING_JOBS = 16
+
+def notify_job(state):
+    """将任务状态推送给关注该任务的客户端"""
+    socketio.emit('job_progress', state, to=f"job:{state['job_id']}")
+
+# 后台任务管理器：导出和深度分析在线程池中执行，不阻塞实时接口
+job_manager = JobManager(notify_job, max_workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS)
+
 # 路由: 首页
 @app.route('/')
 def index():
@@ -65,42 +257,112 @@ def analysis():
     """深度分析路由"""
     return render_template('analysis.html')
 
+# 路由: 健康检查（服务可以处理请求时返回200，供启动脚本和监控轮询）
+@app.route('/health')
+def health():
+    """
+    健康检查路由
+
+    ready表示模型和数据处理器已就绪、可以开始采集；
+    startup包含各模块的导入耗时、组件初始化耗时和启动里程碑
+    """
+    startup_profile.mark('server_ready')
+    get_data_processor()
+    
+    if data_processor is not None:
+        model_state = 'ready'
+    elif processor_error is not None:
+        model_state = 'failed'
+    else:
+        model_state = 'loading'
+    
+    return jsonify({
+        'status': 'ok',
+        'ready': model_state == 'ready',
+        'model': model_state,
+        'error': processor_error,
+        'startup': startup_profile.to_dict()
+    })
+
 # API路由: 开始数据采集
 @app.route('/api/start_collection', methods=['POST'])
 def start_collection():
     """开始数据采集"""
-    global is_simulating, simulation_thread, simulation_data, simulation_index
+    global is_simulating, is_ingesting, replay_engine, current_session_id
+    
+    if get_data_processor() is None:
+        return processor_unavailable()
+    startup_profile.mark('collection_started')
     
     try:
         # 获取请求参数
-        params = request.json
+        params = request.get_json(silent=True) or {}
         data_source = params.get('source', 'simulation')
         
+        if data_source == 'ingest' and INGEST_TOKEN is None:
+            return jsonify({
+                'status': 'error',
+                'message': '数据流接入未启用（需设置GAIT_INGEST_TOKEN）'
+            })
+        
+        # 停止正在进行的回放和数据接入
+        is_ingesting = False
+        if replay_engine is not None:
+            replay_engine.stop()
+        
         # 清空缓冲区
         data_processor.clear_buffers()
         
+        # 会话ID，客户端按会话订阅数据
+        current_session_id = params.get('session_id', DEFAULT_SESSION_ID)
+        
+        # 开始记录新会话
+        open_session({
+            'source': data_source,
+            'stream_session_id': current_session_id,
+            'sampling_rate': data_processor.sampling_rate
+        })
+        
         if data_source == 'simulation':
             # 使用模拟数据
+            # 回放倍速: 1为实时，N为N倍速，0为尽可能快
+            speed = float(params.get('speed', DEFAULT_REPLAY_SPEED))
+            batch_interval = float(params.get('batch_ms', REPLAY_BATCH_INTERVAL))
+            
             # 加载示例数据文件
             sample_path = os.path.join(DATA_DIR, 'sample_data.json')
-            with open(sample_path, 'r') as f:
-                simulation_data = json.load(f)
-            
-            # 重置模拟索引
-            simulation_index = 0
+            recording = load_recording(sample_path)
             
             # 启动数据处理
             data_processor.start_processing()
+            start_result_push()
+            start_fanout()
             
-            # 启动模拟线程
+            # 启动回放引擎
             is_simulating = True
-            simulation_thread = threading.Thread(target=simulate_data)
-            simulation_thread.daemon = True
-            simulation_thread.start()
+            replay_engine = ReplayEngine(
+                recording,
+                make_replay_handler(current_session_id),
+                speed=speed,
+                batch_ms=batch_interval
+            )
+            replay_engine.start()
             
             return jsonify({
                 'status': 'success',
-                'message': '已开始数据采集 (模拟模式)'
+                'message': f'已开始数据采集 (模拟模式, {f"{speed:g}x" if speed else "最快速度"})'
+            })
+        elif data_source == 'ingest':
+            # 处理客户端通过ingest_frame事件推送的传感器数据帧
+            is_simulating = False
+            data_processor.start_processing()
+            start_result_push()
+            start_fanout()
+            is_ingesting = True
+            
+            return jsonify({
+                'status': 'success',
+                'message': f'已开始数据采集 (数据流接入模式, 会话 {current_session_id})'
             })
         else:
             # 使用真实传感器数据
@@ -120,17 +382,21 @@ def start_collection():
 @app.route('/api/stop_collection', methods=['POST'])
 def stop_collection():
     """停止数据采集"""
-    global is_simulating
+    global is_simulating, is_ingesting
     
     try:
-        # 停止模拟
+        # 停止模拟和数据接入
         is_simulating = False
+        is_ingesting = False
+        if replay_engine is not None:
+            replay_engine.stop()
         
         # 停止数据处理
-        data_processor.stop_processing()
+        if data_processor is not None:
+            data_processor.stop_processing()
         
-        # 保存当前会话数据
-        save_session_data()
+        # 写入剩余数据并关闭当前会话
+        close_session()
         
         return jsonify({
             'status': 'success',
@@ -148,8 +414,9 @@ def stop_collection():
 def get_latest_data():
     """获取最新数据"""
     try:
-        # 获取最新结果
-        latest_results = data_processor.get_latest_results()
+        # 获取最新结果（处理器尚未就绪时视为没有结果）
+        processor = get_data_processor()
+        latest_results = processor.get_latest_results() if processor is not None else {'gait': None}
         
         # 如果没有结果，返回模拟数据
         if latest_results['gait'] is None:
@@ -168,17 +435,8 @@ def get_latest_data():
             })
         
         # 构建响应数据
-        response = {
-            'posture_score': latest_results['gait']['posture_score'],
-            'gait_phase': latest_results['gait']['gait_phase'],
-            'cadence': latest_results['gait']['features']['cadence'],
-            'vertical_oscillation': latest_results['gait']['features']['vertical_oscillation'],
-            'impact_force': latest_results['gait']['features']['impact_force'],
-            'pressure_distribution': list(latest_results['pressure']['pressure_distribution'].values()),
-            'recommendations': latest_results['recommendations'],
-            'is_simulated': is_simulating,
-            'timestamp': latest_results.get('timestamp', time.time() * 1000)
-        }
+        response = build_result_view(latest_results)
+        response['is_simulated'] = is_simulating
         
         return jsonify(response)
     
@@ -188,6 +446,74 @@ def get_latest_data():
             'message': f'获取数据失败: {str(e)}'
         })
 
+# API路由: 获取模型版本信息
+@app.route('/api/model')
+def get_model_info():
+    """获取当前活动模型版本和后台加载状态"""
+    if get_data_processor() is None:
+        return processor_unavailable()
+    return jsonify(data_processor.model_registry.get_status())
+
+# API路由: 热加载新模型
+@app.route('/api/model/load', methods=['POST'])
+def load_model():
+    """在后台加载并预热新模型，完成后在窗口之间切换"""
+    try:
+        params = request.json or {}
+        model_name = params.get('model_path')
+        if not model_name:
+            return jsonify({
+                'status': 'error',
+                'message': '缺少模型路径参数'
+            })
+        
+        # 只允许加载模型目录中的文件
+        model_path = os.path.abspath(os.path.join(MODELS_DIR, model_name))
+        if os.path.dirname(model_path) != os.path.abspath(MODELS_DIR) or not os.path.exists(model_path):
+            return jsonify({
+                'status': 'error',
+                'message': f'模型文件不存在: {model_name}'
+            })
+        
+        if get_data_processor() is None:
+            return processor_unavailable()
+        
+        if not data_processor.model_registry.load_model_async(model_path):
+            return jsonify({
+                'status': 'error',
+                'message': '已有模型正在加载，请稍后再试'
+            })
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'正在后台加载模型: {model_name}'
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'模型加载失败: {str(e)}'
+        })
+
+# API路由: 回滚模型
+@app.route('/api/model/rollback', methods=['POST'])
+def rollback_model():
+    """回滚到上一个模型版本"""
+    if get_data_processor() is None:
+        return processor_unavailable()
+    
+    if not data_processor.model_registry.rollback():
+        return jsonify({
+            'status': 'error',
+            'message': '没有可回滚的模型版本'
+        })
+    
+    return jsonify({
+        'status': 'success',
+        'message': '模型已回滚',
+        'model': data_processor.model_registry.get_status()['active']
+    })
+
 # API路由: 获取历史数据
 @app.route('/api/history')
 def get_history_data():
@@ -197,38 +523,34 @@ def get_history_data():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # TODO: 实际应用中应该从数据库查询
-        # 这里返回模拟数据
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        offset = request.args.get('offset', 0, type=int)
+        
+        # 从会话目录查询（使用date索引，不打开原始数据文件）
         history_sessions = [
             {
-                'date': '2024-02-25',
-                'duration': '45分钟',
-                'steps': 8254,
-                'avg_cadence': 183,
-                'posture_score': 87
-            },
-            {
-                'date': '2024-02-23',
-                'duration': '30分钟',
-                'steps': 5473,
-                'avg_cadence': 182,
-                'posture_score': 85
-            },
-            {
-                'date': '2024-02-20',
-                'duration': '60分钟',
-                'steps': 10872,
-                'avg_cadence': 181,
-                'posture_score': 89
+                'session_id': row['session_id'],
+                'date': row['date'],
+                'duration': format_duration(row['duration_s'], long_format=False),
+                'duration_s': row['duration_s'],
+                'steps': row['steps'],
+                'avg_cadence': round(row['avg_cadence']) if row['avg_cadence'] is not None else None,
+                'posture_score': round(row['avg_posture_score']) if row['avg_posture_score'] is not None else None,
+                'pressure_distribution': [row[field] for field in PRESSURE_FIELDS],
+                'stance_ratio': row['stance_ratio']
             }
+            for row in session_catalog.list_sessions(start_date, end_date, limit, offset)
         ]
         
         # 计算统计数据
+        summary = session_catalog.get_stats(start_date, end_date)
         stats = {
-            'total_sessions': len(history_sessions),
-            'total_duration': '18h',
-            'avg_score': 83,
-            'avg_cadence': 178
+            'total_sessions': summary['total_sessions'],
+            'total_duration': format_duration(summary['total_duration_s'], long_format=True),
+            'total_steps': summary['total_steps'],
+            'avg_score': round(summary['avg_score']) if summary['avg_score'] is not None else None,
+            'avg_cadence': round(summary['avg_cadence']) if summary['avg_cadence'] is not None else None,
+            'avg_stance_ratio': summary['avg_stance_ratio']
         }
         
         return jsonify({
@@ -247,24 +569,36 @@ def get_history_data():
 def export_data():
     """导出数据"""
     try:
-        params = request.json
+        params = request.get_json(silent=True) or {}
         export_format = params.get('format', 'csv')
+        table = params.get('table', 'samples')
         
-        # 模拟导出过程
-        time.sleep(1)  # 模拟处理时间
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'status': 'error',
+                'message': f'不支持的导出格式: {export_format}，可选: {", ".join(EXPORT_FORMATS)}'
+            })
         
-        file_name = f'running_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        # 未指定会话时导出日期范围内最近的会话
+        session_id = params.get('session_id')
+        if session_id is None:
+            sessions = session_catalog.list_sessions(params.get('startDate'), params.get('endDate'), limit=1)
+            if not sessions:
+                return jsonify({
+                    'status': 'error',
+                    'message': '所选日期范围内没有会话数据'
+                })
+            session_id = sessions[0]['session_id']
         
-        if export_format == 'csv':
-            file_name += '.csv'
-        else:
-            file_name += '.pdf'
+        # 校验会话存在，实际数据在下载时按块流式生成
+        session_store.open_session(session_id)
+        
+        query = {key: params[key] for key in ('start_ms', 'end_ms') if params.get(key) is not None}
+        file_url = url_for('download_file', filename=export_filename(session_id, export_format, table), **query)
         
-        # 实际应用中应该生成真实的文件
-        # 这里只是返回成功响应
         return jsonify({
             'status': 'success',
-            'file_url': f'/download/{file_name}',
+            'file_url': file_url,
             'message': f'数据已导出为{export_format.upper()}格式'
         })
     
@@ -277,106 +611,549 @@ def export_data():
 # API路由: 下载文件
 @app.route('/download/<filename>')
 def download_file(filename):
-    """提供文件下载"""
-    # 实际应用中应该返回真实生成的文件
-    # 这里只是演示
-    return send_from_directory(DATA_DIR, 'sample_data.json', as_attachment=True, download_name=filename)
+    """
+    流式下载会话数据
+    
+    文件名格式为 <会话ID>[_results].<csv|npz>，可选查询参数start_ms和end_ms选择时间范围。
+    数据按块从磁盘读取并生成，不会把整个会话加载到内存
+    """
+    name, _, export_format = filename.rpartition('.')
+    if export_format not in EXPORT_FORMATS:
+        abort(404)
+    
+    table = 'samples'
+    if name.endswith('_results'):
+        name, table = name[:-len('_results')], 'results'
+    
+    try:
+        reader = session_store.open_session(name)
+    except (ValueError, FileNotFoundError):
+        abort(404)
+    
+    start_ms = request.args.get('start_ms', type=float)
+    end_ms = request.args.get('end_ms', type=float)
+    
+    return Response(
+        stream_with_context(iter_export(reader, export_format, start_ms, end_ms, table)),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# API路由: 会话时间序列（用于绘图）
+@app.route('/api/sessions/<session_id>/series')
+def session_series(session_id):
+    """
+    获取会话的降采样时间序列
+    
+    查询参数: start_ms、end_ms（时间范围），width（图表像素宽度），
+    channels（逗号分隔的通道名），table（samples或results）。
+    根据时间跨度和宽度自动选择原始数据（LTTB降采样）或按秒/按分钟的聚合层级
+    """
+    try:
+        reader = session_store.open_session(session_id)
+    except (ValueError, FileNotFoundError):
+        return jsonify({
+            'status': 'error',
+            'message': f'会话不存在: {session_id}'
+        })
+    
+    try:
+        table = request.args.get('table', 'samples')
+        if table not in ('samples', 'results'):
+            raise ValueError(f'不支持的表: {table}')
+        channels = request.args.get('channels')
+        
+        series = query_series(
+            reader,
+            start_ms=request.args.get('start_ms', type=float),
+            end_ms=request.args.get('end_ms', type=float),
+            width=request.args.get('width', 1000, type=int),
+            channels=channels.split(',') if channels else None,
+            table=table
+        )
+        return jsonify({
+            'status': 'success',
+            'session_id': session_id,
+            'table': table,
+            **series
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        })
+
+def resolve_session_id(session_id):
+    """将'latest'解析为会话目录中最近的会话ID"""
+    if session_id in (None, 'latest'):
+        sessions = session_catalog.list_sessions(limit=1)
+        if not sessions:
+            raise ValueError('没有已保存的会话数据')
+        return sessions[0]['session_id']
+    return session_id
+
+def get_comparison_baseline(comparison, session_id):
+    """
+    从会话目录获取对比基准
+    
+    Args:
+        comparison: 'previous'（上一次训练）、'best'（姿态评分最高的训练）或'average'（所有训练的平均）
+        session_id: 当前分析的会话ID
+    
+    Returns:
+        基准指标字典，没有可对比的数据时返回None
+    """
+    if comparison == 'average':
+        stats = session_catalog.get_stats()
+        return {
+            'label': '个人平均',
+            'posture_score': stats['avg_score'],
+            'cadence': stats['avg_cadence'],
+            'stance_ratio': stats['avg_stance_ratio']
+        }
+    
+    others = [row for row in session_catalog.list_sessions(limit=1000) if row['session_id'] != session_id]
+    if comparison == 'previous':
+        current = session_catalog.get_session(session_id)
+        started_at = current['started_at'] if current else float('inf')
+        others = [row for row in others if row['started_at'] < started_at]
+        row = others[0] if others else None
+        label = '上一次训练'
+    elif comparison == 'best':
+        scored = [row for row in others if row['avg_posture_score'] is not None]
+        row = max(scored, key=lambda item: item['avg_posture_score']) if scored else None
+        label = '个人最佳'
+    else:
+        return None
+    
+    if row is None:
+        return None
+    return {
+        'label': label,
+        'session_id': row['session_id'],
+        'date': row['date'],
+        'posture_score': row['avg_posture_score'],
+        'cadence': row['avg_cadence'],
+        'stance_ratio': row['stance_ratio']
+    }
+
+def export_file_name(key, export_format):
+    """获取后台导出文件名（由任务缓存键生成，相同参数的导出共用一个文件）"""
+    return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.{export_format}"
+
+# API路由: 提交后台任务
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    提交导出或深度分析任务
+    
+    请求参数: type（'analysis'或'export'），session_id（会话ID或'latest'），
+    分析任务可选comparison，导出任务可选format、table、start_ms、end_ms。
+    立即返回任务ID，进度通过Socket.IO的job_progress事件推送（客户端发送watch_job关注任务）
+    """
+    try:
+        params = request.get_json(silent=True) or {}
+        job_type = params.get('type')
+        session_id = resolve_session_id(params.get('session_id'))
+        reader = session_store.open_session(session_id)
+        
+        # 行数作为缓存键的一部分，记录中的会话有新数据时不会命中旧结果
+        job_params = {
+            'session_id': session_id,
+            'rows': {table: reader.num_rows(table) for table in ('samples', 'results')}
+        }
+        
+        if job_type == 'analysis':
+            comparison = params.get('comparison', 'none')
+            job_params['comparison'] = comparison
+            if comparison != 'none':
+                # 对比基准取决于目录中的其他会话，目录变化后不能命中旧结果
+                job_params['catalog_revision'] = session_catalog.revision()
+            
+            def run(job):
+                result = analyze_session(job, reader)
+                result['comparison'] = get_comparison_baseline(comparison, session_id)
+                return result
+        
+        elif job_type == 'export':
+            export_format = params.get('format', 'csv')
+            table = params.get('table', 'samples')
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f'不支持的导出格式: {export_format}，可选: {", ".join(EXPORT_FORMATS)}')
+            if table not in ('samples', 'results'):
+                raise ValueError(f'不支持的表: {table}')
+            job_params.update({
+                'format': export_format,
+                'table': table,
+                'start_ms': params.get('start_ms'),
+                'end_ms': params.get('end_ms')
+            })
+            
+            file_name = export_file_name(job_key(job_type, job_params), export_format)
+            file_url = url_for('download_export', name=file_name,
+                               filename=export_filename(session_id, export_format, table))
+            
+            def run(job):
+                result = export_session(job, reader, os.path.join(EXPORTS_DIR, file_name), export_format,
+                                        params.get('start_ms'), params.get('end_ms'), table)
+                result['file_url'] = file_url
+                return result
+        
+        else:
+            raise ValueError(f'不支持的任务类型: {job_type}')
+        
+        job = job_manager.submit(job_type, job_params, run)
+        return jsonify({
+            'status': 'success',
+            'job': job.to_dict()
+        })
+    
+    except (ValueError, FileNotFoundError, JobQueueFull) as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'提交任务失败: {str(e)}'
+        })
+
+# API路由: 查询后台任务
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """获取任务状态，已完成的任务包含结果"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'任务不存在: {job_id}'
+        })
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict()
+    })
+
+# API路由: 取消后台任务
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消排队中或执行中的任务"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'任务不存在: {job_id}'
+        })
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict()
+    })
+
+# API路由: 下载后台导出的文件
+@app.route('/api/exports/<name>')
+def download_export(name):
+    """下载后台导出任务生成的文件，可选查询参数filename指定保存的文件名"""
+    if name != os.path.basename(name) or not os.path.exists(os.path.join(EXPORTS_DIR, name)):
+        abort(404)
+    return send_from_directory(
+        EXPORTS_DIR, name,
+        as_attachment=True, download_name=request.args.get('filename', name)
+    )
+
+# API路由: 后台任务统计
+@app.route('/api/jobs')
+def get_job_stats():
+    """获取后台任务统计"""
+    return jsonify(job_manager.get_stats())
 
 # Socket.IO: 连接事件
 @socketio.on('connect')
-def on_connect():
+def on_connect(auth=None):
     """客户端连接事件"""
     print(f"客户端已连接: {request.sid}")
+    
+    # 只有提供了正确令牌的客户端可以推送数据流
+    if isinstance(auth, dict) and is_valid_ingest_token(auth.get('ingest_token')):
+        ingest_clients.add(request.sid)
+    
+    # 客户端需要通过subscribe事件订阅会话数据，连接本身不会收到任何数据
+    subscription_manager.add_client(request.sid)
 
 # Socket.IO: 断开连接事件
 @socketio.on('disconnect')
 def on_disconnect():
     """客户端断开连接事件"""
     print(f"客户端已断开连接: {request.sid}")
+    
+    ingest_clients.discard(request.sid)
+    
+    for session_id, channel in subscription_manager.remove_client(request.sid):
+        if channel == 'raw':
+            get_session_stream(session_id)['frames'].remove_client(request.sid)
 
-def simulate_data():
-    """模拟数据线程函数"""
-    global is_simulating, simulation_index, simulation_data
+# Socket.IO: 订阅会话数据
+@socketio.on('subscribe')
+def on_subscribe(data):
+    """
+    订阅会话数据通道
     
-    if simulation_data is None:
-        print("模拟数据未加载")
-        return
+    data: {'session_id': 会话ID, 'channels': ['raw', 'results'], 'points_per_second': 每秒可显示点数}
+    """
+    data = data or {}
+    session_id = data.get('session_id', DEFAULT_SESSION_ID)
+    channels = data.get('channels', CHANNELS)
+    stream = get_session_stream(session_id)
+    
+    for channel in channels:
+        if channel not in CHANNELS:
+            emit('subscribe_error', {'message': f'未知的数据通道: {channel}'})
+            continue
+        
+        subscription_manager.subscribe(request.sid, session_id, channel)
+        
+        if channel == 'raw':
+            stream['frames'].add_client(request.sid, data.get('points_per_second'))
+        else:
+            # 发送当前完整状态，之后只推送增量
+            emit('analysis_snapshot', dict(stream['results'].snapshot(), session_id=session_id))
+
+# Socket.IO: 取消订阅
+@socketio.on('unsubscribe')
+def on_unsubscribe(data):
+    """取消订阅会话数据通道"""
+    data = data or {}
+    session_id = data.get('session_id', DEFAULT_SESSION_ID)
     
-    data_length = len(simulation_data['timestamps'])
-    print(f"开始模拟数据流，共 {data_length} 条数据")
+    for channel in data.get('channels', CHANNELS):
+        subscription_manager.unsubscribe(request.sid, session_id, channel)
+        if channel == 'raw':
+            get_session_stream(session_id)['frames'].remove_client(request.sid)
+
+# Socket.IO: 设置显示分辨率
+@socketio.on('set_resolution')
+def on_set_resolution(data):
+    """客户端声明其图表每秒可显示的点数，服务器据此抽取传感器数据"""
+    data = data or {}
+    session_id = data.get('session_id', DEFAULT_SESSION_ID)
+    if request.sid in subscription_manager.get_subscribers(session_id, 'raw'):
+        get_session_stream(session_id)['frames'].add_client(request.sid, data.get('points_per_second'))
+
+# Socket.IO: 关注后台任务
+@socketio.on('watch_job')
+def on_watch_job(data):
+    """客户端关注任务的进度推送，并立即收到任务的当前状态"""
+    job = job_manager.get_job((data or {}).get('job_id'))
+    if job is None:
+        return {'status': 'error', 'message': '任务不存在'}
     
-    while is_simulating and simulation_index < data_length:
-        # 获取当前数据点
-        timestamp = simulation_data['timestamps'][simulation_index]
-        acc = simulation_data['acceleration'][simulation_index]
-        gyro = simulation_data['gyroscope'][simulation_index]
-        pressure = simulation_data['pressure'][simulation_index]
+    join_room(f'job:{job.job_id}')
+    emit('job_progress', job.to_dict())
+    return {'status': 'success'}
+
+# Socket.IO: 重新同步请求
+@socketio.on('resync')
+def on_resync(data):
+    """客户端发现推送序列号不连续时请求完整快照"""
+    session_id = (data or {}).get('session_id', DEFAULT_SESSION_ID)
+    emit('analysis_snapshot', dict(get_session_stream(session_id)['results'].snapshot(), session_id=session_id))
+
+@socketio.on('ingest_frame')
+def on_ingest_frame(session_id, payload):
+    """
+    接收传感器数据帧（与sensor_frame相同的二进制帧格式）
+    
+    只接受连接时通过令牌认证的客户端。数据转发给会话的原始数据订阅者；
+    当前采集会话处于数据流接入模式时同时送入数据处理器
+    """
+    if request.sid not in ingest_clients:
+        return {'status': 'error', 'message': '未授权的数据流接入'}
+    if not isinstance(session_id, str):
+        return {'status': 'error', 'message': '无效的会话ID'}
+    
+    try:
+        frame = unpack_frame(payload)
+    except (TypeError, ValueError, struct.error) as e:
+        return {'status': 'error', 'message': f'无效的数据帧: {e}'}
+    
+    timestamps = frame['timestamps']
+    values = frame['values'].astype(np.float64)
+    acc, gyro, pressure = values[:, 0:3], values[:, 3:6], values[:, 6:10]
+    
+    get_session_stream(session_id)['frames'].add_samples(timestamps, acc, gyro, pressure)
+    start_fanout()
+    
+    if is_ingesting and session_id == current_session_id:
+        data_processor.add_samples(timestamps, acc, gyro, pressure)
+        record_samples(timestamps, acc, gyro, pressure)
+    
+    return {'status': 'success', 'samples': len(timestamps)}
+
+# API路由: 推送统计
+@app.route('/api/stream_stats')
+def get_stream_stats():
+    """获取订阅客户端的发送队列统计"""
+    return jsonify(subscription_manager.get_stats())
+
+# API路由: 回放统计
+@app.route('/api/replay_stats')
+def get_replay_stats():
+    """获取回放引擎和数据处理器的统计"""
+    return jsonify({
+        'is_simulating': is_simulating,
+        'is_ingesting': is_ingesting,
+        'replay': replay_engine.get_stats() if replay_engine is not None else None,
+        'processing': {
+            'total_samples': data_processor.total_samples,
+            'queued_windows': data_processor.processing_queue.qsize(),
+            'dropped_windows': data_processor.dropped_windows
+        } if data_processor is not None else None
+    })
+
+def start_result_push():
+    """启动分析结果推送任务（如果尚未运行）"""
+    global result_push_thread
+    
+    if result_push_thread is None:
+        result_push_thread = socketio.start_background_task(push_results)
+
+def start_fanout():
+    """启动数据分发任务（如果尚未运行）"""
+    global fanout_thread
+    
+    if fanout_thread is None:
+        fanout_thread = socketio.start_background_task(fanout_loop)
+
+def fanout_loop():
+    """
+    数据分发任务
+    
+    每隔FRAME_INTERVAL毫秒将各会话缓存的传感器样本打包为数据帧，
+    然后发送所有客户端队列中的消息
+    """
+    while True:
+        socketio.sleep(FRAME_INTERVAL / 1000)
         
-        # 添加到数据处理器
-        data_processor.add_imu_data(timestamp, acc, gyro)
-        data_processor.add_pressure_data(timestamp, pressure)
-        
-        # 存储历史数据
-        history_data.append({
-            'timestamp': timestamp,
-            'acc': acc,
-            'gyro': gyro,
-            'pressure': pressure
-        })
+        with session_streams_lock:
+            streams = list(session_streams.values())
+        for stream in streams:
+            stream['frames'].flush()
         
-        # 通过Socket.IO发送实时数据更新
-        socketio.emit('data_update', {
-            'timestamp': timestamp,
-            'acc': acc,
-            'gyro': gyro,
-            'pressure': pressure
-        })
+        subscription_manager.drain()
+
+def push_results():
+    """
+    分析结果推送任务
+    
+    从数据处理器的结果队列中取出新结果，编码为带序列号的增量消息后发布到会话的results通道。
+    推送次数只与新结果的数量有关，与打开的页面数量无关。
+    """
+    while True:
+        try:
+            result = data_processor.result_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
         
-        # 增加索引
-        simulation_index += 1
+        # 记录启动后的第一个分析结果
+        if startup_profile.mark('first_result'):
+            save_startup_profile()
         
-        # 当到达数据末尾时循环
-        if simulation_index >= data_length:
-            simulation_index = 0
+        writer = session_writer
+        if writer is not None:
+            try:
+                writer.append_results([result])
+            except ValueError:
+                pass
         
-        # 等待
-        time.sleep(SIMULATION_INTERVAL / 1000)
-    
-    print("模拟数据已停止")
+        session_id = current_session_id
+        message = get_session_stream(session_id)['results'].encode(result)
+        if message is not None:
+            message['session_id'] = session_id
+            subscription_manager.publish(session_id, 'results', 'analysis_update', message)
+            subscription_manager.drain()
 
-def save_session_data():
-    """保存当前会话数据"""
-    try:
-        if len(history_data) == 0:
-            return
-        
-        # 创建文件名
-        file_name = f'session_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        file_path = os.path.join(DATA_DIR, file_name)
-        
-        # 准备数据
-        session_data = {
-            'timestamps': [],
-            'acceleration': [],
-            'gyroscope': [],
-            'pressure': []
-        }
-        
-        for item in history_data:
-            session_data['timestamps'].append(item['timestamp'])
-            session_data['acceleration'].append(item['acc'])
-            session_data['gyroscope'].append(item['gyro'])
-            session_data['pressure'].append(item['pressure'])
+def make_replay_handler(session_id):
+    """
+    创建回放数据批的处理函数
+    
+    Args:
+        session_id: 数据所属的会话ID
+    
+    Returns:
+        处理函数 handler(batch)
+    """
+    frames = get_session_stream(session_id)['frames']
+    
+    def handle_batch(batch):
+        # 添加到数据处理器
+        data_processor.add_samples(batch['timestamps_ms'], batch['acc'], batch['gyro'], batch['pressure'])
         
-        # 保存为JSON文件
-        with open(file_path, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        # 写入会话存储
+        record_samples(batch['timestamps_ms'], batch['acc'], batch['gyro'], batch['pressure'])
         
-        print(f"会话数据已保存: {file_path}")
+        # 加入会话的数据帧批处理器，按批打包后发送给订阅的客户端
+        frames.add_samples(batch['timestamps_ms'], batch['acc'], batch['gyro'], batch['pressure'])
+    
+    return handle_batch
+
+def open_session(metadata):
+    """
+    关闭当前会话并开始记录新会话
     
+    Args:
+        metadata: 会话元数据字典
+    """
+    global session_writer
+    
+    close_session()
+    with session_writer_lock:
+        session_writer = session_store.create_session(metadata=metadata)
+    print(f"开始记录会话: {session_writer.session_id}")
+
+def close_session():
+    """写入剩余数据并关闭当前会话"""
+    global session_writer
+    
+    with session_writer_lock:
+        writer = session_writer
+        session_writer = None
+    
+    if writer is None:
+        return
+    
+    try:
+        header = writer.close()
+        print(f"会话数据已保存: {writer.session_dir} ({header['tables']['samples']['rows']} 个样本)")
+        
+        # 计算聚合指标并写入会话目录，预先计算绘图用的降采样金字塔
+        reader = session_store.open_session(writer.session_id)
+        session_catalog.add_session(reader)
+        for table in ('samples', 'results'):
+            build_pyramid(reader, table)
     except Exception as e:
         print(f"保存会话数据失败: {e}")
 
+def format_duration(seconds, long_format=False):
+    """
+    格式化时长
+    
+    Args:
+        seconds: 秒数
+        long_format: 为True时按小时显示（用于总时长），否则按分钟显示
+    
+    Returns:
+        时长字符串，例如'45分钟'或'18h'
+    """
+    if long_format and seconds >= 3600:
+        return f'{seconds / 3600:.0f}h'
+    if long_format:
+        return f'{seconds / 60:.0f}m'
+    return f'{seconds / 60:.0f}分钟'
+
+def record_samples(timestamps_ms, acc, gyro, pressure):
+    """将一批样本追加到当前会话"""
+    writer = session_writer
+    if writer is not None:
+        try:
+            writer.append_samples(timestamps_ms, acc, gyro, pressure)
+        except ValueError:
+            # 会话已在停止采集时关闭
+            pass
+
 def create_model_info():
     """创建模型信息文件（如果不存在）"""
     model_info_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
@@ -434,6 +1211,9 @@ if __name__ == '__main__':
     # 创建必要的目录和文件
     create_model_info()
     
+    # 在后台加载模型，服务立即开始监听
+    start_processor_init()
+    
     # 启动Flask应用
     print("启动中长跑实时指导系统Web服务...")
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+传感器数据帧批处理模块
+
+将逐个到达的传感器样本按50-100毫秒分组，打包为float32二进制帧后通过Socket.IO发送，
+并按每个客户端图表实际能显示的分辨率进行抽取，减少序列化开销和websocket帧数量
+
+帧格式 (小端):
+    帧头 (24字节): magic(2s) 版本(B) 保留(B) 序列号(I) 样本数(I) 通道数(H) 抽取因子(H) 基准时间戳毫秒(d)
+    时间偏移: n个float32，相对基准时间戳的毫秒数
+    样本数据: n x 通道数个float32，按行存储 [acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, p1, p2, p3, p4]
+"""
+import math
+import struct
+import threading
+from datetime import datetime
+
+import numpy as np
+
+FRAME_MAGIC = b'GF'
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<2sBBIIHHd')
+
+# 每个样本的通道数: 加速度3 + 角速度3 + 足压4
+FRAME_CHANNELS = 10
+
+def _timestamp_to_ms(timestamp):
+    """
+    将时间戳转换为毫秒级Unix时间
+    
+    Args:
+        timestamp: 毫秒数值或ISO格式字符串
+    
+    Returns:
+        毫秒级时间戳(float)
+    """
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp() * 1000
+    return float(timestamp)
+
+def pack_frame(seq, timestamps_ms, values, decimation=1):
+    """
+    将一批样本打包为二进制帧
+    
+    Args:
+        seq: 帧序列号
+        timestamps_ms: 形状为(n,)的毫秒时间戳数组
+        values: 形状为(n, FRAME_CHANNELS)的样本数组
+        decimation: 帧内样本的抽取因子
+    
+    Returns:
+        二进制帧(bytes)
+    """
+    base_timestamp = float(timestamps_ms[0]) if len(timestamps_ms) else 0.0
+    offsets = (np.asarray(timestamps_ms, dtype=np.float64) - base_timestamp).astype('<f4')
+    values = np.ascontiguousarray(values, dtype='<f4')
+    
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, seq, len(offsets),
+                               FRAME_CHANNELS, decimation, base_timestamp)
+    return header + offsets.tobytes() + values.tobytes()
+
+def unpack_frame(payload):
+    """
+    解析二进制帧
+    
+    Args:
+        payload: pack_frame生成的二进制帧
+    
+    Returns:
+        帧字典，包含seq、decimation、timestamps(毫秒)和values
+    """
+    magic, version, _, seq, n_samples, n_channels, decimation, base_timestamp = \
+        FRAME_HEADER.unpack_from(payload, 0)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError('无法识别的数据帧')
+    
+    offset = FRAME_HEADER.size
+    offsets = np.frombuffer(payload, dtype='<f4', count=n_samples, offset=offset)
+    offset += offsets.nbytes
+    values = np.frombuffer(payload, dtype='<f4', count=n_samples * n_channels, offset=offset)
+    
+    return {
+        'seq': seq,
+        'decimation': decimation,
+        'timestamps': base_timestamp + offsets.astype(np.float64),
+        'values': values.reshape(n_samples, n_channels)
+    }
+
+class FrameBatcher:
+    """
+    传感器数据帧批处理器类
+    
+    缓存待发送的样本，每隔interval_ms毫秒将其打包为二进制帧，
+    按客户端请求的显示分辨率分组抽取后逐个客户端发送
+    """
+    
+    def __init__(self, send_frame, interval_ms=80, sampling_rate=200, default_points_per_second=50):
+        """
+        初始化帧批处理器
+        
+        Args:
+            send_frame: 发送函数 send_frame(payload, sid)
+            interval_ms: 打包间隔(毫秒)，建议50-100
+            sampling_rate: 传感器采样率(Hz)
+            default_points_per_second: 未声明分辨率的客户端使用的每秒点数
+        """
+        self.send_frame = send_frame
+        self.interval_ms = interval_ms
+        self.sampling_rate = sampling_rate
+        self.default_points_per_second = default_points_per_second
+        
+        self.lock = threading.Lock()
+        # 待发送的样本块（数组列表），在flush时一次拼接
+        self.pending_timestamps = []
+        self.pending_values = []
+        
+        # 已发送的样本总数，用于跨帧保持均匀的抽取间隔
+        self.sample_counter = 0
+        self.seq = 0
+        
+        # 客户端sid -> 抽取因子
+        self.clients = {}
+    
+    def decimation_for(self, points_per_second):
+        """
+        根据客户端可显示的每秒点数计算抽取因子
+        
+        Args:
+            points_per_second: 每秒点数
+        
+        Returns:
+            抽取因子(>=1)
+        """
+        if not points_per_second or points_per_second <= 0:
+            return 1
+        return max(1, min(65535, math.ceil(self.sampling_rate / points_per_second)))
+    
+    def add_client(self, sid, points_per_second=None):
+        """
+        注册或更新客户端的显示分辨率
+        
+        Args:
+            sid: Socket.IO会话ID
+            points_per_second: 客户端图表每秒可显示的点数
+        """
+        if points_per_second is None:
+            points_per_second = self.default_points_per_second
+        with self.lock:
+            self.clients[sid] = self.decimation_for(points_per_second)
+    
+    def remove_client(self, sid):
+        """移除客户端"""
+        with self.lock:
+            self.clients.pop(sid, None)
+    
+    def add_sample(self, timestamp, acc, gyro, pressure):
+        """
+        添加单个样本
+        
+        Args:
+            timestamp: 时间戳（毫秒或ISO格式字符串）
+            acc: 加速度 [x, y, z]
+            gyro: 角速度 [x, y, z]
+            pressure: 足压 [前脚掌, 中脚掌, 后脚掌, 外侧]
+        """
+        timestamps = np.array([_timestamp_to_ms(timestamp)], dtype=np.float64)
+        values = np.array([[*acc, *gyro, *pressure]], dtype=np.float32)
+        with self.lock:
+            self.pending_timestamps.append(timestamps)
+            self.pending_values.append(values)
+    
+    def add_samples(self, timestamps_ms, acc, gyro, pressure):
+        """
+        批量添加样本
+        
+        Args:
+            timestamps_ms: 形状为(n,)的毫秒时间戳数组
+            acc: 形状为(n, 3)的加速度数组
+            gyro: 形状为(n, 3)的角速度数组
+            pressure: 形状为(n, 4)的足压数组
+        """
+        # 复制一份，调用方之后可以重用自己的缓冲区
+        timestamps = np.array(timestamps_ms, dtype=np.float64)
+        values = np.hstack([acc, gyro, pressure]).astype(np.float32, copy=False)
+        with self.lock:
+            self.pending_timestamps.append(timestamps)
+            self.pending_values.append(values)
+    
+    def flush(self):
+        """
+        将缓存的样本打包并发送给所有客户端
+        
+        Returns:
+            发送的帧数量
+        """
+        with self.lock:
+            if not self.pending_timestamps or not self.clients:
+                # 没有客户端时直接丢弃，避免缓存无限增长
+                self.sample_counter += sum(len(chunk) for chunk in self.pending_timestamps)
+                self.pending_timestamps = []
+                self.pending_values = []
+                return 0
+            
+            timestamps = np.concatenate(self.pending_timestamps)
+            values = np.concatenate(self.pending_values)
+            self.pending_timestamps = []
+            self.pending_values = []
+            
+            sample_indices = self.sample_counter + np.arange(len(timestamps))
+            self.sample_counter += len(timestamps)
+            self.seq += 1
+            seq = self.seq
+            
+            # 按抽取因子对客户端分组，每组只打包一次
+            groups = {}
+            for sid, decimation in self.clients.items():
+                groups.setdefault(decimation, []).append(sid)
+        
+        sent = 0
+        for decimation, sids in groups.items():
+            mask = sample_indices % decimation == 0
+            if not np.any(mask):
+                continue
+            
+            payload = pack_frame(seq, timestamps[mask], values[mask], decimation)
+            for sid in sids:
+                self.send_frame(payload, sid)
+                sent += 1
+        
+        return sent
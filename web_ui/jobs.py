@@ -0,0 +1,315 @@
+"""
+后台任务模块
+
+导出和深度分析等耗时操作放入有界线程池中执行，请求处理函数只负责提交任务并立即返回任务ID，
+不会阻塞实时数据接口。任务进度通过回调推送（由Web应用转发到Socket.IO），
+相同 (任务类型, 参数) 的已完成结果会被缓存，正在执行的相同任务不会重复提交，
+排队或执行中的任务可以取消
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 任务状态
+JOB_STATES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+# 两次进度通知之间的最小间隔 (秒)
+PROGRESS_INTERVAL = 0.2
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+class JobQueueFull(RuntimeError):
+    """等待执行的任务过多"""
+
+def job_key(kind, params):
+    """
+    获取任务的缓存键
+
+    Args:
+        kind: 任务类型
+        params: 可JSON序列化的参数字典
+
+    Returns:
+        缓存键字符串
+    """
+    return f"{kind}:{json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+
+class Job:
+    """
+    后台任务类
+
+    任务函数通过report报告进度，并在适当的位置调用check_cancelled响应取消请求
+    """
+
+    def __init__(self, kind, params, notify=None):
+        """
+        初始化任务
+
+        Args:
+            kind: 任务类型
+            params: 参数字典
+            notify: 状态变化回调 notify(job_dict)
+        """
+        self.job_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.key = job_key(kind, params)
+        self.notify = notify
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.last_notify = 0.0
+
+    @property
+    def finished(self):
+        """任务是否已结束"""
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        """
+        获取任务状态
+
+        Returns:
+            状态字典，已完成的任务包含结果
+        """
+        state = {
+            'job_id': self.job_id,
+            'type': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'cached': self.cached,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == 'completed':
+            state['result'] = self.result
+        if self.status == 'failed':
+            state['error'] = self.error
+        return state
+
+    def _notify(self, force=False):
+        """发送状态通知，进度通知按PROGRESS_INTERVAL限流"""
+        if self.notify is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_notify < PROGRESS_INTERVAL:
+            return
+        self.last_notify = now
+        try:
+            self.notify(self.to_dict())
+        except Exception as e:
+            print(f"任务状态通知失败: {e}")
+
+    def report(self, progress, message=None):
+        """
+        报告任务进度
+
+        Args:
+            progress: 完成比例 0~1
+            message: 进度说明
+        """
+        self.check_cancelled()
+        self.progress = min(1.0, max(0.0, float(progress)))
+        if message is not None:
+            self.message = message
+        self._notify()
+
+    def check_cancelled(self):
+        """任务已被取消时抛出JobCancelled"""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def _finish(self, status, result=None, error=None):
+        """记录任务结束状态并发送通知"""
+        self.status = status
+        self.result = result
+        self.error = error
+        if status == 'completed':
+            self.progress = 1.0
+        self.finished_at = time.time()
+        self._notify(force=True)
+
+class JobManager:
+    """
+    后台任务管理器类
+
+    使用固定大小的线程池执行任务，限制等待中的任务数量，
+    并按任务键缓存最近完成的结果
+    """
+
+    def __init__(self, notify=None, max_workers=2, max_pending=16, cache_size=32, max_jobs=200):
+        """
+        初始化任务管理器
+
+        Args:
+            notify: 任务状态变化回调 notify(job_dict)
+            max_workers: 工作线程数
+            max_pending: 排队和执行中的任务数上限
+            cache_size: 缓存的已完成结果数量
+            max_jobs: 保留状态的任务数量，超过时移除最早结束的任务
+        """
+        self.notify = notify
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self.max_jobs = max_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.jobs = OrderedDict()
+        self.active = {}
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, kind, params, func):
+        """
+        提交任务
+
+        已缓存相同任务的结果时直接返回已完成的任务；相同任务正在排队或执行时返回该任务
+
+        Args:
+            kind: 任务类型
+            params: 可JSON序列化的参数字典（决定缓存键）
+            func: 任务函数 func(job)，返回值为任务结果
+
+        Returns:
+            Job实例
+
+        Raises:
+            JobQueueFull: 等待执行的任务达到上限
+        """
+        key = job_key(kind, params)
+        with self.lock:
+            if key in self.active:
+                return self.active[key]
+
+            job = Job(kind, params, self.notify)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                job.cached = True
+                job.status = 'completed'
+                job.progress = 1.0
+                job.result = self.cache[key]
+                job.finished_at = job.created_at
+                self._remember(job)
+                return job
+
+            if len(self.active) >= self.max_pending:
+                raise JobQueueFull(f'等待执行的任务过多（上限{self.max_pending}），请稍后重试')
+
+            self.active[key] = job
+            self._remember(job)
+            job.future = self.executor.submit(self._run, job, func)
+        return job
+
+    def _remember(self, job):
+        """记录任务，超过数量上限时移除最早结束的任务"""
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((job_id for job_id, item in self.jobs.items() if item.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest]
+
+    def _run(self, job, func):
+        """在工作线程中执行任务"""
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            job.status = 'running'
+            job.started_at = time.time()
+            job._notify(force=True)
+
+            result = func(job)
+        except JobCancelled:
+            job._finish('cancelled')
+        except Exception as e:
+            print(f"任务执行失败 {job.kind} {job.job_id}: {e}")
+            job._finish('failed', error=str(e))
+        else:
+            with self.lock:
+                self.cache[job.key] = result
+                self.cache.move_to_end(job.key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            job._finish('completed', result=result)
+        finally:
+            with self.lock:
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+
+    def get_job(self, job_id):
+        """获取任务，不存在时返回None"""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        取消任务
+
+        排队中的任务不会再执行，执行中的任务在下一次报告进度时停止
+
+        Returns:
+            Job实例，不存在时返回None
+        """
+        job = self.get_job(job_id)
+        if job is None or job.finished:
+            return job
+
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # 尚未开始执行，直接标记为已取消
+            with self.lock:
+                if self.active.get(job.key) is job:
+                    del self.active[job.key]
+            job._finish('cancelled')
+        return job
+
+    def invalidate(self, predicate):
+        """
+        移除满足条件的缓存结果
+
+        Args:
+            predicate: 判断函数 predicate(key)
+        """
+        with self.lock:
+            for key in [key for key in self.cache if predicate(key)]:
+                del self.cache[key]
+
+    def get_stats(self):
+        """
+        获取任务统计
+
+        Returns:
+            统计字典: 各状态的任务数和缓存的结果数
+        """
+        with self.lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            return {
+                'jobs': counts,
+                'pending': len(self.active),
+                'max_pending': self.max_pending,
+                'cached_results': len(self.cache)
+            }
+
+    def shutdown(self):
+        """取消所有任务并停止线程池"""
+        with self.lock:
+            job_ids = list(self.jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self.executor.shutdown(wait=False)
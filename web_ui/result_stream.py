@@ -0,0 +1,120 @@
+"""
+分析结果推送流模块
+
+将数据处理器产生的分析结果转换为扁平的视图，与上一次推送的状态比较后
+只发送变化的字段，并为每条推送分配递增的序列号，客户端发现序列号不连续时
+请求完整快照重新同步
+"""
+import math
+import threading
+
+from edge_ai.inference import PRESSURE_REGIONS
+
+# 浮点字段保留的小数位数，避免无意义的微小变化触发推送
+FLOAT_PRECISION = 2
+
+def _round_value(value):
+    """对浮点数（包括列表中的浮点数）做舍入，NaN和无穷大转换为None"""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return round(float(value), FLOAT_PRECISION)
+    if isinstance(value, (list, tuple)):
+        return [_round_value(item) for item in value]
+    return value
+
+def build_result_view(result):
+    """
+    将数据处理器的分析结果转换为前端使用的扁平视图
+    
+    Args:
+        result: DataProcessor产生的结果字典
+    
+    Returns:
+        视图字典，分析结果不完整时返回None
+    """
+    gait = result.get('gait')
+    pressure = result.get('pressure')
+    if gait is None or pressure is None:
+        return None
+    
+    view = {
+        'posture_score': gait['posture_score'],
+        'gait_phase': gait['gait_phase'],
+        'phase_confidence': gait['phase_confidence'],
+        'cadence': gait['features']['cadence'],
+        'vertical_oscillation': gait['features']['vertical_oscillation'],
+        'impact_force': gait['features']['impact_force'],
+        'inference_time_ms': gait['inference_time_ms'],
+        'foot_strike_type': pressure['foot_strike_type'],
+        'pronation_type': pressure['pronation_type'],
+        # 按固定的区域顺序排列，不依赖字典的插入顺序
+        'pressure_distribution': [pressure['pressure_distribution'][region] for region in PRESSURE_REGIONS],
+        'recommendations': result['recommendations'],
+        'model_version': result.get('model_version'),
+        'timestamp': result.get('timestamp')
+    }
+    
+    return {key: _round_value(value) for key, value in view.items()}
+
+class ResultStream:
+    """
+    结果推送流类
+    
+    维护最近一次推送的完整状态和序列号，将新结果编码为增量消息
+    """
+    
+    def __init__(self):
+        """初始化结果推送流"""
+        self.seq = 0
+        self.state = {}
+        self.lock = threading.Lock()
+    
+    def reset(self):
+        """清空状态，下一条推送将包含所有字段"""
+        with self.lock:
+            self.state = {}
+    
+    def encode(self, result):
+        """
+        将新结果编码为增量消息
+        
+        Args:
+            result: DataProcessor产生的结果字典
+        
+        Returns:
+            增量消息字典 {'seq': 序列号, 'delta': 变化的字段}，
+            结果无效或没有任何字段变化时返回None
+        """
+        view = build_result_view(result)
+        if view is None:
+            return None
+        
+        with self.lock:
+            delta = {
+                key: value for key, value in view.items()
+                if key not in self.state or self.state[key] != value
+            }
+            if not delta:
+                return None
+            
+            self.state.update(delta)
+            self.seq += 1
+            
+            return {
+                'seq': self.seq,
+                'delta': delta
+            }
+    
+    def snapshot(self):
+        """
+        获取完整状态快照，用于新客户端初始化或序列号不连续时重新同步
+        
+        Returns:
+            快照字典 {'seq': 当前序列号, 'state': 完整状态}
+        """
+        with self.lock:
+            return {
+                'seq': self.seq,
+                'state': dict(self.state)
+            }
\ No newline at end of file
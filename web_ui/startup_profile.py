@@ -0,0 +1,88 @@
+"""
+启动性能记录模块
+
+记录Web应用启动过程中各模块的导入耗时、各组件的初始化耗时，
+以及服务可访问、模型就绪和第一个分析结果等里程碑相对启动开始的时间，
+通过健康检查接口返回，并保存为JSON文件以便跟踪不同版本的启动性能
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class StartupProfile:
+    """
+    启动性能记录类
+
+    所有时间都相对于创建实例的时刻（应用模块开始导入时），单位为毫秒
+    """
+
+    def __init__(self):
+        """初始化启动性能记录"""
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.steps = []
+        self.milestones = {}
+        self.lock = threading.Lock()
+
+    def elapsed_ms(self):
+        """距启动开始的毫秒数"""
+        return (time.perf_counter() - self.start) * 1000
+
+    @contextmanager
+    def measure(self, name):
+        """
+        记录一个步骤（模块导入或组件初始化）的耗时
+
+        Args:
+            name: 步骤名称，约定导入使用 'import:模块名'，初始化使用 'init:组件名'
+        """
+        begin_ms = self.elapsed_ms()
+        try:
+            yield
+        finally:
+            end_ms = self.elapsed_ms()
+            with self.lock:
+                self.steps.append({
+                    'name': name,
+                    'start_ms': round(begin_ms, 3),
+                    'duration_ms': round(end_ms - begin_ms, 3),
+                    'thread': threading.current_thread().name
+                })
+
+    def mark(self, name):
+        """
+        记录里程碑（只记录第一次）
+
+        Returns:
+            是否是第一次记录该里程碑
+        """
+        with self.lock:
+            if name in self.milestones:
+                return False
+            self.milestones[name] = round(self.elapsed_ms(), 3)
+            return True
+
+    def to_dict(self):
+        """
+        获取启动性能记录
+
+        Returns:
+            字典: 启动时间、各步骤耗时（按开始时间排序）和里程碑
+        """
+        with self.lock:
+            return {
+                'started_at': self.started_at,
+                'uptime_ms': round(self.elapsed_ms(), 3),
+                'steps': sorted(self.steps, key=lambda step: step['start_ms']),
+                'milestones': dict(self.milestones)
+            }
+
+    def save(self, path):
+        """将启动性能记录保存为JSON文件（先写临时文件再替换）"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
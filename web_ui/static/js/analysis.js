@@ -14,12 +14,43 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // 绑定下拉框变化事件
     document.getElementById('sessionSelect').addEventListener('change', updateComparisonOptions);
-    document.getElementById('comparisonSelect').addEventListener('change', updateComparisonChart);
+    document.getElementById('comparisonSelect').addEventListener('change', analyzeData);
     
-    // 默认加载最新数据
-    analyzeData();
+    // 加载会话列表后默认分析最新数据
+    loadSessionOptions().finally(analyzeData);
 });
 
+/**
+ * 从历史数据接口加载会话选项
+ */
+function loadSessionOptions() {
+    const urlSessionId = new URLSearchParams(window.location.search).get('session_id');
+    
+    return fetch('/api/history?limit=20')
+        .then(response => response.json())
+        .then(data => {
+            if (!data.sessions) {
+                return;
+            }
+            
+            const sessionSelect = document.getElementById('sessionSelect');
+            sessionSelect.innerHTML = '<option value="latest">最近一次</option>';
+            data.sessions.forEach(session => {
+                const option = document.createElement('option');
+                option.value = session.session_id;
+                option.textContent = `${session.date} (${session.duration})`;
+                sessionSelect.appendChild(option);
+            });
+            
+            // 从历史页面的详情链接进入时选中对应会话
+            if (urlSessionId && data.sessions.some(session => session.session_id === urlSessionId)) {
+                sessionSelect.value = urlSessionId;
+                updateComparisonOptions();
+            }
+        })
+        .catch(error => console.error('加载会话列表失败:', error));
+}
+
 /**
  * 初始化所有图表
  */
@@ -376,31 +407,101 @@ function initCharts() {
     };
 }
 
+// 后台任务进度推送连接和当前分析任务ID
+let socket = null;
+let currentJobId = null;
+
+/**
+ * 获取Socket.IO连接（首次调用时创建）
+ */
+function getSocket() {
+    if (socket === null) {
+        socket = io();
+        socket.on('job_progress', handleJobProgress);
+    }
+    return socket;
+}
+
 /**
  * 分析选中的数据
+ *
+ * 分析在服务器后台任务中执行，进度通过job_progress事件推送；
+ * 分析进行中再次点击按钮会取消当前任务
  */
 function analyzeData() {
     const sessionId = document.getElementById('sessionSelect').value;
     const comparisonType = document.getElementById('comparisonSelect').value;
+    const analyzeBtn = document.getElementById('analyzeBtn');
     
-    console.log(`分析数据: 训练ID=${sessionId}, 对比类型=${comparisonType}`);
+    if (currentJobId !== null) {
+        fetch(`/api/jobs/${currentJobId}/cancel`, { method: 'POST' });
+        return;
+    }
     
-    // 这里应该从API获取实际数据
-    // 现在只是简单地展示加载状态
-    document.getElementById('analyzeBtn').textContent = '分析中...';
+    console.log(`分析数据: 训练ID=${sessionId}, 对比类型=${comparisonType}`);
+    analyzeBtn.textContent = '分析中...';
     
-    // 模拟API请求延迟
-    setTimeout(() => {
-        // 更新各项指标（实际中应从API获取）
-        updateMetrics();
-        
-        // 更新对比图表
-        if (comparisonType !== 'none') {
-            updateComparisonChart();
+    fetch('/api/jobs', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            type: 'analysis',
+            session_id: sessionId,
+            comparison: comparisonType
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status !== 'success') {
+            throw new Error(data.message);
         }
         
-        document.getElementById('analyzeBtn').textContent = '分析数据';
-    }, 1000);
+        currentJobId = data.job.job_id;
+        if (data.job.status === 'completed') {
+            // 缓存的结果直接显示
+            handleJobProgress(data.job);
+        } else {
+            getSocket().emit('watch_job', { job_id: currentJobId });
+        }
+    })
+    .catch(error => {
+        console.error('分析数据失败:', error);
+        analyzeBtn.textContent = '分析数据';
+    });
+}
+
+/**
+ * 处理后台任务进度推送
+ */
+function handleJobProgress(job) {
+    if (job.job_id !== currentJobId) {
+        return;
+    }
+    
+    const analyzeBtn = document.getElementById('analyzeBtn');
+    switch (job.status) {
+        case 'queued':
+            analyzeBtn.textContent = '排队中... (点击取消)';
+            break;
+        case 'running':
+            analyzeBtn.textContent = `分析中 ${Math.round(job.progress * 100)}% (点击取消)`;
+            break;
+        case 'completed':
+            currentJobId = null;
+            analyzeBtn.textContent = '分析数据';
+            updateMetrics(job.result);
+            updateComparisonChart(job.result);
+            break;
+        default:
+            // 失败或已取消
+            currentJobId = null;
+            analyzeBtn.textContent = '分析数据';
+            if (job.status === 'failed') {
+                console.error('分析任务失败:', job.error);
+            }
+    }
 }
 
 /**
@@ -432,18 +533,21 @@ function updateComparisonOptions() {
 /**
  * 更新指标卡片
  */
-function updateMetrics() {
-    // 这里应该用实际数据更新指标
-    // 现在使用的是模拟数据
-    document.getElementById('cadenceValue').textContent = '178';
-    document.getElementById('oscillationValue').textContent = '9.2';
-    document.getElementById('impactValue').textContent = '2.8';
+function updateMetrics(result) {
+    const metrics = result.metrics;
+    const setValue = (id, value, digits) => {
+        document.getElementById(id).textContent = value === null ? '--' : value.toFixed(digits);
+    };
+    
+    setValue('cadenceValue', metrics.cadence, 0);
+    setValue('oscillationValue', metrics.vertical_oscillation, 1);
+    setValue('impactValue', metrics.impact_force, 1);
 }
 
 /**
  * 更新对比图表
  */
-function updateComparisonChart() {
+function updateComparisonChart(result) {
     const comparisonType = document.getElementById('comparisonSelect').value;
     if (comparisonType === 'none') {
         document.getElementById('comparisonChart').parentElement.querySelector('p').style.display = 'block';
@@ -452,25 +556,20 @@ function updateComparisonChart() {
     
     document.getElementById('comparisonChart').parentElement.querySelector('p').style.display = 'none';
     
-    // 根据对比类型获取不同的数据
-    let comparisonData;
-    let comparisonLabel;
+    // 当前训练和对比基准的 [步频, 垂直振幅, 冲击力, 姿态评分]
+    const metrics = result.metrics;
+    const currentData = [metrics.cadence, metrics.vertical_oscillation, metrics.impact_force, metrics.posture_score];
     
-    switch (comparisonType) {
-        case 'previous':
-            comparisonData = [175, 9.8, 3.1, 85];
-            comparisonLabel = '上次训练';
-            break;
-        case 'best':
-            comparisonData = [182, 7.5, 2.5, 92];
-            comparisonLabel = '个人最佳';
-            break;
-        case 'average':
-            comparisonData = [176, 8.9, 2.9, 84];
-            comparisonLabel = '个人平均';
-            break;
+    const baseline = result.comparison;
+    if (!baseline) {
+        document.getElementById('comparisonChart').parentElement.querySelector('p').style.display = 'block';
+        return;
     }
     
+    // 会话目录只保存步频和姿态评分的汇总，其余指标不参与对比
+    const comparisonData = [baseline.cadence, null, null, baseline.posture_score];
+    const comparisonLabel = baseline.label;
+    
     // 更新对比图表
     window.charts.comparisonChart.setOption({
         legend: {
@@ -478,8 +577,8 @@ function updateComparisonChart() {
         },
         series: [
             {
-                // 当前训练数据不变
-                name: '当前训练'
+                name: '当前训练',
+                data: currentData
             },
             {
                 name: comparisonLabel,
@@ -5,15 +5,22 @@
 
 // 全局变量
 let isCollecting = false;
-let updateInterval;
+let socket = null;
 let charts = {};
+// 服务器推送的分析结果状态及其序列号
+let resultState = {};
+let lastSeq = null;
+// 传感器图表显示的时间范围 (秒)
+const HISTORY_SECONDS = 5;
+// 二进制传感器数据帧的帧头长度 (字节)
+const FRAME_HEADER_SIZE = 24;
+// 仪表盘订阅的会话ID
+const SESSION_ID = 'default';
 let dataHistory = {
     timestamps: [],
     acceleration: [],
     gyroscope: [],
-    pressure: [],
-    gaitPhase: [],
-    postureScore: []
+    pressure: []
 };
 
 // DOM加载完成后初始化
@@ -28,8 +35,93 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // 初始化一次数据更新，显示初始状态
     updateDashboard();
+    
+    // 连接Socket.IO，接收服务器推送的分析结果
+    initSocket();
 });
 
+/**
+ * 初始化Socket.IO连接
+ * 分析结果由服务器在产生时推送，不再定时轮询
+ */
+function initSocket() {
+    socket = io();
+    
+    // 完整快照：订阅或重新同步时收到
+    socket.on('analysis_snapshot', function(message) {
+        if (message.session_id !== SESSION_ID) return;
+        lastSeq = message.seq;
+        resultState = message.state;
+        if (Object.keys(resultState).length > 0) {
+            renderResults(resultState);
+        }
+    });
+    
+    // 增量更新：序列号连续时合并，否则请求重新同步
+    socket.on('analysis_update', function(message) {
+        if (message.session_id !== SESSION_ID) return;
+        if (lastSeq === null || message.seq !== lastSeq + 1) {
+            lastSeq = null;
+            socket.emit('resync', { session_id: SESSION_ID });
+            return;
+        }
+        lastSeq = message.seq;
+        Object.assign(resultState, message.delta);
+        renderResults(resultState, message.delta);
+    });
+    
+    // 原始传感器数据：服务器按批打包并按显示分辨率抽取的二进制帧
+    socket.on('sensor_frame', function(sessionId, buffer) {
+        if (sessionId !== SESSION_ID) return;
+        updateDataHistory(decodeSensorFrame(buffer));
+    });
+    
+    // 连接（包括重连）后订阅会话的原始数据和分析结果
+    socket.on('connect', function() {
+        socket.emit('subscribe', {
+            session_id: SESSION_ID,
+            channels: ['raw', 'results'],
+            points_per_second: chartPointsPerSecond()
+        });
+    });
+    
+    // 图表尺寸变化时更新显示分辨率，服务器据此抽取数据
+    window.addEventListener('resize', function() {
+        socket.emit('set_resolution', {
+            session_id: SESSION_ID,
+            points_per_second: chartPointsPerSecond()
+        });
+    });
+}
+
+/**
+ * 根据图表宽度计算每秒可显示的点数
+ */
+function chartPointsPerSecond() {
+    const width = document.getElementById('accChart').clientWidth || 600;
+    return Math.ceil(width / HISTORY_SECONDS);
+}
+
+/**
+ * 解析二进制传感器数据帧
+ * 帧格式见 web_ui/frame_batcher.py
+ */
+function decodeSensorFrame(buffer) {
+    const view = new DataView(buffer);
+    const count = view.getUint32(8, true);
+    const channels = view.getUint16(12, true);
+    const baseTimestamp = view.getFloat64(16, true);
+    
+    return {
+        seq: view.getUint32(4, true),
+        count: count,
+        channels: channels,
+        baseTimestamp: baseTimestamp,
+        offsets: new Float32Array(buffer, FRAME_HEADER_SIZE, count),
+        values: new Float32Array(buffer, FRAME_HEADER_SIZE + count * 4, count * channels)
+    };
+}
+
 /**
  * 初始化所有图表
  */
@@ -248,14 +340,20 @@ function startDataCollection() {
     
     // 发送开始采集请求
     fetch('/api/start_collection', {
-        method: 'POST'
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            source: 'simulation'
+        })
     })
     .then(response => response.json())
     .then(data => {
         console.log(data.message);
         
-        // 开始定时更新仪表盘
-        updateInterval = setInterval(updateDashboard, 100);  // 10Hz更新率
+        // 开始刷新传感器图表，分析结果由服务器推送
+        requestAnimationFrame(refreshSensorCharts);
     })
     .catch(error => {
         console.error('启动数据采集失败:', error);
@@ -276,9 +374,6 @@ function stopDataCollection() {
     document.getElementById('startBtn').disabled = false;
     document.getElementById('stopBtn').disabled = true;
     
-    // 清除更新定时器
-    clearInterval(updateInterval);
-    
     // 发送停止采集请求
     fetch('/api/stop_collection', {
         method: 'POST'
@@ -328,29 +423,17 @@ function exportData() {
 
 /**
  * 更新仪表盘数据
+ * 仅在页面加载时请求一次，之后由服务器推送
  */
 function updateDashboard() {
-    // 从API获取实时数据
-    fetch('/real-time-data')
+    fetch('/api/get_latest_data')
     .then(response => response.json())
     .then(data => {
-        // 更新历史数据数组
-        updateDataHistory(data);
-        
-        // 更新姿态评分仪表盘
-        updateScoreGauge(data.posture_score);
-        
-        // 更新步态相位显示
-        updateGaitPhase(data.gait_phase);
-        
-        // 更新当前状态指标
-        updateStatusMetrics(data);
-        
-        // 更新传感器图表
-        updateSensorCharts(data);
-        
-        // 更新建议列表
-        updateRecommendations(data.recommendations);
+        if (data.status === 'error') {
+            console.error(data.message);
+            return;
+        }
+        renderResults(data);
     })
     .catch(error => {
         console.error('获取实时数据失败:', error);
@@ -358,29 +441,66 @@ function updateDashboard() {
 }
 
 /**
- * 更新数据历史记录
+ * 渲染分析结果
+ * @param {Object} state 完整的分析结果状态
+ * @param {Object} changed 本次变化的字段，未提供时全部重绘
  */
-function updateDataHistory(data) {
-    const timestamp = new Date(data.timestamp);
+function renderResults(state, changed) {
+    changed = changed || state;
     
-    dataHistory.timestamps.push(timestamp);
-    dataHistory.acceleration.push(data.acceleration);
-    dataHistory.gyroscope.push(data.gyroscope);
-    dataHistory.pressure.push(data.pressure);
-    dataHistory.gaitPhase.push(data.gait_phase);
-    dataHistory.postureScore.push(data.posture_score);
+    if ('posture_score' in changed) {
+        updateScoreGauge(Math.round(state.posture_score));
+    }
+    if ('gait_phase' in changed) {
+        updateGaitPhase(state.gait_phase);
+    }
+    updateStatusMetrics(state);
+    if ('pressure_distribution' in changed) {
+        updatePressureChart(state.pressure_distribution);
+    }
+    if ('recommendations' in changed) {
+        updateRecommendations(state.recommendations);
+    }
+}
+
+/**
+ * 更新数据历史记录
+ */
+function updateDataHistory(frame) {
+    for (let i = 0; i < frame.count; i++) {
+        const row = frame.values.subarray(i * frame.channels, (i + 1) * frame.channels);
+        dataHistory.timestamps.push(new Date(frame.baseTimestamp + frame.offsets[i]));
+        dataHistory.acceleration.push([row[0], row[1], row[2]]);
+        dataHistory.gyroscope.push([row[3], row[4], row[5]]);
+        dataHistory.pressure.push([row[6], row[7], row[8], row[9]]);
+    }
     
-    // 只保留最近100个数据点
-    if (dataHistory.timestamps.length > 100) {
-        dataHistory.timestamps.shift();
-        dataHistory.acceleration.shift();
-        dataHistory.gyroscope.shift();
-        dataHistory.pressure.shift();
-        dataHistory.gaitPhase.shift();
-        dataHistory.postureScore.shift();
+    // 只保留最近HISTORY_SECONDS秒的数据
+    const count = dataHistory.timestamps.length;
+    if (count === 0) return;
+    const cutoff = dataHistory.timestamps[count - 1].getTime() - HISTORY_SECONDS * 1000;
+    let drop = 0;
+    while (drop < count && dataHistory.timestamps[drop].getTime() < cutoff) {
+        drop++;
+    }
+    if (drop > 0) {
+        dataHistory.timestamps.splice(0, drop);
+        dataHistory.acceleration.splice(0, drop);
+        dataHistory.gyroscope.splice(0, drop);
+        dataHistory.pressure.splice(0, drop);
     }
 }
 
+/**
+ * 按浏览器刷新节奏重绘传感器图表
+ */
+function refreshSensorCharts() {
+    if (!isCollecting) return;
+    
+    updateSensorCharts();
+    requestAnimationFrame(refreshSensorCharts);
+}
+
 /**
  * 更新姿态评分仪表盘
  */
@@ -434,30 +554,27 @@ function updateGaitPhase(phase) {
  * 更新状态指标
  */
 function updateStatusMetrics(data) {
-    // 这里应该从特征数据中提取指标，现在只是模拟数据
-    // 在实际应用中，这些值应该从后端API返回
-    
-    // 模拟计算步频 (假设可以从acc_z的周期性变化计算)
-    const cadence = Math.round(170 + Math.random() * 20);
-    document.getElementById('cadence').textContent = `${cadence} 步/分钟`;
-    
-    // 模拟计算垂直振幅
-    const oscillation = (8 + Math.random() * 3).toFixed(1);
-    document.getElementById('oscillation').textContent = `${oscillation} 厘米`;
-    
-    // 模拟计算着地冲击
-    const impact = (2.5 + Math.random() * 1.5).toFixed(1);
-    document.getElementById('impact').textContent = `${impact} g`;
+    if (data.cadence != null) {
+        document.getElementById('cadence').textContent = `${Math.round(data.cadence)} 步/分钟`;
+    }
+    if (data.vertical_oscillation != null) {
+        document.getElementById('oscillation').textContent = `${data.vertical_oscillation.toFixed(1)} 厘米`;
+    }
+    if (data.impact_force != null) {
+        document.getElementById('impact').textContent = `${data.impact_force.toFixed(1)} g`;
+    }
     
-    // 模拟计算前后足比例
-    const ratio = (1 + Math.random() * 0.5).toFixed(1);
-    document.getElementById('footRatio').textContent = `${ratio}:1`;
+    // 前后足比例 = 前脚掌 / 后脚掌
+    const distribution = data.pressure_distribution;
+    if (distribution && distribution[2] > 0) {
+        document.getElementById('footRatio').textContent = `${(distribution[0] / distribution[2]).toFixed(1)}:1`;
+    }
 }
 
 /**
  * 更新传感器图表
  */
-function updateSensorCharts(data) {
+function updateSensorCharts() {
     // 更新加速度图表
     const accData = dataHistory.timestamps.map((time, index) => {
         const acc = dataHistory.acceleration[index];
@@ -498,11 +615,17 @@ function updateSensorCharts(data) {
         }]
     });
     
-    // 更新足压图表
+}
+
+/**
+ * 更新足压分布图表
+ */
+function updatePressureChart(distribution) {
+    // 分布以百分比表示，雷达图范围为0-1
     charts.pressureChart.setOption({
         series: [{
             data: [{
-                value: data.pressure,
+                value: distribution.map(value => value / 100),
                 name: '足压分布'
             }]
         }]
@@ -527,7 +650,7 @@ function updateRecommendations(recommendations) {
     recommendations.forEach(recommendation => {
         const div = document.createElement('div');
         div.className = 'recommendation-item';
-        div.textContent = recommendation;
+        div.textContent = `${recommendation.title}：${recommendation.description}`;
         container.appendChild(div);
     });
 }
\ No newline at end of file
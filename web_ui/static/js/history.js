@@ -2,6 +2,11 @@
  * 中长跑实时指导系统 - 历史数据页面JavaScript文件
  */
 
+// 图表实例
+let scoreChart = null;
+let cadenceChart = null;
+let phaseDistChart = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log('历史数据页面初始化完成');
     
@@ -48,7 +53,7 @@ function initDateRangePicker() {
  */
 function initCharts() {
     // 初始化姿态评分趋势图
-    const scoreChart = echarts.init(document.getElementById('scoreChart'));
+    scoreChart = echarts.init(document.getElementById('scoreChart'));
     const scoreOption = {
         tooltip: {
             trigger: 'axis'
@@ -102,7 +107,7 @@ function initCharts() {
     scoreChart.setOption(scoreOption);
 
     // 初始化步频变化图
-    const cadenceChart = echarts.init(document.getElementById('cadenceChart'));
+    cadenceChart = echarts.init(document.getElementById('cadenceChart'));
     const cadenceOption = {
         tooltip: {
             trigger: 'axis'
@@ -161,7 +166,7 @@ function initCharts() {
     cadenceChart.setOption(cadenceOption);
 
     // 初始化步态相位分布图
-    const phaseDistChart = echarts.init(document.getElementById('phaseDistChart'));
+    phaseDistChart = echarts.init(document.getElementById('phaseDistChart'));
     const phaseDistOption = {
         tooltip: {
             trigger: 'item'
@@ -244,28 +249,77 @@ function applyFilters() {
  * 更新统计信息
  */
 function updateStatistics(data) {
-    // 这里应该使用实际数据更新统计信息
-    // 现在使用示例数据
-    document.getElementById('totalSessions').textContent = '12';
-    document.getElementById('totalDuration').textContent = '18h';
-    document.getElementById('avgScore').textContent = '83';
-    document.getElementById('avgCadence').textContent = '178';
+    const stats = data.stats || {};
+    document.getElementById('totalSessions').textContent = stats.total_sessions ?? 0;
+    document.getElementById('totalDuration').textContent = stats.total_duration ?? '0m';
+    document.getElementById('avgScore').textContent = stats.avg_score ?? '--';
+    document.getElementById('avgCadence').textContent = stats.avg_cadence ?? '--';
 }
 
 /**
  * 更新图表数据
  */
 function updateCharts(data) {
-    // 这里应该使用实际数据更新图表
-    // 现在图表已在初始化时设置了示例数据
+    // 接口按时间倒序返回，趋势图按时间正序显示
+    const sessions = (data.sessions || []).slice().reverse();
+    const dates = sessions.map(session => session.date);
+    
+    scoreChart.setOption({
+        xAxis: { data: dates },
+        series: [{ data: sessions.map(session => session.posture_score) }]
+    });
+    cadenceChart.setOption({
+        xAxis: { data: dates },
+        series: [{ data: sessions.map(session => session.avg_cadence) }]
+    });
+    
+    const stanceRatio = (data.stats || {}).avg_stance_ratio;
+    if (stanceRatio != null) {
+        const stance = Math.round(stanceRatio * 100);
+        phaseDistChart.setOption({
+            series: [{
+                data: [
+                    { value: stance, name: '支撑相', itemStyle: { color: '#5cb85c' } },
+                    { value: 100 - stance, name: '摆动相', itemStyle: { color: '#5bc0de' } }
+                ]
+            }]
+        });
+    }
 }
 
 /**
  * 更新历史表格
  */
 function updateHistoryTable(data) {
-    // 这里应该使用实际数据更新历史表格
-    // 现在表格已包含示例数据
+    const tbody = document.getElementById('historyTable');
+    tbody.innerHTML = '';
+    
+    (data.sessions || []).forEach(session => {
+        const row = document.createElement('tr');
+        [
+            session.date,
+            session.duration,
+            session.steps.toLocaleString(),
+            session.avg_cadence ?? '--',
+            session.posture_score ?? '--'
+        ].forEach(value => {
+            const cell = document.createElement('td');
+            cell.textContent = value;
+            row.appendChild(cell);
+        });
+        
+        const actionCell = document.createElement('td');
+        const button = document.createElement('button');
+        button.className = 'btn btn-sm btn-outline-primary';
+        button.textContent = '查看详情';
+        button.addEventListener('click', function() {
+            window.location.href = `/analysis?session_id=${encodeURIComponent(session.session_id)}`;
+        });
+        actionCell.appendChild(button);
+        row.appendChild(actionCell);
+        
+        tbody.appendChild(row);
+    });
 }
 
 /**
@@ -275,7 +329,7 @@ function exportData() {
     console.log('导出数据');
     
     // 显示导出选项弹窗
-    const format = window.confirm('选择导出格式：\n确定 - CSV格式\n取消 - PDF报告') ? 'csv' : 'pdf';
+    const format = window.confirm('选择导出格式：\n确定 - CSV格式\n取消 - NPZ压缩包') ? 'csv' : 'npz';
     
     // 发送导出请求
     fetch('/api/export_data', {
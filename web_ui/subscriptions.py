@@ -0,0 +1,206 @@
+"""
+订阅管理模块
+
+管理客户端对会话数据通道（原始数据raw、分析结果results）的订阅，
+每个客户端拥有一个有界发送队列：队列满时丢弃最旧的消息，
+传输层积压过多的慢客户端暂停发送，不会拖慢其他客户端
+"""
+import threading
+from collections import deque
+
+# 支持的数据通道
+CHANNELS = ('raw', 'results')
+
+class ClientQueue:
+    """
+    客户端发送队列类
+
+    记录客户端的订阅和待发送消息，统计因队列满而丢弃的消息数量
+    """
+
+    def __init__(self, sid, max_size):
+        """
+        初始化客户端发送队列
+
+        Args:
+            sid: Socket.IO会话ID
+            max_size: 队列最大长度
+        """
+        self.sid = sid
+        self.messages = deque(maxlen=max_size)
+        self.subscriptions = set()
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, event, args):
+        """
+        加入待发送消息，队列满时丢弃最旧的消息
+
+        Args:
+            event: 事件名
+            args: 事件参数元组
+        """
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+        self.messages.append((event, args))
+
+class SubscriptionManager:
+    """
+    订阅管理器类
+
+    维护 (会话ID, 通道) -> 客户端 的订阅关系，将发布的消息放入订阅客户端的发送队列，
+    并在drain时按客户端的传输层积压情况发送
+    """
+
+    def __init__(self, send, backlog=None, max_queue_size=50, max_backlog=20):
+        """
+        初始化订阅管理器
+
+        Args:
+            send: 发送函数 send(sid, event, args)
+            backlog: 获取客户端传输层积压消息数的函数 backlog(sid)，为None时不检查
+            max_queue_size: 每个客户端发送队列的最大长度
+            max_backlog: 传输层积压超过该值时暂停向该客户端发送
+        """
+        self.send = send
+        self.backlog = backlog
+        self.max_queue_size = max_queue_size
+        self.max_backlog = max_backlog
+
+        self.lock = threading.Lock()
+        self.drain_lock = threading.Lock()
+        self.clients = {}
+        self.subscribers = {}
+
+    def add_client(self, sid):
+        """注册客户端"""
+        with self.lock:
+            self.clients.setdefault(sid, ClientQueue(sid, self.max_queue_size))
+
+    def remove_client(self, sid):
+        """
+        移除客户端及其全部订阅
+
+        Returns:
+            客户端被移除前的订阅集合
+        """
+        with self.lock:
+            client = self.clients.pop(sid, None)
+            if client is None:
+                return set()
+
+            for key in client.subscriptions:
+                self.subscribers.get(key, set()).discard(sid)
+            return client.subscriptions
+
+    def subscribe(self, sid, session_id, channel):
+        """
+        订阅会话通道
+
+        Args:
+            sid: Socket.IO会话ID
+            session_id: 会话ID
+            channel: 数据通道，'raw'或'results'
+        """
+        if channel not in CHANNELS:
+            raise ValueError(f'未知的数据通道: {channel}')
+
+        with self.lock:
+            client = self.clients.setdefault(sid, ClientQueue(sid, self.max_queue_size))
+            client.subscriptions.add((session_id, channel))
+            self.subscribers.setdefault((session_id, channel), set()).add(sid)
+
+    def unsubscribe(self, sid, session_id, channel):
+        """取消订阅会话通道"""
+        with self.lock:
+            client = self.clients.get(sid)
+            if client is not None:
+                client.subscriptions.discard((session_id, channel))
+            self.subscribers.get((session_id, channel), set()).discard(sid)
+
+    def get_subscribers(self, session_id, channel):
+        """获取会话通道的订阅客户端列表"""
+        with self.lock:
+            return list(self.subscribers.get((session_id, channel), ()))
+
+    def enqueue(self, sid, event, *args):
+        """
+        将消息放入单个客户端的发送队列
+
+        Args:
+            sid: Socket.IO会话ID
+            event: 事件名
+            args: 事件参数
+        """
+        with self.lock:
+            client = self.clients.get(sid)
+            if client is not None:
+                client.put(event, args)
+
+    def publish(self, session_id, channel, event, *args):
+        """
+        向会话通道的所有订阅客户端发布消息
+
+        Args:
+            session_id: 会话ID
+            channel: 数据通道
+            event: 事件名
+            args: 事件参数
+
+        Returns:
+            收到消息的客户端数量
+        """
+        with self.lock:
+            sids = self.subscribers.get((session_id, channel), ())
+            for sid in sids:
+                self.clients[sid].put(event, args)
+            return len(sids)
+
+    def drain(self):
+        """
+        发送所有客户端队列中的消息
+
+        传输层积压超过max_backlog的客户端本轮跳过，其消息留在有界队列中
+
+        Returns:
+            发送的消息数量
+        """
+        with self.drain_lock:
+            with self.lock:
+                clients = list(self.clients.values())
+
+            sent = 0
+            for client in clients:
+                if not client.messages:
+                    continue
+                if self.backlog is not None and self.backlog(client.sid) > self.max_backlog:
+                    continue
+
+                while client.messages:
+                    event, args = client.messages.popleft()
+                    self.send(client.sid, event, args)
+                    client.sent += 1
+                    sent += 1
+
+            return sent
+
+    def get_stats(self):
+        """
+        获取订阅和发送统计
+
+        Returns:
+            统计字典，包含每个客户端的订阅、队列长度、已发送和丢弃消息数
+        """
+        with self.lock:
+            return {
+                'clients': len(self.clients),
+                'per_client': {
+                    sid: {
+                        'subscriptions': [f'{s}:{c}' for s, c in sorted(client.subscriptions)],
+                        'queued': len(client.messages),
+                        'sent': client.sent,
+                        'dropped': client.dropped
+                    }
+                    for sid, client in self.clients.items()
+                }
+            }
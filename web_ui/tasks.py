@@ -0,0 +1,137 @@
+"""
+后台任务函数模块
+
+深度分析和导出文件的具体实现，由JobManager在工作线程中执行。
+数据按块读取，每块之后报告进度并检查取消请求
+"""
+import os
+
+import numpy as np
+
+from storage.session_store import GAIT_PHASES
+from storage.export import iter_export, DEFAULT_EXPORT_CHUNK_ROWS
+
+# 每次读取的行数
+TASK_CHUNK_ROWS = 50000
+
+# 深度分析中累计均值的结果字段
+ANALYSIS_FIELDS = ('posture_score', 'cadence', 'vertical_oscillation', 'impact_force', 'inference_time_ms')
+
+def _accumulate(totals, counts, name, values):
+    """累加忽略NaN的和与有效值数量"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    totals[name] = totals.get(name, 0.0) + np.where(valid, values, 0.0).sum(axis=0)
+    counts[name] = counts.get(name, 0) + valid.sum(axis=0)
+
+def _mean_or_none(total, count):
+    """均值，没有有效值时返回None"""
+    if np.ndim(total):
+        return [float(t / c) if c else None for t, c in zip(total, count)]
+    return float(total / count) if count else None
+
+def analyze_session(job, reader):
+    """
+    深度分析一个已保存的会话
+
+    遍历分析结果表计算各项指标的均值和步态相位占比，遍历原始样本计算加速度幅值统计
+
+    Args:
+        job: Job实例，用于报告进度和检查取消
+        reader: SessionReader实例
+
+    Returns:
+        分析结果字典
+    """
+    num_results = reader.num_rows('results')
+    num_samples = reader.num_rows('samples')
+    total_rows = max(1, num_results + num_samples)
+    done = 0
+
+    totals, counts = {}, {}
+    phase_counts = np.zeros(len(GAIT_PHASES), dtype=np.int64)
+    for chunk in reader.iter_chunks(TASK_CHUNK_ROWS, table='results'):
+        for name in ANALYSIS_FIELDS + ('pressure_distribution',):
+            _accumulate(totals, counts, name, chunk[name])
+        phase_counts += np.bincount(np.clip(chunk['gait_phase'], 0, len(GAIT_PHASES) - 1),
+                                    minlength=len(GAIT_PHASES))
+        done += len(chunk['timestamp'])
+        job.report(done / total_rows, '分析结果数据')
+
+    peak_acc = 0.0
+    for chunk in reader.iter_chunks(TASK_CHUNK_ROWS, table='samples', columns=['timestamp', 'acc', 'pressure']):
+        magnitude = np.linalg.norm(np.asarray(chunk['acc'], dtype=np.float64), axis=1)
+        _accumulate(totals, counts, 'acc_magnitude', magnitude)
+        _accumulate(totals, counts, 'pressure', chunk['pressure'])
+        if np.any(np.isfinite(magnitude)):
+            peak_acc = max(peak_acc, float(np.nanmax(magnitude)))
+        done += len(chunk['timestamp'])
+        job.report(done / total_rows, '分析传感器数据')
+
+    first_ms, last_ms = reader.time_bounds('samples')
+    known_phases = phase_counts[1:].sum()
+    stance = phase_counts[GAIT_PHASES.index('stance')]
+
+    metrics = {name: _mean_or_none(totals.get(name, 0.0), counts.get(name, 0)) for name in ANALYSIS_FIELDS}
+    metrics.update({
+        'stance_ratio': float(stance / known_phases) if known_phases else None,
+        'pressure_distribution': _mean_or_none(totals.get('pressure_distribution', np.zeros(4)),
+                                               counts.get('pressure_distribution', np.zeros(4))),
+        'mean_acc_magnitude': _mean_or_none(totals.get('acc_magnitude', 0.0), counts.get('acc_magnitude', 0)),
+        'peak_acc_magnitude': peak_acc,
+        'mean_pressure': _mean_or_none(totals.get('pressure', np.zeros(4)), counts.get('pressure', np.zeros(4)))
+    })
+
+    return {
+        'session_id': reader.session_id,
+        'samples': num_samples,
+        'results': num_results,
+        'duration_s': (last_ms - first_ms) / 1000.0 if first_ms is not None else 0.0,
+        'metrics': metrics
+    }
+
+def export_session(job, reader, path, export_format, start_ms=None, end_ms=None, table='samples'):
+    """
+    将会话导出为文件
+
+    先写入临时文件，完成后重命名，取消或失败时删除临时文件
+
+    Args:
+        job: Job实例
+        reader: SessionReader实例
+        path: 输出文件路径
+        export_format: 'csv'或'npz'
+        start_ms: 起始时间戳
+        end_ms: 结束时间戳
+        table: 导出的表
+
+    Returns:
+        结果字典: 导出的行数和文件大小
+    """
+    start, end = reader.row_range(start_ms, end_ms, table)
+    total_rows = max(1, end - start)
+    # NPZ每列单独遍历一次数据，按列数估算进度
+    passes = len(reader.tables[table]) if export_format == 'npz' else 1
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for i, data in enumerate(iter_export(reader, export_format, start_ms, end_ms, table)):
+                f.write(data)
+                written += len(data)
+                # 每个输出块大约对应一块行数据，进度按块数估算并限制在99%以内
+                estimate = min(0.99, i * DEFAULT_EXPORT_CHUNK_ROWS / (total_rows * passes))
+                job.report(estimate, f'已写入 {written // 1024} KB')
+        job.check_cancelled()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {
+        'rows': end - start,
+        'size_bytes': written
+    }